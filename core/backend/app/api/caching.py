@@ -0,0 +1,123 @@
+"""
+HTTP条件缓存
+
+只读端点的响应预先序列化为字节并计算强ETag，之后每次请求只需比较If-None-Match：
+命中时返回不带响应体的304，否则直接发送缓存的字节，不再重复构造和序列化字典。
+依赖模型目录的响应按 (目录修订号, 查询参数) 缓存，ETag由修订号和查询参数决定，
+因此判断304时不需要执行查询。
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from fastapi import Response
+
+# 静态配置（随版本发布才变化）的缓存时间，过期后用ETag重新验证
+STATIC_CACHE_CONTROL = "public, max-age=300"
+
+# 模型目录等可能随时变化的数据：客户端每次都重新验证
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+class CachedPayload(NamedTuple):
+    """预先序列化的响应体"""
+    body: bytes
+    etag: str
+
+
+def make_etag(*parts: Any) -> str:
+    """由版本信息（或响应内容）生成强ETag"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else
+                      json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def build_payload(data: Any, etag: Optional[str] = None) -> CachedPayload:
+    """
+    序列化响应数据
+
+    Args:
+        data: 可JSON序列化的数据
+        etag: 由版本信息生成的ETag，默认按序列化后的内容生成
+
+    Returns:
+        预先序列化的响应体
+    """
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return CachedPayload(body, etag or make_etag(body))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match是否命中（按RFC 9110使用弱比较，支持多个ETag和*）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str, cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+    """304响应（不带响应体）"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def cached_response(payload: CachedPayload, if_none_match: Optional[str],
+                    cache_control: str = STATIC_CACHE_CONTROL) -> Response:
+    """
+    返回预先序列化的响应，If-None-Match命中时返回304
+
+    Args:
+        payload: 预先序列化的响应体
+        if_none_match: 请求的If-None-Match头
+        cache_control: Cache-Control头
+
+    Returns:
+        200或304响应
+    """
+    if etag_matches(if_none_match, payload.etag):
+        return not_modified(payload.etag, cache_control)
+    return Response(
+        content=payload.body,
+        media_type="application/json",
+        headers={"ETag": payload.etag, "Cache-Control": cache_control}
+    )
+
+
+class PayloadCache:
+    """按键缓存预先序列化的响应体（LRU，线程安全）"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._payloads: "OrderedDict[Hashable, CachedPayload]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], CachedPayload]) -> CachedPayload:
+        """
+        获取缓存的响应体，未命中时调用build生成
+
+        build在锁外执行，并发请求同一个键时可能重复生成，结果相同
+        """
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                return payload
+        payload = build()
+        with self._lock:
+            self._payloads[key] = payload
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.maxsize:
+                self._payloads.popitem(last=False)
+        return payload
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._payloads.clear()
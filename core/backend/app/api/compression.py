@@ -0,0 +1,285 @@
+"""
+HTTP响应压缩
+
+ASGI中间件，按Accept-Encoding协商zstd、brotli、gzip（brotli和zstd在安装了对应库时才启用）：
+- 一次性返回的响应体达到COMPRESSION_MIN_SIZE才压缩，小响应压缩收益不抵CPU开销
+- 分块响应逐块压缩，其中流式事件（NDJSON、SSE）每块压缩后立即flush，
+  客户端收到每一块后都能立即解压出完整的行，不会因为压缩器缓冲而延迟事件
+- 压缩后的响应ETag改为弱ETag（同一内容的不同编码字节不同），条件请求仍按弱比较命中；
+  带强ETag的响应内容固定，压缩结果按 (ETag, 编码) 缓存，重复请求不再压缩
+"""
+
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+
+# 可压缩的Content-Type（图片、已压缩文件等不再压缩）
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# 流式响应：逐块压缩并立即flush
+STREAMING_TYPES = ("application/x-ndjson", "text/event-stream")
+
+
+class StreamCompressor:
+    """流式压缩器：compress返回本块压缩后的字节，finish返回结尾字节"""
+
+    def __init__(self, encoding: str, level: int, flush: bool = True):
+        """
+        Args:
+            encoding: gzip、br或zstd
+            level: 压缩级别
+            flush: 每块压缩后是否flush（流式事件需要，使客户端立即解出完整内容）
+        """
+        self.encoding = encoding
+        self.flush = flush
+        if encoding == "gzip":
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            chunk = self._compressor.process(data)
+            return chunk + self._compressor.flush() if self.flush else chunk
+        chunk = self._compressor.compress(data)
+        if not self.flush:
+            return chunk
+        if self.encoding == "gzip":
+            return chunk + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return chunk + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def get_levels() -> Dict[str, int]:
+    """各编码的压缩级别（Settings）"""
+    return {
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+        "br": settings.COMPRESSION_BROTLI_QUALITY,
+        "gzip": settings.COMPRESSION_GZIP_LEVEL
+    }
+
+
+def available_encodings() -> List[str]:
+    """可用的编码（按服务端偏好排序：压缩率和速度都更好的在前）"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    一次性压缩
+
+    Args:
+        data: 原始字节
+        encoding: gzip、br或zstd
+        level: 压缩级别，默认使用Settings中的级别
+    """
+    level = get_levels()[encoding] if level is None else level
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Optional[List[str]] = None) -> Optional[str]:
+    """
+    按Accept-Encoding选择编码
+
+    q值高的优先，q值相同时按服务端偏好；q=0表示不接受，"*"匹配其余编码
+
+    Args:
+        accept_encoding: 请求的Accept-Encoding头
+        encodings: 可用编码，默认为available_encodings()
+
+    Returns:
+        选中的编码，都不接受时返回None（不压缩）
+    """
+    encodings = encodings if encodings is not None else available_encodings()
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """响应压缩ASGI中间件"""
+
+    def __init__(self, app: Callable, minimum_size: Optional[int] = None, cache_size: int = 128):
+        """
+        Args:
+            app: ASGI应用
+            minimum_size: 一次性响应的最小压缩大小（字节），默认使用COMPRESSION_MIN_SIZE
+            cache_size: 按 (强ETag, 编码) 缓存的压缩结果数
+        """
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[bytes, str], bytes]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, encoding)(scope, receive, send)
+
+    def _cached_compress(self, body: bytes, encoding: str, etag: Optional[bytes]) -> bytes:
+        """一次性压缩，内容由强ETag确定时复用之前的压缩结果"""
+        if etag is None or etag.startswith(b"W/"):
+            return compress(body, encoding)
+        key = (etag, encoding)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        compressed = compress(body, encoding)
+        with self._cache_lock:
+            self._cache[key] = compressed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return compressed
+
+
+class _CompressedResponder:
+    """单个请求的压缩状态"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.start_message: Optional[Dict[str, Any]] = None
+        self.compressor: Optional[StreamCompressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        self.send = send
+        await self.middleware.app(scope, receive, self.send_wrapper)
+
+    def _should_compress(self, message: Dict[str, Any]) -> bool:
+        headers = dict(message.get("headers") or [])
+        if message["status"] < 200 or message["status"] in (204, 304):
+            return False
+        if b"content-encoding" in headers:
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _compressed_headers(self, content_length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        headers = []
+        for name, value in self.start_message.get("headers") or []:
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                value = b"W/" + value
+            if name == b"vary":
+                continue
+            headers.append((name, value))
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        headers.append((b"vary", self._vary()))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        return headers
+
+    def _vary(self) -> bytes:
+        vary = dict(self.start_message.get("headers") or []).get(b"vary")
+        if vary and b"accept-encoding" not in vary.lower():
+            return vary + b", Accept-Encoding"
+        return vary or b"Accept-Encoding"
+
+    async def send_wrapper(self, message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._should_compress(message)
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None and not more_body:
+            # 一次性响应：达到阈值才压缩
+            start = dict(self.start_message)
+            if len(body) < self.middleware.minimum_size:
+                start["headers"] = [(name, value) for name, value in start.get("headers") or []
+                                    if name != b"vary"] + [(b"vary", self._vary())]
+                await self.send(start)
+                await self.send(message)
+                return
+            etag = dict(start.get("headers") or []).get(b"etag")
+            compressed = self.middleware._cached_compress(body, self.encoding, etag)
+            start["headers"] = self._compressed_headers(len(compressed))
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self.compressor is None:
+            # 分块响应：长度未知，逐块压缩；NDJSON/SSE每块flush，其余类型由压缩器自行缓冲
+            content_type = dict(self.start_message.get("headers") or []).get(b"content-type", b"")
+            self.compressor = StreamCompressor(
+                self.encoding, get_levels()[self.encoding],
+                flush=content_type.decode("latin-1").lower().startswith(STREAMING_TYPES)
+            )
+            start = dict(self.start_message)
+            start["headers"] = self._compressed_headers(None)
+            await self.send(start)
+
+        chunk = self.compressor.compress(body) if body else b""
+        if not more_body:
+            chunk += self.compressor.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
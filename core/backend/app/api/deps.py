@@ -2,9 +2,12 @@
 依赖注入
 """
 
-from typing import Generator
+from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
+from ..config import settings
 from ..services.model_registry import ModelRegistry
+from ..services.result_store import ResultStore, try_get_result_store
+from ..services.job_manager import JobManager, get_job_manager as open_job_manager
 from ..services.calculator.training_calc import TrainingCalculator
 from ..services.calculator.inference_calc import InferenceCalculator
 
@@ -24,6 +27,18 @@ def get_inference_calculator() -> InferenceCalculator:
     return InferenceCalculator()
 
 
+def get_result_store() -> Optional[ResultStore]:
+    """获取持久化计算结果存储实例，RESULT_STORE_ENABLED关闭或存储无法打开时为None（不使用缓存）"""
+    if not settings.RESULT_STORE_ENABLED:
+        return None
+    return try_get_result_store(settings.RESULT_STORE_PATH, settings.RESULT_STORE_MAX_BYTES)
+
+
+def get_job_manager() -> JobManager:
+    """获取异步任务管理器实例"""
+    return open_job_manager(settings.JOB_STORE_PATH, settings.JOB_MAX_WORKERS, settings.JOB_MAX_PENDING)
+
+
 # 未来可以添加数据库连接、缓存等依赖
 # def get_db() -> Generator:
 #     """获取数据库连接"""
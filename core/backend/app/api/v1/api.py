@@ -4,11 +4,15 @@ API v1 路由汇总
 
 from fastapi import APIRouter
 
-from .endpoints import training, inference
+from .endpoints import training, inference, models, hardware, results, jobs
 
 # 创建API路由器
 api_router = APIRouter()
 
 # 注册各个端点路由
 api_router.include_router(training.router, prefix="/training", tags=["Training"])
-api_router.include_router(inference.router, prefix="/inference", tags=["Inference"]) 
\ No newline at end of file
+api_router.include_router(inference.router, prefix="/inference", tags=["Inference"])
+api_router.include_router(models.router, prefix="/models", tags=["Models"])
+api_router.include_router(hardware.router, prefix="/hardware", tags=["Hardware"])
+api_router.include_router(results.router, prefix="/results", tags=["Results"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
@@ -0,0 +1,27 @@
+"""
+硬件信息API端点
+"""
+
+from fastapi import APIRouter, Header, Response
+from typing import Optional
+
+from ...caching import build_payload, cached_response
+from ....utils.constants import GPU_SPECS
+
+router = APIRouter()
+
+# GPU列表（gpu.json只在进程启动时加载，序列化一次）
+_GPUS_PAYLOAD = build_payload([{"name": name, **specs} for name, specs in GPU_SPECS.items()])
+
+
+@router.get("/gpus")
+async def get_gpus(if_none_match: Optional[str] = Header(None)) -> Response:
+    """
+    获取GPU硬件信息列表
+    
+    响应体预先序列化，带强ETag和Cache-Control，If-None-Match命中时返回304
+    
+    Returns:
+        GPU信息列表（显存、带宽、算力等）
+    """
+    return cached_response(_GPUS_PAYLOAD, if_none_match)
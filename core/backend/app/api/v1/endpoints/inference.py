@@ -2,19 +2,29 @@
 推理预估API端点
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, UploadFile, File
+from typing import Dict, Any, Optional
 
+from ...caching import build_payload, cached_response
+from ...deps import get_result_store
 from ....models.inference import InferenceRequest, InferenceResponse
 from ....services.calculator.inference_calc import InferenceCalculator
+from ....services.result_store import ResultStore, make_request_key
+from ....utils.distributions import parse_length_samples, samples_to_distribution
 
 router = APIRouter()
 
 @router.post("/estimate", response_model=InferenceResponse)
-async def estimate_inference_resources(request: InferenceRequest) -> InferenceResponse:
+async def estimate_inference_resources(
+    request: InferenceRequest,
+    store: Optional[ResultStore] = Depends(get_result_store)
+) -> Response:
     """
     预估推理资源需求
     
+    结果按请求内容保存在持久化结果存储中，相同请求（包括其他服务进程和重启前的请求）直接返回
+    已保存的结果，响应头X-Result-Cache标明是否命中
+    
     Args:
         request: 推理预估请求参数
         
@@ -23,39 +33,89 @@ async def estimate_inference_resources(request: InferenceRequest) -> InferenceRe
     """
     try:
         calculator = InferenceCalculator()
-        result = calculator.calculate(request)
-        return result
+        
+        def compute() -> bytes:
+            return calculator.calculate(request).model_dump_json().encode("utf-8")
+        
+        if store is None:
+            body, hit = compute(), False
+        else:
+            key = make_request_key("inference", request, calculator.model_registry)
+            body, hit = store.get_or_compute(key, "inference", compute)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=body, media_type="application/json",
+                    headers={"X-Result-Cache": "hit" if hit else "miss"})
+
+@router.post("/length-distribution")
+async def parse_length_distribution(file: UploadFile = File(...)) -> Dict[str, Any]:
+    """
+    解析长度样本文件
+    
+    文件每行为"输入长度,输出长度"或JSON对象{"prompt_tokens": .., "output_tokens": ..}
+    
+    Args:
+        file: 长度样本文件
+        
+    Returns:
+        可直接填入推理预估请求的输入/输出长度分布
+    """
+    try:
+        content = (await file.read()).decode("utf-8")
+        prompt_lengths, output_lengths = parse_length_samples(content)
+        if not prompt_lengths and not output_lengths:
+            raise ValueError("样本文件中没有可识别的长度数据")
+        
+        return {
+            "prompt_length_distribution": samples_to_distribution(prompt_lengths) if prompt_lengths else None,
+            "output_length_distribution": samples_to_distribution(output_lengths) if output_lengths else None,
+            "sample_count": {"prompt": len(prompt_lengths), "output": len(output_lengths)}
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# 推理后端列表（进程启动时序列化一次）
+INFERENCE_BACKENDS: Dict[str, Any] = {
+    "backends": [
+        {
+            "id": "vllm",
+            "name": "vLLM",
+            "description": "高性能大模型推理服务",
+            "features": ["高吞吐量", "PagedAttention", "连续批处理"]
+        },
+        {
+            "id": "transformers",
+            "name": "Transformers",
+            "description": "HuggingFace Transformers",
+            "features": ["模型支持广泛", "社区活跃", "易于集成"]
+        }
+    ],
+    "quantization_methods": [
+        {"id": "none", "name": "无量化", "description": "使用原始精度"},
+        {"id": "int8", "name": "INT8", "description": "8位整数量化"},
+        {"id": "int4", "name": "INT4", "description": "4位整数量化"},
+        {"id": "gptq", "name": "GPTQ", "description": "生成式预训练Transformer量化"},
+        {"id": "awq", "name": "AWQ", "description": "激活感知权重量化"}
+    ],
+    "kv_cache_dtypes": [
+        {"id": "auto", "name": "自动", "description": "与推理精度一致"},
+        {"id": "fp8", "name": "FP8", "description": "8位浮点KV Cache，按张量缩放，显存减半"},
+        {"id": "int8", "name": "INT8", "description": "8位整数KV Cache，按token缩放"},
+        {"id": "int4", "name": "INT4", "description": "4位整数KV Cache，分组缩放，显存约为1/4"}
+    ]
+}
+
+_INFERENCE_BACKENDS_PAYLOAD = build_payload(INFERENCE_BACKENDS)
+
 
 @router.get("/backends")
-async def get_inference_backends() -> Dict[str, Any]:
+async def get_inference_backends(if_none_match: Optional[str] = Header(None)) -> Response:
     """
     获取推理后端列表
     
+    响应体预先序列化，带强ETag和Cache-Control，If-None-Match命中时返回304
+    
     Returns:
         推理后端配置选项
     """
-    return {
-        "backends": [
-            {
-                "id": "vllm",
-                "name": "vLLM",
-                "description": "高性能大模型推理服务",
-                "features": ["高吞吐量", "PagedAttention", "连续批处理"]
-            },
-            {
-                "id": "transformers",
-                "name": "Transformers",
-                "description": "HuggingFace Transformers",
-                "features": ["模型支持广泛", "社区活跃", "易于集成"]
-            }
-        ],
-        "quantization_methods": [
-            {"id": "none", "name": "无量化", "description": "使用原始精度"},
-            {"id": "int8", "name": "INT8", "description": "8位整数量化"},
-            {"id": "int4", "name": "INT4", "description": "4位整数量化"},
-            {"id": "gptq", "name": "GPTQ", "description": "生成式预训练Transformer量化"},
-            {"id": "awq", "name": "AWQ", "description": "激活感知权重量化"}
-        ]
-    } 
\ No newline at end of file
+    return cached_response(_INFERENCE_BACKENDS_PAYLOAD, if_none_match)
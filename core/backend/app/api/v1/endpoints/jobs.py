@@ -0,0 +1,165 @@
+"""
+异步任务API端点
+
+任务存储为同步SQLite访问（工作进程持有写锁时可能等待busy_timeout），端点均为普通函数，
+由FastAPI在线程池中执行；SSE生成器中的查询同样放到线程池，不阻塞事件循环
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional
+
+from ....config import settings
+from ....models.jobs import JobInfo, JobResults, JobSubmitRequest, TERMINAL_STATUSES
+from ....services.job_manager import JobManager, JobQueueFullError
+from ...deps import get_job_manager
+
+router = APIRouter()
+
+# SSE保活注释的间隔（秒），防止代理因空闲断开连接
+KEEPALIVE_INTERVAL = 15.0
+
+# SSE每次轮询最多推送的结果数
+EVENTS_BATCH_SIZE = 500
+
+
+def _get_job_or_404(manager: JobManager, job_id: str) -> JobInfo:
+    job = manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {job_id}")
+    return job
+
+
+def _sse(event: str, data: str, event_id: Optional[int] = None) -> str:
+    """格式化一条SSE事件"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {data}\n\n"
+
+
+@router.post("", response_model=JobInfo, status_code=202)
+def submit_job(
+    request: JobSubmitRequest,
+    manager: JobManager = Depends(get_job_manager)
+) -> JobInfo:
+    """
+    提交异步任务，立即返回任务ID
+
+    任务在后台进程池中按参数网格逐个预估，通过GET /jobs/{id}轮询、GET /jobs/{id}/events订阅进度
+
+    Args:
+        request: 任务类型、基础预估请求和参数网格
+
+    Returns:
+        排队中的任务状态
+    """
+    try:
+        return manager.submit(request)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except BrokenProcessPool as e:
+        raise HTTPException(status_code=503, detail=f"任务进程池不可用: {e}")
+
+
+@router.get("", response_model=List[JobInfo])
+def list_jobs(
+    limit: int = Query(50, ge=1, le=500, description="返回数量"),
+    manager: JobManager = Depends(get_job_manager)
+) -> List[JobInfo]:
+    """
+    获取最近提交的任务（按提交时间倒序）
+    """
+    return manager.list(limit)
+
+
+@router.get("/{job_id}", response_model=JobInfo)
+def get_job(job_id: str, manager: JobManager = Depends(get_job_manager)) -> JobInfo:
+    """
+    获取任务状态和进度
+    """
+    return _get_job_or_404(manager, job_id)
+
+
+@router.get("/{job_id}/results", response_model=JobResults)
+def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="起始网格序号"),
+    limit: int = Query(100, ge=1, le=1000, description="返回数量"),
+    manager: JobManager = Depends(get_job_manager)
+) -> JobResults:
+    """
+    分页获取任务结果，任务运行中时返回已完成的部分
+
+    Returns:
+        任务状态、结果列表和下一页的offset（无更多结果时与请求的offset相同）
+    """
+    job = _get_job_or_404(manager, job_id)
+    items = manager.get_results(job_id, offset, limit)
+    return JobResults(job=job, items=items, next_offset=items[-1]["index"] + 1 if items else offset)
+
+
+@router.get("/{job_id}/events")
+def stream_job_events(
+    job_id: str,
+    request: Request,
+    offset: int = Query(0, ge=0, description="从该网格序号开始推送结果"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    manager: JobManager = Depends(get_job_manager)
+) -> StreamingResponse:
+    """
+    以SSE推送任务进度和结果
+
+    事件：progress（任务状态变化时，数据为JobInfo）、result（每项结果，id为网格序号）、
+    end（任务结束且结果推送完毕）。断线重连时浏览器自动带上Last-Event-ID，从下一项继续推送
+    """
+    _get_job_or_404(manager, job_id)
+    if last_event_id is not None and last_event_id.isdigit():
+        offset = int(last_event_id) + 1
+
+    async def generate(offset: int) -> AsyncIterator[str]:
+        last_snapshot = None
+        last_sent = time.monotonic()
+        while not await request.is_disconnected():
+            # 先读状态再读结果：任务已结束时结果已全部写入
+            job = await run_in_threadpool(manager.get, job_id)
+            items = await run_in_threadpool(manager.get_results, job_id, offset, EVENTS_BATCH_SIZE)
+            for item in items:
+                yield _sse("result", json.dumps(item, ensure_ascii=False), item["index"])
+                offset = item["index"] + 1
+            snapshot = (job.status, job.completed, job.cancel_requested)
+            if snapshot != last_snapshot:
+                yield _sse("progress", job.model_dump_json())
+                last_snapshot = snapshot
+                last_sent = time.monotonic()
+            elif items:
+                last_sent = time.monotonic()
+            if len(items) == EVENTS_BATCH_SIZE:
+                continue
+            if job.status in TERMINAL_STATUSES:
+                yield _sse("end", job.model_dump_json())
+                return
+            if time.monotonic() - last_sent >= KEEPALIVE_INTERVAL:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(settings.JOB_EVENTS_POLL_INTERVAL)
+
+    return StreamingResponse(
+        generate(offset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/{job_id}/cancel", response_model=JobInfo)
+def cancel_job(job_id: str, manager: JobManager = Depends(get_job_manager)) -> JobInfo:
+    """
+    取消任务：排队中的任务立即取消，运行中的任务在下一次写入进度时停止（已完成的结果保留）
+    """
+    _get_job_or_404(manager, job_id)
+    return manager.cancel(job_id)
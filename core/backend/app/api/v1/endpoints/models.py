@@ -0,0 +1,106 @@
+"""
+模型目录API端点
+"""
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from typing import List, Optional
+
+from ...caching import (
+    PayloadCache, REVALIDATE_CACHE_CONTROL, build_payload, cached_response, etag_matches, make_etag,
+    not_modified
+)
+from ....models.common import ModelSize
+from ....services.model_registry import ModelRegistry
+from ...deps import get_model_registry
+
+router = APIRouter()
+
+# 按 (目录修订号, 查询参数) 缓存序列化后的响应，目录写入后旧条目不再命中并逐渐被淘汰
+_payloads = PayloadCache(maxsize=512)
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """解析逗号分隔的fields参数"""
+    if fields is None:
+        return None
+    parsed = [field.strip() for field in fields.split(",") if field.strip()]
+    return parsed or None
+
+
+@router.get("")
+async def list_models(
+    q: Optional[str] = Query(None, description="名称搜索词（前缀或模糊匹配模型ID和名称）"),
+    family: Optional[str] = Query(None, description="模型系列"),
+    size_category: Optional[ModelSize] = Query(None, description="模型规模类别"),
+    architecture: Optional[str] = Query(None, description="架构类型"),
+    min_parameters: Optional[int] = Query(None, ge=0, description="最小参数量（含）"),
+    max_parameters: Optional[int] = Query(None, ge=0, description="最大参数量（含）"),
+    min_context_length: Optional[int] = Query(None, ge=0, description="最小上下文长度（含）"),
+    max_context_length: Optional[int] = Query(None, ge=0, description="最大上下文长度（含）"),
+    limit: int = Query(50, ge=1, le=500, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，默认为摘要字段"),
+    if_none_match: Optional[str] = Header(None),
+    registry: ModelRegistry = Depends(get_model_registry)
+) -> Response:
+    """
+    搜索、过滤并分页获取模型列表
+
+    强ETag由目录修订号和查询参数决定，目录未变化时带If-None-Match的请求不执行查询直接返回304；
+    相同查询的响应体只序列化一次
+
+    Returns:
+        {"items": 模型列表, "next_cursor": 下一页游标（没有下一页时为null）, "total": 满足条件的模型总数}
+    """
+    criteria = {
+        "q": q,
+        "family": family,
+        "size_category": size_category.value if size_category else None,
+        "architecture": architecture,
+        "min_parameters": min_parameters,
+        "max_parameters": max_parameters,
+        "min_context_length": min_context_length,
+        "max_context_length": max_context_length,
+        "limit": limit,
+        "cursor": cursor
+    }
+    field_list = _parse_fields(fields)
+
+    key = (registry.get_catalog_revision(), tuple(criteria.items()), tuple(field_list or ()))
+    etag = make_etag("models", *key)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    try:
+        payload = _payloads.get_or_build(key, lambda: build_payload(
+            registry.search_models(fields=field_list, **criteria), etag
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return cached_response(payload, if_none_match, REVALIDATE_CACHE_CONTROL)
+
+
+@router.get("/{model_id:path}")
+async def get_model(model_id: str, if_none_match: Optional[str] = Header(None),
+                    registry: ModelRegistry = Depends(get_model_registry)) -> Response:
+    """
+    获取模型详细信息
+
+    Args:
+        model_id: 模型ID（可含"/"，如 Qwen/Qwen2-7B）
+
+    Returns:
+        模型详细信息（ModelInfo），带强ETag，目录未变化时返回304
+    """
+    key = (registry.get_catalog_revision(), model_id)
+    etag = make_etag("model", *key)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    try:
+        payload = _payloads.get_or_build(key, lambda: build_payload(
+            registry.get_model_info(model_id).model_dump(mode="json"), etag
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return cached_response(payload, if_none_match, REVALIDATE_CACHE_CONTROL)
@@ -0,0 +1,28 @@
+"""
+计算结果存储API端点
+"""
+
+from fastapi import APIRouter, Depends
+from typing import Dict, Any, Optional
+
+from ....config import settings
+from ....services.result_store import ResultStore, get_open_errors
+from ...deps import get_result_store
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_result_store_stats(store: Optional[ResultStore] = Depends(get_result_store)) -> Dict[str, Any]:
+    """
+    获取持久化结果存储的统计信息
+    
+    Returns:
+        条目数、各类结果条目数、占用字节数与上限、累计淘汰数、计算器版本，以及本进程的命中率
+        和打开存储失败的次数；存储无法打开时available为false
+    """
+    if store is None:
+        if not settings.RESULT_STORE_ENABLED:
+            return {"enabled": False}
+        # 已启用但无法打开：请求直接计算，不使用缓存
+        return {"enabled": True, "available": False, **get_open_errors()}
+    return {**store.stats(), **get_open_errors()}
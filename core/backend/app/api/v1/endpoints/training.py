@@ -2,19 +2,32 @@
 训练预估API端点
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+import itertools
+import json
 
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Optional
+
+from ...caching import build_payload, cached_response
+from ...deps import get_result_store
 from ....models.training import TrainingRequest, TrainingResponse
 from ....services.calculator.training_calc import TrainingCalculator
+from ....services.result_store import ResultStore, make_request_key
 
 router = APIRouter()
 
 @router.post("/estimate", response_model=TrainingResponse)
-async def estimate_training_resources(request: TrainingRequest) -> TrainingResponse:
+async def estimate_training_resources(
+    request: TrainingRequest,
+    store: Optional[ResultStore] = Depends(get_result_store)
+) -> Response:
     """
     预估训练资源需求
     
+    结果按请求内容保存在持久化结果存储中，相同请求（包括其他服务进程和重启前的请求）直接返回
+    已保存的结果，响应头X-Result-Cache标明是否命中
+    
     Args:
         request: 训练预估请求参数
         
@@ -23,38 +36,119 @@ async def estimate_training_resources(request: TrainingRequest) -> TrainingRespo
     """
     try:
         calculator = TrainingCalculator()
-        result = calculator.calculate(request)
-        return result
+        
+        def compute() -> bytes:
+            return calculator.calculate(request).model_dump_json().encode("utf-8")
+        
+        if store is None:
+            body, hit = compute(), False
+        else:
+            key = make_request_key("training", request, calculator.model_registry)
+            body, hit = store.get_or_compute(key, "training", compute)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=body, media_type="application/json",
+                    headers={"X-Result-Cache": "hit" if hit else "miss"})
+
+@router.post("/pipeline-timeline")
+async def stream_pipeline_timeline(request: TrainingRequest) -> StreamingResponse:
+    """
+    流式返回流水线调度的每个stage显存时间线（NDJSON，每行一个事件）
+    
+    Args:
+        request: 训练预估请求参数
+        
+    Returns:
+        按时间排序的调度事件流，最后一行为汇总（气泡率、每个stage显存峰值）
+    """
+    try:
+        calculator = TrainingCalculator()
+        events = calculator.iter_pipeline_timeline(request)
+        # 先取出第一条事件，使参数错误在开始流式响应前以400返回
+        first_event = next(events)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    lines = (json.dumps(event, ensure_ascii=False) + "\n"
+             for event in itertools.chain([first_event], events))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+# 训练配置选项（进程启动时序列化一次）
+TRAINING_CONFIGS: Dict[str, Any] = {
+    "training_methods": [
+        {"id": "full_finetuning", "name": "全参数微调", "description": "训练所有参数，效果最好但资源需求高"},
+        {"id": "lora", "name": "LoRA微调", "description": "只训练少量参数，资源需求低，效果接近全参数微调"},
+        {"id": "qlora", "name": "QLoRA微调", "description": "基座权重4-bit NF4量化存储，单卡可微调70B模型，反量化降低吞吐"},
+        {"id": "dora", "name": "DoRA微调", "description": "权重分解为幅值和方向，额外训练幅值向量，前向需计算合并权重范数"},
+        {"id": "adalora", "name": "AdaLoRA微调", "description": "按重要性自适应分配各矩阵的rank，训练中从init_rank剪枝到目标rank"}
+    ],
+    "precision_types": [
+        {"id": "fp32", "name": "FP32", "description": "32位浮点精度"},
+        {"id": "fp16", "name": "FP16", "description": "16位浮点精度"},
+        {"id": "bf16", "name": "BF16", "description": "Brain Float 16精度"}
+    ],
+    "optimizers": [
+        {"id": "adamw", "name": "AdamW", "description": "Adam with weight decay"},
+        {"id": "sgd", "name": "SGD", "description": "随机梯度下降"},
+        {"id": "adam", "name": "Adam", "description": "自适应矩估计"},
+        {"id": "adamw_8bit", "name": "AdamW 8-bit", "description": "bitsandbytes 8-bit优化器，状态分块量化为INT8"},
+        {"id": "paged_adamw", "name": "Paged AdamW", "description": "分页优化器，显存不足时状态换出到主机内存"},
+        {"id": "paged_adamw_8bit", "name": "Paged AdamW 8-bit", "description": "8-bit分页优化器"}
+    ],
+    "optimizer_state_dtypes": [
+        {"id": "fp32", "name": "FP32", "description": "混合精度训练默认的优化器状态类型"},
+        {"id": "bf16", "name": "BF16", "description": "半精度优化器状态"},
+        {"id": "fp16", "name": "FP16", "description": "半精度优化器状态"},
+        {"id": "int8", "name": "INT8", "description": "分块量化的8-bit优化器状态"}
+    ],
+    "deepspeed_stages": [
+        {"id": "stage0", "name": "Stage 0", "description": "无显存优化"},
+        {"id": "stage1", "name": "Stage 1", "description": "优化器状态分片"},
+        {"id": "stage2", "name": "Stage 2", "description": "梯度+优化器状态分片"},
+        {"id": "stage3", "name": "Stage 3", "description": "模型参数+梯度+优化器状态分片"}
+    ],
+    "offload_devices": [
+        {"id": "none", "name": "不卸载", "description": "所有模型状态保留在GPU显存"},
+        {"id": "cpu", "name": "CPU", "description": "卸载到主机内存，受PCIe带宽和CPU优化器速度限制"},
+        {"id": "nvme", "name": "NVMe", "description": "卸载到NVMe（ZeRO-Infinity），容量大但受NVMe带宽限制"}
+    ],
+    "pipeline_schedules": [
+        {"id": "1f1b", "name": "1F1B", "description": "每个stage最多持有pp个微批次的激活值"},
+        {"id": "interleaved_1f1b", "name": "交错式1F1B", "description": "每个stage承载多个模型块，气泡更小但在途激活值更多"}
+    ],
+    "activation_recomputations": [
+        {"id": "none", "name": "不重计算", "description": "保存全部激活值，显存最高"},
+        {"id": "selective", "name": "选择性重计算", "description": "只重算注意力分数，去掉O(s²)激活值，计算开销约2-4%"},
+        {"id": "full", "name": "完全重计算", "description": "只保存每层输入，反向时重算整层前向，计算开销约30%"}
+    ],
+    "acceleration_methods": [
+        {"id": "none", "name": "Eager", "description": "显式生成注意力分数矩阵，显存随序列长度平方增长"},
+        {"id": "sdpa", "name": "SDPA", "description": "PyTorch显存高效注意力，不生成分数矩阵，GQA时K/V复制到全部头"},
+        {"id": "flash_attention_2", "name": "Flash Attention 2", "description": "分块计算注意力，原生支持GQA，不复制K/V"},
+        {"id": "unsloth", "name": "Unsloth", "description": "FlashAttention-2内核 + 分块交叉熵，仅支持单卡"}
+    ],
+    "cross_entropy_methods": [
+        {"id": "standard", "name": "标准", "description": "生成完整logits并以FP32计算log_softmax，词表大时显存峰值高"},
+        {"id": "chunked", "name": "分块", "description": "完整logits按token分块计算FP32损失并原地写回梯度（Unsloth）"},
+        {"id": "fused_linear", "name": "融合线性层", "description": "LM head与交叉熵融合按块计算，不生成完整logits（Liger Kernel）"}
+    ],
+    "context_parallel_methods": [
+        {"id": "ring", "name": "Ring Attention", "description": "KV块在环上逐步传递，通信可被注意力计算掩盖"},
+        {"id": "ulysses", "name": "DeepSpeed-Ulysses", "description": "all-to-all在序列切分与注意力头切分之间转换，通信不可掩盖"}
+    ]
+}
+
+_TRAINING_CONFIGS_PAYLOAD = build_payload(TRAINING_CONFIGS)
+
 
 @router.get("/configs")
-async def get_training_configs() -> Dict[str, Any]:
+async def get_training_configs(if_none_match: Optional[str] = Header(None)) -> Response:
     """
     获取训练配置选项
     
+    响应体预先序列化，带强ETag和Cache-Control，If-None-Match命中时返回304
+    
     Returns:
         训练配置选项字典
     """
-    return {
-        "training_methods": [
-            {"id": "full_finetuning", "name": "全参数微调", "description": "训练所有参数，效果最好但资源需求高"},
-            {"id": "lora", "name": "LoRA微调", "description": "只训练少量参数，资源需求低，效果接近全参数微调"}
-        ],
-        "precision_types": [
-            {"id": "fp32", "name": "FP32", "description": "32位浮点精度"},
-            {"id": "fp16", "name": "FP16", "description": "16位浮点精度"},
-            {"id": "bf16", "name": "BF16", "description": "Brain Float 16精度"}
-        ],
-        "optimizers": [
-            {"id": "adamw", "name": "AdamW", "description": "Adam with weight decay"},
-            {"id": "sgd", "name": "SGD", "description": "随机梯度下降"},
-            {"id": "adam", "name": "Adam", "description": "自适应矩估计"}
-        ],
-        "deepspeed_stages": [
-            {"id": "stage0", "name": "Stage 0", "description": "无显存优化"},
-            {"id": "stage1", "name": "Stage 1", "description": "优化器状态分片"},
-            {"id": "stage2", "name": "Stage 2", "description": "梯度+优化器状态分片"},
-            {"id": "stage3", "name": "Stage 3", "description": "模型参数+梯度+优化器状态分片"}
-        ]
-    } 
\ No newline at end of file
+    return cached_response(_TRAINING_CONFIGS_PAYLOAD, if_none_match)
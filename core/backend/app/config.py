@@ -2,9 +2,16 @@
 应用配置管理
 """
 
+from pathlib import Path
 from typing import List
 from pydantic_settings import BaseSettings
 
+# 后端根目录（core/backend），配置中的相对数据路径相对于该目录，与启动时的工作目录无关
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# SQLite内存数据库
+MEMORY_DB = ":memory:"
+
 
 class Settings(BaseSettings):
     """应用配置类"""
@@ -24,9 +31,45 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8787
     
+    # 模型目录数据库（内置模型与注册的自定义模型）。默认为进程内的内存目录，计算器不产生文件、
+    # 自定义模型不跨进程保留；设置为文件路径（如 .cache/model_catalog.sqlite3）时持久化并在多个服务进程间共享
+    MODEL_CATALOG_PATH: str = MEMORY_DB
+    
+    # HuggingFace config.json导入的解析结果缓存目录
+    HF_CONFIG_CACHE_DIR: str = ".cache/hf_configs"
+    
+    # 持久化计算结果存储（多个服务进程共享，重启后保留），大小上限为压缩后的字节数
+    RESULT_STORE_ENABLED: bool = True
+    RESULT_STORE_PATH: str = ".cache/results.sqlite3"
+    RESULT_STORE_MAX_BYTES: int = 256 * 1024 * 1024
+    
+    # 响应压缩：一次性响应达到该大小（字节）才压缩；各编码的压缩级别
+    # （brotli、zstd需安装可选依赖，级别越高压缩率越高但CPU开销越大，见benchmark_compression.py）
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    
+    # 异步任务：任务数据库（状态与逐项结果，断线重连和服务重启后可继续读取）、进程池大小、
+    # 排队和运行中的任务数上限、单个任务的参数网格组合数上限、SSE轮询间隔（秒）、
+    # 任务租约时长（秒，所属服务进程和工作进程都停止续约超过该时长后任务由其他服务进程接管）
+    JOB_STORE_PATH: str = ".cache/jobs.sqlite3"
+    JOB_MAX_WORKERS: int = 2
+    JOB_MAX_PENDING: int = 16
+    JOB_MAX_SWEEP_SIZE: int = 10000
+    JOB_EVENTS_POLL_INTERVAL: float = 0.5
+    JOB_LEASE_SECONDS: float = 30.0
+    
     class Config:
         env_file = ".env"
 
 
+def resolve_data_path(path: str) -> str:
+    """数据文件路径：相对路径按后端根目录解析，内存数据库原样返回"""
+    if path == MEMORY_DB:
+        return path
+    return str(BACKEND_DIR / path)
+
+
 # 全局配置实例
 settings = Settings() 
\ No newline at end of file
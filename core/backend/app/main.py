@@ -8,6 +8,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from .api.v1.api import api_router
+from .api.compression import CompressionMiddleware
 from .config import settings
 
 # 创建FastAPI应用实例  
@@ -28,6 +29,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩（gzip/brotli/zstd，按Accept-Encoding协商）
+app.add_middleware(CompressionMiddleware)
+
 # 注册API路由
 app.include_router(api_router, prefix="/api/v1")
 
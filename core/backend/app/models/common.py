@@ -2,7 +2,7 @@
 通用数据模型
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, Dict, Any, List
 from enum import Enum
 
@@ -22,6 +22,19 @@ class ModelSize(str, Enum):
     XLARGE = "xlarge"    # > 100B
 
 
+class AttentionKernel(str, Enum):
+    """注意力实现枚举"""
+    EAGER = "eager"                          # 逐步矩阵乘 + softmax，显式生成注意力分数矩阵
+    SDPA = "sdpa"                            # PyTorch scaled_dot_product_attention（显存高效内核）
+    FLASH_ATTENTION_2 = "flash_attention_2"  # FlashAttention-2分块内核，原生支持GQA
+
+
+class ContextParallelMethod(str, Enum):
+    """上下文并行方式枚举"""
+    RING = "ring"          # Ring Attention：序列分片，KV块在环上逐步传递
+    ULYSSES = "ulysses"    # DeepSpeed-Ulysses：all-to-all把序列分片转换为注意力头分片
+
+
 class GPUInfo(BaseModel):
     """GPU信息模型"""
     name: str = Field(..., description="GPU名称")
@@ -29,6 +42,10 @@ class GPUInfo(BaseModel):
     memory_bandwidth_gb_s: float = Field(..., description="显存带宽(GB/s)")
     compute_capability: str = Field(..., description="计算能力")
     fp16_tflops: Optional[float] = Field(None, description="FP16半精度算力(TFLOPS)")
+    nvlink_bandwidth_gb_s: Optional[float] = Field(None, description="单卡NVLink单向带宽(GB/s)，不支持时为空")
+    pcie_bandwidth_gb_s: Optional[float] = Field(None, description="PCIe单向带宽(GB/s)")
+    interconnect_bandwidth_gb_s: Optional[float] = Field(None, description="单卡跨节点网络(InfiniBand/RoCE)单向带宽(GB/s)")
+    gpus_per_node: Optional[int] = Field(None, description="单节点GPU数量")
     
     @property
     def has_tensor_cores(self) -> bool:
@@ -62,12 +79,32 @@ class ModelInfo(BaseModel):
     id: str = Field(..., description="模型ID")
     name: str = Field(..., description="模型名称")
     family: str = Field(..., description="模型系列")
-    parameters: int = Field(..., description="参数量")
+    parameters: Optional[int] = Field(None, description="标称参数量，未指定时按模型结构计算；计算时始终使用按结构统计的参数量")
     hidden_size: int = Field(..., description="隐藏层大小")
     num_layers: int = Field(..., description="层数")
     num_heads: int = Field(..., description="注意力头数")
+    num_key_value_heads: Optional[int] = Field(None, ge=1, description="KV头数（GQA/MQA），未指定时按架构默认值")
+    head_dim: Optional[int] = Field(None, ge=1, description="注意力头维度，未指定时为hidden_size/num_heads")
+    intermediate_size: Optional[int] = Field(None, ge=1, description="MLP中间层维度，未指定时按参数量推算")
+    num_experts: Optional[int] = Field(None, ge=1, description="MoE路由专家数，未指定时为稠密模型")
+    num_experts_per_tok: Optional[int] = Field(None, ge=1, description="每个token激活的路由专家数")
+    num_shared_experts: int = Field(default=0, ge=0, description="每个token都经过的共享专家数（按专家FFN维度计）")
+    moe_intermediate_size: Optional[int] = Field(None, ge=1, description="单个专家的FFN中间层维度，未指定时同intermediate_size")
     vocab_size: int = Field(..., description="词汇表大小")
+    tie_word_embeddings: bool = Field(default=False, description="LM head是否与词嵌入共享权重")
+    attention_bias: Optional[bool] = Field(None, description="QKV投影是否带偏置，未指定时按架构默认值")
     context_length: int = Field(..., description="上下文长度")
     architecture: str = Field(..., description="架构类型")
     precision: PrecisionType = Field(default=PrecisionType.FP16, description="默认精度")
-    size_category: ModelSize = Field(..., description="模型规模类别") 
\ No newline at end of file
+    size_category: ModelSize = Field(..., description="模型规模类别")
+
+    @validator('num_experts_per_tok', always=True)
+    def validate_num_experts_per_tok(cls, v, values):
+        """MoE模型未指定时每个token激活2个专家，且不能超过专家数"""
+        num_experts = values.get('num_experts')
+        if not num_experts:
+            return v
+        v = v or min(2, num_experts)
+        if v > num_experts:
+            raise ValueError(f"每个token激活的专家数{v}不能超过专家数{num_experts}")
+        return v
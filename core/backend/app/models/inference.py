@@ -3,10 +3,10 @@
 """
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from enum import Enum
 
-from .common import ResourceEstimate, PrecisionType, ModelInfo
+from .common import ResourceEstimate, PrecisionType, ModelInfo, ContextParallelMethod, AttentionKernel
 
 
 class InferenceBackend(str, Enum):
@@ -24,6 +24,48 @@ class QuantizationMethod(str, Enum):
     AWQ = "awq"
 
 
+class KVCacheDtype(str, Enum):
+    """KV Cache数据类型枚举"""
+    AUTO = "auto"          # 与推理精度一致
+    FP16 = "fp16"
+    BF16 = "bf16"
+    FP8 = "fp8"
+    FP8_E4M3 = "fp8_e4m3"
+    FP8_E5M2 = "fp8_e5m2"
+    INT8 = "int8"
+    INT4 = "int4"
+
+
+class KVCacheQuantization(str, Enum):
+    """KV Cache量化缩放因子粒度枚举"""
+    PER_TENSOR = "per_tensor"  # 每层K/V一个缩放因子
+    PER_HEAD = "per_head"      # 每层每个KV头一个缩放因子
+    PER_TOKEN = "per_token"    # 每个token每个KV头一个缩放因子
+    PER_BLOCK = "per_block"    # 每个KV block每个KV头一个缩放因子
+    PER_GROUP = "per_group"    # 每group_size个元素一个缩放因子和零点
+
+
+class LengthHistogramBin(BaseModel):
+    """长度直方图区间"""
+    length: int = Field(..., ge=0, description="token长度")
+    weight: float = Field(..., ge=0, description="该长度的权重（频数或概率）")
+
+
+class LengthDistribution(BaseModel):
+    """token长度分布，histogram、percentiles、samples三选一"""
+    histogram: Optional[List[LengthHistogramBin]] = Field(None, description="长度直方图")
+    percentiles: Optional[Dict[str, int]] = Field(None, description="长度分位数，如{\"p50\": 512, \"p99\": 3000}")
+    samples: Optional[List[int]] = Field(None, description="长度样本")
+
+    @validator('samples', always=True)
+    def validate_distribution(cls, v, values):
+        """验证分布只提供一种表示"""
+        provided_count = sum([bool(values.get('histogram')), bool(values.get('percentiles')), bool(v)])
+        if provided_count != 1:
+            raise ValueError("histogram、percentiles、samples必须且只能提供一个")
+        return v
+
+
 class InferenceRequest(BaseModel):
     """推理预估请求"""
     # 模型配置
@@ -34,28 +76,72 @@ class InferenceRequest(BaseModel):
     backend: InferenceBackend = Field(..., description="推理后端")
     precision: PrecisionType = Field(default=PrecisionType.FP16, description="推理精度")
     quantization: QuantizationMethod = Field(default=QuantizationMethod.NONE, description="量化方法")
+    attention_kernel: Optional[AttentionKernel] = Field(None, description="注意力实现，默认按推理后端选择")
     
     # 批处理配置
     max_batch_size: int = Field(default=1, ge=1, le=512, description="最大批次大小")
-    max_sequence_length: int = Field(..., ge=128, le=32768, description="最大序列长度")
-    max_new_tokens: int = Field(default=512, ge=1, le=4096, description="最大新生成tokens")
+    max_sequence_length: int = Field(..., ge=128, le=1048576, description="最大序列长度")
+    max_new_tokens: int = Field(default=512, ge=1, le=32768, description="最大新生成tokens")
+    
+    # 长度分布（未提供时按最大长度估算）
+    prompt_length_distribution: Optional[LengthDistribution] = Field(None, description="输入长度分布")
+    output_length_distribution: Optional[LengthDistribution] = Field(None, description="输出长度分布")
+    
+    # 前缀缓存配置
+    shared_prefix_length: int = Field(default=0, ge=0, description="共享前缀（如系统提示词）长度(tokens)")
+    prefix_cache_hit_rate: float = Field(default=1.0, ge=0, le=1, description="请求命中已缓存前缀的比例")
+    num_distinct_prefixes: int = Field(default=1, ge=1, description="不同共享前缀的数量")
     
     # 并行配置
     tensor_parallel: int = Field(default=1, ge=1, description="张量并行度")
     pipeline_parallel: int = Field(default=1, ge=1, description="流水线并行度")
+    context_parallel: int = Field(default=1, ge=1, description="上下文并行度（KV Cache沿序列维或注意力头切分）")
+    context_parallel_method: ContextParallelMethod = Field(default=ContextParallelMethod.RING, description="上下文并行方式")
+    expert_parallel: int = Field(default=1, ge=1, description="专家并行度（MoE路由专家在同一stage的GPU间切分）")
     
     # KV Cache配置
-    kv_cache_dtype: Optional[str] = Field(None, description="KV Cache数据类型")
-    kv_cache_quantization: Optional[str] = Field(None, description="KV Cache量化")
+    block_size: int = Field(default=16, ge=1, le=256, description="PagedAttention KV block大小(tokens)")
+    gpu_memory_utilization: float = Field(default=0.9, gt=0, le=1, description="vLLM可使用的GPU显存比例")
+    swap_space_gb: float = Field(default=4.0, ge=0, description="抢占时用于换出KV block的CPU swap空间(GB)")
+    max_num_seqs: int = Field(default=256, ge=1, description="调度器最大并发序列数")
+    kv_cache_dtype: Optional[KVCacheDtype] = Field(None, description="KV Cache数据类型")
+    kv_cache_quantization: Optional[KVCacheQuantization] = Field(None, description="KV Cache量化缩放粒度")
+    kv_cache_group_size: int = Field(default=64, ge=1, description="per_group量化的分组大小(元素数)")
     
     # 性能要求
     target_throughput: Optional[float] = Field(None, gt=0, description="目标吞吐量(tokens/s)")
     target_latency_ms: Optional[float] = Field(None, gt=0, description="目标延迟(ms)")
     
     # 硬件约束
+    gpu_type: Optional[str] = Field(None, description="目标GPU型号，默认A100-80GB")
     max_gpu_count: Optional[int] = Field(None, ge=1, description="最大GPU数量限制")
     gpu_memory_limit_gb: Optional[float] = Field(None, gt=0, description="单GPU显存限制(GB)")
 
+    @validator('attention_kernel', always=True)
+    def validate_attention_kernel(cls, v, values):
+        """未指定时vLLM使用FlashAttention内核，Transformers默认使用SDPA"""
+        if v is not None:
+            return v
+        if values.get('backend') == InferenceBackend.VLLM:
+            return AttentionKernel.FLASH_ATTENTION_2
+        return AttentionKernel.SDPA
+
+    @validator('expert_parallel')
+    def validate_expert_parallel(cls, v, values):
+        """专家并行使用同一流水线stage内的张量并行和上下文并行GPU"""
+        stage_gpus = values.get('tensor_parallel', 1) * values.get('context_parallel', 1)
+        if stage_gpus % v != 0:
+            raise ValueError("张量并行度 * 上下文并行度必须能被专家并行度整除")
+        return v
+
+    @validator('shared_prefix_length')
+    def validate_shared_prefix_length(cls, v, values):
+        """验证共享前缀长度"""
+        max_sequence_length = values.get('max_sequence_length')
+        if max_sequence_length and v > max_sequence_length:
+            raise ValueError("共享前缀长度不能超过最大序列长度")
+        return v
+
     @validator('custom_model')
     def validate_model_info(cls, v, values):
         """验证模型信息"""
@@ -78,6 +164,19 @@ class InferenceResponse(ResourceEstimate):
     # KV Cache信息
     kv_cache_memory_gb: float = Field(..., description="KV Cache显存需求(GB)")
     max_concurrent_requests: int = Field(..., description="最大并发请求数")
+    kv_cache_blocks: Dict[str, Any] = Field(default_factory=dict, description="KV block分配分析")
+    
+    # 长度分布分析
+    length_distribution_analysis: Dict[str, Any] = Field(default_factory=dict, description="按长度分布估算的期望与尾部显存、并发和吞吐")
+    
+    # 前缀缓存分析
+    prefix_cache_analysis: Dict[str, Any] = Field(default_factory=dict, description="前缀缓存容量与预填充计算分析")
+    
+    # 解码阶段带宽分析
+    decode_analysis: Dict[str, Any] = Field(default_factory=dict, description="解码阶段显存带宽分析")
+    
+    # MoE分析
+    moe_analysis: Optional[Dict[str, Any]] = Field(None, description="MoE总参数/激活参数与单卡专家放置")
     
     # 性能预估
     estimated_throughput: float = Field(..., description="预估吞吐量(tokens/s)")
@@ -0,0 +1,75 @@
+"""
+异步任务相关数据模型
+"""
+
+from pydantic import BaseModel, Field, validator
+from typing import Optional, Dict, Any, List
+from enum import Enum
+
+
+class JobKind(str, Enum):
+    """任务类型枚举"""
+    TRAINING_SWEEP = "training_sweep"
+    INFERENCE_SWEEP = "inference_sweep"
+
+
+class JobStatus(str, Enum):
+    """任务状态枚举"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# 结束状态：不会再变化
+TERMINAL_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobSubmitRequest(BaseModel):
+    """任务提交请求"""
+    kind: JobKind = Field(..., description="任务类型")
+    base: Dict[str, Any] = Field(..., description="基础预估请求（TrainingRequest或InferenceRequest的字段）")
+    grid: Dict[str, List[Any]] = Field(
+        default_factory=dict,
+        description="参数网格：字段名 -> 取值列表，按笛卡尔积逐个覆盖基础请求后预估；为空时只预估基础请求"
+    )
+
+    @validator('grid')
+    def validate_grid(cls, v):
+        """每个字段至少一个取值"""
+        empty = [name for name, values in v.items() if not values]
+        if empty:
+            raise ValueError(f"参数网格中的字段没有取值: {', '.join(empty)}")
+        return v
+
+    def get_total(self) -> int:
+        """网格组合数"""
+        total = 1
+        for values in self.grid.values():
+            total *= len(values)
+        return total
+
+
+class JobInfo(BaseModel):
+    """任务状态"""
+    id: str = Field(..., description="任务ID")
+    kind: JobKind = Field(..., description="任务类型")
+    status: JobStatus = Field(..., description="任务状态")
+    total: int = Field(..., description="总预估次数")
+    completed: int = Field(..., description="已完成的预估次数（含失败）")
+    failed: int = Field(..., description="失败的预估次数")
+    progress: float = Field(..., description="进度（0-1）")
+    cancel_requested: bool = Field(..., description="是否已请求取消")
+    created_at: float = Field(..., description="提交时间（Unix时间戳）")
+    started_at: Optional[float] = Field(None, description="开始时间")
+    finished_at: Optional[float] = Field(None, description="结束时间")
+    error: Optional[str] = Field(None, description="任务失败原因")
+    summary: Optional[Dict[str, Any]] = Field(None, description="结果汇总（任务结束后）")
+
+
+class JobResults(BaseModel):
+    """任务结果（分页，任务运行中可读取已完成的部分结果）"""
+    job: JobInfo = Field(..., description="任务状态")
+    items: List[Dict[str, Any]] = Field(..., description="结果列表，每项含index、params，以及result或error")
+    next_offset: int = Field(..., description="下一页的offset")
@@ -3,16 +3,19 @@
 """
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from enum import Enum
 
-from .common import ResourceEstimate, PrecisionType, ModelInfo
+from .common import ResourceEstimate, PrecisionType, ModelInfo, ContextParallelMethod
 
 
 class TrainingMethod(str, Enum):
     """训练方法枚举"""
     FULL_FINETUNING = "full_finetuning"
     LORA = "lora"
+    QLORA = "qlora"
+    DORA = "dora"
+    ADALORA = "adalora"
 
 
 class OptimizerType(str, Enum):
@@ -20,6 +23,17 @@ class OptimizerType(str, Enum):
     ADAMW = "adamw"
     ADAM = "adam"
     SGD = "sgd"
+    ADAMW_8BIT = "adamw_8bit"
+    PAGED_ADAMW = "paged_adamw"
+    PAGED_ADAMW_8BIT = "paged_adamw_8bit"
+
+
+class OptimizerStateDtype(str, Enum):
+    """优化器状态数据类型枚举"""
+    FP32 = "fp32"
+    FP16 = "fp16"
+    BF16 = "bf16"
+    INT8 = "int8"
 
 
 class DeepSpeedStage(str, Enum):
@@ -30,19 +44,71 @@ class DeepSpeedStage(str, Enum):
     STAGE3 = "stage3"
 
 
+class OffloadDevice(str, Enum):
+    """ZeRO-Offload/ZeRO-Infinity卸载目标设备枚举"""
+    NONE = "none"
+    CPU = "cpu"
+    NVME = "nvme"
+
+
+class PipelineSchedule(str, Enum):
+    """流水线并行调度方式枚举"""
+    ONE_F_ONE_B = "1f1b"
+    INTERLEAVED_1F1B = "interleaved_1f1b"
+
+
+class ActivationRecomputation(str, Enum):
+    """激活重计算方式枚举"""
+    NONE = "none"
+    SELECTIVE = "selective"
+    FULL = "full"
+
+
 class AccelerationMethod(str, Enum):
     """加速方法枚举"""
     NONE = "none"
+    SDPA = "sdpa"
     FLASH_ATTENTION_2 = "flash_attention_2"
     UNSLOTH = "unsloth"
 
 
+class CrossEntropyMethod(str, Enum):
+    """交叉熵损失实现枚举"""
+    STANDARD = "standard"           # 完整logits + FP32 log_softmax（PyTorch/Transformers默认）
+    CHUNKED = "chunked"             # 完整logits，按token分块计算FP32损失并原地写回梯度（Unsloth）
+    FUSED_LINEAR = "fused_linear"   # LM head与交叉熵融合，按块计算logits，不生成完整logits（Liger Kernel）
+
+
 class LoRAConfig(BaseModel):
     """LoRA配置"""
     rank: int = Field(default=8, ge=1, le=512, description="LoRA秩")
     alpha: int = Field(default=16, ge=1, description="LoRA alpha参数")
     dropout: float = Field(default=0.1, ge=0.0, le=1.0, description="LoRA dropout")
     target_modules: Optional[str] = Field(default="all-linear", description="目标模块")
+    init_rank: Optional[int] = Field(None, ge=1, le=1024, description="AdaLoRA初始分配的秩，剪枝到rank")
+    double_quant: bool = Field(default=True, description="QLoRA是否对量化常数做双重量化")
+    quant_block_size: int = Field(default=64, ge=16, le=4096, description="QLoRA的NF4量化块大小")
+
+    @validator('init_rank')
+    def validate_init_rank(cls, v, values):
+        """验证AdaLoRA初始秩"""
+        rank = values.get('rank')
+        if v is not None and rank is not None and v < rank:
+            raise ValueError("AdaLoRA的init_rank不能小于目标rank")
+        return v
+
+
+class PrecisionPolicy(BaseModel):
+    """
+    混合精度策略
+
+    未指定的字段按训练精度推导：FP16/BF16混合精度保留FP32主权重和FP32优化器状态
+    （AdamW约16字节/参数），FP32训练不需要主权重；8-bit优化器的状态默认为INT8
+    """
+    param_dtype: Optional[PrecisionType] = Field(None, description="模型权重数据类型")
+    grad_dtype: Optional[PrecisionType] = Field(None, description="梯度数据类型")
+    master_weights: Optional[bool] = Field(None, description="是否保留FP32主权重")
+    optimizer_state_dtype: Optional[OptimizerStateDtype] = Field(None, description="优化器状态数据类型")
 
 
 class TrainingRequest(BaseModel):
@@ -55,8 +121,9 @@ class TrainingRequest(BaseModel):
     # 训练配置
     training_method: TrainingMethod = Field(..., description="训练方法")
     precision: PrecisionType = Field(default=PrecisionType.FP16, description="训练精度")
+    precision_policy: Optional[PrecisionPolicy] = Field(None, description="各模型状态的数据类型（覆盖按训练精度推导的默认值）")
     batch_size: int = Field(..., ge=1, le=1024, description="批次大小")
-    sequence_length: int = Field(..., ge=128, le=32768, description="序列长度")
+    sequence_length: int = Field(..., ge=128, le=1048576, description="序列长度")
     gradient_accumulation_steps: int = Field(default=1, ge=1, description="梯度累积步数")
     
     # 优化器配置
@@ -68,14 +135,40 @@ class TrainingRequest(BaseModel):
     data_parallel: int = Field(default=1, ge=1, description="数据并行度")
     tensor_parallel: int = Field(default=1, ge=1, description="张量并行度")
     pipeline_parallel: int = Field(default=1, ge=1, description="流水线并行度")
+    context_parallel: int = Field(default=1, ge=1, description="上下文并行度（沿序列维切分）")
+    context_parallel_method: ContextParallelMethod = Field(default=ContextParallelMethod.RING, description="上下文并行方式")
+    expert_parallel: int = Field(default=1, ge=1, description="专家并行度（MoE路由专家在数据并行rank间切分）")
     deepspeed_stage: Optional[DeepSpeedStage] = Field(None, description="DeepSpeed ZeRO阶段")
+    offload_optimizer: OffloadDevice = Field(default=OffloadDevice.NONE, description="优化器状态卸载目标（ZeRO-Offload）")
+    offload_param: OffloadDevice = Field(default=OffloadDevice.NONE, description="模型参数卸载目标（仅ZeRO Stage 3）")
+    nvme_bandwidth_gb_s: float = Field(default=6.0, gt=0, description="单节点NVMe读写带宽(GB/s)")
+    pipeline_schedule: PipelineSchedule = Field(default=PipelineSchedule.ONE_F_ONE_B, description="流水线调度方式")
+    virtual_pipeline_stages: int = Field(default=1, ge=1, description="交错调度时每个stage承载的模型块数")
+    gpu_type: Optional[str] = Field(None, description="训练使用的GPU型号（用于估算计算和通信耗时）")
+    model_flops_utilization: float = Field(default=0.4, gt=0, le=1, description="算力利用率（实际执行的FLOPs / GPU峰值算力）")
+    
+    # 数据集规模（用于估算每轮训练时间）
+    dataset_tokens: Optional[int] = Field(None, ge=1, description="数据集token总数")
+    dataset_samples: Optional[int] = Field(None, ge=1, description="数据集样本数（按序列长度折算token数）")
     
     # LoRA特定配置
     lora_config: Optional[LoRAConfig] = Field(None, description="LoRA配置")
     
     # 其他配置
     gradient_checkpointing: bool = Field(default=False, description="是否启用梯度检查点")
+    activation_recomputation: Optional[ActivationRecomputation] = Field(
+        None, description="激活重计算方式，未指定时由gradient_checkpointing推导（开启为full）"
+    )
+    sequence_parallel: bool = Field(default=False, description="是否在张量并行组内开启序列并行")
+    hidden_dropout: float = Field(default=0.0, ge=0.0, lt=1.0, description="注意力和MLP输出的dropout概率")
+    attention_dropout: float = Field(default=0.0, ge=0.0, lt=1.0, description="注意力权重的dropout概率")
     acceleration_method: AccelerationMethod = Field(default=AccelerationMethod.NONE, description="加速方法")
+    cross_entropy: Optional[CrossEntropyMethod] = Field(
+        None, description="交叉熵损失实现，未指定时Unsloth为chunked，其余为standard"
+    )
+    cross_entropy_chunk_size: Optional[int] = Field(
+        None, ge=1, description="分块/融合交叉熵每块的token数，未指定时按 ceil(词表 / 隐藏维度) 分块"
+    )
 
     @validator('custom_model')
     def validate_model_info(cls, v, values):
@@ -98,11 +191,58 @@ class TrainingRequest(BaseModel):
     def validate_lora_config(cls, v, values):
         """验证LoRA配置"""
         training_method = values.get('training_method')
-        if training_method == TrainingMethod.LORA:
+        if training_method in (TrainingMethod.LORA, TrainingMethod.QLORA,
+                               TrainingMethod.DORA, TrainingMethod.ADALORA):
             if not v:
                 return LoRAConfig()  # 使用默认配置
         return v
 
+    @validator('context_parallel')
+    def validate_context_parallel(cls, v, values):
+        """验证上下文并行度"""
+        sequence_length = values.get('sequence_length')
+        if sequence_length and sequence_length % v != 0:
+            raise ValueError("序列长度必须能被上下文并行度整除")
+        return v
+
+    @validator('expert_parallel')
+    def validate_expert_parallel(cls, v, values):
+        """验证专家并行度"""
+        replicas = values.get('data_parallel', 1) * values.get('context_parallel', 1)
+        if replicas % v != 0:
+            raise ValueError("数据并行度 * 上下文并行度必须能被专家并行度整除")
+        return v
+
+    @validator('offload_optimizer')
+    def validate_offload_optimizer(cls, v, values):
+        """验证优化器卸载配置"""
+        stage = values.get('deepspeed_stage')
+        if v != OffloadDevice.NONE and stage in (None, DeepSpeedStage.STAGE0):
+            raise ValueError("优化器状态卸载需要DeepSpeed ZeRO Stage 1及以上")
+        return v
+
+    @validator('offload_param')
+    def validate_offload_param(cls, v, values):
+        """验证参数卸载配置"""
+        if v != OffloadDevice.NONE and values.get('deepspeed_stage') != DeepSpeedStage.STAGE3:
+            raise ValueError("模型参数卸载需要DeepSpeed ZeRO Stage 3")
+        return v
+
+    @validator('activation_recomputation', always=True)
+    def validate_activation_recomputation(cls, v, values):
+        """未指定重计算方式时按gradient_checkpointing推导"""
+        if v is None:
+            return (ActivationRecomputation.FULL if values.get('gradient_checkpointing')
+                    else ActivationRecomputation.NONE)
+        return v
+
+    @validator('dataset_samples')
+    def validate_dataset_size(cls, v, values):
+        """验证数据集规模"""
+        if v and values.get('dataset_tokens'):
+            raise ValueError("只能提供dataset_tokens或dataset_samples中的一个")
+        return v
+
     @validator('acceleration_method')
     def validate_acceleration_method(cls, v, values):
         """验证加速方法"""
@@ -111,6 +251,14 @@ class TrainingRequest(BaseModel):
             raise ValueError("Unsloth免费版仅支持单卡训练，多卡请选择Flash Attention 2")
         return v
 
+    @validator('cross_entropy', always=True)
+    def validate_cross_entropy(cls, v, values):
+        """未指定交叉熵实现时按加速方法推导"""
+        if v is None:
+            return (CrossEntropyMethod.CHUNKED if values.get('acceleration_method') == AccelerationMethod.UNSLOTH
+                    else CrossEntropyMethod.STANDARD)
+        return v
+
 
 class TrainingResponse(ResourceEstimate):
     """训练预估响应"""
@@ -123,6 +271,15 @@ class TrainingResponse(ResourceEstimate):
     
     # 详细的显存分解
     memory_breakdown: Dict[str, float] = Field(..., description="显存使用详细分解")
+    stage_memory_breakdown: List[Dict[str, Any]] = Field(default_factory=list, description="每个流水线stage的单卡显存分解")
+    pipeline_schedule: Optional[Dict[str, Any]] = Field(None, description="流水线调度模拟汇总（气泡率、每个stage显存峰值）")
+    communication_analysis: Optional[Dict[str, Any]] = Field(None, description="通信开销、训练步耗时和扩展效率分析")
+    flops_analysis: Optional[Dict[str, Any]] = Field(None, description="每token计算量分解、实际MFU和每轮训练计算量")
+    offload_analysis: Optional[Dict[str, Any]] = Field(None, description="CPU/NVMe卸载的主机内存、NVMe容量需求和步耗时开销")
+    activation_analysis: Optional[Dict[str, Any]] = Field(None, description="每层激活值分解与各重计算方式的显存/计算量对比")
+    logits_analysis: Optional[Dict[str, Any]] = Field(None, description="logits与交叉熵损失缓冲区分解及各交叉熵实现的显存对比")
+    adapter_analysis: Optional[Dict[str, Any]] = Field(None, description="LoRA/QLoRA/DoRA/AdaLoRA适配器参数量与基座权重显存")
+    moe_analysis: Optional[Dict[str, Any]] = Field(None, description="MoE总参数/激活参数与单卡专家放置")
     
     # 性能预估
     estimated_tokens_per_second: Optional[float] = Field(None, description="预估处理速度(tokens/s)")
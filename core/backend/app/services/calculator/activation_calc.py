@@ -0,0 +1,168 @@
+"""
+训练激活值计算服务
+
+参考Megatron-LM "Reducing Activation Recomputation in Large Transformer Models"，
+逐项统计每个Transformer层为反向保存的张量（s=序列长度，b=微批次大小，h=隐藏维度，
+a=注意力头数，t=张量并行度，I=MLP中间层维度）：
+- 层归一化：注意力和MLP前两个层归一化的输入，各sbh
+- 注意力投影：QKV矩阵乘输入sbh、Q/K（按KV头数计）、V、输出投影输入；
+  eager/SDPA在GQA时另存repeat_kv复制到全部头的K/V
+- 注意力分数：只有eager实现保存softmax输出as²b，注意力dropout时另有掩码（1字节）和dropout输出
+- softmax统计：SDPA/FlashAttention-2不生成分数矩阵，只保存FP32的log-sum-exp（as·b），
+  见AttentionCalculator
+- MLP：第一个矩阵乘的输入sbh，中间激活（非门控2份sbI：激活函数输入和输出；
+  门控4份sbI：gate、act(gate)、up和相乘结果；Unsloth的融合SwiGLU内核只保存gate和up）；
+  MoE模型的I为激活专家的FFN维度之和，另存每个token复制到k个专家的输入ksbh和FP32路由概率sbE
+- dropout掩码：注意力和MLP输出的hidden dropout掩码，各sbh（1字节）
+注意力投影、注意力分数和MLP中间激活按张量并行切分；层归一化、QKV/MLP输入和dropout掩码
+只有开启序列并行时才按t切分。原论文中dropout开启、I=4h、t=1时每层为 sbh(34 + 5as/h)字节。
+上下文并行度为c时每个rank只保存s/c个token的激活值，注意力分数为本地查询对完整序列，即 a(s/c)sb/t。
+
+重计算方式：
+- none：保存全部激活值
+- selective：只重算注意力分数部分（显存O(s²)、计算量小）
+- full：只保存每层输入，反向时逐层重算，另需一层的完整激活值作为工作区；
+  Unsloth的梯度检查点把每层输入卸载到主机内存
+"""
+
+from typing import Dict, Any, Optional
+
+from ...models.training import TrainingRequest, ActivationRecomputation, AccelerationMethod
+from ...models.common import ModelInfo, PrecisionType
+from .base_calc import BaseCalculator
+from .adapter_calc import AdapterCalculator
+from .attention_calc import AttentionCalculator
+from .flops_calc import FlopsCalculator
+
+
+class ActivationCalculator(BaseCalculator):
+    """Transformer层激活值计算器"""
+
+    # dropout掩码每个元素的字节数
+    DROPOUT_MASK_BYTES = 1
+
+    def __init__(self):
+        """初始化激活值计算器"""
+        super().__init__()
+        self.adapter_calculator = AdapterCalculator()
+        self.attention_calculator = AttentionCalculator()
+
+    def calculate_layer_breakdown(self, model: ModelInfo, request: TrainingRequest) -> Dict[str, float]:
+        """
+        计算单个微批次在单个张量并行、上下文并行rank上每层保存的激活值（字节）
+
+        Args:
+            model: 模型信息
+            request: 训练预估请求
+
+        Returns:
+            每层激活值分解
+        """
+        seq_len, b = request.sequence_length, request.batch_size
+        # 上下文并行沿序列维切分，s为本地token数
+        s = seq_len / request.context_parallel
+        h, a = model.hidden_size, model.num_heads
+        q_dim = a * self.get_head_dim(model)
+        kv_dim = self.get_kv_hidden_size(model)
+        intermediate = self.get_active_intermediate_size(model)
+        t = request.tensor_parallel
+        # 序列并行把张量并行区域之外的激活值沿序列维切分
+        sp = t if request.sequence_parallel else 1
+        e = self.PRECISION_BYTES[request.precision]
+        mask = self.DROPOUT_MASK_BYTES
+
+        kernel = self.attention_calculator.get_training_kernel(request.acceleration_method)
+        attention = self.attention_calculator.calculate_saved_bytes(
+            model, kernel, b, s, seq_len, e, t, request.attention_dropout
+        )
+        # repeat_kv只复制本地的K/V
+        expanded_kv = attention["expanded_kv"] * s / seq_len
+
+        mlp_inputs = e * s * b * h / sp
+        if self.is_moe(model):
+            mlp_inputs += (model.num_experts_per_tok * e * s * b * h / sp +
+                           self.PRECISION_BYTES[PrecisionType.FP32] * s * b * model.num_experts / sp)
+
+        intermediate_tensors = 4 if self.is_gated_mlp(model) else 2
+        if request.acceleration_method == AccelerationMethod.UNSLOTH and self.is_gated_mlp(model):
+            intermediate_tensors = 2
+        dropout_masks = 0.0
+        if request.hidden_dropout > 0:
+            dropout_masks = 2 * mask * s * b * h / sp
+
+        breakdown = {
+            "layernorm": 2 * e * s * b * h / sp,
+            "attention_projections": (e * s * b * h / sp +
+                                      e * s * b * (2 * q_dim + 2 * kv_dim) / t + expanded_kv),
+            "attention_scores": attention["attention_scores"],
+            "softmax_stats": attention["softmax_stats"],
+            "mlp": mlp_inputs + intermediate_tensors * e * s * b * intermediate / t,
+            "dropout_masks": dropout_masks
+        }
+        if self.adapter_calculator.is_adapter_method(request.training_method):
+            breakdown["adapters"] = (self.adapter_calculator.calculate_activation_bytes(model, request) /
+                                     model.num_layers / t / request.context_parallel)
+        return breakdown
+
+    def calculate(self, model: ModelInfo, request: TrainingRequest,
+                  recomputation: Optional[ActivationRecomputation] = None) -> float:
+        """
+        计算单个微批次完整层栈在单个张量并行、上下文并行rank上保存的激活值（字节）
+
+        Args:
+            model: 模型信息
+            request: 训练预估请求
+            recomputation: 重计算方式，默认使用请求中的配置
+
+        Returns:
+            激活值字节数
+        """
+        recomputation = recomputation or request.activation_recomputation
+        breakdown = self.calculate_layer_breakdown(model, request)
+        per_layer = sum(breakdown.values())
+
+        if recomputation == ActivationRecomputation.FULL:
+            if request.acceleration_method == AccelerationMethod.UNSLOTH:
+                return per_layer
+            sp = request.tensor_parallel if request.sequence_parallel else 1
+            layer_input = (self.PRECISION_BYTES[request.precision] * request.sequence_length *
+                           request.batch_size * model.hidden_size / sp / request.context_parallel)
+            return layer_input * model.num_layers + per_layer
+        if recomputation == ActivationRecomputation.SELECTIVE:
+            per_layer -= breakdown["attention_scores"]
+        return per_layer * model.num_layers
+
+    def summarize(self, model: ModelInfo, request: TrainingRequest,
+                  flops_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        汇总每层激活值分解，并对比三种重计算方式的显存与重计算开销
+
+        Args:
+            model: 模型信息
+            request: 训练预估请求
+            flops_analysis: 当前配置的FLOPs分析
+
+        Returns:
+            激活值分析结果，relative_compute为实际执行FLOPs相对模型FLOPs的倍数
+        """
+        breakdown = self.calculate_layer_breakdown(model, request)
+        model_flops = flops_analysis["model_flops_per_token"]
+        modes = {}
+        for mode in ActivationRecomputation:
+            recompute = FlopsCalculator.calculate_recompute_flops(
+                flops_analysis["forward_breakdown"], flops_analysis["forward_flops_per_token"], mode
+            )
+            modes[mode.value] = {
+                "memory_gb": self.convert_bytes(self.calculate(model, request, mode)),
+                "recompute_flops_per_token": recompute,
+                "relative_compute": (model_flops + recompute) / model_flops
+            }
+
+        return {
+            "recomputation": request.activation_recomputation.value,
+            "attention_kernel": self.attention_calculator.get_training_kernel(request.acceleration_method).value,
+            "sequence_parallel": request.sequence_parallel,
+            "per_layer_gb": {name: self.convert_bytes(value) for name, value in breakdown.items()},
+            "recompute_flops_per_token": flops_analysis["recompute_flops_per_token"],
+            "modes": modes
+        }
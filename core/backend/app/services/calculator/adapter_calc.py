@@ -0,0 +1,297 @@
+"""
+参数高效微调（LoRA系列）计算服务
+
+按模型的真实投影矩阵形状计算适配器参数、显存和额外计算量：
+- LoRA：每个目标矩阵 W(in×out) 增加 A(in×r) 和 B(r×out)
+- QLoRA：冻结的基座线性层权重以4-bit NF4存储，每64个权重一个量化常数；
+  双重量化将量化常数再量化为8-bit，每256个常数一个FP32缩放因子
+- DoRA：每个目标矩阵增加长度为out的幅值向量，前向需计算合并权重 W + BA 的列范数
+- AdaLoRA：以SVD形式 P·Λ·Q 参数化，按init_rank分配后逐步剪枝到平均rank；
+  剪枝只置零不缩小张量，显存按init_rank计，并为每个适配器参数保存3份FP32重要性统计
+MoE模型的每个路由专家和共享专家都有各自的MLP投影，参数按全部专家计，激活值按激活的专家计。
+"""
+
+import math
+from typing import Dict, Any, List, Tuple, Optional
+
+from ...models.training import TrainingRequest, TrainingMethod, LoRAConfig
+from ...models.common import ModelInfo, PrecisionType
+from .base_calc import BaseCalculator
+
+
+class AdapterCalculator(BaseCalculator):
+    """LoRA系列适配器计算器"""
+
+    # 使用适配器的训练方法
+    ADAPTER_METHODS = {TrainingMethod.LORA, TrainingMethod.QLORA,
+                       TrainingMethod.DORA, TrainingMethod.ADALORA}
+
+    # 常见的目标模块别名
+    MODULE_ALIASES = {
+        "query": "q_proj", "key": "k_proj", "value": "v_proj", "dense": "o_proj",
+        "w1": "gate_proj", "w3": "up_proj", "w2": "down_proj",
+        "fc1": "up_proj", "fc2": "down_proj"
+    }
+
+    # NF4每个权重的字节数
+    NF4_BYTES_PER_PARAM = 0.5
+
+    # 双重量化中每个FP32二级缩放因子覆盖的一级量化常数个数
+    DOUBLE_QUANT_BLOCK_SIZE = 256
+
+    # AdaLoRA未指定init_rank时相对目标rank的倍数（与PEFT默认的12/8一致）
+    ADALORA_INIT_RANK_RATIO = 1.5
+
+    # AdaLoRA每个适配器参数的FP32重要性统计份数（敏感度、平滑敏感度、不确定性）
+    ADALORA_IMPORTANCE_STATES = 3
+
+    def is_adapter_method(self, training_method: TrainingMethod) -> bool:
+        """是否为LoRA系列训练方法"""
+        return training_method in self.ADAPTER_METHODS
+
+    def get_linear_shapes(self, model: ModelInfo) -> Dict[str, Tuple[int, int]]:
+        """
+        获取每层线性投影的(输入维度, 输出维度)
+
+        K/V投影按KV头数计，MLP按中间层维度（MoE为单个专家的维度）计；非门控MLP没有gate_proj
+        """
+        hidden = model.hidden_size
+        q_dim = model.num_heads * self.get_head_dim(model)
+        kv_dim = self.get_kv_hidden_size(model)
+        intermediate = self.get_expert_intermediate_size(model)
+
+        shapes = {
+            "q_proj": (hidden, q_dim),
+            "k_proj": (hidden, kv_dim),
+            "v_proj": (hidden, kv_dim),
+            "o_proj": (q_dim, hidden),
+            "gate_proj": (hidden, intermediate),
+            "up_proj": (hidden, intermediate),
+            "down_proj": (intermediate, hidden)
+        }
+        if not self.is_gated_mlp(model):
+            shapes.pop("gate_proj")
+        return shapes
+
+    def get_module_copies(self, model: ModelInfo, module: str, active: bool = False) -> int:
+        """
+        每层中某个投影的份数
+
+        MoE模型的MLP投影每个专家各一份，active为True时只计每个token经过的专家
+        """
+        if not self.is_moe(model) or module not in ("gate_proj", "up_proj", "down_proj"):
+            return 1
+        routed = model.num_experts_per_tok if active else model.num_experts
+        return routed + model.num_shared_experts
+
+    def get_target_modules(self, model: ModelInfo, lora_config: LoRAConfig) -> List[str]:
+        """
+        解析target_modules，返回每层适配的投影名称
+
+        "all-linear"适配所有线性投影，未指定时只适配注意力投影
+        """
+        shapes = self.get_linear_shapes(model)
+        target_modules = lora_config.target_modules
+        if target_modules == "all-linear":
+            return list(shapes)
+        if not target_modules:
+            return ["q_proj", "k_proj", "v_proj", "o_proj"]
+
+        modules = []
+        for name in target_modules.split(','):
+            name = self.MODULE_ALIASES.get(name.strip(), name.strip())
+            if not name:
+                continue
+            if name not in shapes:
+                raise ValueError(f"不支持的LoRA目标模块: {name}，可选: {', '.join(shapes)}")
+            if name not in modules:
+                modules.append(name)
+        return modules
+
+    def get_ranks(self, training_method: TrainingMethod, lora_config: LoRAConfig) -> Dict[str, int]:
+        """
+        获取分配的rank和训练结束时的目标rank
+
+        AdaLoRA按init_rank分配张量，剪枝后每个矩阵平均保留rank个奇异值
+        """
+        if training_method == TrainingMethod.ADALORA:
+            init_rank = lora_config.init_rank or math.ceil(lora_config.rank * self.ADALORA_INIT_RANK_RATIO)
+            return {"allocated": init_rank, "target": lora_config.rank}
+        return {"allocated": lora_config.rank, "target": lora_config.rank}
+
+    def calculate_parameters(self, model: ModelInfo, training_method: TrainingMethod,
+                             lora_config: Optional[LoRAConfig]) -> Dict[str, int]:
+        """
+        计算适配器新增的可训练参数量
+
+        Args:
+            model: 模型信息
+            training_method: 训练方法
+            lora_config: LoRA配置，未提供时使用默认配置
+
+        Returns:
+            {"lora": A/B矩阵参数, "singular_values": AdaLoRA奇异值,
+             "magnitude": DoRA幅值向量, "total": 合计}
+        """
+        lora_config = lora_config or LoRAConfig()
+        shapes = self.get_linear_shapes(model)
+        modules = self.get_target_modules(model, lora_config)
+        rank = self.get_ranks(training_method, lora_config)["allocated"]
+
+        copies = {m: self.get_module_copies(model, m) for m in modules}
+        lora_params = model.num_layers * sum(
+            copies[m] * rank * (shapes[m][0] + shapes[m][1]) for m in modules
+        )
+        singular_values = 0
+        magnitude = 0
+        if training_method == TrainingMethod.ADALORA:
+            singular_values = model.num_layers * sum(copies.values()) * rank
+        if training_method == TrainingMethod.DORA:
+            magnitude = model.num_layers * sum(copies[m] * shapes[m][1] for m in modules)
+
+        return {
+            "lora": lora_params,
+            "singular_values": singular_values,
+            "magnitude": magnitude,
+            "total": lora_params + singular_values + magnitude
+        }
+
+    def get_linear_parameters(self, model: ModelInfo) -> int:
+        """Transformer层中线性投影的参数总量（QLoRA量化的部分）"""
+        per_layer = sum(self.get_module_copies(model, name) * i * o
+                        for name, (i, o) in self.get_linear_shapes(model).items())
+        return model.num_layers * per_layer
+
+    def get_quantized_bytes_per_param(self, lora_config: LoRAConfig) -> float:
+        """
+        QLoRA基座权重每个参数的字节数
+
+        无双重量化：0.5 + 4 / 64 = 0.5625字节；双重量化：0.5 + 1 / 64 + 4 / (64 * 256) ≈ 0.516字节
+        """
+        block_size = lora_config.quant_block_size
+        if lora_config.double_quant:
+            constant_bytes = 1 / block_size + 4 / (block_size * self.DOUBLE_QUANT_BLOCK_SIZE)
+        else:
+            constant_bytes = 4 / block_size
+        return self.NF4_BYTES_PER_PARAM + constant_bytes
+
+    def calculate_base_weight_bytes(self, model: ModelInfo, request: TrainingRequest,
+                                    bytes_per_param: float) -> float:
+        """
+        冻结基座模型权重的字节数
+
+        QLoRA只量化Transformer层的线性投影，词嵌入、LM head和归一化层保持训练精度
+        """
+        if request.training_method != TrainingMethod.QLORA:
+            return self.get_total_parameters(model) * bytes_per_param
+        lora_config = request.lora_config or LoRAConfig()
+        linear_params = self.get_linear_parameters(model)
+        return (linear_params * self.get_quantized_bytes_per_param(lora_config) +
+                (self.get_total_parameters(model) - linear_params) * bytes_per_param)
+
+    def calculate_activation_bytes(self, model: ModelInfo, request: TrainingRequest) -> float:
+        """
+        单个微批次适配器额外保存的激活值字节数（完整层栈）
+
+        每个目标矩阵保存dropout后的输入（dropout为0时与基座层共享输入）和rank维中间结果；
+        DoRA另保存基座层输出用于幅值缩放的反向
+        """
+        lora_config = request.lora_config or LoRAConfig()
+        shapes = self.get_linear_shapes(model)
+        rank = self.get_ranks(request.training_method, lora_config)["allocated"]
+        tokens = request.batch_size * request.sequence_length
+
+        elements = 0
+        for module in self.get_target_modules(model, lora_config):
+            in_dim, out_dim = shapes[module]
+            module_elements = rank
+            if lora_config.dropout > 0:
+                module_elements += in_dim
+            if request.training_method == TrainingMethod.DORA:
+                module_elements += out_dim
+            elements += self.get_module_copies(model, module, active=True) * module_elements
+        return tokens * elements * model.num_layers * self.PRECISION_BYTES[request.precision]
+
+    def calculate_extra_flops_per_token(self, model: ModelInfo, request: TrainingRequest) -> float:
+        """
+        DoRA每个token分摊的额外前向FLOPs
+
+        每个微批次对每个目标矩阵计算一次 W + BA（2 * r * in * out）及其列范数（约3 * in * out），
+        范数不参与反向（按DoRA论文做detach）
+        """
+        if request.training_method != TrainingMethod.DORA:
+            return 0.0
+        lora_config = request.lora_config or LoRAConfig()
+        shapes = self.get_linear_shapes(model)
+        rank = lora_config.rank
+        per_microbatch = model.num_layers * sum(
+            self.get_module_copies(model, m) * (2 * rank + 3) * shapes[m][0] * shapes[m][1]
+            for m in self.get_target_modules(model, lora_config)
+        )
+        return per_microbatch / (request.batch_size * request.sequence_length)
+
+    def calculate_importance_bytes(self, request: TrainingRequest, adapter_parameters: int) -> float:
+        """AdaLoRA重要性统计的字节数"""
+        if request.training_method != TrainingMethod.ADALORA:
+            return 0.0
+        return (adapter_parameters * self.ADALORA_IMPORTANCE_STATES *
+                self.PRECISION_BYTES[PrecisionType.FP32])
+
+    def calculate_dequantize_bytes(self, model: ModelInfo, request: TrainingRequest,
+                                   stage_fraction: float) -> float:
+        """
+        QLoRA单卡每次前向或反向反量化基座权重读写的显存字节数
+
+        读取NF4权重与量化常数，写出训练精度的权重
+        """
+        if request.training_method != TrainingMethod.QLORA:
+            return 0.0
+        lora_config = request.lora_config or LoRAConfig()
+        linear_params = self.get_linear_parameters(model) * stage_fraction / request.tensor_parallel
+        return linear_params * (self.get_quantized_bytes_per_param(lora_config) +
+                                self.PRECISION_BYTES[request.precision])
+
+    def summarize(self, model: ModelInfo, request: TrainingRequest) -> Dict[str, Any]:
+        """
+        汇总适配器配置对参数量和显存的影响
+
+        Returns:
+            适配器分析结果
+        """
+        lora_config = request.lora_config or LoRAConfig()
+        modules = self.get_target_modules(model, lora_config)
+        ranks = self.get_ranks(request.training_method, lora_config)
+        parameters = self.calculate_parameters(model, request.training_method, lora_config)
+        bytes_per_param = self.PRECISION_BYTES[request.precision]
+
+        summary = {
+            "training_method": request.training_method.value,
+            "target_modules": modules,
+            "rank": ranks["allocated"],
+            "adapter_parameters": parameters,
+            "trainable_ratio": parameters["total"] / self.get_total_parameters(model),
+            "base_weights_gb": self.convert_bytes(
+                self.calculate_base_weight_bytes(model, request, bytes_per_param)
+            )
+        }
+        if request.training_method == TrainingMethod.QLORA:
+            summary["quantization"] = {
+                "quant_type": "nf4",
+                "block_size": lora_config.quant_block_size,
+                "double_quant": lora_config.double_quant,
+                "bytes_per_param": self.get_quantized_bytes_per_param(lora_config),
+                "quantized_parameters": self.get_linear_parameters(model)
+            }
+        if request.training_method == TrainingMethod.ADALORA:
+            # 总rank预算：剪枝后所有目标矩阵平均保留target个奇异值
+            summary["rank_budget"] = {
+                "init_rank": ranks["allocated"],
+                "target_rank": ranks["target"],
+                "total_budget": (ranks["target"] * model.num_layers *
+                                 sum(self.get_module_copies(model, m) for m in modules)),
+                "final_parameters": parameters["total"] * ranks["target"] // ranks["allocated"],
+                "importance_states_gb": self.convert_bytes(
+                    self.calculate_importance_bytes(request, parameters["total"])
+                )
+            }
+        return summary
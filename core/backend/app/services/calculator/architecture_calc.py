@@ -0,0 +1,80 @@
+"""
+模型结构参数量计算服务
+
+按结构字段逐项统计参数量（h=隐藏维度，L=层数，V=词表大小，q=查询投影维度，
+kv=K/V投影维度，I=MLP中间层维度，E=路由专家数）：
+- 词嵌入：V*h；LM head与词嵌入共享权重时不单独计数，否则另有V*h
+- 注意力：Q、O投影各 h*q，K、V投影各 h*kv（GQA/MQA按KV头数计）
+- MLP：门控结构（SwiGLU/GeGLU）gate、up、down三个 h*I 矩阵，否则两个；
+  MoE模型每层E个路由专家（按专家FFN维度）、共享专家和 h*E 的路由门控
+- 归一化：每层注意力和MLP前各一个，另有最终归一化；RMSNorm只有权重h，LayerNorm另有偏置h
+- 偏置：QKV偏置（Qwen、ChatGLM等），以及ChatGLM输出投影和MLP的线性层偏置
+结构相同的模型共享一次计算结果（按结构缓存）。
+"""
+
+from functools import lru_cache
+from typing import Dict, NamedTuple
+
+
+class ArchitectureShape(NamedTuple):
+    """决定参数量的模型结构（缓存键）"""
+    hidden_size: int
+    num_layers: int
+    vocab_size: int
+    q_dim: int
+    kv_dim: int
+    intermediate_size: int        # 稠密MLP或单个专家的FFN中间层维度
+    num_experts: int              # 路由专家数，稠密模型为0
+    num_shared_experts: int
+    gated_mlp: bool
+    tie_word_embeddings: bool
+    qkv_bias: bool
+    linear_bias: bool
+    layer_norm: bool              # LayerNorm（含偏置），否则为RMSNorm
+
+
+@lru_cache(maxsize=None)
+def count_parameters(shape: ArchitectureShape) -> Dict[str, int]:
+    """
+    计算各组成部分的参数量（所有层）
+
+    Args:
+        shape: 模型结构
+
+    Returns:
+        {"embedding", "lm_head", "attention", "mlp", "experts", "router", "norms", "final_norm", "biases"}，
+        mlp为稠密MLP或MoE共享专家，experts为路由专家
+    """
+    h, layers, intermediate = shape.hidden_size, shape.num_layers, shape.intermediate_size
+    num_matrices = 3 if shape.gated_mlp else 2
+    ffn_params = num_matrices * h * intermediate
+    norm_params = 2 * h if shape.layer_norm else h
+
+    if shape.num_experts:
+        mlp = shape.num_shared_experts * ffn_params
+        experts = shape.num_experts * ffn_params
+        router = h * shape.num_experts
+        num_ffns = shape.num_experts + shape.num_shared_experts
+    else:
+        mlp, experts, router = ffn_params, 0, 0
+        num_ffns = 1
+
+    biases = 0
+    if shape.qkv_bias:
+        biases += shape.q_dim + 2 * shape.kv_dim
+    if shape.linear_bias:
+        # 输出投影偏置h，MLP的上投影（门控结构含gate）偏置和下投影偏置h
+        biases += h + num_ffns * ((num_matrices - 1) * intermediate + h)
+
+    embedding = shape.vocab_size * h
+    return {
+        "embedding": embedding,
+        "lm_head": 0 if shape.tie_word_embeddings else embedding,
+        "attention": layers * h * (2 * shape.q_dim + 2 * shape.kv_dim),
+        "mlp": layers * mlp,
+        "experts": layers * experts,
+        "router": layers * router,
+        "norms": layers * 2 * norm_params,
+        "final_norm": norm_params,
+        "biases": layers * biases
+    }
@@ -0,0 +1,127 @@
+"""
+注意力内核显存计算服务
+
+按注意力实现分别统计注意力计算需要的显存（b=批次，a=注意力头数，t=张量并行度，
+q=查询token数，k=键值token数，e=激活值字节数）：
+- eager：显式生成注意力分数矩阵，训练时为反向保存softmax输出 aqkb·e（attention dropout另存
+  1字节掩码和dropout输出）；前向峰值还包括FP32的softmax结果；GQA时K/V经repeat_kv复制到全部头
+- SDPA：显存高效内核不生成分数矩阵，只保存每个查询的FP32 log-sum-exp（按32个查询对齐），
+  dropout掩码在反向时由随机数种子重新生成；K/V同样经repeat_kv复制到全部头
+- FlashAttention-2：分块计算，只保存FP32 log-sum-exp，原生支持GQA，不复制K/V
+- Unsloth：注意力使用FlashAttention-2内核
+注意力分数部分与查询/键值长度的乘积成正比（O(N²)），softmax统计只与查询长度成正比（O(N)）。
+"""
+
+import math
+from typing import Dict
+
+from ...models.training import AccelerationMethod
+from ...models.common import ModelInfo, AttentionKernel
+from .base_calc import BaseCalculator
+
+
+class AttentionCalculator(BaseCalculator):
+    """注意力内核显存计算器"""
+
+    # softmax统计（log-sum-exp）的字节数，各内核均以FP32保存
+    SOFTMAX_STATS_BYTES = 4
+
+    # eager实现中softmax按FP32计算后再转回激活值精度
+    EAGER_SOFTMAX_BYTES = 4
+
+    # SDPA显存高效内核的log-sum-exp按查询数对齐的粒度
+    MEM_EFFICIENT_LSE_ALIGNMENT = 32
+
+    # dropout掩码每个元素的字节数
+    DROPOUT_MASK_BYTES = 1
+
+    # 训练加速方法使用的注意力内核
+    TRAINING_KERNELS = {
+        AccelerationMethod.NONE: AttentionKernel.EAGER,
+        AccelerationMethod.SDPA: AttentionKernel.SDPA,
+        AccelerationMethod.FLASH_ATTENTION_2: AttentionKernel.FLASH_ATTENTION_2,
+        AccelerationMethod.UNSLOTH: AttentionKernel.FLASH_ATTENTION_2
+    }
+
+    def get_training_kernel(self, acceleration_method: AccelerationMethod) -> AttentionKernel:
+        """获取训练加速方法对应的注意力内核"""
+        return self.TRAINING_KERNELS[acceleration_method]
+
+    def materializes_scores(self, kernel: AttentionKernel) -> bool:
+        """是否显式生成注意力分数矩阵"""
+        return kernel == AttentionKernel.EAGER
+
+    def get_softmax_stats_queries(self, kernel: AttentionKernel, query_tokens: float) -> float:
+        """softmax统计的查询数，SDPA显存高效内核按对齐粒度向上取整"""
+        if kernel == AttentionKernel.SDPA:
+            alignment = self.MEM_EFFICIENT_LSE_ALIGNMENT
+            return math.ceil(query_tokens / alignment) * alignment
+        return query_tokens
+
+    def get_expanded_kv_dim(self, model: ModelInfo, kernel: AttentionKernel) -> int:
+        """
+        GQA时repeat_kv为K/V额外复制出的维度
+
+        eager和SDPA要求K/V与查询头数相同，FlashAttention-2直接按KV头分组计算
+        """
+        if kernel == AttentionKernel.FLASH_ATTENTION_2:
+            return 0
+        q_dim = model.num_heads * self.get_head_dim(model)
+        return q_dim - self.get_kv_hidden_size(model)
+
+    def calculate_saved_bytes(self, model: ModelInfo, kernel: AttentionKernel, batch_size: int,
+                              query_tokens: float, kv_tokens: float, bytes_per_element: float,
+                              tensor_parallel: int, attention_dropout: float = 0.0) -> Dict[str, float]:
+        """
+        计算单层注意力为反向保存的显存（字节，单个张量并行rank）
+
+        Args:
+            model: 模型信息
+            kernel: 注意力内核
+            batch_size: 微批次大小
+            query_tokens: 每个序列的查询token数
+            kv_tokens: 每个序列的键值token数
+            bytes_per_element: 激活值每元素字节数
+            tensor_parallel: 张量并行度
+            attention_dropout: 注意力dropout概率
+
+        Returns:
+            {"attention_scores": 注意力分数及dropout, "softmax_stats": log-sum-exp,
+             "expanded_kv": repeat_kv复制的K/V}
+        """
+        heads = model.num_heads / tensor_parallel
+        attention_scores = 0.0
+        softmax_stats = 0.0
+        if self.materializes_scores(kernel):
+            score_elements = heads * query_tokens * kv_tokens * batch_size
+            attention_scores = bytes_per_element * score_elements
+            if attention_dropout > 0:
+                attention_scores += (self.DROPOUT_MASK_BYTES + bytes_per_element) * score_elements
+        else:
+            softmax_stats = (self.SOFTMAX_STATS_BYTES * heads * batch_size *
+                             self.get_softmax_stats_queries(kernel, query_tokens))
+
+        expanded_kv = (2 * kv_tokens * batch_size * self.get_expanded_kv_dim(model, kernel) *
+                       bytes_per_element / tensor_parallel)
+        return {
+            "attention_scores": attention_scores,
+            "softmax_stats": softmax_stats,
+            "expanded_kv": expanded_kv
+        }
+
+    def calculate_workspace_bytes(self, model: ModelInfo, kernel: AttentionKernel, batch_size: int,
+                                  query_tokens: float, kv_tokens: float, bytes_per_element: float,
+                                  tensor_parallel: int) -> float:
+        """
+        计算单层注意力前向的临时显存峰值（字节，单个张量并行rank），用于推理
+
+        eager同时持有分数矩阵和FP32的softmax结果；其他内核只有log-sum-exp和复制的K/V
+        """
+        saved = self.calculate_saved_bytes(
+            model, kernel, batch_size, query_tokens, kv_tokens, bytes_per_element, tensor_parallel
+        )
+        workspace = saved["softmax_stats"] + saved["expanded_kv"]
+        if self.materializes_scores(kernel):
+            workspace += (saved["attention_scores"] *
+                          (bytes_per_element + self.EAGER_SOFTMAX_BYTES) / bytes_per_element)
+        return workspace
@@ -6,6 +6,8 @@ from typing import Dict, Any, Optional
 from enum import Enum
 
 from ...models.common import PrecisionType, ModelInfo
+from ...utils.constants import MODEL_ARCHITECTURES
+from .architecture_calc import ArchitectureShape, count_parameters
 
 
 class MemoryUnit(str, Enum):
@@ -32,6 +34,7 @@ class BaseCalculator:
         "pytorch": 1.5,
         "transformers": 1.2,
         "deepspeed": 2.0,
+        "vllm": 2.0,
         "default": 1.0
     }
     
@@ -79,9 +82,183 @@ class BaseCalculator:
         """
         # 参数量 * 精度字节数
         bytes_per_param = self.PRECISION_BYTES[precision]
-        total_bytes = model.parameters * bytes_per_param
+        total_bytes = self.get_total_parameters(model) * bytes_per_param
         return self.convert_bytes(total_bytes, MemoryUnit.BYTES, MemoryUnit.GB)
     
+    def get_head_dim(self, model: ModelInfo) -> int:
+        """
+        获取单个注意力头的维度
+        
+        Args:
+            model: 模型信息
+            
+        Returns:
+            注意力头维度，未指定时为 hidden_size / num_heads
+        """
+        return model.head_dim or model.hidden_size // model.num_heads
+    
+    def get_num_kv_heads(self, model: ModelInfo) -> int:
+        """
+        获取KV头数
+        
+        优先使用模型显式指定的num_key_value_heads，其次使用架构默认值
+        （GQA/MQA架构），否则按多头注意力处理（KV头数等于注意力头数）
+        
+        Args:
+            model: 模型信息
+            
+        Returns:
+            KV头数
+        """
+        if model.num_key_value_heads:
+            return model.num_key_value_heads
+        
+        architecture = MODEL_ARCHITECTURES.get(model.architecture, {})
+        if architecture.get("attention_type") in ("group_query", "multi_query"):
+            return min(model.num_heads, architecture.get("num_key_value_heads", 1))
+        
+        return model.num_heads
+    
+    def get_kv_hidden_size(self, model: ModelInfo) -> int:
+        """
+        获取单层K（或V）投影的输出维度
+        
+        Args:
+            model: 模型信息
+            
+        Returns:
+            num_kv_heads * head_dim
+        """
+        return self.get_num_kv_heads(model) * self.get_head_dim(model)
+    
+    def is_gated_mlp(self, model: ModelInfo) -> bool:
+        """
+        判断MLP是否为门控结构（SwiGLU/GeGLU，含gate、up、down三个投影）
+        
+        Args:
+            model: 模型信息
+            
+        Returns:
+            SiLU激活的架构按门控MLP处理
+        """
+        architecture = MODEL_ARCHITECTURES.get(model.architecture, {})
+        return architecture.get("activation", "silu") in ("silu", "swiglu", "geglu")
+    
+    def get_intermediate_size(self, model: ModelInfo) -> int:
+        """
+        获取MLP中间层维度
+        
+        未指定时由标称参数量反推：扣除词嵌入、LM head、注意力投影、归一化和偏置后，
+        剩余参数平均分给每层的MLP投影矩阵；标称参数量也未指定时按架构的FFN倍数计算
+        
+        Args:
+            model: 模型信息
+            
+        Returns:
+            MLP中间层维度
+        """
+        if model.intermediate_size:
+            return model.intermediate_size
+        
+        hidden = model.hidden_size
+        # MoE模型的MLP参数平均分给路由专家和共享专家
+        num_ffns = (model.num_experts + model.num_shared_experts) if self.is_moe(model) else 1
+        if not model.parameters:
+            architecture = MODEL_ARCHITECTURES.get(model.architecture, {})
+            return architecture.get("ffn_multiplier", 4) * hidden // num_ffns
+        
+        other_params = sum(count_parameters(self._build_architecture_shape(model, 0)).values())
+        mlp_params = (model.parameters - other_params) / model.num_layers
+        num_matrices = 3 if self.is_gated_mlp(model) else 2
+        return max(hidden // num_ffns, int(mlp_params / (num_matrices * hidden * num_ffns)))
+    
+    def _build_architecture_shape(self, model: ModelInfo, intermediate_size: int) -> ArchitectureShape:
+        """按给定的FFN维度构造模型结构"""
+        architecture = MODEL_ARCHITECTURES.get(model.architecture, {})
+        qkv_bias = model.attention_bias
+        if qkv_bias is None:
+            qkv_bias = architecture.get("qkv_bias", False)
+        return ArchitectureShape(
+            hidden_size=model.hidden_size,
+            num_layers=model.num_layers,
+            vocab_size=model.vocab_size,
+            q_dim=model.num_heads * self.get_head_dim(model),
+            kv_dim=self.get_kv_hidden_size(model),
+            intermediate_size=intermediate_size,
+            num_experts=model.num_experts if self.is_moe(model) else 0,
+            num_shared_experts=model.num_shared_experts if self.is_moe(model) else 0,
+            gated_mlp=self.is_gated_mlp(model),
+            tie_word_embeddings=model.tie_word_embeddings,
+            qkv_bias=qkv_bias,
+            linear_bias=architecture.get("linear_bias", False),
+            layer_norm=architecture.get("normalization") == "layer_norm"
+        )
+    
+    def get_architecture_shape(self, model: ModelInfo) -> ArchitectureShape:
+        """获取决定参数量的模型结构"""
+        return self._build_architecture_shape(model, self.get_expert_intermediate_size(model))
+    
+    def get_parameter_breakdown(self, model: ModelInfo) -> Dict[str, int]:
+        """
+        按结构统计的各组成部分参数量（所有层）
+        
+        Args:
+            model: 模型信息
+            
+        Returns:
+            词嵌入、LM head、注意力、MLP、路由专家、路由门控、归一化、偏置的参数量
+        """
+        return dict(count_parameters(self.get_architecture_shape(model)))
+    
+    def get_total_parameters(self, model: ModelInfo) -> int:
+        """按结构统计的总参数量，显存计算均使用该值"""
+        return sum(count_parameters(self.get_architecture_shape(model)).values())
+    
+    def get_layer_parameters(self, model: ModelInfo) -> float:
+        """单个Transformer层的参数量（不含词嵌入、LM head和最终归一化）"""
+        breakdown = count_parameters(self.get_architecture_shape(model))
+        outside = breakdown["embedding"] + breakdown["lm_head"] + breakdown["final_norm"]
+        return (sum(breakdown.values()) - outside) / model.num_layers
+    
+    def is_moe(self, model: ModelInfo) -> bool:
+        """是否为混合专家（MoE）模型"""
+        return bool(model.num_experts and model.num_experts > 1)
+    
+    def get_expert_intermediate_size(self, model: ModelInfo) -> int:
+        """单个专家（或稠密MLP）的FFN中间层维度"""
+        return model.moe_intermediate_size or self.get_intermediate_size(model)
+    
+    def get_active_intermediate_size(self, model: ModelInfo) -> int:
+        """
+        每个token实际经过的FFN中间层维度之和
+        
+        MoE模型为 (激活的路由专家数 + 共享专家数) * 专家FFN维度，稠密模型为MLP中间层维度
+        """
+        if not self.is_moe(model):
+            return self.get_intermediate_size(model)
+        experts = model.num_experts_per_tok + model.num_shared_experts
+        return experts * self.get_expert_intermediate_size(model)
+    
+    def get_expert_parameters(self, model: ModelInfo) -> int:
+        """
+        路由专家的参数总量（所有层），稠密模型为0
+        
+        共享专家每个token都会经过，与注意力等参数一样按稠密参数处理
+        """
+        return count_parameters(self.get_architecture_shape(model))["experts"]
+    
+    def get_active_parameters(self, model: ModelInfo) -> int:
+        """
+        每个token实际参与计算的参数量
+        
+        显存按总参数量计，计算量按激活参数量计：总参数减去未被路由到的专家
+        """
+        total = self.get_total_parameters(model)
+        if not self.is_moe(model):
+            return total
+        inactive = model.num_experts - model.num_experts_per_tok
+        return total - self.get_expert_parameters(model) * inactive // model.num_experts
+    
     def get_framework_overhead(self, framework: str = "default") -> float:
         """
         获取框架开销
@@ -0,0 +1,440 @@
+"""
+分布式训练通信开销计算服务
+
+基于α-β模型（延迟 + 数据量/带宽）估算集合通信耗时：
+- 张量并行：每层前向/反向的激活值all-reduce
+- 流水线并行：相邻stage间的激活值/梯度点对点传输
+- 上下文并行：Ring Attention逐块传递KV（可与分块注意力计算重叠），
+  Ulysses对Q/K/V和注意力输出做all-to-all（不可掩盖）
+- 专家并行：每个MoE层前向dispatch/combine两次all-to-all，反向各一次（不可掩盖）
+- 数据并行：按ZeRO阶段的梯度all-reduce、reduce-scatter和参数all-gather
+  （上下文并行的各rank持有相同参数，梯度在数据并行 * 上下文并行组内规约；
+  路由专家按专家并行切分，其梯度只在 数据并行 * 上下文并行 / 专家并行 的组内规约）
+再与计算耗时合成训练步耗时，给出1-1024卡的扩展效率。
+"""
+
+import math
+from typing import Dict, Any, Optional, List
+
+from ...models.training import TrainingRequest, DeepSpeedStage, ActivationRecomputation
+from ...models.common import PrecisionType, ModelInfo, ContextParallelMethod
+from ...utils.constants import GPU_SPECS, DEFAULT_GPU_NAME
+from .base_calc import BaseCalculator
+from .offload_calc import OffloadCalculator
+from .moe_calc import MoECalculator
+
+
+class CommunicationCalculator(BaseCalculator):
+    """分布式训练通信开销计算器"""
+
+    # NCCL集合通信可达到的链路带宽比例
+    BUS_BANDWIDTH_EFFICIENCY = 0.8
+
+    # 单次通信步骤的延迟（秒）
+    LINK_LATENCY_S = {
+        "nvlink": 5e-6,
+        "pcie": 10e-6,
+        "network": 20e-6
+    }
+
+    # 数据并行通信可被反向计算掩盖的比例
+    COMM_OVERLAP_EFFICIENCY = 0.7
+
+    # 反向计算耗时占一个微批次计算耗时的比例（反向约为前向的2倍）
+    BACKWARD_COMPUTE_FRACTION = 2 / 3
+
+    # 扩展效率曲线的GPU数量
+    SCALING_GPU_COUNTS = [2 ** i for i in range(11)]
+
+    def __init__(self):
+        """初始化通信开销计算器"""
+        super().__init__()
+        self.offload_calculator = OffloadCalculator()
+        self.moe_calculator = MoECalculator()
+
+    def get_gpu_specs(self, gpu_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        获取GPU规格
+
+        Args:
+            gpu_name: GPU型号，未指定时使用默认GPU
+
+        Returns:
+            GPU规格字典
+        """
+        gpu_name = gpu_name or DEFAULT_GPU_NAME
+        if gpu_name not in GPU_SPECS:
+            raise ValueError(f"GPU型号 {gpu_name} 不存在")
+        return GPU_SPECS[gpu_name]
+
+    def get_link(self, gpu_specs: Dict[str, Any], group_size: int, stride: int) -> Dict[str, Any]:
+        """
+        获取通信组使用的链路
+
+        按Megatron的rank排布（张量并行在最内层，其次上下文并行、数据并行，最外层流水线并行），
+        通信组跨越的rank范围 group_size * stride 超过单节点GPU数时走跨节点网络，
+        否则节点内优先使用NVLink，没有NVLink时走PCIe
+
+        Args:
+            gpu_specs: GPU规格
+            group_size: 通信组大小
+            stride: 组内相邻rank的间隔
+
+        Returns:
+            链路信息：类型、带宽（bytes/s）、延迟（秒）
+        """
+        gpus_per_node = gpu_specs.get("gpus_per_node", 8)
+        if group_size * stride > gpus_per_node:
+            link_type = "network"
+            bandwidth_gb_s = gpu_specs.get("interconnect_bandwidth_gb_s")
+        elif gpu_specs.get("nvlink_bandwidth_gb_s"):
+            link_type = "nvlink"
+            bandwidth_gb_s = gpu_specs["nvlink_bandwidth_gb_s"]
+        else:
+            link_type = "pcie"
+            bandwidth_gb_s = gpu_specs.get("pcie_bandwidth_gb_s")
+        if not bandwidth_gb_s:
+            raise ValueError(f"GPU规格缺少{link_type}带宽信息")
+
+        # gpu.json中的带宽单位为GB/s（十进制）
+        return {
+            "type": link_type,
+            "bandwidth": bandwidth_gb_s * 1e9 * self.BUS_BANDWIDTH_EFFICIENCY,
+            "latency": self.LINK_LATENCY_S[link_type]
+        }
+
+    def all_reduce(self, size_bytes: float, group_size: int, link: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        all-reduce耗时，取环形与树形算法中较快者
+
+        - 环形：2(n-1)/n * S/B + 2(n-1)α，带宽最优，延迟随组大小线性增长
+        - 树形（双二叉树）：2 * S/B + 2log2(n)α，适合小消息和大规模组
+
+        Returns:
+            {"time": 耗时（秒）, "algorithm": "ring"/"tree"}
+        """
+        if group_size <= 1:
+            return {"time": 0.0, "algorithm": None}
+
+        n = group_size
+        ring = 2 * (n - 1) / n * size_bytes / link["bandwidth"] + 2 * (n - 1) * link["latency"]
+        tree = 2 * size_bytes / link["bandwidth"] + 2 * (n - 1).bit_length() * link["latency"]
+        if tree < ring:
+            return {"time": tree, "algorithm": "tree"}
+        return {"time": ring, "algorithm": "ring"}
+
+    def reduce_scatter(self, size_bytes: float, group_size: int, link: Dict[str, Any]) -> float:
+        """
+        reduce-scatter耗时（环形）：(n-1)/n * S/B + (n-1)α
+
+        Args:
+            size_bytes: 分片前的完整数据量
+        """
+        if group_size <= 1:
+            return 0.0
+        n = group_size
+        return (n - 1) / n * size_bytes / link["bandwidth"] + (n - 1) * link["latency"]
+
+    def all_gather(self, size_bytes: float, group_size: int, link: Dict[str, Any]) -> float:
+        """all-gather耗时，与reduce-scatter对称"""
+        return self.reduce_scatter(size_bytes, group_size, link)
+
+    def all_to_all(self, size_bytes: float, group_size: int, link: Dict[str, Any]) -> float:
+        """
+        all-to-all耗时：每个rank把(n-1)/n的数据发给其他rank，(n-1)/n * S/B + (n-1)α
+
+        Args:
+            size_bytes: 单个rank持有的数据量
+        """
+        if group_size <= 1:
+            return 0.0
+        n = group_size
+        return (n - 1) / n * size_bytes / link["bandwidth"] + (n - 1) * link["latency"]
+
+    def context_parallel_forward(self, model: ModelInfo, method: ContextParallelMethod,
+                                 context_parallel: int, tensor_parallel: int, tokens: float,
+                                 bytes_per_element: float, link: Dict[str, Any]) -> float:
+        """
+        单层前向注意力的上下文并行通信耗时（训练与推理预填充共用）
+
+        - Ring：依次接收其他cp-1个rank的K/V块
+        - Ulysses：对Q、K、V和注意力输出各做一次all-to-all，在序列切分与头切分之间转换
+
+        Args:
+            tokens: 单个上下文并行rank上的token数
+        """
+        if context_parallel <= 1:
+            return 0.0
+        q_dim = model.num_heads * self.get_head_dim(model)
+        kv_dim = self.get_kv_hidden_size(model)
+        if method == ContextParallelMethod.RING:
+            kv_chunk = 2 * tokens * kv_dim * bytes_per_element / tensor_parallel
+            return (context_parallel - 1) * self.p2p(kv_chunk, link)
+        qkvo = tokens * (2 * q_dim + 2 * kv_dim) * bytes_per_element / tensor_parallel
+        return self.all_to_all(qkvo, context_parallel, link)
+
+    def context_parallel(self, model: ModelInfo, request: TrainingRequest, tokens: float,
+                         layers: int, link: Dict[str, Any]) -> float:
+        """
+        单个微批次在layers层上的上下文并行通信耗时
+
+        Ring反向需传递K/V及其梯度（2倍前向数据量），Ulysses反向对各梯度再做一次all-to-all；
+        完全重计算时再执行一次前向通信
+
+        Args:
+            model: 模型信息
+            request: 训练预估请求
+            tokens: 微批次在单个上下文并行rank上的token数
+            layers: 层数
+            link: 上下文并行组使用的链路
+        """
+        forward = self.context_parallel_forward(
+            model, request.context_parallel_method, request.context_parallel,
+            request.tensor_parallel, tokens, self.PRECISION_BYTES[request.precision], link
+        )
+        forward_passes = 2 if request.activation_recomputation == ActivationRecomputation.FULL else 1
+        backward_passes = 2 if request.context_parallel_method == ContextParallelMethod.RING else 1
+        return (forward_passes + backward_passes) * forward * layers
+
+    def p2p(self, size_bytes: float, link: Dict[str, Any]) -> float:
+        """点对点传输耗时"""
+        return size_bytes / link["bandwidth"] + link["latency"]
+
+    def get_peak_flops(self, gpu_specs: Dict[str, Any], precision: PrecisionType) -> float:
+        """
+        获取GPU峰值算力（FLOPS）
+
+        FP32训练按TF32 Tensor Core计，约为FP16算力的一半
+        """
+        peak = gpu_specs.get("fp16_tflops") or 0
+        if precision == PrecisionType.FP32:
+            peak /= 2
+        if peak <= 0:
+            raise ValueError("GPU规格缺少算力信息")
+        return peak * 1e12
+
+    def estimate_step(self, model: ModelInfo, request: TrainingRequest, gpu_specs: Dict[str, Any],
+                      data_parallel: int, flops_per_token: float, stage_params: float,
+                      trainable_stage_params: float, stage_layers: int,
+                      bubble_fraction: float, state_bytes: Dict[str, float],
+                      dequantize_bytes: float = 0.0,
+                      attention_flops_per_token: float = 0.0,
+                      expert_fraction: float = 0.0,
+                      trainable_expert_fraction: float = 0.0) -> Dict[str, Any]:
+        """
+        估算单个训练步（一次优化器更新）的耗时
+
+        - 计算：每个流水线副本 tp * pp * cp 张卡按请求的算力利用率执行全部微批次，再按气泡率放大；
+          QLoRA每次前向、反向（及完全重计算）先按显存带宽反量化基座权重
+        - 张量并行：每层前向2次、反向2次激活值all-reduce（完全重计算再加2次，选择性重计算
+          只重算注意力分数，不增加通信；序列并行以等量的reduce-scatter/all-gather代替），不可掩盖
+        - 流水线并行：每个微批次前向发送激活值、反向发送梯度各一次
+        - 上下文并行：Ring可被注意力计算掩盖，Ulysses的all-to-all不可掩盖
+        - 数据并行：ZeRO 0为梯度all-reduce；Stage 1为梯度reduce-scatter + 参数all-gather；
+          Stage 2每个微批次reduce-scatter梯度；Stage 3每个微批次前向、反向各all-gather一次参数
+          并reduce-scatter梯度。只在最后一个微批次通信的可被其反向计算掩盖，
+          逐微批次通信的可被全部反向计算掩盖
+        - 卸载：CPU/NVMe卸载的PCIe、NVMe传输和CPU优化器更新耗时
+
+        Args:
+            model: 模型信息
+            request: 训练预估请求
+            gpu_specs: GPU规格
+            data_parallel: 数据并行度
+            flops_per_token: 每个token实际执行的计算量（完整模型，含重计算）
+            stage_params: 最大流水线stage的参数量（张量并行切分前）
+            trainable_stage_params: 该stage的可训练参数量
+            stage_layers: 该stage的层数
+            bubble_fraction: 流水线气泡率
+            state_bytes: 每个参数的权重、梯度、主权重、优化器状态字节数
+            dequantize_bytes: QLoRA单卡每次反量化读写的字节数
+            attention_flops_per_token: 每个token的注意力分数前向FLOPs（完整模型）
+            expert_fraction: 路由专家参数占stage参数的比例
+            trainable_expert_fraction: 路由专家参数占可训练参数的比例
+
+        Returns:
+            步耗时分解
+        """
+        tp = request.tensor_parallel
+        pp = request.pipeline_parallel
+        cp = request.context_parallel
+        num_microbatches = request.gradient_accumulation_steps
+        bytes_per_element = self.PRECISION_BYTES[request.precision]
+        microbatch_tokens = request.batch_size * request.sequence_length
+        # 上下文并行rank上的本地token数
+        local_tokens = microbatch_tokens / cp
+        # ZeRO分片和梯度规约的范围
+        dp_group = data_parallel * cp
+        # 专家并行组取自数据并行 * 上下文并行的rank
+        ep = math.gcd(request.expert_parallel, dp_group)
+
+        # 计算耗时
+        peak_flops = self.get_peak_flops(gpu_specs, request.precision)
+        replica_flops = tp * pp * cp * peak_flops * request.model_flops_utilization
+        microbatch_compute = flops_per_token * microbatch_tokens / replica_flops
+        full_recompute = request.activation_recomputation == ActivationRecomputation.FULL
+        dequantize_passes = 3 if full_recompute else 2
+        dequantize_time = (dequantize_passes * dequantize_bytes /
+                           (gpu_specs["memory_bandwidth_gb_s"] * 1e9))
+        microbatch_compute += dequantize_time
+        compute_time = microbatch_compute * num_microbatches / (1 - bubble_fraction)
+
+        links = {
+            "tensor_parallel": self.get_link(gpu_specs, tp, 1),
+            "context_parallel": self.get_link(gpu_specs, cp, tp),
+            "expert_parallel": self.get_link(gpu_specs, ep, tp),
+            "data_parallel": self.get_link(gpu_specs, data_parallel, tp * cp),
+            "pipeline_parallel": self.get_link(gpu_specs, pp, tp * cp * data_parallel)
+        }
+
+        # 张量并行：激活值 b * s * h（上下文并行时为本地序列）
+        activation_bytes = local_tokens * model.hidden_size * bytes_per_element
+        all_reduces_per_layer = 6 if full_recompute else 4
+        tp_all_reduce = self.all_reduce(activation_bytes, tp, links["tensor_parallel"])
+        tp_time = tp_all_reduce["time"] * all_reduces_per_layer * stage_layers * num_microbatches
+
+        # 流水线并行
+        pp_time = 0.0
+        if pp > 1:
+            pp_time = 2 * num_microbatches * self.p2p(activation_bytes, links["pipeline_parallel"])
+
+        # 上下文并行：Ring的K/V传递与分块注意力计算（前向 + 反向）重叠
+        cp_time = num_microbatches * self.context_parallel(
+            model, request, local_tokens, stage_layers, links["context_parallel"]
+        )
+        cp_exposed = cp_time
+        if request.context_parallel_method == ContextParallelMethod.RING:
+            attention_time = (3 * attention_flops_per_token * microbatch_tokens * num_microbatches /
+                              replica_flops)
+            cp_exposed = max(0.0, cp_time - attention_time * self.COMM_OVERLAP_EFFICIENCY)
+
+        # 专家并行：dispatch和combine，前向、反向（及完全重计算的前向）各一次
+        ep_time = 0.0
+        if ep > 1:
+            sp = tp if request.sequence_parallel else 1
+            dispatch_bytes = self.moe_calculator.calculate_dispatch_bytes(
+                model, local_tokens / sp, bytes_per_element
+            )
+            passes = 2 * (3 if full_recompute else 2)
+            ep_time = (num_microbatches * stage_layers * passes *
+                       self.all_to_all(dispatch_bytes, ep, links["expert_parallel"]))
+
+        # 数据并行：稠密参数在dp_group内通信，路由专家参数按ep切分后在dp_group / ep内通信
+        dp_link = links["data_parallel"]
+        gradient_bytes = trainable_stage_params / tp * state_bytes["gradient"]
+        param_bytes = stage_params / tp * state_bytes["param"]
+
+        def dp_collective(collective, size_bytes: float, fraction: float) -> float:
+            return (collective(size_bytes * (1 - fraction), dp_group, dp_link) +
+                    collective(size_bytes * fraction / ep, dp_group // ep, dp_link))
+
+        stage = request.deepspeed_stage or DeepSpeedStage.STAGE0
+        dp_algorithm = None
+        if stage == DeepSpeedStage.STAGE0:
+            dp_all_reduce = self.all_reduce(gradient_bytes * (1 - trainable_expert_fraction), dp_group, dp_link)
+            expert_all_reduce = self.all_reduce(gradient_bytes * trainable_expert_fraction / ep,
+                                                dp_group // ep, dp_link)
+            dp_time = dp_all_reduce["time"] + expert_all_reduce["time"]
+            dp_algorithm = dp_all_reduce["algorithm"]
+            overlap_window = microbatch_compute * self.BACKWARD_COMPUTE_FRACTION
+        elif stage == DeepSpeedStage.STAGE1:
+            dp_time = (dp_collective(self.reduce_scatter, gradient_bytes, trainable_expert_fraction) +
+                       dp_collective(self.all_gather, gradient_bytes, trainable_expert_fraction))
+            overlap_window = microbatch_compute * self.BACKWARD_COMPUTE_FRACTION
+        elif stage == DeepSpeedStage.STAGE2:
+            dp_time = (num_microbatches *
+                       dp_collective(self.reduce_scatter, gradient_bytes, trainable_expert_fraction) +
+                       dp_collective(self.all_gather, gradient_bytes, trainable_expert_fraction))
+            overlap_window = compute_time * self.BACKWARD_COMPUTE_FRACTION
+        else:
+            dp_time = num_microbatches * (
+                2 * dp_collective(self.all_gather, param_bytes, expert_fraction) +
+                dp_collective(self.reduce_scatter, gradient_bytes, trainable_expert_fraction)
+            )
+            overlap_window = compute_time
+        dp_exposed = max(0.0, dp_time - overlap_window * self.COMM_OVERLAP_EFFICIENCY)
+
+        offload = self.offload_calculator.estimate_step_cost(
+            request, gpu_specs, dp_group, stage_params, trainable_stage_params,
+            state_bytes, compute_time, self.COMM_OVERLAP_EFFICIENCY
+        )
+
+        step_time = (compute_time + tp_time + pp_time + cp_exposed + ep_time + dp_exposed +
+                     offload["exposed_s"])
+        tokens_per_step = microbatch_tokens * num_microbatches * data_parallel
+
+        return {
+            "num_gpus": tp * pp * cp * data_parallel,
+            "data_parallel": data_parallel,
+            "links": {name: link["type"] for name, link in links.items()},
+            "tensor_parallel_algorithm": tp_all_reduce["algorithm"],
+            "data_parallel_algorithm": dp_algorithm,
+            "compute_time_s": compute_time,
+            "dequantize_time_s": dequantize_time * num_microbatches,
+            "tensor_parallel_comm_s": tp_time,
+            "pipeline_parallel_comm_s": pp_time,
+            "context_parallel_comm_s": cp_time,
+            "context_parallel_exposed_s": cp_exposed,
+            "expert_parallel": ep,
+            "expert_parallel_comm_s": ep_time,
+            "data_parallel_comm_s": dp_time,
+            "data_parallel_exposed_s": dp_exposed,
+            "offload": offload,
+            "step_time_s": step_time,
+            "tokens_per_step": tokens_per_step,
+            "tokens_per_second": tokens_per_step / step_time
+        }
+
+    def calculate(self, model: ModelInfo, request: TrainingRequest, flops_per_token: float,
+                  stage_params: float, trainable_stage_params: float, stage_layers: int,
+                  state_bytes: Dict[str, float], bubble_fraction: float = 0.0,
+                  dequantize_bytes: float = 0.0,
+                  attention_flops_per_token: float = 0.0,
+                  expert_fraction: float = 0.0,
+                  trainable_expert_fraction: float = 0.0) -> Dict[str, Any]:
+        """
+        估算当前配置的训练步耗时，以及固定张量/流水线并行度时1-1024卡的扩展效率
+
+        扩展效率 = N卡时单卡吞吐 / 数据并行度为1时单卡吞吐（弱扩展，每卡批次大小不变）
+
+        Returns:
+            步耗时分解、扩展效率和扩展曲线
+        """
+        gpu_specs = self.get_gpu_specs(request.gpu_type)
+        replica_gpus = request.tensor_parallel * request.pipeline_parallel * request.context_parallel
+
+        def estimate(data_parallel: int) -> Dict[str, Any]:
+            return self.estimate_step(
+                model, request, gpu_specs, data_parallel, flops_per_token,
+                stage_params, trainable_stage_params, stage_layers, bubble_fraction, state_bytes,
+                dequantize_bytes, attention_flops_per_token, expert_fraction, trainable_expert_fraction
+            )
+
+        baseline = estimate(1)
+        baseline_per_gpu = baseline["tokens_per_second"] / replica_gpus
+
+        def efficiency(step: Dict[str, Any]) -> float:
+            return step["tokens_per_second"] / step["num_gpus"] / baseline_per_gpu
+
+        selected = estimate(request.data_parallel)
+        scaling_curve: List[Dict[str, Any]] = []
+        for num_gpus in self.SCALING_GPU_COUNTS:
+            if num_gpus % replica_gpus:
+                continue
+            step = estimate(num_gpus // replica_gpus)
+            scaling_curve.append({
+                "num_gpus": num_gpus,
+                "data_parallel": step["data_parallel"],
+                "step_time_s": step["step_time_s"],
+                "tokens_per_second": step["tokens_per_second"],
+                "data_parallel_exposed_s": step["data_parallel_exposed_s"],
+                "offload_exposed_s": step["offload"]["exposed_s"],
+                "scaling_efficiency": efficiency(step)
+            })
+
+        return {
+            "gpu": request.gpu_type or DEFAULT_GPU_NAME,
+            **selected,
+            "scaling_efficiency": efficiency(selected),
+            "scaling_curve": scaling_curve
+        }
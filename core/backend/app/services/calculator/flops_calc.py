@@ -0,0 +1,108 @@
+"""
+训练计算量（FLOPs）计算服务
+
+按各组成部分的参数量（见architecture_calc）逐项统计每个token的前向FLOPs（一次乘加计2 FLOPs）：
+- 注意力投影：Q、K、V、O四个投影矩阵（K/V按KV头数计）
+- 注意力分数：QK^T与注意力权重乘V，按完整序列长度计（与Megatron/PaLM的MFU口径一致）
+- MLP：门控结构三个投影，否则两个；MoE模型按每个token激活的路由专家和共享专家计算
+- 路由：MoE门控网络 hidden * num_experts 的矩阵乘
+- 输出层：LM head的logits
+反向计算量为前向的2倍（输入梯度 + 权重梯度）。完全重计算额外重算一次各层前向，
+选择性重计算只重算注意力分数部分。
+"""
+
+from typing import Dict, Any
+
+from ...models.training import TrainingRequest, TrainingMethod, ActivationRecomputation
+from ...models.common import ModelInfo
+from .base_calc import BaseCalculator
+
+
+class FlopsCalculator(BaseCalculator):
+    """训练计算量计算器"""
+
+    def calculate_forward_flops(self, model: ModelInfo, sequence_length: int) -> Dict[str, float]:
+        """
+        计算每个token的前向FLOPs分解（完整模型）
+
+        Args:
+            model: 模型信息
+            sequence_length: 序列长度
+
+        Returns:
+            各组成部分的每token前向FLOPs
+        """
+        parameters = self.get_parameter_breakdown(model)
+        q_dim = model.num_heads * self.get_head_dim(model)
+        active_experts = parameters["experts"]
+        if self.is_moe(model):
+            active_experts = active_experts * model.num_experts_per_tok / model.num_experts
+
+        return {
+            "attention_projections": 2 * parameters["attention"],
+            "attention_scores": model.num_layers * 2 * 2 * sequence_length * q_dim,
+            "mlp": 2 * (parameters["mlp"] + active_experts),
+            "router": 2 * parameters["router"],
+            # 共享权重时LM head与词嵌入为同一矩阵
+            "logits": 2 * (parameters["lm_head"] or parameters["embedding"])
+        }
+
+    @staticmethod
+    def calculate_recompute_flops(forward_breakdown: Dict[str, float], forward: float,
+                                  recomputation: ActivationRecomputation) -> float:
+        """
+        计算每个token的重计算FLOPs
+
+        完全重计算重算各层前向（不含输出层），选择性重计算只重算注意力分数
+        """
+        if recomputation == ActivationRecomputation.FULL:
+            return forward - forward_breakdown["logits"]
+        if recomputation == ActivationRecomputation.SELECTIVE:
+            return forward_breakdown["attention_scores"]
+        return 0.0
+
+    def calculate(self, model: ModelInfo, request: TrainingRequest, lora_parameters: int = 0,
+                  adapter_flops: float = 0.0) -> Dict[str, Any]:
+        """
+        计算每个token的训练FLOPs
+
+        - 全参数微调：反向 = 2 * 前向
+        - LoRA：冻结权重只计算输入梯度（反向矩阵乘与前向等量），注意力分数项没有权重仍为2倍，
+          适配器前向2P、反向4P；DoRA的合并权重范数只在前向计算（adapter_flops）
+        - 重计算：完全重计算重算各层前向（不含输出层），选择性重计算重算注意力分数
+
+        model_flops_per_token不含重计算，用于计算MFU；
+        hardware_flops_per_token为实际执行的FLOPs，用于估算计算耗时
+
+        Args:
+            model: 模型信息
+            request: 训练预估请求
+            lora_parameters: LoRA适配器参数量
+            adapter_flops: 适配器每个token分摊的额外前向FLOPs
+
+        Returns:
+            FLOPs分解
+        """
+        forward_breakdown = self.calculate_forward_flops(model, request.sequence_length)
+        forward = sum(forward_breakdown.values())
+
+        if request.training_method == TrainingMethod.FULL_FINETUNING:
+            backward = 2 * forward
+        else:
+            forward += 2 * lora_parameters
+            backward = forward + forward_breakdown["attention_scores"] + 2 * lora_parameters
+            forward += adapter_flops
+
+        recompute = self.calculate_recompute_flops(
+            forward_breakdown, forward, request.activation_recomputation
+        )
+
+        model_flops = forward + backward
+        return {
+            "forward_breakdown": forward_breakdown,
+            "forward_flops_per_token": forward,
+            "backward_flops_per_token": backward,
+            "recompute_flops_per_token": recompute,
+            "model_flops_per_token": model_flops,
+            "hardware_flops_per_token": model_flops + recompute
+        }
@@ -2,13 +2,21 @@
 推理资源计算服务
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import math
 
-from ...models.inference import InferenceRequest, InferenceResponse, InferenceBackend, QuantizationMethod
-from ...models.common import PrecisionType, ModelInfo
+import numpy as np
+
+from ...models.inference import (
+    InferenceRequest, InferenceResponse, InferenceBackend, QuantizationMethod, KVCacheDtype, LengthDistribution
+)
+from ...models.common import PrecisionType, ModelInfo, ContextParallelMethod
 from ...services.model_registry import ModelRegistry
-from .base_calc import BaseCalculator
+from ...utils.constants import GPU_SPECS, DEFAULT_GPU_NAME
+from ...utils.distributions import distribution_to_histogram, summarize_distribution
+from .base_calc import BaseCalculator, MemoryUnit
+from .kv_cache_calc import KVCacheCalculator
+from .comm_calc import CommunicationCalculator
 
 
 class InferenceCalculator(BaseCalculator):
@@ -23,6 +31,16 @@ class InferenceCalculator(BaseCalculator):
         QuantizationMethod.AWQ: 0.25      # 4-bit量化
     }
     
+    # 解码阶段可达到的显存带宽利用率
+    MEMORY_BANDWIDTH_EFFICIENCY = 0.8
+    
+    # 预填充阶段可达到的算力利用率（MFU）
+    PREFILL_COMPUTE_EFFICIENCY = 0.5
+    
+    # 标准正态分布分位点，用于批次级尾部估算
+    NORMAL_Z_P95 = 1.645
+    NORMAL_Z_P99 = 2.326
+    
     # 推理后端的显存开销系数
     BACKEND_OVERHEAD_MULTIPLIER = {
         InferenceBackend.VLLM: 1.2,
@@ -33,6 +51,8 @@ class InferenceCalculator(BaseCalculator):
         """初始化推理计算器"""
         super().__init__()
         self.model_registry = ModelRegistry()
+        self.kv_cache_calculator = KVCacheCalculator()
+        self.communication_calculator = CommunicationCalculator()
     
     def calculate(self, request: InferenceRequest) -> InferenceResponse:
         """
@@ -56,19 +76,30 @@ class InferenceCalculator(BaseCalculator):
         backend_multiplier = self.BACKEND_OVERHEAD_MULTIPLIER.get(request.backend, 1.0)
         total_memory = (model_memory + kv_cache_memory + activation_memory) * backend_multiplier
         
+        # KV block分配分析（所选GPU及GPU目录中每种GPU）
+        kv_cache_blocks = self.kv_cache_calculator.calculate(
+            model, request, model_memory, request.gpu_type
+        )
+        
+        self.kv_cache_calculator.moe_calculator.validate_expert_parallel(model, request.expert_parallel)
+        
         # 计算GPU需求
-        min_gpu_count = max(1, math.ceil(total_memory / 80))  # 假设80GB显存
-        optimal_gpu_count = request.tensor_parallel * request.pipeline_parallel
+        gpu_memory = GPU_SPECS[kv_cache_blocks["gpu"]]["memory_gb"]
+        min_gpu_count = max(1, math.ceil(total_memory / gpu_memory))
+        optimal_gpu_count = request.tensor_parallel * request.pipeline_parallel * request.context_parallel
         
         # 计算最大并发请求数
-        max_concurrent_requests = self._calculate_max_concurrent_requests(
-            model, request, kv_cache_memory
-        )
+        max_concurrent_requests = self._calculate_max_concurrent_requests(kv_cache_blocks)
         
         # 性能预估
         estimated_throughput = self._estimate_throughput(model, request)
         estimated_latency_p50 = self._estimate_latency(model, request, percentile=50)
         estimated_latency_p99 = self._estimate_latency(model, request, percentile=99)
+        decode_analysis = self._estimate_decode_bandwidth(model, request, model_memory, kv_cache_blocks)
+        prefix_cache_analysis = self._analyze_prefix_cache(model, request, kv_cache_memory, kv_cache_blocks)
+        length_distribution_analysis = self._analyze_length_distribution(
+            model, request, model_memory, kv_cache_memory, kv_cache_blocks
+        )
         
         # 显存分解
         memory_breakdown = {
@@ -80,14 +111,28 @@ class InferenceCalculator(BaseCalculator):
         
         # 生成推荐GPU列表
         from ...utils.helpers import recommend_gpus
-        memory_per_gpu = total_memory / max(1, request.tensor_parallel)
+        # 权重按张量并行（路由专家按专家并行）切分、在上下文并行间复制；
+        # KV Cache和激活值按张量并行 * 上下文并行切分
+        weights_per_gpu = self.kv_cache_calculator.get_weights_per_gpu(model, request, model_memory)
+        memory_per_gpu = (weights_per_gpu * request.pipeline_parallel +
+                          (kv_cache_memory + activation_memory) /
+                          (request.tensor_parallel * request.context_parallel)) * backend_multiplier
         recommended_gpus = recommend_gpus(memory_per_gpu, max_count=5, use_case="inference")
         
         # 生成优化建议
-        recommendations = self._generate_recommendations(model, request, total_memory)
+        recommendations = self._generate_recommendations(
+            model, request, total_memory, model_memory, kv_cache_blocks
+        )
         
         # 扩展性分析
-        scalability_analysis = self._analyze_scalability(model, request)
+        scalability_analysis = self._analyze_scalability(model, request, kv_cache_blocks)
+        
+        moe_analysis = self.kv_cache_calculator.moe_calculator.summarize(
+            model, request.tensor_parallel, request.pipeline_parallel, request.expert_parallel,
+            self.kv_cache_calculator.get_expert_shards(request),
+            self.PRECISION_BYTES[request.precision] * self.QUANTIZATION_COMPRESSION_RATIO.get(request.quantization, 1.0),
+            decode_analysis["expert_parallel_comm_ms"] / 1000
+        )
         
         return InferenceResponse(
             # 基础显存信息
@@ -106,9 +151,14 @@ class InferenceCalculator(BaseCalculator):
             quantization=request.quantization,
             kv_cache_memory_gb=kv_cache_memory,
             max_concurrent_requests=max_concurrent_requests,
+            kv_cache_blocks=kv_cache_blocks,
             estimated_throughput=estimated_throughput,
             estimated_latency_p50_ms=estimated_latency_p50,
             estimated_latency_p99_ms=estimated_latency_p99,
+            length_distribution_analysis=length_distribution_analysis,
+            prefix_cache_analysis=prefix_cache_analysis,
+            decode_analysis=decode_analysis,
+            moe_analysis=moe_analysis,
             memory_breakdown=memory_breakdown,
             recommendations=recommendations,
             scalability_analysis=scalability_analysis
@@ -133,70 +183,60 @@ class InferenceCalculator(BaseCalculator):
     
     def _calculate_kv_cache_memory(self, model: ModelInfo, request: InferenceRequest) -> float:
         """计算KV Cache显存"""
-        # KV Cache大小 = 2 * batch_size * total_sequence_length * num_layers * num_heads * head_dim * bytes_per_element
+        # KV Cache大小 = batch_size * total_sequence_length * 单token KV字节数
         # 总序列长度 = 输入序列长度 + 最大新生成token长度
-        bytes_per_element = self.PRECISION_BYTES[request.precision]
-        head_dim = model.hidden_size // model.num_heads
-        
-        # 计算总序列长度（输入 + 输出）
+        # 启用前缀缓存时，命中的共享前缀不再按序列重复存储，每个不同前缀只计一次
         total_sequence_length = request.max_sequence_length + request.max_new_tokens
+        token_bytes = self.kv_cache_calculator.calculate_token_bytes(model, request)
+        block_size = self.kv_cache_calculator.get_block_size(request, total_sequence_length)
+        prefix_sharing = self.kv_cache_calculator.calculate_prefix_sharing(request, block_size)
         
-        kv_cache_size = (2 * request.max_batch_size * total_sequence_length * 
-                        model.num_layers * model.num_heads * head_dim * bytes_per_element)
+        private_tokens = total_sequence_length - prefix_sharing["expected_cached_tokens"]
+        shared_tokens = prefix_sharing["shared_tokens_per_prefix"] * request.num_distinct_prefixes
+        kv_cache_size = (request.max_batch_size * private_tokens + shared_tokens) * token_bytes
         
         return self.convert_bytes(kv_cache_size)
     
     def _calculate_activation_memory(self, model: ModelInfo, request: InferenceRequest) -> float:
-        """计算激活值显存"""
-        bytes_per_element = self.PRECISION_BYTES[request.precision]
-        
-        # 计算总序列长度（输入 + 输出）
-        total_sequence_length = request.max_sequence_length + request.max_new_tokens
-        
-        # 基础激活值：包含所有Transformer层的激活值
-        # 推理时虽然是单向计算，但仍需要存储每层的激活值用于后续计算
-        activation_size = (request.max_batch_size * total_sequence_length * 
-                         model.hidden_size * model.num_layers * bytes_per_element)
-        
-        # 注意力机制的激活值（Q, K, V矩阵）
-        # 推理时注意力计算同样产生O(n²)的中间结果
-        attention_size = (request.max_batch_size * model.num_heads * 
-                        total_sequence_length * total_sequence_length * 
-                        bytes_per_element * model.num_layers)
-        
-        total_bytes = activation_size + attention_size
+        """
+        计算激活值显存
         
-        # 推理时通常不使用梯度检查点，但可能有其他优化
-        # 注意：推理的激活值通常比训练小，因为不需要保存用于反向传播的中间结果
-        # 这里我们使用一个保守的折扣因子
-        total_bytes *= 0.6  # 推理时激活值约为训练时的60%
+        推理不为反向保存激活值，各层顺序执行，峰值出现在整批prompt预填充时的单层工作集：
+        投影/FFN中间态（与KV Cache profiling的宽度一致）加上注意力内核的临时显存
+        （eager为O(s²)的分数矩阵，SDPA/FlashAttention-2只有O(s)的softmax统计）；
+        上下文并行时每个rank只处理1/cp的查询
+        """
+        bytes_per_element = self.PRECISION_BYTES[request.precision]
+        tp = request.tensor_parallel
+        prompt_length = request.max_sequence_length
+        query_tokens = prompt_length / request.context_parallel
+        
+        width = self.kv_cache_calculator.get_profile_activation_width(model)
+        layer_bytes = request.max_batch_size * query_tokens * width * bytes_per_element / tp
+        attention_bytes = self.kv_cache_calculator.attention_calculator.calculate_workspace_bytes(
+            model, request.attention_kernel, request.max_batch_size,
+            query_tokens, prompt_length, bytes_per_element, tp
+        )
         
-        return self.convert_bytes(total_bytes)
+        return self.convert_bytes(layer_bytes + attention_bytes)
     
-    def _calculate_max_concurrent_requests(self, model: ModelInfo, request: InferenceRequest, 
-                                         kv_cache_memory: float) -> int:
+    def _calculate_max_concurrent_requests(self, kv_cache_blocks: Dict[str, Any]) -> int:
         """计算最大并发请求数"""
-        # 基于KV Cache显存限制计算
-        if kv_cache_memory > 0:
-            # 假设80GB显存，留出模型权重和其他开销后的可用显存
-            available_memory = 80 - self.calculate_model_memory(model, request.precision) - 10
-            max_requests = max(1, int(available_memory / (kv_cache_memory / request.max_batch_size)))
-        else:
-            max_requests = request.max_batch_size
-        
-        return min(max_requests, 100)  # 限制最大值
+        # 基于所选GPU上可分配的KV block数量计算，至少为1
+        return max(1, kv_cache_blocks["selected"]["max_concurrent_sequences"])
     
     def _estimate_throughput(self, model: ModelInfo, request: InferenceRequest) -> float:
         """预估吞吐量（tokens/s）"""
         # 基础吞吐量估算
         base_throughput = 10000  # 基础tokens/s
         
-        # 根据模型大小调整
-        if model.parameters > 70e9:  # > 70B
+        # 根据模型大小调整（MoE按每个token激活的参数量）
+        active_parameters = self.get_active_parameters(model)
+        if active_parameters > 70e9:  # > 70B
             base_throughput *= 0.1
-        elif model.parameters > 13e9:  # > 13B
+        elif active_parameters > 13e9:  # > 13B
             base_throughput *= 0.4
-        elif model.parameters > 7e9:   # > 7B
+        elif active_parameters > 7e9:   # > 7B
             base_throughput *= 0.7
         
         # 根据量化方法调整
@@ -215,14 +255,15 @@ class InferenceCalculator(BaseCalculator):
         # 基础延迟估算
         base_latency = 50  # 基础延迟ms
         
-        # 根据模型大小调整
-        if model.parameters > 70e9:  # > 70B
+        # 根据模型大小调整（MoE按每个token激活的参数量）
+        active_parameters = self.get_active_parameters(model)
+        if active_parameters > 70e9:  # > 70B
             base_latency *= 10
-        elif model.parameters > 30e9:  # > 30B
+        elif active_parameters > 30e9:  # > 30B
             base_latency *= 5
-        elif model.parameters > 13e9:  # > 13B
+        elif active_parameters > 13e9:  # > 13B
             base_latency *= 2.5
-        elif model.parameters > 7e9:   # > 7B
+        elif active_parameters > 7e9:   # > 7B
             base_latency *= 1.5
         
         # 根据序列长度调整
@@ -249,20 +290,333 @@ class InferenceCalculator(BaseCalculator):
         
         return max(10, base_latency)  # 最小10ms
     
+    def _get_length_distribution(self, distribution: Optional[LengthDistribution],
+                                 max_length: int) -> Tuple[np.ndarray, np.ndarray]:
+        """获取截断到[1, max_length]的长度分布，未提供时退化为最大长度的单点分布"""
+        if distribution is None:
+            return np.array([float(max_length)]), np.array([1.0])
+        lengths, probs = distribution_to_histogram(distribution)
+        return np.clip(lengths, 1, max_length), probs
+    
+    def _analyze_length_distribution(self, model: ModelInfo, request: InferenceRequest,
+                                     model_memory: float, kv_cache_memory: float,
+                                     kv_cache_blocks: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        按输入/输出长度分布估算KV显存、最大并发和解码吞吐
+        
+        假设输入与输出长度相互独立，在二者的联合分布上向量化计算每个序列的
+        KV token数和block数；批次级尾部分位数按独立同分布序列之和的正态近似估算，
+        且不超过按最大长度估算的最坏情况
+        """
+        if not request.prompt_length_distribution and not request.output_length_distribution:
+            return {}
+        
+        prompt_lengths, prompt_probs = self._get_length_distribution(
+            request.prompt_length_distribution, request.max_sequence_length
+        )
+        output_lengths, output_probs = self._get_length_distribution(
+            request.output_length_distribution, request.max_new_tokens
+        )
+        
+        # 联合分布：行为输入长度，列为输出长度
+        prompts = prompt_lengths[:, None]
+        outputs = output_lengths[None, :]
+        probs = (prompt_probs[:, None] * output_probs[None, :]).ravel()
+        totals = np.broadcast_to(prompts + outputs, (len(prompt_lengths), len(output_lengths)))
+        
+        # 前缀缓存：序列只能复用自身prompt内的完整共享block
+        block_size = kv_cache_blocks["block_size"]
+        prefix_sharing = self.kv_cache_calculator.calculate_prefix_sharing(request, block_size)
+        cached = prefix_sharing["hit_rate"] * np.minimum(
+            prefix_sharing["shared_tokens_per_prefix"], np.floor(prompts / block_size) * block_size
+        )
+        
+        token_bytes = self.kv_cache_calculator.calculate_token_bytes(model, request)
+        kv_bytes = ((totals - cached) * token_bytes).ravel()
+        blocks = (np.ceil(totals / block_size) - cached / block_size).ravel()
+        
+        # KV显存：期望值与正态近似的批次尾部分位数
+        batch_size = request.max_batch_size
+        shared_bytes = prefix_sharing["shared_tokens_per_prefix"] * request.num_distinct_prefixes * token_bytes
+        mean_bytes = float(np.dot(probs, kv_bytes))
+        std_bytes = float(np.sqrt(np.dot(probs, (kv_bytes - mean_bytes) ** 2)))
+        
+        def batch_kv_memory(z: float) -> float:
+            total_bytes = batch_size * mean_bytes + z * np.sqrt(batch_size) * std_bytes + shared_bytes
+            return min(kv_cache_memory, self.convert_bytes(total_bytes))
+        
+        # 最大并发：N个序列的block总数在给定分位数下不超过可用block数
+        # N * mean + z * sqrt(N) * std <= available，解关于sqrt(N)的二次方程
+        selected = kv_cache_blocks["selected"]
+        available_blocks = selected["num_gpu_blocks"] - selected["shared_prefix_blocks"]
+        mean_blocks = float(np.dot(probs, blocks))
+        std_blocks = float(np.sqrt(np.dot(probs, (blocks - mean_blocks) ** 2)))
+        
+        def max_concurrency(z: float) -> int:
+            root = (-z * std_blocks + np.sqrt((z * std_blocks) ** 2 + 4 * mean_blocks * available_blocks)) / (2 * mean_blocks)
+            return min(request.max_num_seqs, int(root ** 2))
+        
+        # 解码吞吐：按输出token加权的平均上下文长度
+        mean_output = float(np.dot(output_probs, output_lengths))
+        decode_context = float(np.sum(prompt_probs[:, None] * output_probs[None, :] *
+                                      outputs * (prompts + outputs / 2))) / mean_output
+        expected_concurrency = max_concurrency(0.0)
+        decode = self._estimate_decode_bandwidth(
+            model, request, model_memory, kv_cache_blocks,
+            batch_size=max(1, min(batch_size, expected_concurrency)),
+            average_context_length=decode_context
+        )
+        
+        return {
+            "prompt_length": summarize_distribution(prompt_lengths, prompt_probs),
+            "output_length": summarize_distribution(output_lengths, output_probs),
+            "total_length": summarize_distribution(totals.ravel(), probs),
+            "kv_cache_memory_gb": {
+                "expected": batch_kv_memory(0.0),
+                "p95": batch_kv_memory(self.NORMAL_Z_P95),
+                "p99": batch_kv_memory(self.NORMAL_Z_P99),
+                "worst_case": kv_cache_memory
+            },
+            "max_concurrent_sequences": {
+                "expected": expected_concurrency,
+                "p99": max_concurrency(self.NORMAL_Z_P99),
+                "worst_case": selected["max_concurrent_sequences"]
+            },
+            "decode": {
+                "batch_size": decode["batch_size"],
+                "average_context_length": decode_context,
+                "tokens_per_second": decode["tokens_per_second"],
+                "requests_per_second": decode["tokens_per_second"] / mean_output
+            }
+        }
+    
+    def _estimate_prefill_compute(self, model: ModelInfo, request: InferenceRequest,
+                                  cached_tokens: float) -> Dict[str, float]:
+        """
+        预估单个请求的预填充计算量
+        
+        线性层FLOPs = 2 * 激活参数量 * 需计算的token数（MoE只计路由到的专家）；
+        注意力FLOPs = 4 * num_layers * num_heads * head_dim * Σ每个token的上下文长度，
+        命中前缀缓存的token跳过计算，但后续token仍需关注完整前缀；
+        上下文并行时计算分摊到张量并行 * 上下文并行张卡，并叠加注意力的上下文并行通信
+        """
+        prompt_length = request.max_sequence_length
+        computed_tokens = prompt_length - cached_tokens
+        
+        q_size = model.num_heads * self.get_head_dim(model)
+        context_sum = (prompt_length ** 2 - cached_tokens ** 2) / 2
+        flops = (2 * self.get_active_parameters(model) * computed_tokens +
+                 4 * model.num_layers * q_size * context_sum)
+        
+        gpu_specs = GPU_SPECS[request.gpu_type or DEFAULT_GPU_NAME]
+        compute = (gpu_specs.get("fp16_tflops") or 0) * 1e12 * self.PREFILL_COMPUTE_EFFICIENCY
+        compute *= request.tensor_parallel * request.context_parallel
+        
+        time_ms = None
+        context_parallel_ms = 0.0
+        if compute:
+            attention_time = 4 * model.num_layers * q_size * context_sum / compute
+            context_parallel_ms = self._estimate_context_parallel_prefill(
+                model, request, computed_tokens, attention_time
+            ) * 1000
+            time_ms = flops / compute * 1000 + context_parallel_ms
+        expert_parallel_ms = self._estimate_expert_parallel_comm(
+            model, request, computed_tokens / request.context_parallel
+        ) * 1000
+        if time_ms is not None:
+            time_ms += expert_parallel_ms
+        
+        return {
+            "computed_tokens": computed_tokens,
+            "flops": flops,
+            "context_parallel_comm_ms": context_parallel_ms,
+            "expert_parallel_comm_ms": expert_parallel_ms,
+            "time_ms": time_ms
+        }
+    
+    def _estimate_expert_parallel_comm(self, model: ModelInfo, request: InferenceRequest,
+                                       tokens: float) -> float:
+        """
+        单次前向的专家并行all-to-all耗时（秒）
+        
+        每个MoE层dispatch和combine各一次，tokens为单卡上的token数
+        """
+        if request.expert_parallel <= 1:
+            return 0.0
+        comm = self.communication_calculator
+        link = comm.get_link(comm.get_gpu_specs(request.gpu_type), request.expert_parallel, 1)
+        dispatch_bytes = self.kv_cache_calculator.moe_calculator.calculate_dispatch_bytes(
+            model, tokens, self.PRECISION_BYTES[request.precision]
+        )
+        return 2 * comm.all_to_all(dispatch_bytes, request.expert_parallel, link) * model.num_layers
+    
+    def _estimate_context_parallel_prefill(self, model: ModelInfo, request: InferenceRequest,
+                                           computed_tokens: float, attention_time: float) -> float:
+        """
+        预填充阶段未被掩盖的上下文并行通信耗时（秒）
+        
+        Ring的K/V传递与分块注意力计算重叠，Ulysses的all-to-all位于关键路径上
+        """
+        cp = request.context_parallel
+        if cp <= 1:
+            return 0.0
+        comm = self.communication_calculator
+        gpu_specs = comm.get_gpu_specs(request.gpu_type)
+        link = comm.get_link(gpu_specs, cp, request.tensor_parallel)
+        per_layer = comm.context_parallel_forward(
+            model, request.context_parallel_method, cp, request.tensor_parallel,
+            computed_tokens / cp, self.PRECISION_BYTES[request.precision], link
+        )
+        comm_time = per_layer * model.num_layers
+        if request.context_parallel_method == ContextParallelMethod.RING:
+            return max(0.0, comm_time - attention_time * comm.COMM_OVERLAP_EFFICIENCY)
+        return comm_time
+    
+    def _analyze_prefix_cache(self, model: ModelInfo, request: InferenceRequest,
+                              kv_cache_memory: float, kv_cache_blocks: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        前缀缓存分析
+        
+        对比"每个序列都存储完整prompt"的基线与共享前缀block只存一份时的
+        KV显存、最大并发和预填充计算量
+        """
+        if request.shared_prefix_length == 0:
+            return {}
+        
+        baseline_request = request.model_copy(update={"shared_prefix_length": 0})
+        baseline_kv_cache = self._calculate_kv_cache_memory(model, baseline_request)
+        
+        selected = kv_cache_blocks["selected"]
+        baseline_concurrency = min(request.max_num_seqs,
+                                   selected["num_gpu_blocks"] // selected["blocks_per_sequence"])
+        concurrency = selected["max_concurrent_sequences"]
+        
+        prefix_sharing = self.kv_cache_calculator.calculate_prefix_sharing(
+            request, kv_cache_blocks["block_size"]
+        )
+        baseline_prefill = self._estimate_prefill_compute(model, request, 0)
+        prefill = self._estimate_prefill_compute(model, request, prefix_sharing["expected_cached_tokens"])
+        
+        return {
+            "shared_tokens_per_prefix": prefix_sharing["shared_tokens_per_prefix"],
+            "shared_blocks": prefix_sharing["resident_shared_blocks"],
+            "expected_cached_tokens": prefix_sharing["expected_cached_tokens"],
+            "baseline_kv_cache_memory_gb": baseline_kv_cache,
+            "kv_cache_memory_gb": kv_cache_memory,
+            "kv_cache_saving_gb": baseline_kv_cache - kv_cache_memory,
+            "baseline_max_concurrent_sequences": baseline_concurrency,
+            "max_concurrent_sequences": concurrency,
+            "capacity_gain": concurrency / baseline_concurrency if baseline_concurrency else None,
+            "baseline_prefill_flops": baseline_prefill["flops"],
+            "prefill_flops": prefill["flops"],
+            "prefill_compute_saving": 1 - prefill["flops"] / baseline_prefill["flops"],
+            "baseline_prefill_time_ms": baseline_prefill["time_ms"],
+            "prefill_time_ms": prefill["time_ms"]
+        }
+    
+    def _estimate_decode_bandwidth(self, model: ModelInfo, request: InferenceRequest,
+                                   model_memory: float, kv_cache_blocks: Dict[str, Any],
+                                   batch_size: Optional[int] = None,
+                                   average_context_length: Optional[float] = None) -> Dict[str, Any]:
+        """
+        解码阶段显存带宽分析
+        
+        解码是访存受限的：每生成一个token，每张卡都要读取本卡的全部权重和
+        批次内所有序列的KV Cache，单步耗时 ≈ 读取字节数 / 有效显存带宽；
+        MoE模型只读取本批token路由到的专家（期望 E * (1 - (1 - k/E)^batch) 个），并叠加专家并行all-to-all；
+        上下文并行时每层还需在cp个rank间合并各自的部分注意力输出
+        """
+        gpu_specs = GPU_SPECS[kv_cache_blocks["gpu"]]
+        if batch_size is None:
+            max_sequences = max(1, kv_cache_blocks["selected"]["max_concurrent_sequences"])
+            batch_size = min(request.max_batch_size, max_sequences)
+        
+        # 解码过程中平均上下文长度：输入长度 + 一半的新生成token
+        if average_context_length is None:
+            average_context_length = request.max_sequence_length + request.max_new_tokens / 2
+        
+        # 单卡读取量：权重按TP*PP（路由专家按专家并行）切分，KV按单卡block字节数折算到每个token
+        moe = self.kv_cache_calculator.moe_calculator
+        weights_per_gpu = self.kv_cache_calculator.get_weights_per_gpu(model, request, model_memory)
+        weight_bytes = self.convert_bytes(weights_per_gpu, MemoryUnit.GB, MemoryUnit.BYTES)
+        if self.is_moe(model):
+            untouched = 1 - moe.expected_active_experts(model, batch_size) / model.num_experts
+            expert_bytes = self.convert_bytes(
+                model_memory * moe.get_expert_fraction(model) /
+                (self.kv_cache_calculator.get_expert_shards(request) * request.pipeline_parallel),
+                MemoryUnit.GB, MemoryUnit.BYTES
+            )
+            weight_bytes -= expert_bytes * untouched
+        token_bytes_per_gpu = kv_cache_blocks["block_bytes"] / kv_cache_blocks["block_size"]
+        kv_cache_bytes = batch_size * average_context_length * token_bytes_per_gpu
+        
+        # gpu.json中的带宽单位为GB/s（十进制）
+        bandwidth = gpu_specs["memory_bandwidth_gb_s"] * 1e9 * self.MEMORY_BANDWIDTH_EFFICIENCY
+        stage_time = (weight_bytes + kv_cache_bytes) / bandwidth
+        
+        combine_time = 0.0
+        if request.context_parallel > 1:
+            comm = self.communication_calculator
+            link = comm.get_link(comm.get_gpu_specs(kv_cache_blocks["gpu"]),
+                                 request.context_parallel, request.tensor_parallel)
+            # 合并注意力输出及其log-sum-exp：batch * q_dim
+            partial_bytes = (batch_size * model.num_heads * self.get_head_dim(model) *
+                             self.PRECISION_BYTES[request.precision] / request.tensor_parallel)
+            combine = comm.all_reduce(partial_bytes, request.context_parallel, link)["time"]
+            combine_time = combine * kv_cache_blocks["layers_per_stage"]
+            stage_time += combine_time
+        
+        # 流水线并行时一个token需依次经过所有stage
+        expert_parallel_time = self._estimate_expert_parallel_comm(model, request, batch_size)
+        step_time = stage_time * request.pipeline_parallel + expert_parallel_time
+        
+        return {
+            "gpu": kv_cache_blocks["gpu"],
+            "batch_size": batch_size,
+            "average_context_length": average_context_length,
+            "weight_bytes_per_step_gb": self.convert_bytes(weight_bytes),
+            "kv_cache_bytes_per_step_gb": self.convert_bytes(kv_cache_bytes),
+            "kv_cache_read_fraction": kv_cache_bytes / (weight_bytes + kv_cache_bytes),
+            "context_parallel_combine_ms": combine_time * 1000,
+            "expert_parallel_comm_ms": expert_parallel_time * 1000,
+            "step_time_ms": step_time * 1000,
+            "tokens_per_second": batch_size / step_time
+        }
+    
     def _generate_recommendations(self, model: ModelInfo, request: InferenceRequest, 
-                                total_memory: float) -> Dict[str, Any]:
+                                total_memory: float, model_memory: float,
+                                kv_cache_blocks: Dict[str, Any]) -> Dict[str, Any]:
         """生成优化建议"""
         recommendations = {}
         
+        # KV Cache量化建议：量化前后所选GPU上的最大并发对比
+        if self.kv_cache_calculator.is_kv_cache_quantized(request):
+            recommendations["kv_cache"] = [
+                f"KV Cache使用{kv_cache_blocks['kv_cache_dtype']}存储"
+                f"（{kv_cache_blocks['kv_cache_quantization']}缩放），"
+                f"每元素{kv_cache_blocks['bytes_per_element']:.3f}字节",
+                "KV Cache量化会带来一定精度损失，INT4建议配合分组量化并评测效果"
+            ]
+        elif request.backend == InferenceBackend.VLLM:
+            fp8_request = request.model_copy(update={"kv_cache_dtype": KVCacheDtype.FP8})
+            fp8_blocks = self.kv_cache_calculator.calculate(model, fp8_request, model_memory, request.gpu_type)
+            current = kv_cache_blocks["selected"]["max_concurrent_sequences"]
+            quantized = fp8_blocks["selected"]["max_concurrent_sequences"]
+            if quantized > current:
+                recommendations["kv_cache"] = [
+                    f"使用FP8 KV Cache可将{kv_cache_blocks['gpu']}上的最大并发序列数从{current}提升至{quantized}",
+                    "FP8 KV Cache同时减少解码阶段读取KV Cache的显存带宽"
+                ]
+        
         # 量化建议
-        if request.quantization == QuantizationMethod.NONE and model.parameters > 10e9:
+        if request.quantization == QuantizationMethod.NONE and self.get_total_parameters(model) > 10e9:
             recommendations["quantization"] = [
                 "考虑使用INT4或GPTQ量化以减少显存占用",
                 "量化可以显著提升推理速度和并发能力"
             ]
         
         # 后端选择建议（仅保留通用建议）
-        if request.backend == InferenceBackend.TRANSFORMERS and model.parameters > 7e9:
+        if request.backend == InferenceBackend.TRANSFORMERS and self.get_total_parameters(model) > 7e9:
             recommendations["backend"] = [
                 "对于大模型，建议使用vLLM以获得更好性能",
                 "vLLM在大模型推理上有更好的显存和计算优化"
@@ -277,7 +631,8 @@ class InferenceCalculator(BaseCalculator):
         
         return recommendations
     
-    def _analyze_scalability(self, model: ModelInfo, request: InferenceRequest) -> Dict[str, Any]:
+    def _analyze_scalability(self, model: ModelInfo, request: InferenceRequest,
+                             kv_cache_blocks: Dict[str, Any]) -> Dict[str, Any]:
         """扩展性分析"""
         analysis = {}
         
@@ -292,9 +647,11 @@ class InferenceCalculator(BaseCalculator):
         
         # 显存扩展性
         analysis["memory_scaling"] = {
-            "model_memory_per_gpu": self.calculate_model_memory(model, request.precision) / request.tensor_parallel,
+            "model_memory_per_gpu": self.kv_cache_calculator.get_weights_per_gpu(
+                model, request, self.calculate_model_memory(model, request.precision)
+            ) * request.pipeline_parallel,
             "kv_cache_scaling": "线性增长",
-            "recommended_max_concurrent_users": self._calculate_max_concurrent_requests(model, request, 0) * 10
+            "recommended_max_concurrent_users": self._calculate_max_concurrent_requests(kv_cache_blocks) * 10
         }
         
         return analysis 
\ No newline at end of file
@@ -0,0 +1,367 @@
+"""
+KV Cache分页分配计算服务
+
+按照vLLM PagedAttention的显存分配方式建模：
+先从 GPU显存 * gpu_memory_utilization 中扣除模型权重、profiling激活峰值和非PyTorch开销，
+剩余显存按固定大小的KV block切分，每个序列按需占用 ceil(序列长度 / block_size) 个block。
+上下文并行时权重在各rank间复制：Ring Attention沿序列维切分KV，每个rank只存1/cp的token；
+Ulysses按KV头在张量并行 * 上下文并行的rank间切分。
+"""
+
+from typing import Dict, Any, Optional
+import math
+
+from ...models.inference import InferenceRequest, InferenceBackend, KVCacheDtype, KVCacheQuantization
+from ...models.common import ModelInfo, ContextParallelMethod
+from ...utils.constants import GPU_SPECS, DEFAULT_GPU_NAME, MODEL_ARCHITECTURES
+from .base_calc import BaseCalculator, MemoryUnit
+from .attention_calc import AttentionCalculator
+from .moe_calc import MoECalculator
+
+
+class KVCacheCalculator(BaseCalculator):
+    """KV Cache分页分配计算器"""
+
+    # profiling时单次前向的最小token数（对应vLLM的max_num_batched_tokens下限）
+    MIN_PROFILE_BATCHED_TOKENS = 2048
+    
+    # KV Cache数据类型对应的每元素字节数（AUTO与推理精度一致）
+    KV_CACHE_DTYPE_BYTES = {
+        KVCacheDtype.FP16: 2,
+        KVCacheDtype.BF16: 2,
+        KVCacheDtype.FP8: 1,
+        KVCacheDtype.FP8_E4M3: 1,
+        KVCacheDtype.FP8_E5M2: 1,
+        KVCacheDtype.INT8: 1,
+        KVCacheDtype.INT4: 0.5
+    }
+    
+    # 未指定量化粒度时各数据类型的默认缩放粒度
+    DEFAULT_KV_CACHE_QUANTIZATION = {
+        KVCacheDtype.FP8: KVCacheQuantization.PER_TENSOR,
+        KVCacheDtype.FP8_E4M3: KVCacheQuantization.PER_TENSOR,
+        KVCacheDtype.FP8_E5M2: KVCacheQuantization.PER_TENSOR,
+        KVCacheDtype.INT8: KVCacheQuantization.PER_TOKEN,
+        KVCacheDtype.INT4: KVCacheQuantization.PER_GROUP
+    }
+    
+    # 每条缩放记录的字节数：FP8只存FP32缩放因子，整数量化存FP16缩放因子和零点
+    KV_CACHE_SCALE_BYTES = {
+        KVCacheDtype.FP8: 4,
+        KVCacheDtype.FP8_E4M3: 4,
+        KVCacheDtype.FP8_E5M2: 4,
+        KVCacheDtype.INT8: 4,
+        KVCacheDtype.INT4: 4
+    }
+
+    def __init__(self):
+        """初始化KV Cache计算器"""
+        super().__init__()
+        self.attention_calculator = AttentionCalculator()
+        self.moe_calculator = MoECalculator()
+
+    def get_kv_heads_per_rank(self, model: ModelInfo, tensor_parallel: int) -> int:
+        """
+        计算张量并行下每张卡持有的KV头数
+
+        KV头按张量并行度切分；当并行度大于KV头数时，KV头在各卡间复制，每卡至少1个
+        """
+        return max(1, math.ceil(self.get_num_kv_heads(model) / tensor_parallel))
+
+    def get_head_shards(self, request: InferenceRequest) -> int:
+        """KV头的切分份数，Ulysses在张量并行和上下文并行组内共同按头切分"""
+        if request.context_parallel_method == ContextParallelMethod.ULYSSES:
+            return request.tensor_parallel * request.context_parallel
+        return request.tensor_parallel
+
+    def get_sequence_shards(self, request: InferenceRequest) -> int:
+        """序列维的切分份数，Ring Attention下每个rank只存1/cp的token"""
+        if request.context_parallel_method == ContextParallelMethod.RING:
+            return request.context_parallel
+        return 1
+
+    def get_expert_shards(self, request: InferenceRequest) -> int:
+        """
+        单个流水线stage内路由专家参数的切分数
+
+        专家并行度不超过张量并行度时专家仍随张量并行切分，否则每张卡持有 num_experts / ep 个完整专家
+        """
+        return max(request.tensor_parallel, request.expert_parallel)
+
+    def get_weights_per_gpu(self, model: ModelInfo, request: InferenceRequest, model_memory_gb: float) -> float:
+        """
+        单卡权重显存（GB）
+
+        稠密参数按张量并行切分、路由专家按专家并行切分，再按流水线stage切分；上下文并行的各rank复制权重
+        """
+        multiplier = self.moe_calculator.get_shard_multiplier(
+            model, request.tensor_parallel, self.get_expert_shards(request)
+        )
+        return model_memory_gb * multiplier / request.pipeline_parallel
+
+    def get_layers_per_stage(self, model: ModelInfo, pipeline_parallel: int) -> int:
+        """计算流水线并行下单个stage承载的层数"""
+        return math.ceil(model.num_layers / pipeline_parallel)
+
+    def is_kv_cache_quantized(self, request: InferenceRequest) -> bool:
+        """判断KV Cache是否量化存储"""
+        return request.kv_cache_dtype in self.DEFAULT_KV_CACHE_QUANTIZATION
+
+    def get_kv_cache_quantization(self, request: InferenceRequest) -> Optional[KVCacheQuantization]:
+        """获取KV Cache量化缩放粒度，未量化时返回None"""
+        if not self.is_kv_cache_quantized(request):
+            return None
+        return request.kv_cache_quantization or self.DEFAULT_KV_CACHE_QUANTIZATION[request.kv_cache_dtype]
+
+    def get_scale_bytes_per_element(self, model: ModelInfo, request: InferenceRequest) -> float:
+        """
+        计算量化KV Cache分摊到每个元素的缩放因子字节数
+
+        per_tensor/per_head的缩放因子数量与序列长度无关，可忽略；
+        其余粒度按 缩放记录字节数 / 每条记录覆盖的元素数 分摊
+        """
+        quantization = self.get_kv_cache_quantization(request)
+        if quantization in (None, KVCacheQuantization.PER_TENSOR, KVCacheQuantization.PER_HEAD):
+            return 0.0
+
+        if quantization == KVCacheQuantization.PER_TOKEN:
+            elements_per_scale = self.get_head_dim(model)
+        elif quantization == KVCacheQuantization.PER_BLOCK:
+            elements_per_scale = request.block_size * self.get_head_dim(model)
+        else:
+            elements_per_scale = request.kv_cache_group_size
+
+        return self.KV_CACHE_SCALE_BYTES[request.kv_cache_dtype] / elements_per_scale
+
+    def get_bytes_per_element(self, model: ModelInfo, request: InferenceRequest) -> float:
+        """
+        获取KV Cache单个元素的字节数（含量化缩放因子开销）
+
+        未指定kv_cache_dtype或为auto时与推理精度一致
+        """
+        if not request.kv_cache_dtype or request.kv_cache_dtype == KVCacheDtype.AUTO:
+            return self.PRECISION_BYTES[request.precision]
+
+        return (self.KV_CACHE_DTYPE_BYTES[request.kv_cache_dtype] +
+                self.get_scale_bytes_per_element(model, request))
+
+    def calculate_token_bytes(self, model: ModelInfo, request: InferenceRequest) -> float:
+        """
+        计算单个token在所有层上的KV Cache字节数（未分片）
+
+        token字节数 = 2(K和V) * num_layers * num_kv_heads * head_dim * bytes_per_element
+        GQA/MQA模型的num_kv_heads小于注意力头数，KV Cache相应按比例缩小；
+        量化KV Cache的bytes_per_element包含缩放因子开销
+        """
+        return (2 * model.num_layers * self.get_kv_hidden_size(model) *
+                self.get_bytes_per_element(model, request))
+
+    def get_block_size(self, request: InferenceRequest, sequence_length: int) -> int:
+        """
+        获取KV block大小（token数）
+
+        非分页后端按最大序列长度连续预分配显存，等价于每个序列占用一个完整block
+        """
+        if request.backend == InferenceBackend.VLLM:
+            return request.block_size
+        return sequence_length
+
+    def calculate_block_bytes(self, model: ModelInfo, request: InferenceRequest,
+                              block_size: int) -> Dict[str, float]:
+        """
+        计算单个KV block的字节数（单张GPU视角）
+
+        Ring Attention时block内的token分散到各上下文并行rank，单卡只存1/cp
+
+        Args:
+            model: 模型信息
+            request: 推理预估请求
+            block_size: block大小（token数）
+
+        Returns:
+            每层block字节数和单卡所有层block字节数
+        """
+        kv_heads_per_rank = self.get_kv_heads_per_rank(model, self.get_head_shards(request))
+        per_layer_block_bytes = (2 * block_size * kv_heads_per_rank * self.get_head_dim(model) *
+                                 self.get_bytes_per_element(model, request) /
+                                 self.get_sequence_shards(request))
+        layers_per_stage = self.get_layers_per_stage(model, request.pipeline_parallel)
+
+        return {
+            "per_layer_block_bytes": per_layer_block_bytes,
+            "block_bytes": per_layer_block_bytes * layers_per_stage,
+            "kv_heads_per_rank": kv_heads_per_rank,
+            "layers_per_stage": layers_per_stage
+        }
+
+    def calculate_prefix_sharing(self, request: InferenceRequest, block_size: int) -> Dict[str, float]:
+        """
+        计算前缀缓存下的KV block共享情况
+
+        vLLM自动前缀缓存以完整block为单位共享：每个不同前缀的完整block只存一份，
+        命中前缀的序列只需为剩余token分配私有block；非分页后端不共享
+
+        Args:
+            request: 推理预估请求
+            block_size: block大小（token数）
+
+        Returns:
+            共享block数、共享token数和单序列期望私有block数
+        """
+        sequence_length = request.max_sequence_length + request.max_new_tokens
+        blocks_per_sequence = math.ceil(sequence_length / block_size)
+
+        if request.backend == InferenceBackend.VLLM:
+            shared_blocks_per_prefix = request.shared_prefix_length // block_size
+        else:
+            shared_blocks_per_prefix = 0
+        hit_rate = request.prefix_cache_hit_rate if shared_blocks_per_prefix else 0.0
+
+        return {
+            "shared_blocks_per_prefix": shared_blocks_per_prefix,
+            "shared_tokens_per_prefix": shared_blocks_per_prefix * block_size,
+            "resident_shared_blocks": shared_blocks_per_prefix * request.num_distinct_prefixes,
+            "hit_rate": hit_rate,
+            "expected_cached_tokens": hit_rate * shared_blocks_per_prefix * block_size,
+            "expected_blocks_per_sequence": blocks_per_sequence - hit_rate * shared_blocks_per_prefix
+        }
+
+    def get_profile_activation_width(self, model: ModelInfo) -> int:
+        """
+        单层前向每个token同时存在的激活元素数
+
+        Q + 2 * KV投影 + 注意力输出/残差2份hidden + FFN中间态2*ffn_multiplier份hidden
+        """
+        ffn_multiplier = MODEL_ARCHITECTURES.get(model.architecture, {}).get("ffn_multiplier", 4)
+        q_size = model.num_heads * self.get_head_dim(model)
+        kv_size = self.get_kv_hidden_size(model)
+        return q_size + 2 * kv_size + (2 + 2 * ffn_multiplier) * model.hidden_size
+
+    def calculate_profile_activation_memory(self, model: ModelInfo, request: InferenceRequest,
+                                            sequence_length: int) -> float:
+        """
+        计算显存profiling时单次前向的激活峰值（GB，单卡）
+
+        推理时各层顺序执行，激活峰值只取决于单层工作集：
+        tokens * 单token激活宽度 * bytes / TP，加上注意力内核的临时显存（按单个最长序列计）；
+        上下文并行时每个rank只处理1/cp的token
+        """
+        batched_tokens = max(self.MIN_PROFILE_BATCHED_TOKENS, sequence_length)
+        bytes_per_element = self.PRECISION_BYTES[request.precision]
+        cp = request.context_parallel
+        tp = request.tensor_parallel
+
+        activation_bytes = (batched_tokens * self.get_profile_activation_width(model) *
+                            bytes_per_element / (tp * cp))
+        activation_bytes += self.attention_calculator.calculate_workspace_bytes(
+            model, request.attention_kernel, 1, sequence_length / cp, sequence_length, bytes_per_element, tp
+        )
+        return self.convert_bytes(activation_bytes)
+
+    def calculate_block_allocation(self, model: ModelInfo, request: InferenceRequest,
+                                   model_memory_gb: float, gpu_memory_gb: float) -> Dict[str, Any]:
+        """
+        计算单张GPU上的KV block分配情况
+
+        Args:
+            model: 模型信息
+            request: 推理预估请求
+            model_memory_gb: 模型权重总显存（GB，未分片）
+            gpu_memory_gb: 单张GPU显存（GB）
+
+        Returns:
+            block数量、可用KV显存和最大并发序列数
+        """
+        sequence_length = request.max_sequence_length + request.max_new_tokens
+        block_size = self.get_block_size(request, sequence_length)
+        block_info = self.calculate_block_bytes(model, request, block_size)
+        block_bytes = block_info["block_bytes"]
+
+        if request.gpu_memory_limit_gb:
+            gpu_memory_gb = min(gpu_memory_gb, request.gpu_memory_limit_gb)
+
+        # vLLM只使用gpu_memory_utilization比例的显存，其他后端可使用全部显存
+        utilization = request.gpu_memory_utilization if request.backend == InferenceBackend.VLLM else 1.0
+        usable_memory_gb = gpu_memory_gb * utilization
+
+        weights_per_gpu = self.get_weights_per_gpu(model, request, model_memory_gb)
+        activation_peak = self.calculate_profile_activation_memory(model, request, sequence_length)
+        overhead = self.get_framework_overhead(request.backend.value)
+
+        kv_cache_memory_gb = max(0.0, usable_memory_gb - weights_per_gpu - activation_peak - overhead)
+        kv_cache_bytes = self.convert_bytes(kv_cache_memory_gb, MemoryUnit.GB, MemoryUnit.BYTES)
+
+        num_gpu_blocks = int(kv_cache_bytes // block_bytes)
+        swap_bytes = self.convert_bytes(request.swap_space_gb, MemoryUnit.GB, MemoryUnit.BYTES)
+        num_cpu_blocks = int(swap_bytes // block_bytes)
+
+        blocks_per_sequence = math.ceil(sequence_length / block_size)
+
+        # 共享前缀block常驻显存只计一次，其余block按序列期望私有block数分配
+        prefix_sharing = self.calculate_prefix_sharing(request, block_size)
+        shared_blocks = min(num_gpu_blocks, prefix_sharing["resident_shared_blocks"])
+        max_sequences_by_blocks = int((num_gpu_blocks - shared_blocks) //
+                                      prefix_sharing["expected_blocks_per_sequence"])
+
+        return {
+            "gpu_memory_gb": gpu_memory_gb,
+            "usable_memory_gb": usable_memory_gb,
+            "weights_per_gpu_gb": weights_per_gpu,
+            "activation_peak_gb": activation_peak,
+            "overhead_gb": overhead,
+            "kv_cache_memory_gb": kv_cache_memory_gb,
+            "num_gpu_blocks": num_gpu_blocks,
+            "num_cpu_blocks": num_cpu_blocks,
+            "blocks_per_sequence": blocks_per_sequence,
+            "shared_prefix_blocks": shared_blocks,
+            "expected_blocks_per_sequence": prefix_sharing["expected_blocks_per_sequence"],
+            "max_concurrent_sequences": min(request.max_num_seqs, max_sequences_by_blocks),
+            # 被抢占后可换出到CPU swap空间的序列数
+            "max_swapped_sequences": num_cpu_blocks // blocks_per_sequence,
+            "fits": max_sequences_by_blocks >= 1
+        }
+
+    def calculate(self, model: ModelInfo, request: InferenceRequest,
+                  model_memory_gb: float, gpu_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        计算所选GPU及GPU目录中每种GPU的KV block分配情况
+
+        Args:
+            model: 模型信息
+            request: 推理预估请求
+            model_memory_gb: 模型权重总显存（GB，未分片）
+            gpu_name: 所选GPU型号，默认使用参考GPU
+
+        Returns:
+            KV block分配分析
+
+        Raises:
+            ValueError: GPU型号不存在时抛出
+        """
+        gpu_name = gpu_name or DEFAULT_GPU_NAME
+        if gpu_name not in GPU_SPECS:
+            raise ValueError(f"GPU型号 {gpu_name} 不存在")
+
+        sequence_length = request.max_sequence_length + request.max_new_tokens
+        block_size = self.get_block_size(request, sequence_length)
+        block_info = self.calculate_block_bytes(model, request, block_size)
+        quantization = self.get_kv_cache_quantization(request)
+
+        per_gpu = {
+            name: self.calculate_block_allocation(model, request, model_memory_gb, specs["memory_gb"])
+            for name, specs in GPU_SPECS.items()
+        }
+
+        return {
+            "gpu": gpu_name,
+            "block_size": block_size,
+            "kv_cache_dtype": (request.kv_cache_dtype or KVCacheDtype.AUTO).value,
+            "kv_cache_quantization": quantization.value if quantization else None,
+            "bytes_per_element": self.get_bytes_per_element(model, request),
+            "per_layer_block_bytes": block_info["per_layer_block_bytes"],
+            "block_bytes": block_info["block_bytes"],
+            "kv_heads_per_rank": block_info["kv_heads_per_rank"],
+            "layers_per_stage": block_info["layers_per_stage"],
+            "selected": per_gpu[gpu_name],
+            "per_gpu": per_gpu
+        }
@@ -0,0 +1,137 @@
+"""
+logits与交叉熵损失显存计算服务
+
+最后一个流水线stage在计算损失时，除各层激活值外还需要词表维度的缓冲区
+（T=单个微批次在单个上下文并行rank上的token数，V=单个张量并行rank上的词表大小，
+h=隐藏维度，e=激活值字节数，C=分块的token数）：
+- standard：LM head输出eT·V的logits，低精度训练时再转为FP32（4T·V），
+  log_softmax为反向保存FP32结果（4T·V），反向时生成FP32的logits梯度（4T·V）
+- chunked：完整logits只保存一份（eT·V），按C个token分块在FP32下计算损失，
+  梯度原地写回logits缓冲区，只另存每个token的FP32 log-sum-exp（Unsloth）
+- fused_linear：LM head与交叉熵融合，每次只计算C个token的logits（eC·V及其FP32副本），
+  前向中即算出隐藏状态的梯度（eT·h）和LM head权重梯度（Liger Kernel）
+LM head可训练时，反向还会生成一份完整的LM head权重梯度（V·h）：梯度累积或ZeRO梯度分片时
+它是与已有梯度缓冲区相加/归约前的临时张量，融合实现则在前向中就已生成并保存到反向。
+"""
+
+import math
+from typing import Dict, Any, Optional
+
+from ...models.training import TrainingRequest, CrossEntropyMethod
+from ...models.common import ModelInfo, PrecisionType
+from .base_calc import BaseCalculator
+
+
+class LogitsCalculator(BaseCalculator):
+    """logits与交叉熵损失显存计算器"""
+
+    def get_local_tokens(self, request: TrainingRequest) -> float:
+        """单个微批次在单个上下文并行rank上计算损失的token数"""
+        return request.batch_size * request.sequence_length / request.context_parallel
+
+    def get_chunk_size(self, model: ModelInfo, request: TrainingRequest) -> int:
+        """
+        分块/融合交叉熵每块的token数
+
+        未指定时与Liger Kernel一致：把T个token分为 ceil(V / h) 块，块大小向上取2的幂，
+        使每块logits与隐藏状态的大小相当
+        """
+        tokens = math.ceil(self.get_local_tokens(request))
+        if request.cross_entropy_chunk_size:
+            return min(tokens, request.cross_entropy_chunk_size)
+        num_chunks = math.ceil(model.vocab_size / model.hidden_size)
+        chunk = 2 ** math.ceil(math.log2(max(1, math.ceil(tokens / num_chunks))))
+        return min(tokens, chunk)
+
+    def calculate_breakdown(self, model: ModelInfo, request: TrainingRequest,
+                            head_gradient_bytes: float = 0.0, accumulates_gradient: bool = False,
+                            method: Optional[CrossEntropyMethod] = None) -> Dict[str, float]:
+        """
+        计算单个微批次在损失计算时的logits与损失缓冲区（字节，单个张量并行、上下文并行rank）
+
+        Args:
+            model: 模型信息
+            request: 训练预估请求
+            head_gradient_bytes: LM head权重梯度每个元素的字节数，LM head冻结时为0
+            accumulates_gradient: 权重梯度是否先生成再与梯度缓冲区相加（梯度累积或ZeRO梯度分片）
+            method: 交叉熵实现，默认使用请求中的配置
+
+        Returns:
+            {"logits": logits及其FP32副本, "loss": 损失为反向保存的张量和工作区,
+             "logits_gradient": logits或隐藏状态的梯度, "embedding_gradient": LM head权重梯度}
+        """
+        method = method or request.cross_entropy
+        fp32 = self.PRECISION_BYTES[PrecisionType.FP32]
+        e = self.PRECISION_BYTES[request.precision]
+        # 低精度训练时交叉熵在FP32下计算
+        upcast = fp32 if e < fp32 else 0
+        tokens = self.get_local_tokens(request)
+        vocab = model.vocab_size / request.tensor_parallel
+        head_weight = vocab * model.hidden_size
+
+        if method == CrossEntropyMethod.STANDARD:
+            breakdown = {
+                "logits": (e + upcast) * tokens * vocab,
+                "loss": fp32 * tokens * vocab,
+                "logits_gradient": fp32 * tokens * vocab
+            }
+        elif method == CrossEntropyMethod.CHUNKED:
+            chunk = self.get_chunk_size(model, request)
+            breakdown = {
+                "logits": e * tokens * vocab,
+                "loss": fp32 * tokens + 2 * fp32 * chunk * vocab,
+                "logits_gradient": 0.0
+            }
+        else:
+            chunk = self.get_chunk_size(model, request)
+            breakdown = {
+                "logits": (e + upcast) * chunk * vocab,
+                "loss": fp32 * tokens,
+                "logits_gradient": e * tokens * model.hidden_size
+            }
+
+        embedding_gradient = 0.0
+        if method == CrossEntropyMethod.FUSED_LINEAR or accumulates_gradient:
+            embedding_gradient = head_gradient_bytes * head_weight
+        breakdown["embedding_gradient"] = embedding_gradient
+        return breakdown
+
+    def calculate(self, model: ModelInfo, request: TrainingRequest,
+                  head_gradient_bytes: float = 0.0, accumulates_gradient: bool = False,
+                  method: Optional[CrossEntropyMethod] = None) -> float:
+        """计算单个微批次的logits与损失缓冲区合计（字节）"""
+        return sum(self.calculate_breakdown(
+            model, request, head_gradient_bytes, accumulates_gradient, method
+        ).values())
+
+    def summarize(self, model: ModelInfo, request: TrainingRequest,
+                  head_gradient_bytes: float = 0.0, accumulates_gradient: bool = False) -> Dict[str, Any]:
+        """
+        汇总logits与损失缓冲区，并对比各交叉熵实现的显存
+
+        Args:
+            model: 模型信息
+            request: 训练预估请求
+            head_gradient_bytes: LM head权重梯度每个元素的字节数，LM head冻结时为0
+            accumulates_gradient: 权重梯度是否先生成再与梯度缓冲区相加
+
+        Returns:
+            logits分析结果
+        """
+        breakdown = self.calculate_breakdown(model, request, head_gradient_bytes, accumulates_gradient)
+        modes = {
+            method.value: self.convert_bytes(self.calculate(
+                model, request, head_gradient_bytes, accumulates_gradient, method
+            ))
+            for method in CrossEntropyMethod
+        }
+        return {
+            "cross_entropy": request.cross_entropy.value,
+            "vocab_size": model.vocab_size,
+            "tokens_per_microbatch": self.get_local_tokens(request),
+            "chunk_size": (None if request.cross_entropy == CrossEntropyMethod.STANDARD
+                           else self.get_chunk_size(model, request)),
+            "breakdown_gb": {name: self.convert_bytes(value) for name, value in breakdown.items()},
+            "total_gb": self.convert_bytes(sum(breakdown.values())),
+            "modes": modes
+        }
@@ -0,0 +1,101 @@
+"""
+混合专家（MoE）计算服务
+
+- 参数：显存按全部专家的总参数量计，计算量按每个token激活的专家计
+- 专家并行：路由专家按专家并行度均匀分到各rank，每个rank持有 num_experts / ep 个专家；
+  注意力、共享专家和词嵌入仍按张量并行切分
+- all-to-all：每个MoE层前向把token分发到所在专家的rank（dispatch），计算后再收回（combine），
+  每个token复制 num_experts_per_tok 份，反向各再做一次
+"""
+
+import math
+from typing import Dict, Any, Optional
+
+from ...models.common import ModelInfo
+from .base_calc import BaseCalculator
+
+
+class MoECalculator(BaseCalculator):
+    """混合专家计算器"""
+
+    def validate_expert_parallel(self, model: ModelInfo, expert_parallel: int) -> None:
+        """校验专家并行度能否均分路由专家"""
+        if expert_parallel <= 1:
+            return
+        if not self.is_moe(model):
+            raise ValueError(f"模型{model.id}不是MoE模型，不支持专家并行")
+        if model.num_experts % expert_parallel != 0:
+            raise ValueError(f"专家数{model.num_experts}不能被专家并行度{expert_parallel}整除")
+
+    def get_expert_fraction(self, model: ModelInfo) -> float:
+        """路由专家参数占总参数量的比例"""
+        return self.get_expert_parameters(model) / self.get_total_parameters(model)
+
+    def get_shard_multiplier(self, model: ModelInfo, shards: int, expert_shards: int) -> float:
+        """
+        单卡持有的参数比例（相对总参数量）
+
+        稠密参数按shards切分，路由专家参数按expert_shards切分
+        """
+        expert_fraction = self.get_expert_fraction(model)
+        return (1 - expert_fraction) / shards + expert_fraction / expert_shards
+
+    def calculate_dispatch_bytes(self, model: ModelInfo, tokens: float, bytes_per_element: float) -> float:
+        """单个rank一次dispatch（或combine）发送的字节数：每个token复制到激活的每个专家"""
+        if not self.is_moe(model):
+            return 0.0
+        return tokens * model.num_experts_per_tok * model.hidden_size * bytes_per_element
+
+    def expected_active_experts(self, model: ModelInfo, tokens: float) -> float:
+        """
+        一批tokens在单层中期望被路由到的不同专家数（均匀路由）
+
+        E * (1 - (1 - k / E)^tokens)，解码时决定需要从显存读取的专家权重
+        """
+        if not self.is_moe(model):
+            return 0.0
+        miss = 1 - model.num_experts_per_tok / model.num_experts
+        return model.num_experts * (1 - miss ** tokens)
+
+    def summarize(self, model: ModelInfo, tensor_parallel: int, pipeline_parallel: int,
+                  expert_parallel: int, expert_shards: int, bytes_per_param: float,
+                  all_to_all_s: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        汇总MoE参数与单卡专家放置
+
+        Args:
+            model: 模型信息
+            tensor_parallel: 张量并行度（稠密参数的切分数）
+            pipeline_parallel: 流水线并行度
+            expert_parallel: 专家并行度
+            expert_shards: 单个流水线stage内路由专家参数的切分数
+            bytes_per_param: 每个参数的字节数
+            all_to_all_s: 专家并行all-to-all耗时（秒）
+
+        Returns:
+            MoE分析结果，稠密模型返回None
+        """
+        if not self.is_moe(model):
+            return None
+        total_params = self.get_total_parameters(model)
+        expert_params = self.get_expert_parameters(model)
+        dense_params = total_params - expert_params
+        dense_per_gpu = dense_params / (tensor_parallel * pipeline_parallel)
+        expert_per_gpu = expert_params / (expert_shards * pipeline_parallel)
+        return {
+            "num_experts": model.num_experts,
+            "num_experts_per_tok": model.num_experts_per_tok,
+            "num_shared_experts": model.num_shared_experts,
+            "expert_intermediate_size": self.get_expert_intermediate_size(model),
+            "total_parameters": total_params,
+            "active_parameters": self.get_active_parameters(model),
+            "expert_parameters": expert_params,
+            "active_ratio": self.get_active_parameters(model) / total_params,
+            "expert_parallel": expert_parallel,
+            "experts_per_gpu": model.num_experts / expert_parallel,
+            "expert_layers_per_gpu": math.ceil(model.num_layers / pipeline_parallel),
+            "dense_params_per_gpu": dense_per_gpu,
+            "expert_params_per_gpu": expert_per_gpu,
+            "weights_per_gpu_gb": self.convert_bytes((dense_per_gpu + expert_per_gpu) * bytes_per_param),
+            "all_to_all_s": all_to_all_s
+        }
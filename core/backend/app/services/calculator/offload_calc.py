@@ -0,0 +1,173 @@
+"""
+ZeRO-Offload / ZeRO-Infinity卸载开销计算服务
+
+- 优化器卸载：优化器状态存放在主机内存或NVMe，由CPU执行优化器更新；
+  梯度分片经PCIe传到主机，更新后的参数再传回GPU
+- 分页优化器（bitsandbytes）：优化器状态位于统一内存，显存不足时按页换出到主机内存，
+  GPU显存需求不计入优化器状态
+- 参数卸载（Stage 3）：参数分片存放在主机内存或NVMe，每个微批次前向、反向各取回一次，
+  GPU上只保留正在计算的若干层
+"""
+
+from typing import Dict, Any, List
+
+from ...models.training import TrainingRequest, OffloadDevice, DeepSpeedStage, OptimizerType
+from .base_calc import BaseCalculator
+
+
+class OffloadCalculator(BaseCalculator):
+    """CPU/NVMe卸载开销计算器"""
+
+    # PCIe传输可达到的带宽比例
+    PCIE_BANDWIDTH_EFFICIENCY = 0.8
+
+    # 单节点CPU优化器（DeepSpeed CPU-Adam）每秒更新的参数量
+    CPU_OPTIMIZER_PARAMS_PER_S = 1e9
+
+    # 参数卸载时GPU上常驻的层数（当前计算层 + 预取层）
+    PARAM_OFFLOAD_RESIDENT_LAYERS = 2
+
+    # NVMe卸载时每张GPU在主机内存中的锁页交换缓冲区（GB）
+    NVME_STAGING_BUFFER_GB = 1.0
+
+    # 分页优化器，状态在显存不足时换出到主机内存
+    PAGED_OPTIMIZERS = {OptimizerType.PAGED_ADAMW, OptimizerType.PAGED_ADAMW_8BIT}
+
+    def apply_to_stage(self, request: TrainingRequest, stage: Dict[str, Any],
+                       resident_weights: float) -> Dict[str, Any]:
+        """
+        将卸载配置应用到单个stage的单卡显存分解
+
+        - 优化器卸载：优化器状态和FP32主权重移至卸载设备；Stage 2/3的梯度分片移至主机内存
+        - 分页优化器：优化器状态按最坏情况全部换出到主机内存
+        - 参数卸载：权重分片移至卸载设备，GPU上只保留resident_weights
+
+        Args:
+            request: 训练预估请求
+            stage: stage显存分解（GB，卸载前）
+            resident_weights: 参数卸载时GPU上常驻的权重（GB）
+
+        Returns:
+            卸载后的stage显存分解，增加host_offload与nvme_offload（GB，单卡）
+        """
+        offloaded = {OffloadDevice.CPU: 0.0, OffloadDevice.NVME: 0.0}
+
+        if request.offload_optimizer != OffloadDevice.NONE:
+            offloaded[request.offload_optimizer] += stage["optimizer_states"] + stage["master_weights"]
+            stage["optimizer_states"] = 0.0
+            stage["master_weights"] = 0.0
+            if request.deepspeed_stage in (DeepSpeedStage.STAGE2, DeepSpeedStage.STAGE3):
+                offloaded[OffloadDevice.CPU] += stage["gradients"]
+                stage["gradients"] = 0.0
+
+        elif request.optimizer in self.PAGED_OPTIMIZERS:
+            offloaded[OffloadDevice.CPU] += stage["optimizer_states"]
+            stage["optimizer_states"] = 0.0
+
+        if request.offload_param != OffloadDevice.NONE:
+            offloaded[request.offload_param] += stage["model_weights"]
+            stage["model_weights"] = min(stage["model_weights"], resident_weights)
+
+        if OffloadDevice.NVME in (request.offload_optimizer, request.offload_param):
+            offloaded[OffloadDevice.CPU] += self.NVME_STAGING_BUFFER_GB
+
+        stage["host_offload"] = offloaded[OffloadDevice.CPU]
+        stage["nvme_offload"] = offloaded[OffloadDevice.NVME]
+        stage["total"] = (stage["model_weights"] + stage["master_weights"] + stage["gradients"] +
+                          stage["optimizer_states"] + stage["activations"] + stage["logits"] +
+                          stage["framework_overhead"])
+        return stage
+
+    def get_gpus_per_node(self, gpu_specs: Dict[str, Any], num_gpus: int) -> int:
+        """单个节点上实际参与训练的GPU数量"""
+        return min(gpu_specs.get("gpus_per_node", 8), num_gpus)
+
+    def estimate_step_cost(self, request: TrainingRequest, gpu_specs: Dict[str, Any],
+                           data_parallel: int, stage_params: float, trainable_stage_params: float,
+                           state_bytes: Dict[str, float], compute_time: float,
+                           overlap_efficiency: float) -> Dict[str, float]:
+        """
+        估算卸载带来的单步额外耗时
+
+        PCIe为每张GPU独享，NVMe带宽和CPU优化器算力由节点内GPU共享。
+        参数取回可与计算重叠（预取），优化器卸载的梯度下传、CPU更新、参数上传和NVMe读写
+        位于优化器步的关键路径上，不可掩盖
+
+        Args:
+            request: 训练预估请求
+            gpu_specs: GPU规格
+            data_parallel: 参数分片的数据并行度（含上下文并行）
+            stage_params: 瓶颈stage的参数量（张量并行切分前）
+            trainable_stage_params: 该stage的可训练参数量
+            state_bytes: 每个参数的权重、梯度、主权重、优化器状态字节数
+            compute_time: 单步计算耗时（秒）
+            overlap_efficiency: 参数预取可被计算掩盖的比例
+
+        Returns:
+            各项耗时（秒）与未被掩盖的总耗时
+        """
+        tp = request.tensor_parallel
+        num_microbatches = request.gradient_accumulation_steps
+        gpus_on_node = self.get_gpus_per_node(
+            gpu_specs, tp * request.pipeline_parallel * data_parallel
+        )
+        pcie_bandwidth = gpu_specs["pcie_bandwidth_gb_s"] * 1e9 * self.PCIE_BANDWIDTH_EFFICIENCY
+        # 单卡分得的NVMe带宽
+        nvme_bandwidth = request.nvme_bandwidth_gb_s * 1e9 / gpus_on_node
+
+        pcie_time = 0.0
+        nvme_time = 0.0
+        cpu_optimizer_time = 0.0
+        param_fetch_time = 0.0
+
+        if request.offload_optimizer != OffloadDevice.NONE:
+            # ZeRO Stage 1及以上时每个rank只更新自己的分片
+            trainable_rank = trainable_stage_params / tp / data_parallel
+            pcie_time += trainable_rank * (state_bytes["gradient"] + state_bytes["param"]) / pcie_bandwidth
+            cpu_optimizer_time = trainable_rank * gpus_on_node / self.CPU_OPTIMIZER_PARAMS_PER_S
+            if request.offload_optimizer == OffloadDevice.NVME:
+                # 优化器状态和主权重在优化器步前读入、步后写回
+                nvme_time += (2 * trainable_rank * (state_bytes["optimizer"] + state_bytes["master_weights"]) /
+                              nvme_bandwidth)
+
+        if request.offload_param != OffloadDevice.NONE:
+            param_rank_bytes = stage_params / tp / data_parallel * state_bytes["param"]
+            param_fetch_time = 2 * num_microbatches * param_rank_bytes / pcie_bandwidth
+            if request.offload_param == OffloadDevice.NVME:
+                param_fetch_time += 2 * num_microbatches * param_rank_bytes / nvme_bandwidth
+
+        exposed = (pcie_time + nvme_time + cpu_optimizer_time +
+                   max(0.0, param_fetch_time - compute_time * overlap_efficiency))
+        return {
+            "optimizer_pcie_s": pcie_time,
+            "optimizer_nvme_s": nvme_time,
+            "cpu_optimizer_s": cpu_optimizer_time,
+            "param_fetch_s": param_fetch_time,
+            "exposed_s": exposed
+        }
+
+    def summarize(self, request: TrainingRequest, gpu_specs: Dict[str, Any],
+                  stages: List[Dict[str, Any]], step_cost: Dict[str, float]) -> Dict[str, Any]:
+        """
+        汇总卸载所需的单节点主机内存和NVMe容量
+
+        按每个节点放满同一stage最大卸载量的GPU估算（流水线各stage的GPU可能位于同一节点）
+
+        Returns:
+            卸载分析结果
+        """
+        num_gpus = (request.tensor_parallel * request.pipeline_parallel *
+                    request.context_parallel * request.data_parallel)
+        gpus_on_node = self.get_gpus_per_node(gpu_specs, num_gpus)
+        host_per_gpu = max(stage["host_offload"] for stage in stages)
+        nvme_per_gpu = max(stage["nvme_offload"] for stage in stages)
+        return {
+            "offload_optimizer": request.offload_optimizer.value,
+            "offload_param": request.offload_param.value,
+            "gpus_per_node": gpus_on_node,
+            "host_memory_per_gpu_gb": host_per_gpu,
+            "nvme_per_gpu_gb": nvme_per_gpu,
+            "host_memory_per_node_gb": host_per_gpu * gpus_on_node,
+            "nvme_per_node_gb": nvme_per_gpu * gpus_on_node,
+            **step_cost
+        }
@@ -0,0 +1,203 @@
+"""
+流水线并行调度模拟服务
+
+逐步模拟1F1B和交错式(interleaved)1F1B调度，生成每个stage的显存时间线和流水线气泡率。
+每个stage的静态显存（权重、梯度、优化器状态、框架开销）和单个微批次的激活值
+来自训练计算器的显存公式；微批次的激活值在前向开始时分配、在反向结束时释放。
+"""
+
+from typing import Dict, Any, List, Iterator, Tuple
+
+from ...models.training import PipelineSchedule
+
+
+class PipelineScheduleSimulator:
+    """流水线调度模拟器"""
+
+    # 反向计算耗时相对前向的倍数（反向需计算输入梯度和权重梯度）
+    BACKWARD_FORWARD_RATIO = 2.0
+
+    def __init__(self, num_stages: int, num_microbatches: int,
+                 schedule: PipelineSchedule = PipelineSchedule.ONE_F_ONE_B,
+                 virtual_stages: int = 1):
+        """
+        初始化流水线调度模拟器
+
+        Args:
+            num_stages: 流水线stage数（即流水线并行度）
+            num_microbatches: 每个训练步的微批次数
+            schedule: 调度方式
+            virtual_stages: 交错调度时每个stage承载的模型块数
+        """
+        schedule = PipelineSchedule(schedule)
+        if schedule == PipelineSchedule.ONE_F_ONE_B:
+            virtual_stages = 1
+        elif num_stages > 1 and num_microbatches % num_stages != 0:
+            raise ValueError("交错式1F1B调度要求微批次数能被流水线并行度整除")
+
+        self.num_stages = num_stages
+        self.num_microbatches = num_microbatches
+        self.schedule = schedule
+        self.virtual_stages = virtual_stages
+
+    def _get_chunk(self, op_index: int, forward: bool) -> Tuple[int, int]:
+        """
+        计算交错调度中第op_index个前向/反向操作对应的(微批次, 模型块)
+
+        参考Megatron-LM：微批次以num_stages个为一组，组内按模型块依次执行
+        """
+        p, v = self.num_stages, self.virtual_stages
+        group, position = divmod(op_index, p * v)
+        chunk = position // p
+        if not forward:
+            chunk = v - 1 - chunk
+        return group * p + position % p, chunk
+
+    def build_stage_ops(self, stage: int) -> List[Tuple[str, int, int]]:
+        """
+        生成单个stage的操作序列
+
+        1F1B：预热阶段执行 min(pp - stage - 1, m) 次前向，稳态交替执行一次前向一次反向，
+        冷却阶段完成剩余反向；交错调度的预热次数为 (pp - stage - 1) * 2 + (v - 1) * pp
+
+        Returns:
+            [(操作类型"F"/"B", 微批次, 模型块), ...]
+        """
+        p, v, m = self.num_stages, self.virtual_stages, self.num_microbatches
+        total = m * v
+
+        if v == 1:
+            warmup = min(p - stage - 1, m)
+        else:
+            warmup = min((p - stage - 1) * 2 + (v - 1) * p, total)
+
+        ops = []
+        forward_index = backward_index = 0
+        for _ in range(warmup):
+            ops.append(("F",) + self._get_chunk(forward_index, True))
+            forward_index += 1
+        for _ in range(total - warmup):
+            ops.append(("F",) + self._get_chunk(forward_index, True))
+            forward_index += 1
+            ops.append(("B",) + self._get_chunk(backward_index, False))
+            backward_index += 1
+        for _ in range(warmup):
+            ops.append(("B",) + self._get_chunk(backward_index, False))
+            backward_index += 1
+        return ops
+
+    def _schedule_ops(self) -> List[Dict[str, Any]]:
+        """
+        按依赖关系计算每个操作的开始和结束时间
+
+        前向依赖上一个虚拟stage的同一微批次前向，反向依赖下一个虚拟stage的同一微批次反向；
+        时间单位为一个微批次在一个stage上的前向耗时
+        """
+        p, v = self.num_stages, self.virtual_stages
+        last_virtual = p * v - 1
+        forward_time = 1.0 / v
+        backward_time = forward_time * self.BACKWARD_FORWARD_RATIO
+
+        stage_ops = [self.build_stage_ops(stage) for stage in range(p)]
+        positions = [0] * p
+        device_free = [0.0] * p
+        finished: Dict[Tuple[str, int, int], float] = {}
+        records = []
+
+        remaining = sum(len(ops) for ops in stage_ops)
+        while remaining:
+            progressed = False
+            for stage in range(p):
+                while positions[stage] < len(stage_ops[stage]):
+                    kind, microbatch, chunk = stage_ops[stage][positions[stage]]
+                    virtual = chunk * p + stage
+                    if kind == "F":
+                        dependency = ("F", microbatch, virtual - 1) if virtual > 0 else None
+                    elif virtual < last_virtual:
+                        dependency = ("B", microbatch, virtual + 1)
+                    else:
+                        dependency = ("F", microbatch, virtual)
+                    if dependency is not None and dependency not in finished:
+                        break
+
+                    start = max(device_free[stage], finished.get(dependency, 0.0))
+                    end = start + (forward_time if kind == "F" else backward_time)
+                    finished[(kind, microbatch, virtual)] = end
+                    device_free[stage] = end
+                    records.append({
+                        "stage": stage, "op": kind, "microbatch": microbatch,
+                        "chunk": chunk, "start": start, "end": end
+                    })
+                    positions[stage] += 1
+                    remaining -= 1
+                    progressed = True
+            if not progressed:
+                raise RuntimeError("流水线调度存在循环依赖")
+
+        return records
+
+    def simulate(self, stage_memory: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        模拟流水线调度，按时间顺序逐个生成操作事件，最后生成汇总
+
+        Args:
+            stage_memory: 训练计算器给出的每个stage的单卡显存分解，
+                需包含activations、in_flight_microbatches和total
+
+        Yields:
+            操作事件 {"type": "op", ...}，包含该操作结束后本stage的显存；
+            最后一条为汇总 {"type": "summary", ...}
+        """
+        static_memory = []
+        chunk_activation = []
+        for stage in stage_memory:
+            per_microbatch = stage["activations"] / stage["in_flight_microbatches"]
+            static_memory.append(stage["total"] - stage["activations"])
+            chunk_activation.append(per_microbatch / self.virtual_stages)
+
+        records = self._schedule_ops()
+        records.sort(key=lambda r: (r["end"], r["stage"]))
+
+        live = [0] * self.num_stages
+        peak_memory = list(static_memory)
+        peak_in_flight = [0] * self.num_stages
+        busy = [0.0] * self.num_stages
+        makespan = max(r["end"] for r in records)
+
+        for record in records:
+            stage = record["stage"]
+            live[stage] += 1 if record["op"] == "F" else -1
+            busy[stage] += record["end"] - record["start"]
+            memory = static_memory[stage] + live[stage] * chunk_activation[stage]
+            if memory > peak_memory[stage]:
+                peak_memory[stage] = memory
+            peak_in_flight[stage] = max(peak_in_flight[stage], live[stage])
+            yield dict(record, type="op", memory_gb=memory)
+
+        yield {
+            "type": "summary",
+            **self.summarize(peak_memory, peak_in_flight, busy, makespan)
+        }
+
+    def summarize(self, peak_memory: List[float], peak_in_flight: List[int],
+                  busy: List[float], makespan: float) -> Dict[str, Any]:
+        """汇总每个stage的显存峰值和流水线气泡率"""
+        return {
+            "schedule": self.schedule.value,
+            "num_stages": self.num_stages,
+            "num_microbatches": self.num_microbatches,
+            "virtual_stages": self.virtual_stages,
+            "makespan": makespan,
+            "bubble_fraction": 1 - sum(busy) / (makespan * self.num_stages),
+            "peak_memory_per_stage_gb": peak_memory,
+            # 以完整微批次计的在途激活值数量
+            "peak_in_flight_microbatches": [n / self.virtual_stages for n in peak_in_flight]
+        }
+
+    def run(self, stage_memory: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """执行完整模拟并只返回汇总结果"""
+        summary: Dict[str, Any] = {}
+        for event in self.simulate(stage_memory):
+            if event["type"] == "summary":
+                summary = event
+        return summary
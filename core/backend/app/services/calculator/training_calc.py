@@ -2,13 +2,19 @@
 训练资源计算服务
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Iterator, Tuple
 import math
 
-from ...models.training import TrainingRequest, TrainingResponse, TrainingMethod, OptimizerType, DeepSpeedStage, AccelerationMethod, LoRAConfig
-from ...models.common import PrecisionType, ModelInfo, ModelSize
+from ...models.training import TrainingRequest, TrainingResponse, TrainingMethod, OptimizerType, OptimizerStateDtype, DeepSpeedStage, PipelineSchedule, OffloadDevice
+from ...models.common import PrecisionType, ModelInfo, ModelSize, ContextParallelMethod
 from ...services.model_registry import ModelRegistry
 from .base_calc import BaseCalculator
+from .pipeline_sim import PipelineScheduleSimulator
+from .comm_calc import CommunicationCalculator
+from .flops_calc import FlopsCalculator
+from .adapter_calc import AdapterCalculator
+from .activation_calc import ActivationCalculator
+from .logits_calc import LogitsCalculator
 
 
 class TrainingCalculator(BaseCalculator):
@@ -18,15 +24,39 @@ class TrainingCalculator(BaseCalculator):
     OPTIMIZER_STATE_MULTIPLIER = {
         OptimizerType.ADAMW: 2.0,  # beta1, beta2 动量
         OptimizerType.ADAM: 2.0,   # beta1, beta2 动量  
-        OptimizerType.SGD: 1.0     # 动量
+        OptimizerType.SGD: 1.0,    # 动量
+        OptimizerType.ADAMW_8BIT: 2.0,
+        OptimizerType.PAGED_ADAMW: 2.0,
+        OptimizerType.PAGED_ADAMW_8BIT: 2.0
     }
     
+    # 8-bit优化器（bitsandbytes）的状态默认按INT8分块量化存储
+    EIGHT_BIT_OPTIMIZERS = {OptimizerType.ADAMW_8BIT, OptimizerType.PAGED_ADAMW_8BIT}
+    
+    # 优化器状态数据类型的字节数
+    OPTIMIZER_STATE_BYTES = {
+        OptimizerStateDtype.FP32: 4,
+        OptimizerStateDtype.FP16: 2,
+        OptimizerStateDtype.BF16: 2,
+        OptimizerStateDtype.INT8: 1
+    }
+    
+    # INT8优化器状态分块量化的块大小，每块额外保存一个FP32缩放因子
+    OPTIMIZER_QUANT_BLOCK_SIZE = 2048
+    
 
     
     def __init__(self):
         """初始化训练计算器"""
         super().__init__()
         self.model_registry = ModelRegistry()
+        self.communication_calculator = CommunicationCalculator()
+        self.flops_calculator = FlopsCalculator()
+        self.adapter_calculator = AdapterCalculator()
+        self.activation_calculator = ActivationCalculator()
+        self.logits_calculator = LogitsCalculator()
+        self.offload_calculator = self.communication_calculator.offload_calculator
+        self.moe_calculator = self.communication_calculator.moe_calculator
     
     def calculate(self, request: TrainingRequest) -> TrainingResponse:
         """
@@ -46,91 +76,72 @@ class TrainingCalculator(BaseCalculator):
         activation_memory = self._calculate_activation_memory(model, request)
         optimizer_memory = self._calculate_optimizer_memory(model, request)
         gradient_memory = self._calculate_gradient_memory(model, request)
+        master_weights_memory = self._calculate_master_weights_memory(model, request)
+        logits_memory = self._calculate_logits_memory(model, request)
         
-        # 计算总显存
-        # 多卡训练时需要考虑各组件的分片情况
-        if request.data_parallel > 1:
-            # 多卡训练总显存计算
-            if request.deepspeed_stage == DeepSpeedStage.STAGE3:
-                # Stage 3: 所有组件都分片
-                total_memory = (model_memory + activation_memory + 
-                               (optimizer_memory or 0) + (gradient_memory or 0) +
-                               self.get_framework_overhead("pytorch") * request.data_parallel)
-            elif request.deepspeed_stage == DeepSpeedStage.STAGE2:
-                # Stage 2: 模型权重不分片，优化器和梯度分片
-                total_memory = (model_memory * request.data_parallel + activation_memory + 
-                               (optimizer_memory or 0) + (gradient_memory or 0) +
-                               self.get_framework_overhead("pytorch") * request.data_parallel)
-            elif request.deepspeed_stage == DeepSpeedStage.STAGE1:
-                # Stage 1: 只有优化器分片
-                total_memory = (model_memory * request.data_parallel + activation_memory + 
-                               (optimizer_memory or 0) + (gradient_memory or 0) * request.data_parallel +
-                               self.get_framework_overhead("pytorch") * request.data_parallel)
-            else:
-                # 不使用DeepSpeed: 除激活值外，其他组件每张卡都需要完整副本
-                total_memory = (model_memory * request.data_parallel + activation_memory + 
-                               (optimizer_memory or 0) * request.data_parallel + 
-                               (gradient_memory or 0) * request.data_parallel +
-                               self.get_framework_overhead("pytorch") * request.data_parallel)
-        else:
-            # 单卡训练
-            total_memory = (model_memory + activation_memory + 
-                           (optimizer_memory or 0) + (gradient_memory or 0) +
-                           self.get_framework_overhead("pytorch"))
+        # 按流水线stage计算单卡显存（张量并行切分模型状态，流水线并行切分层，ZeRO按状态分片）
+        stage_memory_breakdown = self._calculate_stage_memory(
+            model, request, model_memory, activation_memory, optimizer_memory, gradient_memory,
+            master_weights_memory, logits_memory
+        )
+        # 按调度模拟结果修正每个stage在途的激活值
+        pipeline_schedule = self._apply_pipeline_schedule(model, request, stage_memory_breakdown)
+        memory_per_gpu = max(stage["total"] for stage in stage_memory_breakdown)
+        
+        # 总显存 = 各stage单卡显存之和 * 张量并行度 * 上下文并行度 * 数据并行度
+        total_memory = (sum(stage["total"] for stage in stage_memory_breakdown) *
+                        request.tensor_parallel * request.context_parallel * request.data_parallel)
         
         # 计算有效批次大小
         effective_batch_size = (request.batch_size * 
                               request.gradient_accumulation_steps * 
                               request.data_parallel)
         
-        # 计算GPU需求
-        # 考虑DeepSpeed分片后的实际单卡显存需求
-        # 注意：激活值在数据并行训练中总是按GPU数量分片（每张卡处理不同的batch）
-        activation_memory_per_gpu = activation_memory / request.data_parallel
-        
-        if request.deepspeed_stage == DeepSpeedStage.STAGE3:
-            # Stage 3分片所有参数，显存需求最小
-            memory_per_gpu = (model_memory / request.data_parallel + 
-                            activation_memory_per_gpu + 
-                            (optimizer_memory or 0) / request.data_parallel +
-                            (gradient_memory or 0) / request.data_parallel +
-                            self.get_framework_overhead("pytorch"))
-        elif request.deepspeed_stage == DeepSpeedStage.STAGE2:
-            # Stage 2分片优化器状态和梯度
-            memory_per_gpu = (model_memory + 
-                            activation_memory_per_gpu + 
-                            (optimizer_memory or 0) / request.data_parallel +
-                            (gradient_memory or 0) / request.data_parallel +
-                            self.get_framework_overhead("pytorch"))
-        elif request.deepspeed_stage == DeepSpeedStage.STAGE1:
-            # Stage 1只分片优化器状态
-            memory_per_gpu = (model_memory + 
-                            activation_memory_per_gpu + 
-                            (optimizer_memory or 0) / request.data_parallel +
-                            (gradient_memory or 0) +
-                            self.get_framework_overhead("pytorch"))
-        else:
-            # 不使用DeepSpeed，模型权重、优化器和梯度不分片，但激活值按GPU数量分片
-            memory_per_gpu = (model_memory + 
-                            activation_memory_per_gpu + 
-                            (optimizer_memory or 0) +
-                            (gradient_memory or 0) +
-                            self.get_framework_overhead("pytorch"))
-        
         min_gpu_count = max(1, math.ceil(total_memory / 80))  # 假设80GB显存
-        optimal_gpu_count = request.data_parallel
-        
-        # 显存分解
+        optimal_gpu_count = (request.data_parallel * request.tensor_parallel *
+                             request.pipeline_parallel * request.context_parallel)
+        
+        # 显存分解（优化器状态、主权重和梯度按ZeRO在数据并行组内分片、路由专家按专家并行切分后的单卡值）
+        sharding = self._get_zero_sharding_factors(request)
+        optimizer_memory *= self._get_state_multiplier(model, request, sharding["optimizer_states"], True)
+        gradient_memory *= self._get_state_multiplier(model, request, sharding["gradients"], True)
+        master_weights_memory *= self._get_state_multiplier(model, request, sharding["master_weights"], True)
         memory_breakdown = {
             "model_weights": model_memory,
+            "master_weights": master_weights_memory,
             "activations": activation_memory,
-            "optimizer_states": optimizer_memory or 0,
-            "gradients": gradient_memory or 0,
+            "logits": logits_memory,
+            "optimizer_states": optimizer_memory,
+            "gradients": gradient_memory,
             "framework_overhead": self.get_framework_overhead("pytorch")
         }
         
-        # 性能预估
-        estimated_tokens_per_second = self._estimate_training_speed(model, request)
+        # 性能预估：计算量 / (峰值算力 * 算力利用率)，叠加流水线气泡和通信开销
+        flops_analysis = self._calculate_flops(model, request)
+        activation_analysis = self.activation_calculator.summarize(model, request, flops_analysis)
+        logits_analysis = self.logits_calculator.summarize(model, request, *self._get_head_gradient(model, request))
+        communication_analysis = self._analyze_communication(
+            model, request, pipeline_schedule, flops_analysis["hardware_flops_per_token"],
+            flops_analysis["forward_breakdown"]["attention_scores"]
+        )
+        estimated_tokens_per_second = communication_analysis["tokens_per_second"]
+        estimated_time_per_epoch = self._estimate_time_per_epoch(
+            request, flops_analysis, communication_analysis
+        )
+        offload_analysis = None
+        if self._is_offload_enabled(request):
+            offload_analysis = self.offload_calculator.summarize(
+                request, self.communication_calculator.get_gpu_specs(request.gpu_type),
+                stage_memory_breakdown, communication_analysis["offload"]
+            )
+        adapter_analysis = None
+        if self.adapter_calculator.is_adapter_method(request.training_method):
+            adapter_analysis = self.adapter_calculator.summarize(model, request)
+        moe_analysis = self.moe_calculator.summarize(
+            model, request.tensor_parallel, request.pipeline_parallel, request.expert_parallel,
+            request.tensor_parallel * request.expert_parallel, self.PRECISION_BYTES[request.precision],
+            communication_analysis["expert_parallel_comm_s"]
+        )
         
         # 生成推荐GPU列表
         from ...utils.helpers import recommend_gpus
@@ -156,13 +167,275 @@ class TrainingCalculator(BaseCalculator):
             effective_batch_size=effective_batch_size,
             memory_per_gpu=memory_per_gpu,
             memory_breakdown=memory_breakdown,
+            stage_memory_breakdown=stage_memory_breakdown,
+            pipeline_schedule=pipeline_schedule,
+            communication_analysis=communication_analysis,
+            flops_analysis=flops_analysis,
+            offload_analysis=offload_analysis,
+            activation_analysis=activation_analysis,
+            logits_analysis=logits_analysis,
+            adapter_analysis=adapter_analysis,
+            moe_analysis=moe_analysis,
             estimated_tokens_per_second=estimated_tokens_per_second,
-            estimated_time_per_epoch=None,  # 需要更多信息才能计算
+            estimated_time_per_epoch=estimated_time_per_epoch,
             recommendations=recommendations
         )
     
 
 
+    def _get_zero_sharding_factors(self, request: TrainingRequest) -> Dict[str, int]:
+        """
+        获取DeepSpeed ZeRO下各模型状态在数据并行组内的分片数
+        
+        Stage 1分片优化器状态（含FP32主权重），Stage 2增加梯度，Stage 3增加模型权重；
+        上下文并行的各rank持有相同参数，与数据并行一起参与分片
+        """
+        dp = request.data_parallel * request.context_parallel
+        stage = request.deepspeed_stage
+        return {
+            "model_weights": dp if stage == DeepSpeedStage.STAGE3 else 1,
+            "master_weights": dp if stage in [DeepSpeedStage.STAGE1, DeepSpeedStage.STAGE2,
+                                              DeepSpeedStage.STAGE3] else 1,
+            "gradients": dp if stage in [DeepSpeedStage.STAGE2, DeepSpeedStage.STAGE3] else 1,
+            "optimizer_states": dp if stage in [DeepSpeedStage.STAGE1, DeepSpeedStage.STAGE2,
+                                                DeepSpeedStage.STAGE3] else 1
+        }
+    
+    def _get_state_multiplier(self, model: ModelInfo, request: TrainingRequest, shards: int,
+                              trainable: bool = False) -> float:
+        """
+        单卡持有的模型状态比例（张量并行切分前）
+        
+        稠密参数按ZeRO分片数切分；路由专家先按专家并行切分，ZeRO再在剩余的数据并行rank内分片，
+        合计切分数为 max(ZeRO分片数, 专家并行度)。LoRA系列的可训练状态为适配器，按稠密参数处理
+        """
+        if trainable and self.adapter_calculator.is_adapter_method(request.training_method):
+            return 1 / shards
+        return self.moe_calculator.get_shard_multiplier(model, shards, max(shards, request.expert_parallel))
+    
+    def _is_offload_enabled(self, request: TrainingRequest) -> bool:
+        """是否启用了优化器或参数卸载（分页优化器的状态可换出到主机内存，按卸载处理）"""
+        return (request.offload_optimizer != OffloadDevice.NONE or
+                request.offload_param != OffloadDevice.NONE or
+                request.optimizer in self.offload_calculator.PAGED_OPTIMIZERS)
+    
+    def _get_state_bytes(self, request: TrainingRequest) -> Dict[str, float]:
+        """
+        按混合精度策略计算每个参数的权重、梯度、主权重和优化器状态字节数
+        
+        默认值由训练精度推导：权重和梯度与训练精度一致；FP16/BF16训练保留FP32主权重；
+        优化器状态为FP32，8-bit优化器为INT8（每2048个元素一个FP32缩放因子）。
+        BF16/FP16混合精度AdamW合计 2 + 2 + 4 + 8 = 16字节/参数
+        
+        Returns:
+            {"param", "gradient", "master_weights", "optimizer"} 每个参数的字节数，
+            optimizer不含主权重
+        """
+        policy = request.precision_policy
+        param_dtype = (policy and policy.param_dtype) or request.precision
+        grad_dtype = (policy and policy.grad_dtype) or param_dtype
+        
+        master_weights = policy.master_weights if policy and policy.master_weights is not None else None
+        if master_weights is None:
+            master_weights = param_dtype != PrecisionType.FP32
+        
+        state_dtype = policy and policy.optimizer_state_dtype
+        if not state_dtype:
+            state_dtype = (OptimizerStateDtype.INT8 if request.optimizer in self.EIGHT_BIT_OPTIMIZERS
+                           else OptimizerStateDtype.FP32)
+        state_bytes = self.OPTIMIZER_STATE_BYTES[state_dtype]
+        if state_dtype == OptimizerStateDtype.INT8:
+            state_bytes += 4 / self.OPTIMIZER_QUANT_BLOCK_SIZE
+        
+        return {
+            "param": self.PRECISION_BYTES[param_dtype],
+            "gradient": self.PRECISION_BYTES[grad_dtype],
+            "master_weights": self.PRECISION_BYTES[PrecisionType.FP32] if master_weights else 0,
+            "optimizer": state_bytes * self.OPTIMIZER_STATE_MULTIPLIER.get(request.optimizer, 1.0)
+        }
+    
+    def _get_stage_layers(self, model: ModelInfo, pipeline_parallel: int) -> List[int]:
+        """
+        计算流水线并行下每个stage的层数
+        
+        层数不能整除时，靠前的stage各多分配一层
+        """
+        base, remainder = divmod(model.num_layers, pipeline_parallel)
+        return [base + (1 if stage < remainder else 0) for stage in range(pipeline_parallel)]
+    
+    def _get_stage_parameter_fractions(self, model: ModelInfo, stage_layers: List[int]) -> List[float]:
+        """
+        计算每个流水线stage持有的参数占比
+        
+        词嵌入位于第一个stage，LM head和最终归一化位于最后一个stage，其余参数按层数分配；
+        共享权重的LM head在最后一个stage另存一份词嵌入（流水线并行时两端各持有一份）
+        """
+        breakdown = self.get_parameter_breakdown(model)
+        total_params = self.get_total_parameters(model)
+        layer_params = self.get_layer_parameters(model)
+        head_params = breakdown["lm_head"] or breakdown["embedding"]
+        
+        fractions = []
+        for stage, layers in enumerate(stage_layers):
+            stage_params = layers * layer_params
+            if stage == 0:
+                stage_params += breakdown["embedding"]
+            if stage == len(stage_layers) - 1:
+                stage_params += breakdown["final_norm"]
+                if len(stage_layers) > 1 or breakdown["lm_head"]:
+                    stage_params += head_params
+            fractions.append(stage_params / total_params)
+        return fractions
+    
+    def _calculate_stage_memory(self, model: ModelInfo, request: TrainingRequest,
+                                model_memory: float, activation_memory: float,
+                                optimizer_memory: float, gradient_memory: float,
+                                master_weights_memory: float = 0.0,
+                                logits_memory: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        计算Megatron式3D并行下每个流水线stage的单卡显存
+        
+        - 模型权重、梯度、主权重、优化器状态：按stage参数占比切分后，再按张量并行度切分，
+          并叠加ZeRO在数据并行组内的分片（各状态只分片一次）
+        - 激活值：按stage层数切分；1F1B调度下第s个stage（从0开始）在稳态时
+          同时持有 min(pp - s, 微批次数) 个微批次的激活值
+        - logits与损失缓冲区：只在最后一个stage，且同一时刻只有一个微批次在计算损失
+        - CPU/NVMe卸载：卸载的部分移出GPU，记入host_offload和nvme_offload
+        
+        Args:
+            model: 模型信息
+            request: 训练预估请求
+            model_memory: 模型权重显存（GB，完整模型）
+            activation_memory: 单个微批次的激活值显存（GB，完整层栈，单个张量并行rank）
+            optimizer_memory: 优化器状态显存（GB，分片前）
+            gradient_memory: 梯度显存（GB，分片前）
+            master_weights_memory: FP32主权重显存（GB，分片前）
+            logits_memory: 单个微批次的logits与损失缓冲区（GB，单个张量并行rank）
+            
+        Returns:
+            每个stage的单卡显存分解
+        """
+        tp = request.tensor_parallel
+        pp = request.pipeline_parallel
+        if model.num_heads % tp != 0:
+            raise ValueError(f"注意力头数{model.num_heads}不能被张量并行度{tp}整除")
+        if (request.context_parallel_method == ContextParallelMethod.ULYSSES and
+                model.num_heads % (tp * request.context_parallel) != 0):
+            raise ValueError(f"Ulysses要求注意力头数{model.num_heads}能被张量并行度 * 上下文并行度"
+                             f"{tp * request.context_parallel}整除")
+        if pp > model.num_layers:
+            raise ValueError(f"流水线并行度{pp}不能超过模型层数{model.num_layers}")
+        self.moe_calculator.validate_expert_parallel(model, request.expert_parallel)
+        
+        sharding = self._get_zero_sharding_factors(request)
+        stage_layers = self._get_stage_layers(model, pp)
+        fractions = self._get_stage_parameter_fractions(model, stage_layers)
+        num_microbatches = request.gradient_accumulation_steps
+        framework_overhead = self.get_framework_overhead("pytorch")
+        
+        stages = []
+        for stage, (layers, fraction) in enumerate(zip(stage_layers, fractions)):
+            in_flight = min(pp - stage, num_microbatches) if pp > 1 else 1
+            
+            weights = (model_memory * fraction / tp *
+                       self._get_state_multiplier(model, request, sharding["model_weights"]))
+            gradients = (gradient_memory * fraction / tp *
+                         self._get_state_multiplier(model, request, sharding["gradients"], True))
+            optimizer_states = (optimizer_memory * fraction / tp *
+                                self._get_state_multiplier(model, request, sharding["optimizer_states"], True))
+            master_weights = (master_weights_memory * fraction / tp *
+                              self._get_state_multiplier(model, request, sharding["master_weights"], True))
+            # 激活值在数据并行中按GPU数量分片（每张卡处理不同的batch）
+            activations = (activation_memory / request.data_parallel *
+                           layers / model.num_layers * in_flight)
+            logits = logits_memory / request.data_parallel if stage == pp - 1 else 0.0
+            
+            stage_memory = {
+                "stage": stage,
+                "layers": layers,
+                "in_flight_microbatches": in_flight,
+                "model_weights": weights,
+                "master_weights": master_weights,
+                "gradients": gradients,
+                "optimizer_states": optimizer_states,
+                "activations": activations,
+                "logits": logits,
+                "framework_overhead": framework_overhead,
+                "total": (weights + master_weights + gradients + optimizer_states +
+                          activations + logits + framework_overhead)
+            }
+            if self._is_offload_enabled(request):
+                # 参数卸载时GPU上只保留正在计算的几层（all-gather后的完整层权重）
+                resident_layers = min(layers, self.offload_calculator.PARAM_OFFLOAD_RESIDENT_LAYERS)
+                resident_weights = model_memory * resident_layers / model.num_layers / tp
+                self.offload_calculator.apply_to_stage(request, stage_memory, resident_weights)
+            stages.append(stage_memory)
+        
+        return stages
+    
+    def _create_pipeline_simulator(self, model: ModelInfo,
+                                   request: TrainingRequest) -> PipelineScheduleSimulator:
+        """创建流水线调度模拟器"""
+        pp = request.pipeline_parallel
+        virtual_stages = 1
+        if request.pipeline_schedule == PipelineSchedule.INTERLEAVED_1F1B:
+            virtual_stages = request.virtual_pipeline_stages
+            if virtual_stages > min(self._get_stage_layers(model, pp)):
+                raise ValueError(f"每个stage的模型块数{virtual_stages}不能超过该stage的层数")
+        return PipelineScheduleSimulator(
+            num_stages=pp,
+            num_microbatches=request.gradient_accumulation_steps,
+            schedule=request.pipeline_schedule,
+            virtual_stages=virtual_stages
+        )
+    
+    def _apply_pipeline_schedule(self, model: ModelInfo, request: TrainingRequest,
+                                 stages: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        模拟流水线调度，并用每个stage的在途激活值峰值更新stage显存分解
+        
+        1F1B调度的模拟峰值与 min(pp - s, 微批次数) 一致；交错调度预热阶段更长，
+        在途激活值更多
+        
+        Returns:
+            调度模拟汇总，未启用流水线并行时返回None
+        """
+        if request.pipeline_parallel <= 1:
+            return None
+        
+        summary = self._create_pipeline_simulator(model, request).run(stages)
+        for stage, peak_in_flight in zip(stages, summary["peak_in_flight_microbatches"]):
+            per_microbatch = stage["activations"] / stage["in_flight_microbatches"]
+            activations = per_microbatch * peak_in_flight
+            stage["total"] += activations - stage["activations"]
+            stage["activations"] = activations
+            stage["in_flight_microbatches"] = peak_in_flight
+        
+        summary.pop("type")
+        return summary
+    
+    def iter_pipeline_timeline(self, request: TrainingRequest) -> Iterator[Dict[str, Any]]:
+        """
+        逐个生成流水线调度的显存时间线事件，最后一条为汇总
+        
+        Args:
+            request: 训练预估请求
+            
+        Yields:
+            调度事件字典
+        """
+        model = self._get_model_info(request)
+        stages = self._calculate_stage_memory(
+            model, request,
+            self._calculate_model_memory(model, request),
+            self._calculate_activation_memory(model, request),
+            self._calculate_optimizer_memory(model, request),
+            self._calculate_gradient_memory(model, request),
+            self._calculate_master_weights_memory(model, request),
+            self._calculate_logits_memory(model, request)
+        )
+        yield from self._create_pipeline_simulator(model, request).simulate(stages)
+    
     def _get_model_info(self, request: TrainingRequest) -> ModelInfo:
         """获取模型信息"""
         if request.model_id:
@@ -219,7 +492,7 @@ class TrainingCalculator(BaseCalculator):
             num_layers = 96
             num_heads = 96
         
-        return ModelInfo(
+        model = ModelInfo(
             id=f"custom-{parameters_billion}b",
             name=f"自定义 {parameters_billion}B 参数模型",
             family="custom",
@@ -233,6 +506,9 @@ class TrainingCalculator(BaseCalculator):
             precision=PrecisionType.FP16,
             size_category=self._get_model_size_category(parameters_billion)
         )
+        # 隐藏维度和层数取自经验表，MLP中间层维度按参数量反推（按256对齐），使结构参数量与给定参数量一致
+        intermediate_size = max(256, round(self.get_intermediate_size(model) / 256) * 256)
+        return model.model_copy(update={"intermediate_size": intermediate_size})
     
     def _get_model_size_category(self, parameters_billion: float):
         """根据参数数量确定模型规模类别"""
@@ -247,124 +523,71 @@ class TrainingCalculator(BaseCalculator):
     
     def _calculate_model_memory(self, model: ModelInfo, request: TrainingRequest) -> float:
         """计算模型权重显存"""
+        bytes_per_param = self._get_state_bytes(request)["param"]
         if request.training_method == TrainingMethod.FULL_FINETUNING:
-            return self.calculate_model_memory(model, request.precision)
+            return self.convert_bytes(self.get_total_parameters(model) * bytes_per_param)
         else:
-            # LoRA方法只需要原模型 + LoRA参数
-            base_memory = self.calculate_model_memory(model, request.precision)
-            lora_params = self._calculate_lora_parameters(model, request.lora_config)
-            lora_memory = lora_params * self.PRECISION_BYTES[request.precision] / (1024**3)
-            return base_memory + lora_memory
+            # LoRA系列方法需要冻结的基座模型（QLoRA为NF4量化）+ 适配器参数
+            base_bytes = self.adapter_calculator.calculate_base_weight_bytes(model, request, bytes_per_param)
+            adapter_params = self._get_trainable_parameters(model, request)
+            return self.convert_bytes(base_bytes + adapter_params * bytes_per_param)
     
     def _calculate_activation_memory(self, model: ModelInfo, request: TrainingRequest) -> float:
-        """计算激活值显存"""
-        # 激活值大小 = batch_size * sequence_length * hidden_size * num_layers * bytes_per_element
-        bytes_per_element = self.PRECISION_BYTES[request.precision]
-        
-        # 基础激活值
-        activation_size = (request.batch_size * request.sequence_length * 
-                         model.hidden_size * model.num_layers * bytes_per_element)
-        
-        # 注意力机制的激活值（Q, K, V）
-        attention_size = (request.batch_size * model.num_heads * 
-                        request.sequence_length * request.sequence_length * 
-                        bytes_per_element * model.num_layers)
-        
-        total_bytes = activation_size + attention_size
-        
-        # 梯度检查点可以减少激活值显存
-        if request.gradient_checkpointing:
-            total_bytes *= 0.3  # 约减少70%
-        
-        # 应用加速方法的显存优化
-        total_bytes = self._apply_acceleration_method(total_bytes, request)
+        """
+        计算单个微批次的激活值显存（完整层栈，单个张量并行rank）
         
-        return self.convert_bytes(total_bytes)
+        按Transformer层逐项统计保存的张量，考虑重计算方式、序列并行、dropout掩码、MLP中间层维度
+        和注意力内核（eager保存O(s²)的注意力分数，SDPA/FlashAttention-2只保存O(s)的softmax统计）
+        """
+        return self.convert_bytes(self.activation_calculator.calculate(model, request))
     
-    def _apply_acceleration_method(self, memory_bytes: float, request: TrainingRequest) -> float:
-        """应用加速方法的显存优化"""
-        if request.acceleration_method == AccelerationMethod.FLASH_ATTENTION_2:
-            # Flash Attention 2的核心优化：避免materialization N×N注意力矩阵
-            # 将O(N²)的注意力矩阵存储替换为O(N)的统计信息存储
-            memory_bytes = self._apply_flash_attention_optimization(memory_bytes, request)
-        
-        elif request.acceleration_method == AccelerationMethod.UNSLOTH:
-            # Unsloth 在 Flash Attention 2 基础上额外优化
-            # 根据官方文档：支持4倍于HF+FA2的上下文长度，意味着显存效率约4倍
-            # 总体减少约75%的激活值显存
-            memory_bytes *= 0.25
-        
-        return memory_bytes
+    def _get_head_gradient(self, model: ModelInfo, request: TrainingRequest) -> Tuple[float, bool]:
+        """
+        LM head权重梯度每个元素的字节数（LoRA系列方法冻结LM head时为0），
+        以及该梯度是否先生成再累加/归约到梯度缓冲区（梯度累积或ZeRO梯度分片）
+        """
+        if request.training_method != TrainingMethod.FULL_FINETUNING:
+            return 0.0, False
+        accumulates = (request.gradient_accumulation_steps > 1 or
+                       self._get_zero_sharding_factors(request)["gradients"] > 1)
+        return self._get_state_bytes(request)["gradient"], accumulates
     
-    def _apply_flash_attention_optimization(self, total_activation_memory: float, request: TrainingRequest) -> float:
+    def _calculate_logits_memory(self, model: ModelInfo, request: TrainingRequest) -> float:
         """
-        应用Flash Attention的具体优化算法
+        计算单个微批次的logits与交叉熵损失缓冲区（单个张量并行rank）
         
-        基于实际benchmarks修正：Flash Attention的主要优化不是大幅减少内存，
-        而是提高计算效率和支持更长序列。实际内存优化幅度相对温和。
+        按交叉熵实现分别统计logits、FP32 softmax/梯度和LM head权重梯度，见LogitsCalculator
         """
-        # 获取序列长度以确定优化幅度
-        seq_len = request.sequence_length
-        
-        # 根据实际测试数据，Flash Attention的内存优化效果：
-        # 1. 短序列（<= 2048）：优化幅度约10-15%
-        # 2. 中序列（2048-8192）：优化幅度约15-25%  
-        # 3. 长序列（> 8192）：优化幅度约25-35%
-        
-        if seq_len <= 2048:
-            # 短序列：优化幅度较小
-            optimization_factor = 0.85  # 减少15%
-        elif seq_len <= 8192:
-            # 中长序列：中等优化幅度
-            optimization_factor = 0.80  # 减少20%
-        else:
-            # 长序列：较大优化幅度
-            optimization_factor = 0.70  # 减少30%
-        
-        # 应用优化
-        optimized_memory = total_activation_memory * optimization_factor
-        
-        return optimized_memory
+        return self.convert_bytes(self.logits_calculator.calculate(
+            model, request, *self._get_head_gradient(model, request)
+        ))
     
-    def _calculate_optimizer_memory(self, model: ModelInfo, request: TrainingRequest) -> Optional[float]:
-        """计算优化器状态显存"""
-        if request.training_method == TrainingMethod.LORA:
-            # LoRA方法只优化LoRA参数
-            trainable_params = self._calculate_lora_parameters(model, request.lora_config)
-        else:
-            trainable_params = model.parameters
-        
-        multiplier = self.OPTIMIZER_STATE_MULTIPLIER.get(request.optimizer, 1.0)
-        bytes_per_param = self.PRECISION_BYTES[request.precision]
-        
-        # DeepSpeed ZeRO可以分片优化器状态
-        if request.deepspeed_stage in [DeepSpeedStage.STAGE1, DeepSpeedStage.STAGE2, DeepSpeedStage.STAGE3]:
-            # 优化器状态在多个GPU间分片
-            sharding_factor = request.data_parallel
-        else:
-            sharding_factor = 1
-        
-        total_bytes = trainable_params * bytes_per_param * multiplier / sharding_factor
+    def _get_trainable_parameters(self, model: ModelInfo, request: TrainingRequest) -> int:
+        """可训练参数量，LoRA系列方法只训练适配器参数"""
+        if self.adapter_calculator.is_adapter_method(request.training_method):
+            return self.adapter_calculator.calculate_parameters(
+                model, request.training_method, request.lora_config
+            )["total"]
+        return self.get_total_parameters(model)
+    
+    def _calculate_optimizer_memory(self, model: ModelInfo, request: TrainingRequest) -> float:
+        """计算优化器状态显存（ZeRO分片前，AdaLoRA含重要性统计）"""
+        trainable_params = self._get_trainable_parameters(model, request)
+        total_bytes = trainable_params * self._get_state_bytes(request)["optimizer"]
+        total_bytes += self.adapter_calculator.calculate_importance_bytes(request, trainable_params)
         return self.convert_bytes(total_bytes)
     
-    def _calculate_gradient_memory(self, model: ModelInfo, request: TrainingRequest) -> Optional[float]:
-        """计算梯度显存"""
-        if request.training_method == TrainingMethod.LORA:
-            # LoRA方法只需要LoRA参数的梯度
-            trainable_params = self._calculate_lora_parameters(model, request.lora_config)
-        else:
-            trainable_params = model.parameters
-        
-        bytes_per_param = self.PRECISION_BYTES[request.precision]
-        
-        # DeepSpeed ZeRO Stage 2/3可以分片梯度
-        if request.deepspeed_stage in [DeepSpeedStage.STAGE2, DeepSpeedStage.STAGE3]:
-            sharding_factor = request.data_parallel
-        else:
-            sharding_factor = 1
+    def _calculate_master_weights_memory(self, model: ModelInfo, request: TrainingRequest) -> float:
+        """计算混合精度训练的FP32主权重显存（ZeRO分片前）"""
+        trainable_params = self._get_trainable_parameters(model, request)
+        return self.convert_bytes(trainable_params * self._get_state_bytes(request)["master_weights"])
+    
+    def _calculate_gradient_memory(self, model: ModelInfo, request: TrainingRequest) -> float:
+        """计算梯度显存（ZeRO分片前）"""
+        trainable_params = self._get_trainable_parameters(model, request)
         
         # 基础梯度显存
-        total_bytes = trainable_params * bytes_per_param / sharding_factor
+        total_bytes = trainable_params * self._get_state_bytes(request)["gradient"]
         
         # 梯度累积的额外显存开销
         # 实际测试表明，梯度累积会增加5-15%的额外显存开销
@@ -374,47 +597,93 @@ class TrainingCalculator(BaseCalculator):
             accumulation_overhead = 1.0 + (0.10 * (1 + 0.5 * math.log(request.gradient_accumulation_steps)))
             
             # 优化器类型影响：Adam系列需要更多缓冲区
-            if request.optimizer in [OptimizerType.ADAMW, OptimizerType.ADAM]:
+            if request.optimizer != OptimizerType.SGD:
                 accumulation_overhead *= 1.15  # Adam额外增加15%开销
             
             total_bytes *= accumulation_overhead
         
         return self.convert_bytes(total_bytes)
     
-    def _estimate_training_speed(self, model: ModelInfo, request: TrainingRequest) -> Optional[float]:
-        """预估训练速度（tokens/s）"""
-        # 基础速度（假设A100 GPU）
-        base_speed = 2000
-        
-        # 根据模型大小调整
-        if model.parameters > 70e9:  # > 70B
-            base_speed *= 0.05
-        elif model.parameters > 30e9:  # > 30B
-            base_speed *= 0.15
-        elif model.parameters > 13e9:  # > 13B
-            base_speed *= 0.3
-        elif model.parameters > 7e9:   # > 7B
-            base_speed *= 0.5
-        else:  # <= 7B
-            base_speed *= 0.8
-            
-        # 根据训练方法调整
-        if request.training_method == TrainingMethod.LORA:
-            base_speed *= 1.5  # LoRA方法更快
-            
-        # 根据序列长度调整
-        seq_factor = min(2048, request.sequence_length) / 2048
-        base_speed *= seq_factor
+    def _calculate_flops(self, model: ModelInfo, request: TrainingRequest) -> Dict[str, Any]:
+        """计算每个token的训练FLOPs"""
+        lora_parameters = 0
+        if self.adapter_calculator.is_adapter_method(request.training_method):
+            lora_parameters = self._get_trainable_parameters(model, request)
+        return self.flops_calculator.calculate(
+            model, request, lora_parameters,
+            adapter_flops=self.adapter_calculator.calculate_extra_flops_per_token(model, request)
+        )
+    
+    def _analyze_communication(self, model: ModelInfo, request: TrainingRequest,
+                               pipeline_schedule: Optional[Dict[str, Any]],
+                               flops_per_token: float,
+                               attention_flops_per_token: float = 0.0) -> Dict[str, Any]:
+        """
+        估算通信开销、训练步耗时和扩展效率
+        
+        以参数最多的流水线stage作为瓶颈stage
+        """
+        stage_layers = self._get_stage_layers(model, request.pipeline_parallel)
+        fractions = self._get_stage_parameter_fractions(model, stage_layers)
+        bottleneck = max(range(len(fractions)), key=lambda stage: fractions[stage])
+        stage_params = self.get_total_parameters(model) * fractions[bottleneck]
+        
+        expert_fraction = self.moe_calculator.get_expert_fraction(model)
+        if self.adapter_calculator.is_adapter_method(request.training_method):
+            adapter_params = self._get_trainable_parameters(model, request)
+            trainable_stage_params = adapter_params * stage_layers[bottleneck] / model.num_layers
+            trainable_expert_fraction = 0.0
+        else:
+            trainable_stage_params = stage_params
+            trainable_expert_fraction = expert_fraction
+        dequantize_bytes = self.adapter_calculator.calculate_dequantize_bytes(
+            model, request, stage_layers[bottleneck] / model.num_layers
+        )
         
-        # 根据批次大小调整
-        batch_factor = min(32, request.batch_size) / 8
-        base_speed *= batch_factor
+        return self.communication_calculator.calculate(
+            model, request,
+            flops_per_token=flops_per_token,
+            stage_params=stage_params,
+            trainable_stage_params=trainable_stage_params,
+            stage_layers=stage_layers[bottleneck],
+            state_bytes=self._get_state_bytes(request),
+            bubble_fraction=pipeline_schedule["bubble_fraction"] if pipeline_schedule else 0.0,
+            dequantize_bytes=dequantize_bytes,
+            attention_flops_per_token=attention_flops_per_token,
+            expert_fraction=expert_fraction,
+            trainable_expert_fraction=trainable_expert_fraction
+        )
+    
+    def _estimate_time_per_epoch(self, request: TrainingRequest, flops_analysis: Dict[str, Any],
+                                 communication_analysis: Dict[str, Any]) -> Optional[str]:
+        """
+        计算实际MFU，并在提供数据集规模时估算每轮训练时间
         
-        # 根据并行度调整
-        parallel_efficiency = 0.9 ** (request.data_parallel - 1)
-        base_speed *= parallel_efficiency * request.data_parallel
+        实际MFU = 每token模型FLOPs（不含重计算） * 吞吐 / (GPU数 * 峰值算力)，
+        会因重计算、流水线气泡和未掩盖的通信低于请求的算力利用率
         
-        return max(10, base_speed)  # 最小10 tokens/s
+        Returns:
+            每轮训练时间描述，未提供数据集规模时返回None
+        """
+        from ...utils.helpers import estimate_training_time
+        
+        tokens_per_second = communication_analysis["tokens_per_second"]
+        gpu_specs = self.communication_calculator.get_gpu_specs(request.gpu_type)
+        peak_flops = self.communication_calculator.get_peak_flops(gpu_specs, request.precision)
+        flops_analysis["achieved_mfu"] = (flops_analysis["model_flops_per_token"] * tokens_per_second /
+                                          (communication_analysis["num_gpus"] * peak_flops))
+        
+        dataset_tokens = request.dataset_tokens
+        if request.dataset_samples:
+            dataset_tokens = request.dataset_samples * request.sequence_length
+        if not dataset_tokens:
+            return None
+        
+        description, time_breakdown = estimate_training_time(tokens_per_second, dataset_tokens)
+        flops_analysis["dataset_tokens"] = dataset_tokens
+        flops_analysis["flops_per_epoch"] = flops_analysis["hardware_flops_per_token"] * dataset_tokens
+        flops_analysis["time_per_epoch"] = time_breakdown
+        return description
     
     def _generate_recommendations(self, model: ModelInfo, request: TrainingRequest, 
                                 total_memory: float, memory_per_gpu: float) -> Dict[str, Any]:
@@ -426,14 +695,18 @@ class TrainingCalculator(BaseCalculator):
             recommendations["memory_optimization"] = [
                 "单卡显存需求较高，建议使用更多GPU或开启DeepSpeed",
                 "考虑使用DeepSpeed ZeRO Stage 3进行更深度的模型分片",
-                "启用gradient_checkpointing减少激活值显存",
+                "启用gradient_checkpointing或选择性重计算减少激活值显存",
                 "考虑使用LoRA等参数高效微调方法"
             ]
+            if request.sequence_length >= 32768 and request.context_parallel == 1:
+                recommendations["memory_optimization"].append(
+                    "长序列训练可开启上下文并行（Ring Attention / Ulysses）沿序列维切分激活值"
+                )
         elif total_memory > 80 and request.data_parallel == 1:
             recommendations["memory_optimization"] = [
                 "建议增加GPU数量进行多卡训练",
                 "或者使用LoRA等参数高效微调方法",
-                "开启gradient_checkpointing可减少30-70%激活值显存"
+                "选择性重计算只重算注意力分数，以很小的计算开销去掉O(s²)的激活值；完全重计算只保存每层输入"
             ]
         
         # DeepSpeed建议
@@ -455,11 +728,16 @@ class TrainingCalculator(BaseCalculator):
                 ]
         
         # 训练方法建议
-        if request.training_method == TrainingMethod.FULL_FINETUNING and model.parameters > 10e9:
+        if request.training_method == TrainingMethod.FULL_FINETUNING and self.get_total_parameters(model) > 10e9:
             recommendations["training_method"] = [
                 "对于大模型，建议使用LoRA或QLoRA以减少显存占用",
                 "全参数微调可能需要大量GPU资源"
             ]
+        elif request.training_method in (TrainingMethod.LORA, TrainingMethod.DORA) and memory_per_gpu > 80:
+            recommendations["training_method"] = [
+                "冻结的基座权重占用主要显存，QLoRA以4-bit NF4存储基座权重可减少约70%",
+                "QLoRA的反量化会降低训练吞吐"
+            ]
         
         # 批次大小建议
         if request.batch_size > 32:
@@ -469,42 +747,3 @@ class TrainingCalculator(BaseCalculator):
             ]
         
         return recommendations
-    
-    def _calculate_lora_parameters(self, model: ModelInfo, lora_config: Optional[LoRAConfig]) -> int:
-        """
-        计算LoRA新增的参数数量
-        
-        Args:
-            model: 模型信息
-            lora_config: LoRA配置
-            
-        Returns:
-            LoRA参数数量
-        """
-        if not lora_config:
-            lora_config = LoRAConfig()  # 使用默认配置
-        
-        rank = lora_config.rank
-        
-        # 根据target_modules计算适配的层数
-        # 默认适配所有线性层：q_proj, k_proj, v_proj, o_proj, gate_proj, up_proj, down_proj
-        if lora_config.target_modules == "all-linear":
-            # 每层有7个线性层（注意力4个 + FFN 3个）
-            linear_layers_per_layer = 7
-        else:
-            # 解析target_modules字符串，计算实际的线性层数
-            if isinstance(lora_config.target_modules, str) and lora_config.target_modules:
-                target_modules = lora_config.target_modules.split(',')
-                linear_layers_per_layer = len([m.strip() for m in target_modules if m.strip()])
-            else:
-                # 默认只适配注意力层
-                linear_layers_per_layer = 4  # q, k, v, o
-        
-        total_linear_layers = model.num_layers * linear_layers_per_layer
-        
-        # LoRA参数计算：每个适配层增加 rank * (input_dim + output_dim) 个参数
-        # 对于注意力层和FFN层，input_dim = output_dim = hidden_size
-        lora_params_per_layer = rank * (model.hidden_size + model.hidden_size)
-        total_lora_params = total_linear_layers * lora_params_per_layer
-        
-        return total_lora_params 
\ No newline at end of file
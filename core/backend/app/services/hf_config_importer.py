@@ -0,0 +1,287 @@
+"""
+HuggingFace config.json离线导入服务
+
+读取本地checkpoint目录中的config.json，按model_type映射为ModelInfo（含GQA、head_dim、
+MLP/专家维度、共享词嵌入、QKV偏置等结构字段），参数量按结构计算。
+解析结果按文件内容的SHA-256缓存到磁盘，重复导入时只解析新增或修改过的文件；
+未命中缓存的文件较多时在进程池中并行解析。
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from ..config import resolve_data_path, settings
+from ..models.common import ModelInfo, PrecisionType, ModelSize
+from ..utils.helpers import calculate_model_size_category
+from .calculator.base_calc import BaseCalculator
+
+
+# 解析逻辑变化时递增，使旧的缓存条目失效
+PARSER_VERSION = 2
+
+CONFIG_FILENAME = "config.json"
+
+# model_type对应的架构与模型系列
+MODEL_TYPES = {
+    "llama": ("llama", "llama"),
+    "mistral": ("mistral", "mistral"),
+    "mixtral": ("mixtral", "mistral"),
+    "qwen": ("qwen", "qwen"),
+    "qwen2": ("qwen", "qwen"),
+    "qwen3": ("qwen", "qwen"),
+    "qwen2_moe": ("qwen2_moe", "qwen"),
+    "chatglm": ("chatglm", "chatglm"),
+    "baichuan": ("baichuan", "baichuan"),
+    "deepseek": ("deepseek_moe", "deepseek"),
+    "gemma": ("gemma", "gemma")
+}
+
+# 配置中未写tie_word_embeddings时各模型类的默认值（PretrainedConfig默认共享）
+TIE_WORD_EMBEDDINGS_DEFAULTS = {
+    "llama": False,
+    "mistral": False,
+    "mixtral": False,
+    "qwen": False,
+    "qwen2": False,
+    "qwen2_moe": False,
+    "chatglm": False,
+    "baichuan": False,
+    "deepseek": False
+}
+
+TORCH_DTYPES = {
+    "float32": PrecisionType.FP32,
+    "float16": PrecisionType.FP16,
+    "bfloat16": PrecisionType.BF16
+}
+
+
+def _first(config: Dict[str, Any], *keys: str, default: Any = None) -> Any:
+    """返回配置中第一个存在的键的值"""
+    for key in keys:
+        if config.get(key) is not None:
+            return config[key]
+    return default
+
+
+def parse_hf_config(config: Dict[str, Any], model_id: str, name: Optional[str] = None) -> ModelInfo:
+    """
+    将HuggingFace config.json映射为ModelInfo
+
+    Args:
+        config: config.json内容
+        model_id: 模型ID
+        name: 模型名称，默认取 _name_or_path 或模型ID
+
+    Returns:
+        模型信息，参数量按结构计算
+
+    Raises:
+        ValueError: 内容不是JSON对象、model_type不支持或缺少必要字段时抛出
+    """
+    if not isinstance(config, dict):
+        raise ValueError(f"config.json顶层应为对象，实际为{type(config).__name__}")
+    model_type = config.get("model_type")
+    if model_type not in MODEL_TYPES:
+        raise ValueError(f"不支持的model_type: {model_type}")
+    architecture, family = MODEL_TYPES[model_type]
+
+    fields: Dict[str, Any] = {
+        "hidden_size": _first(config, "hidden_size"),
+        "num_layers": _first(config, "num_hidden_layers", "num_layers"),
+        "num_heads": _first(config, "num_attention_heads"),
+        "num_key_value_heads": _first(config, "num_key_value_heads"),
+        "head_dim": _first(config, "head_dim", "kv_channels"),
+        "intermediate_size": _first(config, "intermediate_size", "ffn_hidden_size", "inner_hidden_size"),
+        "vocab_size": _first(config, "padded_vocab_size", "vocab_size"),
+        "context_length": _first(config, "max_position_embeddings", "seq_length",
+                                 "max_sequence_length", "model_max_length", default=2048),
+        "tie_word_embeddings": _first(config, "tie_word_embeddings",
+                                      default=TIE_WORD_EMBEDDINGS_DEFAULTS.get(model_type, True)),
+        "attention_bias": _first(config, "attention_bias")
+    }
+
+    if model_type == "qwen":
+        # 第一代Qwen的intermediate_size为gate与up两个投影之和
+        fields["intermediate_size"] = fields["intermediate_size"] and fields["intermediate_size"] // 2
+    elif model_type == "chatglm":
+        if config.get("multi_query_attention"):
+            fields["num_key_value_heads"] = config.get("multi_query_group_num")
+        if "ffn_hidden_size" in config:
+            # ChatGLM2/3：SwiGLU + RMSNorm，输出层不共享词嵌入，线性层无偏置
+            architecture = "chatglm2"
+            fields["attention_bias"] = config.get("add_qkv_bias", True)
+        else:
+            fields["num_key_value_heads"] = fields["num_key_value_heads"] or fields["num_heads"]
+            fields["tie_word_embeddings"] = _first(config, "tie_word_embeddings", default=True)
+    elif model_type == "mixtral":
+        fields["num_experts"] = config.get("num_local_experts")
+        fields["num_experts_per_tok"] = config.get("num_experts_per_tok")
+    elif model_type == "qwen2_moe":
+        expert_size = config["moe_intermediate_size"]
+        fields["num_experts"] = config.get("num_experts")
+        fields["num_experts_per_tok"] = config.get("num_experts_per_tok")
+        fields["moe_intermediate_size"] = expert_size
+        fields["num_shared_experts"] = config.get("shared_expert_intermediate_size", 0) // expert_size
+    elif model_type == "deepseek":
+        # 前first_k_dense_replace层的稠密MLP按专家层处理
+        fields["num_experts"] = config.get("n_routed_experts")
+        fields["num_experts_per_tok"] = config.get("num_experts_per_tok")
+        fields["moe_intermediate_size"] = config.get("moe_intermediate_size")
+        fields["num_shared_experts"] = config.get("n_shared_experts") or 0
+
+    missing = [key for key in ("hidden_size", "num_layers", "num_heads", "vocab_size") if not fields[key]]
+    if missing:
+        raise ValueError(f"config.json缺少字段: {', '.join(missing)}")
+
+    model = ModelInfo(
+        id=model_id,
+        name=name or config.get("_name_or_path") or model_id,
+        family=family,
+        architecture=architecture,
+        precision=TORCH_DTYPES.get(config.get("torch_dtype"), PrecisionType.FP16),
+        size_category=ModelSize.MEDIUM,
+        **{key: value for key, value in fields.items() if value is not None}
+    )
+    parameters = BaseCalculator().get_total_parameters(model)
+    return model.model_copy(update={
+        "parameters": parameters,
+        "size_category": calculate_model_size_category(parameters)
+    })
+
+
+def _parse_config_content(content: bytes) -> Tuple[bool, Any]:
+    """
+    解析config.json内容（进程池工作函数）
+
+    Returns:
+        (是否成功, 不含id的模型字段或错误信息；name取自_name_or_path，缺失时为空字符串)
+    """
+    try:
+        model = parse_hf_config(json.loads(content), model_id="")
+        return True, model.model_dump(mode="json", exclude={"id"})
+    except (ValueError, KeyError, TypeError, AttributeError, ZeroDivisionError) as e:
+        return False, str(e) or type(e).__name__
+
+
+class HFConfigImporter:
+    """HuggingFace config.json导入器"""
+
+    # 未命中缓存的文件数达到该值时才启用进程池（进程启动开销约数百毫秒）
+    PROCESS_POOL_MIN_FILES = 64
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None, max_workers: Optional[int] = None):
+        """
+        初始化导入器
+
+        Args:
+            cache_dir: 解析结果缓存目录，默认使用配置HF_CONFIG_CACHE_DIR（相对路径按后端根目录解析）
+            max_workers: 进程池大小，默认为CPU核数
+        """
+        self.cache_dir = Path(resolve_data_path(str(cache_dir or settings.HF_CONFIG_CACHE_DIR)))
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def find_configs(self, path: Union[str, Path]) -> List[Path]:
+        """查找目录树中的全部config.json（path为文件时直接返回）"""
+        path = Path(path)
+        if path.is_file():
+            return [path]
+        if not path.is_dir():
+            raise ValueError(f"路径 {path} 不存在")
+        return sorted(path.rglob(CONFIG_FILENAME))
+
+    def get_model_id(self, config_path: Path, root: Path) -> str:
+        """模型ID取config.json所在目录相对导入根目录的路径（如 Qwen/Qwen2-7B）"""
+        directory = config_path.parent
+        if root.is_dir() and directory != root:
+            return directory.relative_to(root).as_posix()
+        return directory.name or config_path.stem
+
+    def get_content_hash(self, content: bytes) -> str:
+        """缓存键：解析器版本 + 文件内容的SHA-256"""
+        digest = hashlib.sha256(f"v{PARSER_VERSION}:".encode())
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _cache_path(self, content_hash: str) -> Path:
+        return self.cache_dir / content_hash[:2] / f"{content_hash}.json"
+
+    def _read_cache(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._cache_path(content_hash).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_cache(self, content_hash: str, entry: Dict[str, Any]) -> None:
+        """原子写入缓存条目（先写临时文件再替换），并发导入时不会读到半个文件"""
+        path = self._cache_path(content_hash)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _parse_all(self, contents: List[bytes]) -> List[Tuple[bool, Any]]:
+        """解析未命中缓存的文件，数量较多时使用进程池"""
+        if len(contents) < self.PROCESS_POOL_MIN_FILES or self.max_workers <= 1:
+            return [_parse_config_content(content) for content in contents]
+        chunksize = max(1, len(contents) // (self.max_workers * 4))
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(_parse_config_content, contents, chunksize=chunksize))
+
+    def import_path(self, path: Union[str, Path]) -> Dict[str, Any]:
+        """
+        导入单个config.json或目录树中的全部config.json
+
+        解析失败的文件（包括不支持的model_type）记入errors，不影响其他文件；
+        解析失败的结果同样缓存，文件未修改时不再重复解析
+
+        Args:
+            path: config.json文件或checkpoint目录树
+
+        Returns:
+            {"models": ModelInfo列表, "errors": [{"path", "error"}],
+             "total": 文件数, "cache_hits": 命中缓存数, "parsed": 本次解析数}
+        """
+        root = Path(path)
+        config_paths = self.find_configs(root)
+
+        entries: Dict[Path, Dict[str, Any]] = {}
+        misses: List[Tuple[Path, str, bytes]] = []
+        for config_path in config_paths:
+            content = config_path.read_bytes()
+            content_hash = self.get_content_hash(content)
+            entry = self._read_cache(content_hash)
+            if entry is None:
+                misses.append((config_path, content_hash, content))
+            else:
+                entries[config_path] = entry
+
+        results = self._parse_all([content for _, _, content in misses])
+        for (config_path, content_hash, _), (ok, value) in zip(misses, results):
+            entry = {"model": value} if ok else {"error": value}
+            self._write_cache(content_hash, entry)
+            entries[config_path] = entry
+
+        models, errors = [], []
+        for config_path in config_paths:
+            entry = entries[config_path]
+            if "error" in entry:
+                errors.append({"path": str(config_path), "error": entry["error"]})
+                continue
+            model_id = self.get_model_id(config_path, root)
+            fields = dict(entry["model"])
+            # 名称优先取config.json的_name_or_path，缺失时使用模型ID
+            name = fields.pop("name", None) or model_id
+            models.append(ModelInfo(id=model_id, name=name, **fields))
+
+        return {
+            "models": models,
+            "errors": errors,
+            "total": len(config_paths),
+            "cache_hits": len(config_paths) - len(misses),
+            "parsed": len(misses)
+        }
@@ -0,0 +1,591 @@
+"""
+异步任务服务
+
+耗时较长的预估（参数网格扫描等）作为任务在后台执行，提交后立即返回任务ID：
+- 任务在有界进程池中执行（spawn启动，不继承父进程的SQLite连接），排队和运行中的任务数有上限
+- 任务状态、进度和逐项结果保存在SQLite中（WAL模式）：工作进程直接写入，
+  API进程（可以是多个服务进程中的任意一个）读取，客户端轮询或通过SSE订阅，断线后可从任意位置继续读取
+- 取消为协作式：工作进程每次写入进度时检查取消标记；尚未开始的任务直接从进程池队列中撤销
+- 任务归属用租约表示：所属服务进程定期续约排队和运行中的任务，工作进程每次写入进度时续约；
+  租约过期（服务进程和工作进程都已退出）的任务由其他服务进程接管，已完成的网格项不再重复计算。
+  租约只依赖数据库中的时间戳，多个主机或容器共享任务数据库时同样适用（要求各主机时钟基本同步）
+- 工作进程异常退出（OOM、被杀死）导致进程池损坏时重建进程池，受影响的任务重新提交并从断点继续
+"""
+
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from ..config import resolve_data_path, settings
+from ..models.jobs import JobInfo, JobKind, JobStatus, JobSubmitRequest
+
+# 表结构版本，结构变化时重建数据库
+SCHEMA_VERSION = 2
+
+# 工作进程写入进度和部分结果的间隔（秒），同时也是响应取消的最大延迟
+FLUSH_INTERVAL = 0.25
+
+# 进程池损坏时同一任务最多执行的次数（反复导致工作进程退出的任务标记为失败）
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner TEXT NOT NULL,
+    lease_expires_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, lease_expires_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+ACTIVE_STATUSES = (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+
+
+class JobQueueFullError(RuntimeError):
+    """排队和运行中的任务数已达上限"""
+
+
+class JobStore:
+    """SQLite任务存储（API进程和工作进程各自打开）"""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        打开（必要时创建）任务存储
+
+        Args:
+            path: 数据库文件路径
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA busy_timeout=5000")
+        self._initialize_schema()
+
+    def _initialize_schema(self) -> None:
+        """创建表和索引，表结构版本不一致时重建"""
+        with self._lock:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._connection.executescript(
+                    "DROP TABLE IF EXISTS jobs; DROP TABLE IF EXISTS job_results;" + SCHEMA +
+                    f"PRAGMA user_version = {SCHEMA_VERSION};"
+                )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """显式写事务（连接为自动提交模式）"""
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def _to_info(self, row: sqlite3.Row) -> JobInfo:
+        return JobInfo(
+            id=row["id"],
+            kind=row["kind"],
+            status=row["status"],
+            total=row["total"],
+            completed=row["completed"],
+            failed=row["failed"],
+            progress=row["completed"] / row["total"] if row["total"] else 1.0,
+            cancel_requested=bool(row["cancel_requested"]),
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            error=row["error"],
+            summary=json.loads(row["summary"]) if row["summary"] else None
+        )
+
+    def _active_condition(self) -> str:
+        return f"status IN ({', '.join('?' * len(ACTIVE_STATUSES))})"
+
+    def create(self, request: JobSubmitRequest, owner: str, lease_seconds: float) -> JobInfo:
+        """新建排队中的任务，租约属于owner"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO jobs (id, kind, status, request, total, owner, lease_expires_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, request.kind.value, JobStatus.QUEUED.value, request.model_dump_json(),
+                 request.get_total(), owner, now + lease_seconds, now)
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        """获取任务状态，不存在时返回None"""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_info(row) if row else None
+
+    def get_request(self, job_id: str) -> JobSubmitRequest:
+        """获取任务的提交请求"""
+        with self._lock:
+            row = self._connection.execute("SELECT request FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return JobSubmitRequest.model_validate_json(row["request"])
+
+    def list(self, limit: int = 50) -> List[JobInfo]:
+        """最近提交的任务"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._to_info(row) for row in rows]
+
+    def count_active(self) -> int:
+        """排队和运行中的任务数"""
+        with self._lock:
+            return self._connection.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE {self._active_condition()}", ACTIVE_STATUSES
+            ).fetchone()[0]
+
+    def get_results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """序号不小于offset的结果（按序号排序）"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT data FROM job_results WHERE job_id = ? AND idx >= ? ORDER BY idx LIMIT ?",
+                (job_id, offset, limit)
+            ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def get_completed_indexes(self, job_id: str) -> set:
+        """已完成的网格项序号"""
+        with self._lock:
+            rows = self._connection.execute("SELECT idx FROM job_results WHERE job_id = ?", (job_id,)).fetchall()
+        return {row["idx"] for row in rows}
+
+    def request_cancel(self, job_id: str) -> None:
+        """设置取消标记"""
+        with self._lock:
+            self._connection.execute(
+                f"UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND {self._active_condition()}",
+                (job_id, *ACTIVE_STATUSES)
+            )
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._connection.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def mark_running(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """
+        开始执行并续约
+
+        Returns:
+            任务是否仍属于owner且未结束（否则不应执行）
+        """
+        now = time.time()
+        with self._lock:
+            return self._connection.execute(
+                f"UPDATE jobs SET status = ?, started_at = COALESCE(started_at, ?), lease_expires_at = ? "
+                f"WHERE id = ? AND owner = ? AND {self._active_condition()}",
+                (JobStatus.RUNNING.value, now, now + lease_seconds, job_id, owner, *ACTIVE_STATUSES)
+            ).rowcount > 0
+
+    def append_results(self, job_id: str, owner: str, lease_seconds: float,
+                       items: List[Dict[str, Any]]) -> bool:
+        """
+        写入一批结果、更新进度并续约（单个事务）
+
+        已写入的网格项不重复计数
+
+        Returns:
+            任务是否仍属于owner且未结束；否则不写入，调用方应停止执行
+        """
+        with self._lock:
+            with self._transaction():
+                renewed = self._connection.execute(
+                    f"UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND owner = ? AND {self._active_condition()}",
+                    (time.time() + lease_seconds, job_id, owner, *ACTIVE_STATUSES)
+                ).rowcount
+                if not renewed:
+                    return False
+                completed = failed = 0
+                for item in items:
+                    if self._connection.execute(
+                        "INSERT OR IGNORE INTO job_results (job_id, idx, data) VALUES (?, ?, ?)",
+                        (job_id, item["index"], json.dumps(item, ensure_ascii=False))
+                    ).rowcount:
+                        completed += 1
+                        failed += "error" in item
+                self._connection.execute(
+                    "UPDATE jobs SET completed = completed + ?, failed = failed + ? WHERE id = ?",
+                    (completed, failed, job_id)
+                )
+        return True
+
+    def renew_leases(self, owner: str, lease_seconds: float) -> int:
+        """续约owner的全部排队和运行中的任务，返回续约的任务数"""
+        with self._lock:
+            return self._connection.execute(
+                f"UPDATE jobs SET lease_expires_at = ? WHERE owner = ? AND {self._active_condition()}",
+                (time.time() + lease_seconds, owner, *ACTIVE_STATUSES)
+            ).rowcount
+
+    def finish(self, job_id: str, status: JobStatus, error: Optional[str] = None,
+               summary: Optional[Dict[str, Any]] = None, owner: Optional[str] = None) -> None:
+        """任务结束（已结束的任务不再改变；指定owner时只在任务仍属于owner时生效）"""
+        condition = f"id = ? AND {self._active_condition()}"
+        params: Tuple[Any, ...] = (job_id, *ACTIVE_STATUSES)
+        if owner is not None:
+            condition += " AND owner = ?"
+            params += (owner,)
+        with self._lock:
+            self._connection.execute(
+                f"UPDATE jobs SET status = ?, finished_at = ?, error = ?, summary = ? WHERE {condition}",
+                (status.value, time.time(), error, json.dumps(summary, ensure_ascii=False) if summary else None,
+                 *params)
+            )
+
+    def claim_expired(self, owner: str, lease_seconds: float) -> List[str]:
+        """
+        接管租约已过期（所属服务进程和工作进程都已退出）的未完成任务
+
+        查询和接管在同一个写事务中，多个服务进程同时接管时每个任务只会被接管一次
+
+        Returns:
+            接管后需要重新提交到进程池的任务ID（已请求取消的任务直接标记为已取消）
+        """
+        now = time.time()
+        claimed = []
+        with self._lock:
+            with self._transaction():
+                rows = self._connection.execute(
+                    f"SELECT id, cancel_requested FROM jobs WHERE {self._active_condition()} "
+                    f"AND lease_expires_at < ?",
+                    (*ACTIVE_STATUSES, now)
+                ).fetchall()
+                for row in rows:
+                    if row["cancel_requested"]:
+                        self.finish(row["id"], JobStatus.CANCELLED)
+                        continue
+                    self._connection.execute(
+                        "UPDATE jobs SET owner = ?, status = ?, lease_expires_at = ? WHERE id = ?",
+                        (owner, JobStatus.QUEUED.value, now + lease_seconds, row["id"])
+                    )
+                    claimed.append(row["id"])
+        return claimed
+
+
+def _iter_grid(grid: Dict[str, List[Any]]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """按笛卡尔积枚举参数组合"""
+    names = list(grid)
+    for index, values in enumerate(itertools.product(*(grid[name] for name in names))):
+        yield index, dict(zip(names, values))
+
+
+def _get_sweep_target(kind: JobKind) -> Tuple[str, Any, Any]:
+    """任务类型对应的 (结果命名空间, 请求类, 计算器类)"""
+    if kind == JobKind.TRAINING_SWEEP:
+        from ..models.training import TrainingRequest
+        from .calculator.training_calc import TrainingCalculator
+        return "training", TrainingRequest, TrainingCalculator
+    from ..models.inference import InferenceRequest
+    from .calculator.inference_calc import InferenceCalculator
+    return "inference", InferenceRequest, InferenceCalculator
+
+
+def validate_submission(request: JobSubmitRequest) -> None:
+    """
+    提交前校验：网格大小不超过上限，第一个组合能构造出合法的预估请求
+
+    Raises:
+        ValueError: 校验失败时抛出
+    """
+    total = request.get_total()
+    if total > settings.JOB_MAX_SWEEP_SIZE:
+        raise ValueError(f"参数网格共{total}个组合，超过上限{settings.JOB_MAX_SWEEP_SIZE}")
+    _, request_cls, _ = _get_sweep_target(request.kind)
+    _, params = next(_iter_grid(request.grid))
+    request_cls(**{**request.base, **params})
+
+
+def run_job(path: str, job_id: str, owner: str, lease_seconds: float) -> None:
+    """
+    执行任务（进程池工作函数）
+
+    逐个预估网格组合，每项结果（或错误）定期批量写入任务存储并续约；任务已被其他服务进程
+    接管（租约丢失）时停止。预估结果经持久化结果存储读穿，已算过的请求不再重复计算
+    """
+    from .result_store import make_request_key, try_get_result_store
+
+    store = JobStore(path)
+    if store.is_cancel_requested(job_id):
+        store.finish(job_id, JobStatus.CANCELLED, owner=owner)
+        return
+    if not store.mark_running(job_id, owner, lease_seconds):
+        return
+    try:
+        request = store.get_request(job_id)
+        namespace, request_cls, calculator_cls = _get_sweep_target(request.kind)
+        calculator = calculator_cls()
+        # 结果存储无法打开时直接计算
+        result_store = (try_get_result_store(settings.RESULT_STORE_PATH, settings.RESULT_STORE_MAX_BYTES)
+                        if settings.RESULT_STORE_ENABLED else None)
+        # 接管的任务跳过已完成的组合
+        done = store.get_completed_indexes(job_id)
+
+        buffer: List[Dict[str, Any]] = []
+        best: Optional[Dict[str, Any]] = None
+        last_flush = time.monotonic()
+        for index, params in _iter_grid(request.grid):
+            if index in done:
+                continue
+            item: Dict[str, Any] = {"index": index, "params": params}
+            try:
+                estimate_request = request_cls(**{**request.base, **params})
+
+                def compute() -> bytes:
+                    return calculator.calculate(estimate_request).model_dump_json().encode("utf-8")
+
+                if result_store is None:
+                    body = compute()
+                else:
+                    key = make_request_key(namespace, estimate_request, calculator.model_registry)
+                    body, _ = result_store.get_or_compute(key, namespace, compute)
+                item["result"] = json.loads(body)
+                memory = item["result"]["total_memory_gb"]
+                if best is None or memory < best["total_memory_gb"]:
+                    best = {"index": index, "params": params, "total_memory_gb": memory}
+            except Exception as e:
+                item["error"] = str(e)
+            buffer.append(item)
+
+            if time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                if not store.append_results(job_id, owner, lease_seconds, buffer):
+                    return
+                buffer, last_flush = [], time.monotonic()
+                if store.is_cancel_requested(job_id):
+                    store.finish(job_id, JobStatus.CANCELLED, owner=owner)
+                    return
+
+        if not store.append_results(job_id, owner, lease_seconds, buffer):
+            return
+        info = store.get(job_id)
+        store.finish(job_id, JobStatus.SUCCEEDED, owner=owner, summary={
+            "succeeded": info.completed - info.failed,
+            "failed": info.failed,
+            "lowest_memory": best
+        })
+    except Exception as e:
+        store.finish(job_id, JobStatus.FAILED, error=str(e) or type(e).__name__, owner=owner)
+
+
+class JobManager:
+    """任务管理器（每个服务进程一个，持有进程池并续约自己的任务）"""
+
+    def __init__(self, path: Union[str, Path], max_workers: int, max_pending: int,
+                 lease_seconds: Optional[float] = None):
+        """
+        Args:
+            path: 任务数据库路径
+            max_workers: 进程池大小
+            max_pending: 排队和运行中的任务数上限（所有服务进程合计）
+            lease_seconds: 任务租约时长，默认使用JOB_LEASE_SECONDS；每1/3租约时长续约并接管过期任务
+        """
+        self.path = str(path)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.lease_seconds = settings.JOB_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        # 租约持有者标识（主机名和进程号仅用于排查，唯一性由随机串保证）
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.store = JobStore(path)
+        self._lock = threading.RLock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # 已损坏的进程池，由续约线程释放（见_discard_executor）
+        self._retired: List[ProcessPoolExecutor] = []
+        self._futures: Dict[str, Future] = {}
+        self._attempts: Dict[str, int] = {}
+        self._closed = threading.Event()
+        self._claim_expired()
+        self._heartbeat = threading.Thread(target=self._run_heartbeat, name="job-lease-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _run_heartbeat(self) -> None:
+        """定期续约自己的任务（包括还在进程池队列中的任务）并接管其他服务进程遗留的过期任务"""
+        while not self._closed.wait(self.lease_seconds / 3):
+            with self._lock:
+                self._retired.clear()
+            try:
+                self.store.renew_leases(self.owner, self.lease_seconds)
+                self._claim_expired()
+            except sqlite3.Error:
+                # 数据库暂时不可用（如被锁），下一轮重试
+                continue
+
+    def _claim_expired(self) -> None:
+        for job_id in self.store.claim_expired(self.owner, self.lease_seconds):
+            self._dispatch(job_id)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn"))
+        return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        """
+        丢弃已损坏的进程池，下次提交时重建
+
+        任务回调在进程池管理线程持有shutdown_lock时执行，此时释放进程池的最后一个引用会在同一线程
+        触发其弱引用回调再次获取shutdown_lock而死锁，因此先保留引用，由续约线程释放
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._retired.append(executor)
+
+    def _dispatch(self, job_id: str) -> None:
+        """
+        提交到进程池，进程池已损坏时重建后重试一次
+
+        Raises:
+            BrokenProcessPool: 重建后仍无法提交时抛出
+        """
+        args = (run_job, self.path, job_id, self.owner, self.lease_seconds)
+        with self._lock:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(*args)
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                executor = self._get_executor()
+                future = executor.submit(*args)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda done: self._on_done(job_id, executor, done))
+
+    def _on_done(self, job_id: str, executor: ProcessPoolExecutor, future: Future) -> None:
+        """
+        任务结束回调：撤销的任务标记为已取消；工作进程异常退出（进程池损坏）时重建进程池
+        并重新提交任务，多次失败后标记为失败
+        """
+        with self._lock:
+            if self._futures.get(job_id) is future:
+                del self._futures[job_id]
+        if self._closed.is_set():
+            # 服务关闭时撤销的任务保持未完成，租约过期后由其他服务进程接管
+            return
+        if future.cancelled():
+            self.store.finish(job_id, JobStatus.CANCELLED, owner=self.owner)
+            return
+        error = future.exception()
+        if error is None:
+            with self._lock:
+                self._attempts.pop(job_id, None)
+            return
+        if isinstance(error, BrokenProcessPool):
+            self._discard_executor(executor)
+            with self._lock:
+                attempts = self._attempts[job_id] = self._attempts.get(job_id, 0) + 1
+            if attempts < MAX_ATTEMPTS and not self.store.is_cancel_requested(job_id):
+                try:
+                    self._dispatch(job_id)
+                    return
+                except BrokenProcessPool:
+                    pass
+        with self._lock:
+            self._attempts.pop(job_id, None)
+        self.store.finish(job_id, JobStatus.FAILED, error=str(error) or "工作进程异常退出", owner=self.owner)
+
+    def submit(self, request: JobSubmitRequest) -> JobInfo:
+        """
+        提交任务
+
+        Raises:
+            ValueError: 请求校验失败时抛出
+            JobQueueFullError: 排队和运行中的任务数已达上限时抛出
+            BrokenProcessPool: 无法提交到进程池时抛出（任务标记为失败，不占用排队名额）
+        """
+        validate_submission(request)
+        if self.store.count_active() >= self.max_pending:
+            raise JobQueueFullError(f"排队和运行中的任务已达上限{self.max_pending}，请稍后再试")
+        job = self.store.create(request, self.owner, self.lease_seconds)
+        try:
+            self._dispatch(job.id)
+        except BrokenProcessPool as e:
+            self.store.finish(job.id, JobStatus.FAILED, error=f"任务提交到进程池失败: {e}", owner=self.owner)
+            raise
+        return job
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        """获取任务状态"""
+        return self.store.get(job_id)
+
+    def list(self, limit: int = 50) -> List[JobInfo]:
+        """最近提交的任务"""
+        return self.store.list(limit)
+
+    def get_results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """任务结果（运行中时为已完成的部分）"""
+        return self.store.get_results(job_id, offset, limit)
+
+    def cancel(self, job_id: str) -> Optional[JobInfo]:
+        """
+        取消任务：尚未开始的任务直接撤销，运行中的任务在下一次写入进度时停止
+
+        Returns:
+            取消后的任务状态，任务不存在时返回None
+        """
+        self.store.request_cancel(job_id)
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self.store.finish(job_id, JobStatus.CANCELLED, owner=self.owner)
+        return self.store.get(job_id)
+
+    def shutdown(self) -> None:
+        """停止续约并关闭进程池（不等待运行中的任务，未完成的任务租约过期后由其他服务进程接管）"""
+        self._closed.set()
+        self._heartbeat.join()
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._retired.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_managers: Dict[str, JobManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_job_manager(path: Union[str, Path], max_workers: int, max_pending: int) -> JobManager:
+    """获取指定路径的任务管理器（同一进程内共享进程池，相对路径按后端根目录解析）"""
+    key = str(Path(resolve_data_path(str(path))).resolve())
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = JobManager(key, max_workers, max_pending)
+        return _managers[key]
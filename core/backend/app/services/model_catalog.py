@@ -0,0 +1,301 @@
+"""
+模型目录持久化存储
+
+模型保存在SQLite数据库中：常用查询字段（系列、规模、架构、参数量、上下文长度）单独成列并建立
+二级索引，完整的ModelInfo以JSON保存，只在取用时才反序列化（按ID缓存）。
+内置模型定义位于 core/model-data/models.json，文件内容变化时自动重新导入；
+注册、更新、删除的自定义模型直接写入数据库；使用文件数据库时跨请求和重启保留，
+使用内存数据库（":memory:"）时只在当前进程内有效。
+每个写事务递增目录修订号，搜索索引和HTTP缓存按修订号判断目录是否变化。
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple, Union
+
+from ..config import MEMORY_DB, resolve_data_path
+from ..models.common import ModelInfo
+from .calculator.base_calc import BaseCalculator
+
+
+# 内置模型定义文件
+SEED_FILE = Path(__file__).resolve().parents[3] / "model-data" / "models.json"
+
+# 表结构版本，结构变化时重建数据库
+SCHEMA_VERSION = 1
+
+# 列表查询返回的摘要字段（不反序列化完整模型）
+SUMMARY_COLUMNS = ("id", "name", "family", "parameters", "size_category", "context_length", "architecture")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    family TEXT NOT NULL,
+    architecture TEXT NOT NULL,
+    size_category TEXT NOT NULL,
+    parameters INTEGER NOT NULL,
+    context_length INTEGER NOT NULL,
+    builtin INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_models_family ON models (family);
+CREATE INDEX IF NOT EXISTS idx_models_size_category ON models (size_category);
+CREATE INDEX IF NOT EXISTS idx_models_architecture ON models (architecture);
+CREATE INDEX IF NOT EXISTS idx_models_parameters ON models (parameters);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ModelCatalog:
+    """SQLite模型目录"""
+
+    def __init__(self, path: Union[str, Path], seed_file: Optional[Path] = SEED_FILE):
+        """
+        打开（必要时创建）模型目录
+
+        Args:
+            path: 数据库文件路径
+            seed_file: 内置模型定义文件，为None时不导入内置模型
+        """
+        self.path = Path(path)
+        if str(path) != MEMORY_DB:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._calculator = BaseCalculator()
+        self._lock = threading.RLock()
+        # 已反序列化的模型：ID -> (JSON, ModelInfo)，JSON不同（被其他进程修改）时重新反序列化
+        self._materialized: Dict[str, Tuple[str, ModelInfo]] = {}
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        # WAL模式下读不阻塞写，多个服务进程可同时打开同一个目录
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA busy_timeout=5000")
+        self._initialize_schema()
+        if seed_file is not None:
+            self._sync_seed(seed_file)
+
+    def _initialize_schema(self) -> None:
+        """创建表和索引，表结构版本不一致时重建"""
+        with self._lock:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._connection.executescript(
+                    "DROP TABLE IF EXISTS models; DROP TABLE IF EXISTS meta;" + SCHEMA +
+                    f"PRAGMA user_version = {SCHEMA_VERSION};"
+                )
+            # 数据库文件的随机标识，删除重建后修订号重新计数也不会与旧修订号混淆
+            self._connection.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (uuid.uuid4().hex,)
+            )
+
+    def _sync_seed(self, seed_file: Path) -> None:
+        """
+        内置模型定义文件内容变化时重新导入内置模型
+
+        不影响自定义模型：以内置模型ID注册或更新过的模型（builtin = 0）保留用户的定义
+        """
+        content = seed_file.read_bytes()
+        seed_hash = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = 'seed_hash'").fetchone()
+            if row and row["value"] == seed_hash:
+                return
+            models = [ModelInfo(**entry) for entry in json.loads(content)]
+            with self._transaction():
+                self._connection.execute("DELETE FROM models WHERE builtin = 1")
+                self._upsert(models, builtin=True)
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('seed_hash', ?)", (seed_hash,)
+                )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """显式写事务（连接为自动提交模式），提交时递增目录修订号"""
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self._connection.execute(
+                "INSERT INTO meta (key, value) VALUES ('revision', '1') "
+                "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+            )
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def _with_parameters(self, model: ModelInfo) -> ModelInfo:
+        """未给出标称参数量的模型按结构计算参数量"""
+        if model.parameters:
+            return model
+        return model.model_copy(update={"parameters": self._calculator.get_total_parameters(model)})
+
+    def _upsert(self, models: Iterable[ModelInfo], builtin: bool = False) -> None:
+        rows = []
+        for model in models:
+            model = self._with_parameters(model)
+            self._materialized.pop(model.id, None)
+            rows.append((
+                model.id, model.name, model.family, model.architecture, model.size_category.value,
+                model.parameters, model.context_length, int(builtin), model.model_dump_json()
+            ))
+        columns = "id, name, family, architecture, size_category, parameters, context_length, builtin, data"
+        if builtin:
+            # 内置模型只覆盖内置模型，同ID的自定义模型优先
+            self._connection.executemany(
+                f"INSERT INTO models ({columns}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET name = excluded.name, family = excluded.family, "
+                "architecture = excluded.architecture, size_category = excluded.size_category, "
+                "parameters = excluded.parameters, context_length = excluded.context_length, "
+                "data = excluded.data WHERE models.builtin = 1",
+                rows
+            )
+            return
+        self._connection.executemany(
+            f"INSERT OR REPLACE INTO models ({columns}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+    def _materialize(self, row: sqlite3.Row) -> ModelInfo:
+        cached = self._materialized.get(row["id"])
+        if cached and cached[0] == row["data"]:
+            return cached[1]
+        model = ModelInfo.model_validate_json(row["data"])
+        self._materialized[row["id"]] = (row["data"], model)
+        return model
+
+    def _select(self, where: str = "", params: tuple = ()) -> List[ModelInfo]:
+        with self._lock:
+            rows = self._connection.execute(f"SELECT id, data FROM models {where} ORDER BY rowid", params).fetchall()
+            return [self._materialize(row) for row in rows]
+
+    def revision(self) -> str:
+        """目录修订号（"数据库标识:写事务计数"），目录内容变化后必然不同"""
+        with self._lock:
+            rows = dict(self._connection.execute(
+                "SELECT key, value FROM meta WHERE key IN ('epoch', 'revision')"
+            ).fetchall())
+        return f"{rows.get('epoch', '')}:{rows.get('revision', '0')}"
+
+    def count(self) -> int:
+        """模型数量"""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM models").fetchone()[0]
+
+    def contains(self, model_id: str) -> bool:
+        """模型ID是否存在"""
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM models WHERE id = ?", (model_id,)).fetchone() is not None
+
+    def get(self, model_id: str) -> Optional[ModelInfo]:
+        """按ID获取模型，不存在时返回None"""
+        models = self._select("WHERE id = ?", (model_id,))
+        return models[0] if models else None
+
+    def get_many(self, model_ids: List[str]) -> List[ModelInfo]:
+        """按ID批量获取模型（单次查询），按传入顺序返回，不存在的ID被跳过"""
+        if not model_ids:
+            return []
+        placeholders = ", ".join("?" * len(model_ids))
+        models = {model.id: model for model in self._select(f"WHERE id IN ({placeholders})", tuple(model_ids))}
+        return [models[model_id] for model_id in model_ids if model_id in models]
+
+    def list_summaries(self) -> List[Dict[str, Any]]:
+        """全部模型的摘要信息（只读取索引列，不反序列化完整模型）"""
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM models ORDER BY rowid"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def find(self, family: Optional[str] = None, size_category: Optional[str] = None,
+             architecture: Optional[str] = None, min_parameters: Optional[int] = None,
+             max_parameters: Optional[int] = None) -> List[ModelInfo]:
+        """
+        按索引列查询模型
+
+        Args:
+            family: 模型系列
+            size_category: 模型规模类别
+            architecture: 架构类型
+            min_parameters: 最小参数量（含）
+            max_parameters: 最大参数量（含）
+
+        Returns:
+            满足全部条件的模型列表
+        """
+        conditions, params = [], []
+        for column, value in (("family", family), ("size_category", size_category),
+                              ("architecture", architecture)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if min_parameters is not None:
+            conditions.append("parameters >= ?")
+            params.append(min_parameters)
+        if max_parameters is not None:
+            conditions.append("parameters <= ?")
+            params.append(max_parameters)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._select(where, tuple(params))
+
+    def insert(self, model: ModelInfo) -> ModelInfo:
+        """新增模型，ID已存在时抛出ValueError"""
+        with self._lock:
+            with self._transaction():
+                if self.contains(model.id):
+                    raise ValueError(f"模型ID {model.id} 已存在")
+                self._upsert([model])
+        return self.get(model.id)
+
+    def update(self, model_id: str, model: ModelInfo) -> ModelInfo:
+        """更新模型（可修改ID），模型不存在或新ID已被其他模型占用时抛出ValueError"""
+        with self._lock:
+            with self._transaction():
+                if not self.contains(model_id):
+                    raise ValueError(f"模型 {model_id} 不存在")
+                if model.id != model_id and self.contains(model.id):
+                    raise ValueError(f"模型ID {model.id} 已存在")
+                self._connection.execute("DELETE FROM models WHERE id = ?", (model_id,))
+                self._materialized.pop(model_id, None)
+                self._upsert([model])
+        return self.get(model.id)
+
+    def upsert_many(self, models: Iterable[ModelInfo]) -> None:
+        """批量新增或覆盖模型（单个事务）"""
+        with self._lock:
+            with self._transaction():
+                self._upsert(models)
+
+    def delete(self, model_id: str) -> None:
+        """删除模型，模型不存在时抛出ValueError"""
+        with self._lock:
+            with self._transaction():
+                if not self._connection.execute("DELETE FROM models WHERE id = ?", (model_id,)).rowcount:
+                    raise ValueError(f"模型 {model_id} 不存在")
+            self._materialized.pop(model_id, None)
+
+
+_catalogs: Dict[str, ModelCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path: Union[str, Path]) -> ModelCatalog:
+    """
+    获取指定路径的模型目录（同一进程内共享连接和已反序列化的模型）
+
+    相对路径按后端根目录解析；":memory:"为进程内共享的内存目录
+    """
+    path = resolve_data_path(str(path))
+    key = path if path == MEMORY_DB else str(Path(path).resolve())
+    with _catalogs_lock:
+        if key not in _catalogs:
+            _catalogs[key] = ModelCatalog(path)
+        return _catalogs[key]
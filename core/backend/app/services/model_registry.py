@@ -3,253 +3,23 @@
 """
 
 from typing import Dict, Any, List, Optional
-from ..models.common import ModelInfo, PrecisionType, ModelSize
+from ..config import settings
+from ..models.common import ModelInfo, ModelSize
+from .model_catalog import ModelCatalog, get_catalog
+from .model_search import get_search_index, project
 
 
 class ModelRegistry:
-    """模型注册表"""
+    """模型注册表（基于持久化的模型目录）"""
     
-    def __init__(self):
-        """初始化模型注册表"""
-        self._models = self._initialize_models()
-    
-    def _initialize_models(self) -> Dict[str, ModelInfo]:
-        """初始化预定义模型"""
-        models = {}
-        
-        # LLaMA系列
-        models["llama-7b"] = ModelInfo(
-            id="llama-7b",
-            name="LLaMA 7B",
-            family="llama",
-            parameters=7000000000,
-            hidden_size=4096,
-            num_layers=32,
-            num_heads=32,
-            vocab_size=32000,
-            context_length=2048,
-            architecture="llama",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.MEDIUM
-        )
-        
-        models["llama-13b"] = ModelInfo(
-            id="llama-13b",
-            name="LLaMA 13B",
-            family="llama",
-            parameters=13000000000,
-            hidden_size=5120,
-            num_layers=40,
-            num_heads=40,
-            vocab_size=32000,
-            context_length=2048,
-            architecture="llama",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.LARGE
-        )
-        
-        models["llama-70b"] = ModelInfo(
-            id="llama-70b",
-            name="LLaMA 70B",
-            family="llama",
-            parameters=70000000000,
-            hidden_size=8192,
-            num_layers=80,
-            num_heads=64,
-            vocab_size=32000,
-            context_length=2048,
-            architecture="llama",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.XLARGE
-        )
-        
-        # LLaMA 2系列
-        models["llama2-7b"] = ModelInfo(
-            id="llama2-7b",
-            name="LLaMA 2 7B",
-            family="llama",
-            parameters=7000000000,
-            hidden_size=4096,
-            num_layers=32,
-            num_heads=32,
-            vocab_size=32000,
-            context_length=4096,
-            architecture="llama",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.MEDIUM
-        )
-        
-        models["llama2-13b"] = ModelInfo(
-            id="llama2-13b",
-            name="LLaMA 2 13B",
-            family="llama",
-            parameters=13000000000,
-            hidden_size=5120,
-            num_layers=40,
-            num_heads=40,
-            vocab_size=32000,
-            context_length=4096,
-            architecture="llama",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.LARGE
-        )
-        
-        models["llama2-70b"] = ModelInfo(
-            id="llama2-70b",
-            name="LLaMA 2 70B",
-            family="llama",
-            parameters=70000000000,
-            hidden_size=8192,
-            num_layers=80,
-            num_heads=64,
-            vocab_size=32000,
-            context_length=4096,
-            architecture="llama",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.XLARGE
-        )
-        
-        # 通义千问系列
-        models["qwen-7b"] = ModelInfo(
-            id="qwen-7b",
-            name="Qwen 7B",
-            family="qwen",
-            parameters=7720000000,
-            hidden_size=4096,
-            num_layers=32,
-            num_heads=32,
-            vocab_size=151936,
-            context_length=8192,
-            architecture="qwen",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.MEDIUM
-        )
-        
-        models["qwen-14b"] = ModelInfo(
-            id="qwen-14b",
-            name="Qwen 14B",
-            family="qwen",
-            parameters=14700000000,
-            hidden_size=5120,
-            num_layers=40,
-            num_heads=40,
-            vocab_size=151936,
-            context_length=8192,
-            architecture="qwen",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.LARGE
-        )
-        
-        models["qwen-72b"] = ModelInfo(
-            id="qwen-72b",
-            name="Qwen 72B",
-            family="qwen",
-            parameters=72700000000,
-            hidden_size=8192,
-            num_layers=80,
-            num_heads=64,
-            vocab_size=151936,
-            context_length=32768,
-            architecture="qwen",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.XLARGE
-        )
-        
-        # Qwen2系列
-        models["qwen2-7b"] = ModelInfo(
-            id="qwen2-7b",
-            name="Qwen2 7B",
-            family="qwen",
-            parameters=7720000000,
-            hidden_size=4096,
-            num_layers=28,
-            num_heads=32,
-            vocab_size=151936,
-            context_length=131072,
-            architecture="qwen",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.MEDIUM
-        )
-        
-        models["qwen2-72b"] = ModelInfo(
-            id="qwen2-72b",
-            name="Qwen2 72B",
-            family="qwen",
-            parameters=72700000000,
-            hidden_size=8192,
-            num_layers=80,
-            num_heads=64,
-            vocab_size=151936,
-            context_length=131072,
-            architecture="qwen",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.XLARGE
-        )
-        
-        # Mistral系列
-        models["mistral-7b"] = ModelInfo(
-            id="mistral-7b",
-            name="Mistral 7B",
-            family="mistral",
-            parameters=7200000000,
-            hidden_size=4096,
-            num_layers=32,
-            num_heads=32,
-            vocab_size=32000,
-            context_length=32768,
-            architecture="mistral",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.MEDIUM
-        )
-        
-        models["mixtral-8x7b"] = ModelInfo(
-            id="mixtral-8x7b",
-            name="Mixtral 8x7B",
-            family="mistral",
-            parameters=46700000000,  # 8个专家，每个7B参数
-            hidden_size=4096,
-            num_layers=32,
-            num_heads=32,
-            vocab_size=32000,
-            context_length=32768,
-            architecture="mixtral",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.XLARGE
-        )
-        
-        # ChatGLM系列
-        models["chatglm-6b"] = ModelInfo(
-            id="chatglm-6b",
-            name="ChatGLM 6B",
-            family="chatglm",
-            parameters=6200000000,
-            hidden_size=4096,
-            num_layers=28,
-            num_heads=32,
-            vocab_size=130528,
-            context_length=2048,
-            architecture="chatglm",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.MEDIUM
-        )
-        
-        # Baichuan系列
-        models["baichuan-7b"] = ModelInfo(
-            id="baichuan-7b",
-            name="Baichuan 7B",
-            family="baichuan",
-            parameters=7000000000,
-            hidden_size=4096,
-            num_layers=32,
-            num_heads=32,
-            vocab_size=64000,
-            context_length=4096,
-            architecture="baichuan",
-            precision=PrecisionType.FP16,
-            size_category=ModelSize.MEDIUM
-        )
+    def __init__(self, catalog_path: Optional[str] = None):
+        """
+        初始化模型注册表
         
-        return models
+        Args:
+            catalog_path: 模型目录数据库路径，默认使用配置MODEL_CATALOG_PATH
+        """
+        self._catalog: ModelCatalog = get_catalog(catalog_path or settings.MODEL_CATALOG_PATH)
     
     def get_all_models(self) -> List[Dict[str, Any]]:
         """
@@ -258,18 +28,7 @@ class ModelRegistry:
         Returns:
             模型列表
         """
-        return [
-            {
-                "id": model.id,
-                "name": model.name,
-                "family": model.family,
-                "parameters": model.parameters,
-                "size_category": model.size_category.value,
-                "context_length": model.context_length,
-                "architecture": model.architecture
-            }
-            for model in self._models.values()
-        ]
+        return self._catalog.list_summaries()
     
     def get_model_info(self, model_id: str) -> ModelInfo:
         """
@@ -284,10 +43,11 @@ class ModelRegistry:
         Raises:
             ValueError: 模型不存在时抛出
         """
-        if model_id not in self._models:
+        model = self._catalog.get(model_id)
+        if model is None:
             raise ValueError(f"模型 {model_id} 不存在")
         
-        return self._models[model_id]
+        return model
     
     def get_models_by_family(self, family: str) -> List[ModelInfo]:
         """
@@ -299,7 +59,7 @@ class ModelRegistry:
         Returns:
             该系列的模型列表
         """
-        return [model for model in self._models.values() if model.family == family]
+        return self._catalog.find(family=family)
     
     def get_models_by_size(self, size_category: ModelSize) -> List[ModelInfo]:
         """
@@ -311,7 +71,60 @@ class ModelRegistry:
         Returns:
             该规模的模型列表
         """
-        return [model for model in self._models.values() if model.size_category == size_category]
+        return self._catalog.find(size_category=ModelSize(size_category).value)
+    
+    def get_models_by_architecture(self, architecture: str) -> List[ModelInfo]:
+        """
+        根据架构类型获取模型列表
+        
+        Args:
+            architecture: 架构类型
+            
+        Returns:
+            该架构的模型列表
+        """
+        return self._catalog.find(architecture=architecture)
+    
+    def get_models_by_parameters(self, min_parameters: Optional[int] = None,
+                                 max_parameters: Optional[int] = None) -> List[ModelInfo]:
+        """
+        根据参数量范围获取模型列表
+        
+        Args:
+            min_parameters: 最小参数量（含）
+            max_parameters: 最大参数量（含）
+            
+        Returns:
+            参数量在范围内的模型列表
+        """
+        return self._catalog.find(min_parameters=min_parameters, max_parameters=max_parameters)
+    
+    def search_models(self, fields: Optional[List[str]] = None, **criteria: Any) -> Dict[str, Any]:
+        """
+        搜索、过滤并分页获取模型（内存索引）
+        
+        Args:
+            fields: 返回字段，为None时返回摘要字段
+            **criteria: 搜索词、过滤条件和分页参数，见ModelSearchIndex.search
+            
+        Returns:
+            {"items", "next_cursor", "total"}
+            
+        Raises:
+            ValueError: 游标或字段无效时抛出
+        """
+        result = get_search_index(self._catalog).search(**criteria)
+        result["items"] = project(result["items"], self._catalog, fields)
+        return result
+    
+    def get_catalog_revision(self) -> str:
+        """
+        获取模型目录修订号，目录内容变化后必然不同
+        
+        Returns:
+            修订号
+        """
+        return self._catalog.revision()
     
     def register_custom_model(self, model: ModelInfo) -> None:
         """
@@ -320,10 +133,27 @@ class ModelRegistry:
         Args:
             model: 自定义模型信息
         """
-        if model.id in self._models:
-            raise ValueError(f"模型ID {model.id} 已存在")
+        self._catalog.insert(model)
+    
+    def import_hf_configs(self, path: str, cache_dir: Optional[str] = None,
+                          max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        从本地HuggingFace config.json（单个文件或目录树）导入模型，已存在的模型ID会被更新
+        
+        Args:
+            path: config.json文件或checkpoint目录树
+            cache_dir: 解析结果缓存目录
+            max_workers: 并行解析的进程数
+            
+        Returns:
+            导入结果，models为导入的模型ID列表
+        """
+        from .hf_config_importer import HFConfigImporter
         
-        self._models[model.id] = model
+        result = HFConfigImporter(cache_dir, max_workers).import_path(path)
+        self._catalog.upsert_many(result["models"])
+        result["models"] = [model.id for model in result["models"]]
+        return result
     
     def update_model(self, model_id: str, model: ModelInfo) -> None:
         """
@@ -333,10 +163,7 @@ class ModelRegistry:
             model_id: 模型ID
             model: 新的模型信息
         """
-        if model_id not in self._models:
-            raise ValueError(f"模型 {model_id} 不存在")
-        
-        self._models[model_id] = model
+        self._catalog.update(model_id, model)
     
     def remove_model(self, model_id: str) -> None:
         """
@@ -345,7 +172,4 @@ class ModelRegistry:
         Args:
             model_id: 模型ID
         """
-        if model_id not in self._models:
-            raise ValueError(f"模型 {model_id} 不存在")
-        
-        del self._models[model_id] 
\ No newline at end of file
+        self._catalog.delete(model_id) 
\ No newline at end of file
@@ -0,0 +1,276 @@
+"""
+模型目录搜索服务
+
+在内存中为模型目录的摘要信息建立索引，模型选择器每次输入都能在毫秒级返回（上万个模型）：
+- 名称搜索：ID和名称按非字母数字字符切分为词，词表排序后二分查找前缀；
+  没有前缀匹配时再用三元组（trigram）倒排索引做模糊匹配，容忍拼写错误
+- 过滤：系列、规模、架构为等值索引，参数量和上下文长度为排序列表上的二分区间查询
+- 分页：按 (相关度降序, ID) 排序的游标分页，游标为上一页最后一项的排序键，
+  翻页期间目录增删模型不会导致重复或遗漏
+索引按目录修订号缓存，目录写入后下一次查询时重建。
+"""
+
+import base64
+import bisect
+import json
+import re
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from ..models.common import ModelInfo
+from .model_catalog import ModelCatalog, SUMMARY_COLUMNS
+
+
+# 相关度：ID或名称完全匹配 > 每个查询词都是某个词的前缀 > 模糊匹配（三元组相似度，不超过1）
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+
+# 模糊匹配的最低相似度（查询三元组中出现在模型词中的比例）
+FUZZY_THRESHOLD = 0.5
+
+_TOKEN_PATTERN = re.compile(r"[^0-9a-z]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """小写后按非字母数字字符切分（"Qwen2-7B-Chat" -> ["qwen2", "7b", "chat"]）"""
+    return [token for token in _TOKEN_PATTERN.split(text.lower()) if token]
+
+
+def trigrams(token: str) -> Set[str]:
+    """词的三元组（词首补两个空格、词尾补一个空格，与pg_trgm一致）"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def encode_cursor(sort_key: Tuple[float, str]) -> str:
+    """将排序键编码为不透明的游标"""
+    raw = json.dumps([sort_key[0], sort_key[1]], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    解码游标
+
+    Raises:
+        ValueError: 游标格式无效时抛出
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, model_id = json.loads(raw)
+        return float(score), str(model_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+class ModelSearchIndex:
+    """模型目录摘要的内存索引（只读，目录变化时整体重建）"""
+
+    def __init__(self, summaries: List[Dict[str, Any]], revision: str = ""):
+        """
+        建立索引
+
+        Args:
+            summaries: 模型摘要列表（ModelCatalog.list_summaries）
+            revision: 建立索引时的目录修订号
+        """
+        self.revision = revision
+        # 按ID排序，无搜索词时的结果顺序即为位置顺序
+        self.summaries = sorted(summaries, key=lambda summary: summary["id"])
+
+        self._by_value: Dict[str, Dict[str, Set[int]]] = {
+            column: {} for column in ("family", "size_category", "architecture")
+        }
+        self._sorted_ranges: Dict[str, List[Tuple[int, int]]] = {}
+        self._exact: Dict[str, Set[int]] = {}
+        self._tokens: List[Tuple[str, int]] = []
+        self._trigrams: Dict[str, Set[int]] = {}
+
+        for position, summary in enumerate(self.summaries):
+            for column, index in self._by_value.items():
+                index.setdefault(str(summary[column]).lower(), set()).add(position)
+            for text in {summary["id"].lower(), summary["name"].lower()}:
+                self._exact.setdefault(text, set()).add(position)
+            tokens = set(tokenize(summary["id"])) | set(tokenize(summary["name"]))
+            for token in tokens:
+                self._tokens.append((token, position))
+                for trigram in trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(position)
+        self._tokens.sort()
+
+        for column in ("parameters", "context_length"):
+            self._sorted_ranges[column] = sorted(
+                (summary[column], position) for position, summary in enumerate(self.summaries)
+            )
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    def _prefix_matches(self, prefix: str) -> Set[int]:
+        """含有以prefix开头的词的模型"""
+        matches = set()
+        for i in range(bisect.bisect_left(self._tokens, (prefix, -1)), len(self._tokens)):
+            token, position = self._tokens[i]
+            if not token.startswith(prefix):
+                break
+            matches.add(position)
+        return matches
+
+    def _range_matches(self, column: str, low: Optional[int], high: Optional[int]) -> Set[int]:
+        """column在 [low, high] 区间内的模型"""
+        entries = self._sorted_ranges[column]
+        start = 0 if low is None else bisect.bisect_left(entries, (low, -1))
+        end = len(entries) if high is None else bisect.bisect_right(entries, (high, len(entries)))
+        return {position for _, position in entries[start:end]}
+
+    def _score(self, query: str, candidates: Optional[Set[int]]) -> Dict[int, float]:
+        """计算候选模型的相关度，不匹配的模型不出现在结果中"""
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return {}
+
+        scores: Dict[int, float] = {}
+        prefix: Optional[Set[int]] = None
+        for token in query_tokens:
+            matches = self._prefix_matches(token)
+            prefix = matches if prefix is None else prefix & matches
+        for position in prefix:
+            scores[position] = PREFIX_SCORE
+        for position in self._exact.get(query.strip().lower(), ()):
+            scores[position] = EXACT_SCORE
+
+        if candidates is not None:
+            scores = {position: score for position, score in scores.items() if position in candidates}
+        if scores:
+            return scores
+
+        # 没有前缀匹配时才做模糊匹配：统计每个模型与查询共有的三元组数
+        query_trigrams = set().union(*(trigrams(token) for token in query_tokens))
+        shared: Counter = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._trigrams.get(trigram, ()))
+        for position, count in shared.items():
+            similarity = round(count / len(query_trigrams), 4)
+            if similarity >= FUZZY_THRESHOLD and (candidates is None or position in candidates):
+                scores[position] = similarity
+        return scores
+
+    def search(self, q: Optional[str] = None, family: Optional[str] = None,
+               size_category: Optional[str] = None, architecture: Optional[str] = None,
+               min_parameters: Optional[int] = None, max_parameters: Optional[int] = None,
+               min_context_length: Optional[int] = None, max_context_length: Optional[int] = None,
+               limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        搜索、过滤并分页
+
+        Args:
+            q: 名称搜索词（前缀或模糊匹配ID和名称），为空时不按名称过滤
+            family: 模型系列（不区分大小写）
+            size_category: 模型规模类别
+            architecture: 架构类型
+            min_parameters: 最小参数量（含）
+            max_parameters: 最大参数量（含）
+            min_context_length: 最小上下文长度（含）
+            max_context_length: 最大上下文长度（含）
+            limit: 每页数量
+            cursor: 上一页返回的next_cursor
+
+        Returns:
+            {"items": 摘要列表（含score）, "next_cursor": 下一页游标（没有下一页时为None），
+             "total": 满足条件的模型总数}
+
+        Raises:
+            ValueError: 游标无效时抛出
+        """
+        candidates: Optional[Set[int]] = None
+        filters = []
+        for column, value in (("family", family), ("size_category", size_category),
+                              ("architecture", architecture)):
+            if value is not None:
+                filters.append(self._by_value[column].get(str(value).lower(), set()))
+        if min_parameters is not None or max_parameters is not None:
+            filters.append(self._range_matches("parameters", min_parameters, max_parameters))
+        if min_context_length is not None or max_context_length is not None:
+            filters.append(self._range_matches("context_length", min_context_length, max_context_length))
+        # 从最小的集合开始求交集
+        for matches in sorted(filters, key=len):
+            candidates = matches if candidates is None else candidates & matches
+
+        if q and q.strip():
+            scores = self._score(q, candidates)
+            ranked = sorted(((-score, self.summaries[position]["id"]), position)
+                            for position, score in scores.items())
+        else:
+            positions = range(len(self.summaries)) if candidates is None else sorted(candidates)
+            ranked = [((0.0, self.summaries[position]["id"]), position) for position in positions]
+
+        start = 0
+        if cursor:
+            score, model_id = decode_cursor(cursor)
+            start = bisect.bisect_right(ranked, ((-score, model_id), len(self.summaries)))
+        page = ranked[start:start + limit]
+        has_more = start + limit < len(ranked)
+
+        return {
+            "items": [dict(self.summaries[position], score=abs(key[0])) for key, position in page],
+            "next_cursor": encode_cursor((-page[-1][0][0], page[-1][0][1])) if page and has_more else None,
+            "total": len(ranked)
+        }
+
+
+_indexes: Dict[int, ModelSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(catalog: ModelCatalog) -> ModelSearchIndex:
+    """获取目录的搜索索引，目录修订号变化（包括其他进程写入）时重建"""
+    revision = catalog.revision()
+    with _indexes_lock:
+        index = _indexes.get(id(catalog))
+        if index is None or index.revision != revision:
+            index = ModelSearchIndex(catalog.list_summaries(), revision)
+            _indexes[id(catalog)] = index
+        return index
+
+
+def project(summaries: List[Dict[str, Any]], catalog: ModelCatalog,
+            fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    按fields裁剪返回字段
+
+    只请求摘要字段时直接使用索引中的摘要，否则从目录批量读取完整模型
+
+    Args:
+        summaries: 搜索结果中的摘要
+        catalog: 模型目录
+        fields: 返回字段（ModelInfo字段名或score），为None时返回摘要字段和score
+
+    Returns:
+        裁剪后的模型列表
+
+    Raises:
+        ValueError: 字段名未知时抛出
+    """
+    if fields is None:
+        return summaries
+    unknown = [field for field in fields if field != "score" and field not in ModelInfo.model_fields]
+    if unknown:
+        raise ValueError(f"未知的字段: {', '.join(unknown)}")
+    available = set(SUMMARY_COLUMNS) | {"score"}
+    if set(fields) <= available:
+        return [{field: summary[field] for field in fields} for summary in summaries]
+
+    models = {model.id: model for model in catalog.get_many([summary["id"] for summary in summaries])}
+    model_fields = [field for field in fields if field != "score"]
+    items = []
+    for summary in summaries:
+        model = models.get(summary["id"])
+        if model is None:
+            # 索引建立后模型已被删除
+            continue
+        item = model.model_dump(mode="json", include=set(model_fields))
+        if "score" in fields:
+            item["score"] = summary["score"]
+        items.append({field: item.get(field) for field in fields})
+    return items
@@ -0,0 +1,316 @@
+"""
+持久化计算结果存储
+
+计算结果按内容寻址保存在SQLite中（WAL模式，多个服务进程共享同一个文件，重启后保留）：
+- 键为 (命名空间, 规范化的请求, 请求引用的模型定义, 计算器版本) 的SHA-256，
+  计算器版本取计算相关源码和GPU数据的哈希，部署新的计算逻辑后旧结果自然不再命中
+- 值为序列化后的响应字节（zlib压缩），命中时无需反序列化即可直接返回
+- 总大小超过上限时按最近访问时间淘汰到上限的90%，访问时间最多每分钟更新一次，
+  避免每次命中都产生写事务
+- 存储本身出错（无法打开、数据库被锁、磁盘已满等）时退化为直接计算，不影响请求结果，错误次数计入统计
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+from ..config import resolve_data_path
+
+# 表结构版本，结构变化时重建数据库
+SCHEMA_VERSION = 1
+
+# 淘汰时降到上限的比例，避免每次写入都触发淘汰
+EVICTION_LOW_WATER = 0.9
+
+# 命中时距上次更新超过该秒数才更新访问时间
+TOUCH_INTERVAL = 60.0
+
+# 影响计算结果的源码和数据（相对app目录）
+_VERSION_SOURCES = ("services/calculator", "models", "utils")
+_GPU_DATA_FILE = Path(__file__).resolve().parents[3] / "gpu-data" / "gpu.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_accessed_at ON results (accessed_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+@lru_cache(maxsize=1)
+def get_calculator_version() -> str:
+    """计算器版本：计算相关源码与GPU数据文件内容的哈希（进程内只计算一次）"""
+    app_dir = Path(__file__).resolve().parents[1]
+    digest = hashlib.sha256()
+    files = sorted(path for source in _VERSION_SOURCES for path in (app_dir / source).rglob("*.py"))
+    for path in files + [_GPU_DATA_FILE]:
+        if path.exists():
+            digest.update(path.relative_to(path.parents[1]).as_posix().encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def make_key(namespace: str, *parts: Any) -> str:
+    """
+    结果键：命名空间、规范化JSON（键排序）和计算器版本的SHA-256
+
+    Args:
+        namespace: 结果类型，如 training、inference
+        *parts: 决定结果的全部输入（可JSON序列化）
+    """
+    canonical = json.dumps([namespace, get_calculator_version(), *parts],
+                           sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def make_request_key(namespace: str, request: Any, registry: Any) -> str:
+    """
+    预估请求的结果键
+
+    请求引用目录中的模型（model_id）时键中包含该模型的定义，修改模型后旧结果不再命中；
+    自定义模型和参数量本身就在请求中
+
+    Args:
+        namespace: 结果类型
+        request: 预估请求（pydantic模型）
+        registry: 解析model_id的模型注册表
+
+    Raises:
+        ValueError: 模型不存在时抛出
+    """
+    model_id = getattr(request, "model_id", None)
+    model = registry.get_model_info(model_id).model_dump(mode="json") if model_id else None
+    return make_key(namespace, request.model_dump(mode="json"), model)
+
+
+class ResultStore:
+    """SQLite计算结果存储"""
+
+    def __init__(self, path: Union[str, Path], max_bytes: int):
+        """
+        打开（必要时创建）结果存储
+
+        Args:
+            path: 数据库文件路径
+            max_bytes: 结果总大小上限（压缩后字节）
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        # 本进程的命中/未命中/存储错误计数
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        try:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA busy_timeout=5000")
+            self._initialize_schema()
+        except sqlite3.Error:
+            self._connection.close()
+            raise
+
+    def _initialize_schema(self) -> None:
+        """创建表和索引，表结构版本不一致时重建"""
+        with self._lock:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._connection.executescript(
+                    "DROP TABLE IF EXISTS results; DROP TABLE IF EXISTS meta;" + SCHEMA +
+                    f"PRAGMA user_version = {SCHEMA_VERSION};"
+                )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """显式写事务（连接为自动提交模式）"""
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def _add_meta(self, key: str, delta: int) -> None:
+        self._connection.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+            (key, delta)
+        )
+
+    def _meta(self, key: str) -> int:
+        row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """按键读取结果，不存在时返回None"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data, accessed_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL:
+                self._connection.execute(
+                    "UPDATE results SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+        return zlib.decompress(row[0])
+
+    def put(self, key: str, namespace: str, value: bytes) -> None:
+        """写入结果，总大小超过上限时淘汰最久未访问的结果"""
+        data = zlib.compress(value, 1)
+        now = time.time()
+        with self._lock:
+            with self._transaction():
+                old = self._connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO results (key, namespace, size, created_at, accessed_at, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, namespace, len(data), now, now, data)
+                )
+                self._add_meta("total_bytes", len(data) - (old[0] if old else 0))
+                if self._meta("total_bytes") > self.max_bytes:
+                    self._evict(int(self.max_bytes * EVICTION_LOW_WATER))
+
+    def _evict(self, target_bytes: int) -> None:
+        """按访问时间从旧到新删除结果，直到总大小不超过target_bytes（在写事务中调用）"""
+        excess = self._meta("total_bytes") - target_bytes
+        freed, evicted = 0, []
+        for key, size in self._connection.execute("SELECT key, size FROM results ORDER BY accessed_at"):
+            if freed >= excess:
+                break
+            evicted.append((key,))
+            freed += size
+        self._connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+        self._add_meta("total_bytes", -freed)
+        self._add_meta("evictions", len(evicted))
+
+    def get_or_compute(self, key: str, namespace: str, compute: Callable[[], bytes]) -> Tuple[bytes, bool]:
+        """
+        读穿：命中时直接返回已保存的结果，否则计算并保存
+
+        读写存储出错时按未命中处理、不保存结果，只有compute的异常会抛给调用方
+
+        Args:
+            key: 结果键（make_key）
+            namespace: 结果类型
+            compute: 计算并序列化结果，抛出异常时不保存
+
+        Returns:
+            (结果字节, 是否命中)
+        """
+        try:
+            value = self.get(key)
+        except (sqlite3.Error, OSError, zlib.error):
+            self._record_error()
+            value = None
+        if value is not None:
+            return value, True
+        value = compute()
+        try:
+            self.put(key, namespace, value)
+        except (sqlite3.Error, OSError):
+            self._record_error()
+        return value, False
+
+    def _record_error(self) -> None:
+        with self._lock:
+            self._errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        存储统计
+
+        Returns:
+            条目数、各命名空间条目数、压缩后总大小、上限、累计淘汰数，以及本进程的命中率
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT namespace, COUNT(*) FROM results GROUP BY namespace"
+            ).fetchall()
+            total_bytes = self._meta("total_bytes")
+            evictions = self._meta("evictions")
+            hits, misses, errors = self._hits, self._misses, self._errors
+        lookups = hits + misses
+        return {
+            "enabled": True,
+            "available": True,
+            "entries": sum(row[1] for row in rows),
+            "namespaces": {row[0]: row[1] for row in rows},
+            "total_bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": evictions,
+            "calculator_version": get_calculator_version(),
+            "process": {
+                "hits": hits,
+                "misses": misses,
+                "errors": errors,
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
+        }
+
+    def clear(self) -> None:
+        """删除全部结果"""
+        with self._lock:
+            with self._transaction():
+                self._connection.execute("DELETE FROM results")
+                self._connection.execute("UPDATE meta SET value = 0 WHERE key = 'total_bytes'")
+
+
+_stores: Dict[Tuple[str, int], ResultStore] = {}
+_stores_lock = threading.Lock()
+
+# 本进程打开存储失败的次数和最近一次的错误
+_open_errors = 0
+_last_open_error: Optional[str] = None
+
+
+def get_result_store(path: Union[str, Path], max_bytes: int) -> ResultStore:
+    """获取指定路径和大小上限的结果存储（同一进程内共享连接，相对路径按后端根目录解析）"""
+    key = (str(Path(resolve_data_path(str(path))).resolve()), max_bytes)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ResultStore(key[0], max_bytes)
+        return _stores[key]
+
+
+def try_get_result_store(path: Union[str, Path], max_bytes: int) -> Optional[ResultStore]:
+    """
+    获取结果存储，打开失败（目录不可写、数据库被锁、不是SQLite文件等）时返回None并计数
+
+    失败的存储不缓存，之后的调用会重新尝试打开
+    """
+    global _open_errors, _last_open_error
+    try:
+        return get_result_store(path, max_bytes)
+    except (sqlite3.Error, OSError) as e:
+        with _stores_lock:
+            _open_errors += 1
+            _last_open_error = str(e) or type(e).__name__
+        return None
+
+
+def get_open_errors() -> Dict[str, Any]:
+    """本进程打开存储失败的次数和最近一次的错误"""
+    with _stores_lock:
+        return {"open_errors": _open_errors, "last_open_error": _last_open_error}
@@ -30,6 +30,9 @@ def load_gpu_specs():
 # GPU硬件信息 - 从JSON文件动态加载
 GPU_SPECS = load_gpu_specs()
 
+# 未指定GPU型号时使用的参考GPU
+DEFAULT_GPU_NAME = "A100-80GB"
+
 # 模型架构配置
 MODEL_ARCHITECTURES = {
     "llama": {
@@ -42,19 +45,58 @@ MODEL_ARCHITECTURES = {
         "ffn_multiplier": 4,
         "attention_type": "multi_head",
         "activation": "silu",
-        "normalization": "rms_norm"
+        "normalization": "rms_norm",
+        "qkv_bias": True
     },
     "mistral": {
         "ffn_multiplier": 4,
         "attention_type": "group_query",
+        "num_key_value_heads": 8,
+        "activation": "silu",
+        "normalization": "rms_norm"
+    },
+    "mixtral": {
+        "ffn_multiplier": 4,
+        "attention_type": "group_query",
+        "num_key_value_heads": 8,
+        "activation": "silu",
+        "normalization": "rms_norm"
+    },
+    "qwen2_moe": {
+        "ffn_multiplier": 4,
+        "attention_type": "multi_head",
+        "activation": "silu",
+        "normalization": "rms_norm",
+        "qkv_bias": True
+    },
+    "deepseek_moe": {
+        "ffn_multiplier": 4,
+        "attention_type": "multi_head",
         "activation": "silu",
         "normalization": "rms_norm"
     },
     "chatglm": {
         "ffn_multiplier": 4,
         "attention_type": "multi_query",
+        "num_key_value_heads": 2,
         "activation": "gelu",
-        "normalization": "layer_norm"
+        "normalization": "layer_norm",
+        "qkv_bias": True,
+        "linear_bias": True
+    },
+    "chatglm2": {
+        "ffn_multiplier": 4,
+        "attention_type": "multi_query",
+        "num_key_value_heads": 2,
+        "activation": "swiglu",
+        "normalization": "rms_norm",
+        "qkv_bias": True
+    },
+    "gemma": {
+        "ffn_multiplier": 8,
+        "attention_type": "multi_head",
+        "activation": "geglu",
+        "normalization": "rms_norm"
     },
     "baichuan": {
         "ffn_multiplier": 4,
@@ -107,7 +149,7 @@ INFERENCE_FRAMEWORKS = {
 }
 
 # 常用序列长度
-COMMON_SEQUENCE_LENGTHS = [512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072]
+COMMON_SEQUENCE_LENGTHS = [512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072, 262144, 524288, 1048576]
 
 # 常用批次大小
 COMMON_BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512] 
\ No newline at end of file
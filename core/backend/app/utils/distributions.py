@@ -0,0 +1,189 @@
+"""
+token长度分布工具
+"""
+
+import json
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+from ..models.inference import LengthDistribution, LengthHistogramBin
+
+# 分布离散化后的最大区间数，控制输入/输出联合分布的计算规模
+MAX_DISTRIBUTION_BINS = 512
+
+# 分位数表示离散化时的采样点数
+PERCENTILE_GRID_POINTS = 256
+
+
+def _parse_percentile_key(key: str) -> float:
+    """
+    解析分位数键
+
+    Args:
+        key: 形如 "p50"、"p99.9"、"50" 的分位数键
+
+    Returns:
+        0-1之间的分位点
+    """
+    value = float(key.lower().lstrip("p"))
+    if not 0 <= value <= 100:
+        raise ValueError(f"分位数 {key} 超出0-100范围")
+    return value / 100
+
+
+def _compact(lengths: np.ndarray, weights: np.ndarray,
+             max_bins: int = MAX_DISTRIBUTION_BINS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    合并相同长度并在区间过多时按等概率分位点重新离散化
+
+    Returns:
+        (长度数组, 归一化概率数组)
+    """
+    lengths, inverse = np.unique(lengths, return_inverse=True)
+    weights = np.bincount(inverse, weights=weights)
+    total = weights.sum()
+    if total <= 0:
+        raise ValueError("长度分布的权重之和必须大于0")
+    probs = weights / total
+
+    if len(lengths) > max_bins:
+        # 取等概率分位点（区间中点），保留分布形状与尾部
+        cdf = np.cumsum(probs)
+        grid = (np.arange(max_bins) + 0.5) / max_bins
+        indices = np.minimum(np.searchsorted(cdf, grid), len(lengths) - 1)
+        return _compact(lengths[indices], np.ones(max_bins), max_bins)
+
+    return lengths.astype(float), probs
+
+
+def distribution_to_histogram(distribution: LengthDistribution) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将任意表示的长度分布转换为离散概率分布
+
+    分位数表示在相邻分位点之间线性插值，未给出p0时以1为最小长度
+
+    Args:
+        distribution: 长度分布
+
+    Returns:
+        (长度数组, 概率数组)
+    """
+    if distribution.histogram:
+        lengths = np.array([b.length for b in distribution.histogram], dtype=float)
+        weights = np.array([b.weight for b in distribution.histogram], dtype=float)
+        return _compact(lengths, weights)
+
+    if distribution.samples:
+        samples = np.asarray(distribution.samples, dtype=float)
+        return _compact(samples, np.ones(len(samples)))
+
+    points = sorted((_parse_percentile_key(k), v) for k, v in distribution.percentiles.items())
+    if points[0][0] > 0:
+        points.insert(0, (0.0, min(1, points[0][1])))
+    quantiles = np.array([q for q, _ in points])
+    values = np.maximum.accumulate(np.array([v for _, v in points], dtype=float))
+
+    # 超出最高分位点的部分按最高分位点的长度截断
+    grid = (np.arange(PERCENTILE_GRID_POINTS) + 0.5) / PERCENTILE_GRID_POINTS
+    lengths = np.round(np.interp(grid, quantiles, values))
+    return _compact(lengths, np.ones(len(lengths)))
+
+
+def weighted_quantile(values: np.ndarray, probs: np.ndarray, q: float) -> float:
+    """
+    计算离散分布的分位数
+
+    Args:
+        values: 取值数组
+        probs: 对应概率数组
+        q: 分位点（0-1）
+
+    Returns:
+        分位数
+    """
+    order = np.argsort(values, kind="stable")
+    cdf = np.cumsum(probs[order])
+    index = min(int(np.searchsorted(cdf, q - 1e-12)), len(values) - 1)
+    return float(values[order][index])
+
+
+def summarize_distribution(values: np.ndarray, probs: np.ndarray) -> dict:
+    """
+    汇总分布的均值、中位数和尾部分位数
+
+    Args:
+        values: 取值数组
+        probs: 对应概率数组
+
+    Returns:
+        统计信息字典
+    """
+    return {
+        "mean": float(np.dot(values, probs)),
+        "p50": weighted_quantile(values, probs, 0.50),
+        "p95": weighted_quantile(values, probs, 0.95),
+        "p99": weighted_quantile(values, probs, 0.99),
+        "max": float(values.max())
+    }
+
+
+def parse_length_samples(content: str) -> Tuple[List[int], List[int]]:
+    """
+    解析长度样本文件
+
+    支持两种格式，逐行解析并跳过无法识别的行（如CSV表头）：
+    - JSON Lines：{"prompt_tokens": 812, "output_tokens": 230}
+    - 文本/CSV：每行 "输入长度,输出长度"（也可用空白分隔），只有一列时视为输入长度
+
+    Args:
+        content: 文件内容
+
+    Returns:
+        (输入长度样本, 输出长度样本)
+    """
+    prompt_lengths: List[int] = []
+    output_lengths: List[int] = []
+
+    for line in content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "prompt_tokens" in record:
+                prompt_lengths.append(int(record["prompt_tokens"]))
+            if "output_tokens" in record:
+                output_lengths.append(int(record["output_tokens"]))
+            continue
+
+        fields = [f for f in re.split(r"[,\s]+", line) if f]
+        if not fields or not all(f.isdigit() for f in fields):
+            continue
+        prompt_lengths.append(int(fields[0]))
+        if len(fields) > 1:
+            output_lengths.append(int(fields[1]))
+
+    return prompt_lengths, output_lengths
+
+
+def samples_to_distribution(samples: List[int]) -> LengthDistribution:
+    """
+    将长度样本压缩为直方图表示的长度分布
+
+    Args:
+        samples: 长度样本
+
+    Returns:
+        直方图表示的长度分布
+    """
+    lengths, probs = distribution_to_histogram(LengthDistribution(samples=samples))
+    return LengthDistribution(histogram=[
+        LengthHistogramBin(length=int(length), weight=float(prob))
+        for length, prob in zip(lengths, probs)
+    ])
@@ -90,7 +90,11 @@ def recommend_gpus(memory_requirement_gb: float, max_count: int = 8,
                 memory_gb=gpu_memory,
                 memory_bandwidth_gb_s=specs["memory_bandwidth_gb_s"],
                 compute_capability=specs["compute_capability"],
-                fp16_tflops=specs.get("fp16_tflops")
+                fp16_tflops=specs.get("fp16_tflops"),
+                nvlink_bandwidth_gb_s=specs.get("nvlink_bandwidth_gb_s"),
+                pcie_bandwidth_gb_s=specs.get("pcie_bandwidth_gb_s"),
+                interconnect_bandwidth_gb_s=specs.get("interconnect_bandwidth_gb_s"),
+                gpus_per_node=specs.get("gpus_per_node")
             )
             recommendations.append(gpu_info)
         
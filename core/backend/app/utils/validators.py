@@ -32,8 +32,8 @@ def validate_sequence_length(seq_len: int) -> bool:
     Returns:
         是否有效
     """
-    # 序列长度应该在128到131072之间，且是2的幂次
-    if not (128 <= seq_len <= 131072):
+    # 序列长度应该在128到1048576之间，且是2的幂次
+    if not (128 <= seq_len <= 1048576):
         return False
     
     # 检查是否是2的幂次（对于大多数模型架构更高效）
@@ -142,9 +142,15 @@ def validate_inference_config(config: Dict[str, Any]) -> List[str]:
         errors.append("Transformers后端不建议使用超过32的批次大小")
     
     # 验证序列长度和显存的合理性
+    # KV Cache = batch * seq_len * num_layers * num_kv_heads * head_dim * 2(K和V) * 2字节
+    # GQA/MQA模型通过num_key_value_heads缩小KV Cache，未提供时按7B多头注意力模型估算
     max_sequence_length = config.get("max_sequence_length")
     if max_sequence_length and max_batch_size:
-        estimated_kv_cache_gb = (max_batch_size * max_sequence_length * 4096 * 32 * 2 * 2) / (1024**3)
+        num_layers = config.get("num_layers", 32)
+        num_kv_heads = config.get("num_key_value_heads") or config.get("num_heads", 32)
+        head_dim = config.get("head_dim", 128)
+        estimated_kv_cache_gb = (max_batch_size * max_sequence_length * num_layers *
+                                 num_kv_heads * head_dim * 2 * 2) / (1024**3)
         if estimated_kv_cache_gb > 40:  # 粗略估算
             errors.append("当前配置的KV Cache可能超过单GPU显存限制")
     
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+响应压缩基准测试 - 对比各编码和压缩级别在典型输出上的传输字节数与CPU开销
+
+典型输出：
+- sweep：多组训练配置（模型 × 训练方法 × 序列长度 × 批次大小）的完整预估结果（JSON数组）
+- timeline：流水线调度显存时间线（NDJSON），分别测一次性压缩和逐行flush的流式压缩
+
+用法: python benchmark_compression.py [--repeat N]
+"""
+
+import argparse
+import itertools
+import json
+import time
+from typing import Callable, List, Tuple
+
+from app.api.compression import StreamCompressor, available_encodings, compress, brotli, zstandard
+from app.models.training import TrainingRequest, TrainingMethod
+from app.services.calculator.training_calc import TrainingCalculator
+
+# 每种编码测试的压缩级别（含Settings默认值）
+LEVELS = {
+    "gzip": [1, 6, 9],
+    "br": [1, 4, 9, 11],
+    "zstd": [1, 3, 9, 19]
+}
+
+
+def build_sweep() -> bytes:
+    """生成训练配置sweep的响应体"""
+    calculator = TrainingCalculator()
+    results = []
+    for model_id, method, sequence_length, batch_size in itertools.product(
+        ["llama2-7b", "llama2-13b", "qwen2-7b", "mixtral-8x7b"],
+        [TrainingMethod.FULL_FINETUNING, TrainingMethod.LORA, TrainingMethod.QLORA],
+        [2048, 4096, 8192],
+        [1, 2, 4, 8]
+    ):
+        request = TrainingRequest(
+            model_id=model_id, training_method=method, batch_size=batch_size,
+            sequence_length=sequence_length, gradient_accumulation_steps=8, pipeline_parallel=2
+        )
+        results.append(calculator.calculate(request).model_dump(mode="json"))
+    return json.dumps(results, ensure_ascii=False).encode("utf-8")
+
+
+def build_timeline() -> List[bytes]:
+    """生成流水线时间线NDJSON（每行一个事件）"""
+    request = TrainingRequest(
+        model_id="llama2-7b", training_method=TrainingMethod.FULL_FINETUNING, batch_size=1,
+        sequence_length=2048, gradient_accumulation_steps=256, pipeline_parallel=8
+    )
+    return [(json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+            for event in TrainingCalculator().iter_pipeline_timeline(request)]
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        import gzip
+        return gzip.decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def measure(func: Callable[[], bytes], repeat: int) -> Tuple[bytes, float]:
+    """返回结果和最短耗时（毫秒）"""
+    best = float("inf")
+    result = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def stream(lines: List[bytes], encoding: str, level: int) -> bytes:
+    compressor = StreamCompressor(encoding, level, flush=True)
+    return b"".join(compressor.compress(line) for line in lines) + compressor.finish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数（取最短耗时）")
+    args = parser.parse_args()
+
+    print("🚀 生成典型输出...")
+    sweep = build_sweep()
+    lines = build_timeline()
+    timeline = b"".join(lines)
+    print(f"   - sweep: {len(sweep) / 1024:.1f} KB")
+    print(f"   - timeline: {len(timeline) / 1024:.1f} KB, {len(lines)} 行")
+
+    encodings = available_encodings()
+    missing = [name for name in LEVELS if name not in encodings]
+    if missing:
+        print(f"⚠️  未安装 {', '.join(missing)} 的依赖，跳过（pip install brotli zstandard）")
+
+    header = f"{'输出':<16}{'编码':<6}{'级别':>4}{'字节数':>12}{'压缩率':>8}{'压缩ms':>10}{'MB/s':>9}{'解压ms':>9}"
+    print("\n" + header)
+    print("-" * len(header))
+    for name, payload in (("sweep", sweep), ("timeline", timeline)):
+        for encoding in encodings:
+            for level in LEVELS[encoding]:
+                compressed, elapsed = measure(lambda: compress(payload, encoding, level), args.repeat)
+                _, decompress_elapsed = measure(lambda: decompress(compressed, encoding), args.repeat)
+                print(f"{name:<16}{encoding:<6}{level:>4}{len(compressed):>12}"
+                      f"{len(payload) / len(compressed):>8.1f}{elapsed:>10.2f}"
+                      f"{len(payload) / 1e6 / (elapsed / 1000):>9.0f}{decompress_elapsed:>9.2f}")
+
+    # 流式：每行flush，客户端可立即解出每个事件，代价是压缩率下降
+    for encoding in encodings:
+        for level in LEVELS[encoding]:
+            compressed, elapsed = measure(lambda: stream(lines, encoding, level), args.repeat)
+            assert decompress(compressed, encoding) == timeline
+            print(f"{'timeline/flush':<16}{encoding:<6}{level:>4}{len(compressed):>12}"
+                  f"{len(timeline) / len(compressed):>8.1f}{elapsed:>10.2f}"
+                  f"{len(timeline) / 1e6 / (elapsed / 1000):>9.0f}{'':>9}")
+
+
+if __name__ == "__main__":
+    main()
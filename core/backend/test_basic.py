@@ -33,6 +33,8 @@ def test_model_registry():
     print("\n🔍 测试模型注册表...")
     
     try:
+        from app.services.model_registry import ModelRegistry
+        
         registry = ModelRegistry()
         
         # 测试获取所有模型
@@ -60,6 +62,7 @@ def test_training_calculator():
     try:
         from app.models.training import TrainingRequest, TrainingMethod, OptimizerType
         from app.models.common import PrecisionType
+        from app.services.calculator.training_calc import TrainingCalculator
         
         # 创建测试请求
         request = TrainingRequest(
@@ -93,6 +96,7 @@ def test_inference_calculator():
     try:
         from app.models.inference import InferenceRequest, InferenceBackend, QuantizationMethod
         from app.models.common import PrecisionType
+        from app.services.calculator.inference_calc import InferenceCalculator
         
         # 创建测试请求
         request = InferenceRequest(
@@ -119,6 +123,1597 @@ def test_inference_calculator():
         return False
 
 
+def test_paged_kv_cache():
+    """测试PagedAttention KV block分配"""
+    print("\n🔍 测试KV block分配...")
+    
+    try:
+        from app.models.inference import InferenceRequest, InferenceBackend
+        from app.services.calculator.inference_calc import InferenceCalculator
+        
+        request = InferenceRequest(
+            model_id="llama-7b",
+            backend=InferenceBackend.VLLM,
+            max_batch_size=8,
+            max_sequence_length=2048,
+            max_new_tokens=512,
+            gpu_type="RTX-4090"
+        )
+        result = InferenceCalculator().calculate(request)
+        blocks = result.kv_cache_blocks
+        selected = blocks["selected"]
+        
+        # 2560 tokens / 16 = 160 blocks/序列，每个block为 16 * 32层 * 2 * 4096 * 2字节 = 8MB
+        assert blocks["block_bytes"] == 16 * 32 * 2 * 4096 * 2
+        assert selected["blocks_per_sequence"] == 160
+        assert result.max_concurrent_requests == max(1, selected["max_concurrent_sequences"])
+        assert blocks["per_gpu"]["A100-80GB"]["num_gpu_blocks"] > selected["num_gpu_blocks"]
+        
+        # 张量并行切分KV头后，单卡block变小、block数增加
+        tp_request = request.model_copy(update={"tensor_parallel": 2})
+        tp_blocks = InferenceCalculator().calculate(tp_request).kv_cache_blocks
+        assert tp_blocks["block_bytes"] * 2 == blocks["block_bytes"]
+        assert tp_blocks["selected"]["num_gpu_blocks"] > selected["num_gpu_blocks"]
+        
+        print(f"✅ KV block分配计算成功:")
+        print(f"   - RTX-4090 KV block数: {selected['num_gpu_blocks']}")
+        print(f"   - RTX-4090 最大并发序列: {selected['max_concurrent_sequences']}")
+        print(f"   - A100-80GB 最大并发序列: {blocks['per_gpu']['A100-80GB']['max_concurrent_sequences']}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ KV block分配测试失败: {e}")
+        return False
+
+
+def test_gqa_kv_cache():
+    """测试GQA/MQA模型的KV Cache计算"""
+    print("\n🔍 测试GQA KV Cache...")
+    
+    try:
+        from app.models.inference import InferenceRequest, InferenceBackend
+        from app.services.calculator.inference_calc import InferenceCalculator
+        
+        calculator = InferenceCalculator()
+        
+        def estimate(model_id):
+            request = InferenceRequest(
+                model_id=model_id,
+                backend=InferenceBackend.VLLM,
+                max_batch_size=8,
+                max_sequence_length=4096,
+                tensor_parallel=4
+            )
+            return calculator.calculate(request)
+        
+        # LLaMA 2 70B为8个KV头的GQA，KV Cache是同结构多头注意力LLaMA 70B的1/8
+        mha = estimate("llama-70b")
+        gqa = estimate("llama2-70b")
+        assert abs(mha.kv_cache_memory_gb / gqa.kv_cache_memory_gb - 8) < 1e-6
+        assert gqa.kv_cache_blocks["kv_heads_per_rank"] == 2
+        assert gqa.max_concurrent_requests > mha.max_concurrent_requests
+        
+        print(f"✅ GQA KV Cache计算成功:")
+        print(f"   - LLaMA 70B KV Cache: {mha.kv_cache_memory_gb:.2f} GB, 最大并发: {mha.max_concurrent_requests}")
+        print(f"   - LLaMA 2 70B KV Cache: {gqa.kv_cache_memory_gb:.2f} GB, 最大并发: {gqa.max_concurrent_requests}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ GQA KV Cache测试失败: {e}")
+        return False
+
+
+def test_kv_cache_quantization():
+    """测试KV Cache量化"""
+    print("\n🔍 测试KV Cache量化...")
+    
+    try:
+        from app.models.inference import InferenceRequest, InferenceBackend, KVCacheDtype, KVCacheQuantization
+        from app.services.calculator.inference_calc import InferenceCalculator
+        
+        calculator = InferenceCalculator()
+        base_request = InferenceRequest(
+            model_id="llama-13b",
+            backend=InferenceBackend.VLLM,
+            max_batch_size=32,
+            max_sequence_length=4096
+        )
+        base = calculator.calculate(base_request)
+        fp8 = calculator.calculate(base_request.model_copy(update={"kv_cache_dtype": KVCacheDtype.FP8}))
+        int4 = calculator.calculate(base_request.model_copy(update={
+            "kv_cache_dtype": KVCacheDtype.INT4,
+            "kv_cache_quantization": KVCacheQuantization.PER_GROUP
+        }))
+        
+        # FP8按张量缩放没有额外开销，KV Cache减半、block数翻倍
+        assert abs(base.kv_cache_memory_gb / fp8.kv_cache_memory_gb - 2) < 1e-6
+        assert fp8.kv_cache_blocks["selected"]["num_gpu_blocks"] >= 2 * base.kv_cache_blocks["selected"]["num_gpu_blocks"]
+        # INT4分组量化：0.5字节 + 每64个元素4字节缩放因子和零点
+        assert abs(int4.kv_cache_blocks["bytes_per_element"] - (0.5 + 4 / 64)) < 1e-9
+        # 解码阶段每个序列读取的KV字节数减半
+        per_sequence = lambda r: r.decode_analysis["kv_cache_bytes_per_step_gb"] / r.decode_analysis["batch_size"]
+        assert abs(per_sequence(base) / per_sequence(fp8) - 2) < 1e-6
+        assert "kv_cache" in base.recommendations
+        
+        print(f"✅ KV Cache量化计算成功:")
+        print(f"   - FP16最大并发: {base.max_concurrent_requests}")
+        print(f"   - FP8最大并发: {fp8.max_concurrent_requests}")
+        print(f"   - INT4最大并发: {int4.max_concurrent_requests}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ KV Cache量化测试失败: {e}")
+        return False
+
+
+def test_prefix_cache():
+    """测试前缀缓存KV复用"""
+    print("\n🔍 测试前缀缓存...")
+    
+    try:
+        from app.models.inference import InferenceRequest, InferenceBackend
+        from app.services.calculator.inference_calc import InferenceCalculator
+        
+        calculator = InferenceCalculator()
+        request = InferenceRequest(
+            model_id="llama2-13b",
+            backend=InferenceBackend.VLLM,
+            max_batch_size=32,
+            max_sequence_length=4096,
+            shared_prefix_length=3000,
+            prefix_cache_hit_rate=0.9,
+            num_distinct_prefixes=4
+        )
+        result = calculator.calculate(request)
+        analysis = result.prefix_cache_analysis
+        
+        # 只共享完整block：3000 // 16 = 187个block
+        assert analysis["shared_tokens_per_prefix"] == 187 * 16
+        assert analysis["shared_blocks"] == 187 * 4
+        assert result.kv_cache_memory_gb < analysis["baseline_kv_cache_memory_gb"]
+        assert analysis["capacity_gain"] > 1
+        assert analysis["prefill_flops"] < analysis["baseline_prefill_flops"]
+        
+        # 未设置共享前缀时不输出分析，KV Cache与基线一致
+        baseline = calculator.calculate(request.model_copy(update={"shared_prefix_length": 0}))
+        assert baseline.prefix_cache_analysis == {}
+        assert abs(baseline.kv_cache_memory_gb - analysis["baseline_kv_cache_memory_gb"]) < 1e-9
+        
+        print(f"✅ 前缀缓存计算成功:")
+        print(f"   - KV Cache: {analysis['baseline_kv_cache_memory_gb']:.2f} GB -> {result.kv_cache_memory_gb:.2f} GB")
+        print(f"   - 容量提升: {analysis['capacity_gain']:.2f}x")
+        print(f"   - 预填充计算节省: {analysis['prefill_compute_saving']:.0%}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 前缀缓存测试失败: {e}")
+        return False
+
+
+def test_length_distribution():
+    """测试按长度分布估算推理资源"""
+    print("\n🔍 测试长度分布...")
+    
+    try:
+        from app.models.inference import InferenceRequest, InferenceBackend
+        from app.services.calculator.inference_calc import InferenceCalculator
+        from app.utils.distributions import parse_length_samples
+        
+        prompts, outputs = parse_length_samples(
+            "prompt,output\n100,20\n300,60\n{\"prompt_tokens\": 2000, \"output_tokens\": 500}\n"
+        )
+        assert prompts == [100, 300, 2000] and outputs == [20, 60, 500]
+        
+        request = InferenceRequest(
+            model_id="llama2-13b",
+            backend=InferenceBackend.VLLM,
+            max_batch_size=64,
+            max_sequence_length=4096,
+            max_new_tokens=1024,
+            prompt_length_distribution={"percentiles": {"p50": 600, "p95": 2500, "p99": 4000}},
+            output_length_distribution={"histogram": [{"length": 100, "weight": 3}, {"length": 800, "weight": 1}]}
+        )
+        result = InferenceCalculator().calculate(request)
+        analysis = result.length_distribution_analysis
+        memory = analysis["kv_cache_memory_gb"]
+        concurrency = analysis["max_concurrent_sequences"]
+        
+        assert memory["expected"] < memory["p95"] < memory["p99"] <= memory["worst_case"]
+        assert memory["worst_case"] == result.kv_cache_memory_gb
+        assert concurrency["worst_case"] <= concurrency["p99"] <= concurrency["expected"]
+        assert abs(analysis["output_length"]["mean"] - 275) < 1e-9
+        
+        print(f"✅ 长度分布计算成功:")
+        print(f"   - KV Cache 期望/P99/最坏: {memory['expected']:.1f}/{memory['p99']:.1f}/{memory['worst_case']:.1f} GB")
+        print(f"   - 最大并发 期望/P99/最坏: {concurrency['expected']}/{concurrency['p99']}/{concurrency['worst_case']}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 长度分布测试失败: {e}")
+        return False
+
+
+def test_3d_parallel_training():
+    """测试张量并行与流水线并行的训练显存"""
+    print("\n🔍 测试3D并行训练显存...")
+    
+    try:
+        from app.models.training import TrainingRequest, TrainingMethod, DeepSpeedStage
+        from app.services.calculator.training_calc import TrainingCalculator
+        
+        calculator = TrainingCalculator()
+        request = TrainingRequest(
+            model_id="llama2-70b",
+            training_method=TrainingMethod.FULL_FINETUNING,
+            batch_size=1,
+            sequence_length=4096,
+            gradient_accumulation_steps=8,
+            data_parallel=2,
+            tensor_parallel=8,
+            pipeline_parallel=4,
+            deepspeed_stage=DeepSpeedStage.STAGE1,
+            gradient_checkpointing=True
+        )
+        result = calculator.calculate(request)
+        stages = result.stage_memory_breakdown
+        
+        # 1F1B：第一个stage持有pp个微批次的激活值，最后一个stage只持有1个
+        assert [s["in_flight_microbatches"] for s in stages] == [4, 3, 2, 1]
+        assert sum(s["layers"] for s in stages) == 80
+        assert stages[0]["activations"] == 4 * stages[-1]["activations"]
+        assert result.memory_per_gpu == max(s["total"] for s in stages)
+        assert result.optimal_gpu_count == 64
+        
+        # 不使用张量/流水线并行时单卡需要持有完整模型
+        single = calculator.calculate(request.model_copy(update={"tensor_parallel": 1, "pipeline_parallel": 1}))
+        assert len(single.stage_memory_breakdown) == 1
+        assert single.memory_per_gpu > 8 * result.memory_per_gpu
+        
+        print(f"✅ 3D并行计算成功:")
+        for stage in stages:
+            print(f"   - Stage {stage['stage']}: {stage['total']:.2f} GB/GPU")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 3D并行测试失败: {e}")
+        return False
+
+
+def test_pipeline_schedule():
+    """测试流水线调度模拟"""
+    print("\n🔍 测试流水线调度模拟...")
+    
+    try:
+        from app.models.training import TrainingRequest, TrainingMethod, PipelineSchedule
+        from app.services.calculator.training_calc import TrainingCalculator
+        
+        calculator = TrainingCalculator()
+        request = TrainingRequest(
+            model_id="llama2-7b",
+            training_method=TrainingMethod.FULL_FINETUNING,
+            batch_size=1,
+            sequence_length=2048,
+            gradient_accumulation_steps=8,
+            pipeline_parallel=4
+        )
+        result = calculator.calculate(request)
+        schedule = result.pipeline_schedule
+        
+        # 1F1B气泡率 = (pp - 1) / (m + pp - 1)
+        assert abs(schedule["bubble_fraction"] - 3 / 11) < 1e-9
+        assert [s["in_flight_microbatches"] for s in result.stage_memory_breakdown] == [4, 3, 2, 1]
+        assert schedule["peak_memory_per_stage_gb"] == [s["total"] for s in result.stage_memory_breakdown]
+        
+        # 交错调度气泡率降为 (pp - 1) / (v * m + pp - 1)，但在途激活值更多
+        interleaved = calculator.calculate(request.model_copy(update={
+            "pipeline_schedule": PipelineSchedule.INTERLEAVED_1F1B,
+            "virtual_pipeline_stages": 2
+        }))
+        assert abs(interleaved.pipeline_schedule["bubble_fraction"] - 3 / 19) < 1e-9
+        assert interleaved.memory_per_gpu > result.memory_per_gpu
+        
+        # 时间线：每个stage每个微批次一次前向一次反向，最后一条为汇总
+        events = list(calculator.iter_pipeline_timeline(request))
+        assert len(events) == 4 * 8 * 2 + 1
+        assert events[-1]["type"] == "summary"
+        assert max(e["memory_gb"] for e in events[:-1] if e["stage"] == 0) == schedule["peak_memory_per_stage_gb"][0]
+        
+        print(f"✅ 流水线调度模拟成功:")
+        print(f"   - 1F1B气泡率: {schedule['bubble_fraction']:.2%}")
+        print(f"   - 交错式气泡率: {interleaved.pipeline_schedule['bubble_fraction']:.2%}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 流水线调度测试失败: {e}")
+        return False
+
+
+def test_communication_model():
+    """测试分布式训练通信开销与扩展效率"""
+    print("\n🔍 测试通信开销模型...")
+    
+    try:
+        from app.models.training import TrainingRequest, TrainingMethod, DeepSpeedStage
+        from app.services.calculator.training_calc import TrainingCalculator
+        from app.services.calculator.comm_calc import CommunicationCalculator
+        
+        comm = CommunicationCalculator()
+        specs = comm.get_gpu_specs("A100-80GB")
+        # 8卡以内走NVLink，跨节点走网络
+        assert comm.get_link(specs, 8, 1)["type"] == "nvlink"
+        assert comm.get_link(specs, 4, 4)["type"] == "network"
+        assert comm.get_link(comm.get_gpu_specs("RTX-4090"), 4, 1)["type"] == "pcie"
+        # 小消息树形all-reduce更快，大消息环形更快
+        link = comm.get_link(specs, 16, 8)
+        assert comm.all_reduce(1024, 16, link)["algorithm"] == "tree"
+        assert comm.all_reduce(1e9, 16, link)["algorithm"] == "ring"
+        
+        calculator = TrainingCalculator()
+        request = TrainingRequest(
+            model_id="llama2-7b",
+            training_method=TrainingMethod.FULL_FINETUNING,
+            batch_size=1,
+            sequence_length=2048,
+            data_parallel=64,
+            deepspeed_stage=DeepSpeedStage.STAGE3,
+            gpu_type="A100-80GB"
+        )
+        analysis = calculator.calculate(request).communication_analysis
+        curve = analysis["scaling_curve"]
+        
+        assert [point["num_gpus"] for point in curve] == [2 ** i for i in range(11)]
+        assert curve[0]["scaling_efficiency"] == 1.0
+        # 数据并行组跨节点后扩展效率单调下降
+        efficiencies = [point["scaling_efficiency"] for point in curve]
+        assert all(a >= b for a, b in zip(efficiencies, efficiencies[1:]))
+        assert efficiencies[-1] < efficiencies[3]
+        assert analysis["step_time_s"] >= analysis["compute_time_s"]
+        
+        print(f"✅ 通信开销计算成功:")
+        print(f"   - 步耗时: {analysis['step_time_s']:.2f} s")
+        print(f"   - 64卡扩展效率: {analysis['scaling_efficiency']:.2%}")
+        print(f"   - 1024卡扩展效率: {efficiencies[-1]:.2%}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 通信开销测试失败: {e}")
+        return False
+
+
+def test_flops_throughput():
+    """测试FLOPs计算与训练吞吐预估"""
+    print("\n🔍 测试FLOPs与训练吞吐...")
+    
+    try:
+        from app.models.training import TrainingRequest, TrainingMethod, ActivationRecomputation
+        from app.services.calculator.training_calc import TrainingCalculator
+        
+        calculator = TrainingCalculator()
+        request = TrainingRequest(
+            model_id="llama2-7b",
+            training_method=TrainingMethod.FULL_FINETUNING,
+            batch_size=4,
+            sequence_length=2048,
+            dataset_tokens=1_000_000_000
+        )
+        result = calculator.calculate(request)
+        flops = result.flops_analysis
+        model = calculator.model_registry.get_model_info("llama2-7b")
+        
+        # 除注意力分数外，前向FLOPs约为 2 * (参数量 - 词嵌入参数量)
+        breakdown = flops["forward_breakdown"]
+        dense = flops["forward_flops_per_token"] - breakdown["attention_scores"]
+        expected = 2 * (model.parameters - model.vocab_size * model.hidden_size)
+        assert abs(dense - expected) / expected < 0.01
+        assert flops["model_flops_per_token"] == 3 * flops["forward_flops_per_token"]
+        assert abs(flops["achieved_mfu"] - request.model_flops_utilization) < 1e-9
+        assert result.estimated_time_per_epoch is not None
+        
+        # 梯度检查点重算各层前向，吞吐下降，实际MFU低于设定值
+        checkpointed = calculator.calculate(request.model_copy(update={
+            "gradient_checkpointing": True, "activation_recomputation": ActivationRecomputation.FULL
+        }))
+        recompute = checkpointed.flops_analysis["recompute_flops_per_token"]
+        assert recompute == flops["forward_flops_per_token"] - breakdown["logits"]
+        assert checkpointed.estimated_tokens_per_second < result.estimated_tokens_per_second
+        assert checkpointed.flops_analysis["achieved_mfu"] < request.model_flops_utilization
+        
+        print(f"✅ FLOPs计算成功:")
+        print(f"   - 每token训练FLOPs: {flops['model_flops_per_token'] / 1e9:.1f} GFLOPs")
+        print(f"   - 吞吐: {result.estimated_tokens_per_second:.0f} tokens/s")
+        print(f"   - 10亿token每轮耗时: {result.estimated_time_per_epoch}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ FLOPs测试失败: {e}")
+        return False
+
+
+def test_zero_offload():
+    """测试ZeRO-Offload/ZeRO-Infinity卸载"""
+    print("\n🔍 测试CPU/NVMe卸载...")
+    
+    try:
+        from app.models.training import TrainingRequest, TrainingMethod, DeepSpeedStage, OffloadDevice
+        from app.services.calculator.training_calc import TrainingCalculator
+        
+        calculator = TrainingCalculator()
+        request = TrainingRequest(
+            model_id="llama2-13b",
+            training_method=TrainingMethod.FULL_FINETUNING,
+            batch_size=2,
+            sequence_length=2048,
+            gradient_accumulation_steps=8,
+            data_parallel=4,
+            deepspeed_stage=DeepSpeedStage.STAGE3,
+            gpu_type="RTX-4090"
+        )
+        baseline = calculator.calculate(request)
+        assert baseline.offload_analysis is None
+        
+        cpu = calculator.calculate(request.model_copy(update={
+            "offload_optimizer": OffloadDevice.CPU, "offload_param": OffloadDevice.CPU
+        }))
+        stage = cpu.stage_memory_breakdown[0]
+        assert stage["optimizer_states"] == 0 and stage["gradients"] == 0
+        assert cpu.memory_per_gpu < baseline.memory_per_gpu
+        # 卸载的显存全部进入主机内存，换来更长的步耗时
+        analysis = cpu.offload_analysis
+        assert analysis["host_memory_per_node_gb"] == analysis["host_memory_per_gpu_gb"] * 4
+        assert analysis["nvme_per_node_gb"] == 0
+        assert cpu.communication_analysis["step_time_s"] > baseline.communication_analysis["step_time_s"]
+        
+        nvme = calculator.calculate(request.model_copy(update={
+            "offload_optimizer": OffloadDevice.NVME, "offload_param": OffloadDevice.NVME
+        }))
+        assert nvme.offload_analysis["nvme_per_node_gb"] > 0
+        assert nvme.offload_analysis["host_memory_per_node_gb"] < analysis["host_memory_per_node_gb"]
+        assert nvme.communication_analysis["step_time_s"] > cpu.communication_analysis["step_time_s"]
+        
+        # 参数卸载仅支持ZeRO Stage 3
+        try:
+            TrainingRequest(**{**request.model_dump(), "deepspeed_stage": DeepSpeedStage.STAGE2,
+                               "offload_param": OffloadDevice.CPU})
+            return False
+        except ValueError:
+            pass
+        
+        print(f"✅ 卸载计算成功:")
+        print(f"   - 单卡显存: {baseline.memory_per_gpu:.2f} GB -> {cpu.memory_per_gpu:.2f} GB")
+        print(f"   - 单节点主机内存: {analysis['host_memory_per_node_gb']:.2f} GB")
+        print(f"   - 卸载步耗时开销: {analysis['exposed_s']:.2f} s")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 卸载测试失败: {e}")
+        return False
+
+
+def test_precision_policy():
+    """测试混合精度策略与ZeRO分片"""
+    print("\n🔍 测试混合精度策略...")
+    
+    try:
+        from app.models.training import (TrainingRequest, TrainingMethod, DeepSpeedStage,
+                                         OptimizerType, PrecisionPolicy)
+        from app.models.common import PrecisionType
+        from app.services.calculator.training_calc import TrainingCalculator
+        
+        calculator = TrainingCalculator()
+        request = TrainingRequest(
+            model_id="llama2-7b",
+            training_method=TrainingMethod.FULL_FINETUNING,
+            precision=PrecisionType.BF16,
+            batch_size=1,
+            sequence_length=512
+        )
+        parameters = calculator.get_total_parameters(calculator._get_model_info(request))
+        
+        def bytes_per_param(result):
+            stage = result.stage_memory_breakdown[0]
+            states = (stage["model_weights"] + stage["master_weights"] +
+                      stage["gradients"] + stage["optimizer_states"])
+            return states * 1024 ** 3 / parameters
+        
+        # BF16混合精度AdamW：2(权重) + 2(梯度) + 4(FP32主权重) + 8(FP32动量) = 16字节/参数
+        single = calculator.calculate(request)
+        assert abs(bytes_per_param(single) - 16) < 1e-6
+        
+        # 每个状态只按ZeRO分片一次：Stage 3下8卡为2字节/参数，Stage 1为 2 + 2 + 12/8
+        zero3 = calculator.calculate(request.model_copy(update={
+            "data_parallel": 8, "deepspeed_stage": DeepSpeedStage.STAGE3
+        }))
+        assert abs(bytes_per_param(zero3) - 2) < 1e-6
+        zero1 = calculator.calculate(request.model_copy(update={
+            "data_parallel": 8, "deepspeed_stage": DeepSpeedStage.STAGE1
+        }))
+        assert abs(bytes_per_param(zero1) - 5.5) < 1e-6
+        
+        # 8-bit优化器状态约1字节/状态
+        adam8bit = calculator.calculate(request.model_copy(update={"optimizer": OptimizerType.ADAMW_8BIT}))
+        assert abs(bytes_per_param(adam8bit) - 10) < 0.01
+        
+        # 分页优化器的状态可换出到主机内存
+        paged = calculator.calculate(request.model_copy(update={"optimizer": OptimizerType.PAGED_ADAMW_8BIT}))
+        assert paged.memory_per_gpu < adam8bit.memory_per_gpu
+        assert paged.offload_analysis["host_memory_per_gpu_gb"] > 0
+        
+        # 纯BF16训练：不保留主权重，BF16优化器状态
+        pure_bf16 = calculator.calculate(request.model_copy(update={
+            "precision_policy": PrecisionPolicy(master_weights=False, optimizer_state_dtype="bf16")
+        }))
+        assert abs(bytes_per_param(pure_bf16) - 8) < 1e-6
+        
+        print(f"✅ 混合精度策略计算成功:")
+        print(f"   - BF16 AdamW: {bytes_per_param(single):.1f} 字节/参数")
+        print(f"   - ZeRO-3 8卡: {bytes_per_param(zero3):.1f} 字节/参数")
+        print(f"   - 8-bit AdamW: {bytes_per_param(adam8bit):.1f} 字节/参数")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 混合精度策略测试失败: {e}")
+        return False
+
+
+def test_adapter_methods():
+    """测试QLoRA、DoRA和AdaLoRA训练方法"""
+    print("\n🔍 测试LoRA系列训练方法...")
+    
+    try:
+        from app.models.training import (TrainingRequest, TrainingMethod, LoRAConfig,
+                                         OptimizerType)
+        from app.models.common import PrecisionType
+        from app.services.calculator.training_calc import TrainingCalculator
+        
+        calculator = TrainingCalculator()
+        adapter = calculator.adapter_calculator
+        model = calculator.model_registry.get_model_info("llama2-70b")
+        
+        # LoRA参数按真实投影形状计算：K/V投影按8个KV头，MLP按中间层维度
+        config = LoRAConfig(rank=16, target_modules="all-linear")
+        shapes = adapter.get_linear_shapes(model)
+        assert shapes["k_proj"] == (8192, 1024)
+        expected = 80 * 16 * sum(i + o for i, o in shapes.values())
+        assert adapter.calculate_parameters(model, TrainingMethod.LORA, config)["total"] == expected
+        
+        # DoRA增加每个目标矩阵输出维度的幅值向量，AdaLoRA按init_rank分配并保存奇异值
+        dora = adapter.calculate_parameters(model, TrainingMethod.DORA, config)
+        assert dora["magnitude"] == 80 * sum(o for _, o in shapes.values())
+        adalora = adapter.calculate_parameters(model, TrainingMethod.ADALORA, config)
+        assert adalora["lora"] == expected * 24 // 16
+        
+        # QLoRA：70B模型单张80GB显卡可微调，双重量化约0.516字节/参数
+        request = TrainingRequest(
+            model_id="llama2-70b",
+            training_method=TrainingMethod.QLORA,
+            precision=PrecisionType.BF16,
+            batch_size=1,
+            sequence_length=512,
+            gradient_checkpointing=True,
+            optimizer=OptimizerType.PAGED_ADAMW_8BIT,
+            lora_config=config
+        )
+        qlora = calculator.calculate(request)
+        assert abs(adapter.get_quantized_bytes_per_param(config) - 0.5161) < 1e-3
+        assert qlora.memory_per_gpu < 80
+        assert qlora.communication_analysis["dequantize_time_s"] > 0
+        
+        lora = calculator.calculate(request.model_copy(update={"training_method": TrainingMethod.LORA}))
+        assert lora.model_memory_gb > 3 * qlora.model_memory_gb
+        assert lora.estimated_tokens_per_second > qlora.estimated_tokens_per_second
+        
+        # DoRA的合并权重范数增加前向计算量
+        dora_result = calculator.calculate(request.model_copy(update={"training_method": TrainingMethod.DORA}))
+        assert (dora_result.flops_analysis["forward_flops_per_token"] >
+                lora.flops_analysis["forward_flops_per_token"])
+        
+        print(f"✅ LoRA系列训练方法计算成功:")
+        print(f"   - 70B QLoRA单卡显存: {qlora.memory_per_gpu:.1f} GB")
+        print(f"   - 70B LoRA单卡显存: {lora.memory_per_gpu:.1f} GB")
+        print(f"   - 适配器参数: {qlora.adapter_analysis['adapter_parameters']['total'] / 1e6:.1f}M")
+        
+        return True
+    except Exception as e:
+        print(f"❌ LoRA系列训练方法测试失败: {e}")
+        return False
+
+
+def test_activation_recomputation():
+    """测试逐层激活值与选择性重计算"""
+    print("\n🔍 测试激活值与重计算...")
+    
+    try:
+        from app.models.training import TrainingRequest, TrainingMethod, ActivationRecomputation
+        from app.models.common import ModelInfo, PrecisionType
+        from app.services.calculator.training_calc import TrainingCalculator
+        
+        # GPT式模型：多头注意力、非门控MLP、I = 4h，与Megatron论文的设定一致
+        s, b, h, a, layers = 2048, 1, 4096, 32, 32
+        model = ModelInfo(
+            id="gpt-7b", name="GPT 7B", family="gpt", parameters=6_700_000_000,
+            hidden_size=h, num_layers=layers, num_heads=a, num_key_value_heads=a,
+            intermediate_size=4 * h, vocab_size=51200, context_length=2048,
+            architecture="chatglm", precision=PrecisionType.FP16, size_category="medium"
+        )
+        request = TrainingRequest(
+            custom_model=model,
+            training_method=TrainingMethod.FULL_FINETUNING,
+            batch_size=b,
+            sequence_length=s,
+            hidden_dropout=0.1,
+            attention_dropout=0.1
+        )
+        calculator = TrainingCalculator()
+        activation = calculator.activation_calculator
+        
+        # 每层 sbh(34 + 5as/h)，张量并行 + 序列并行时全部除以t
+        expected = s * b * h * (34 + 5 * a * s / h)
+        assert abs(activation.calculate(model, request) - expected * layers) < 1
+        tp_sp = request.model_copy(update={"tensor_parallel": 8, "sequence_parallel": True})
+        assert abs(activation.calculate(model, tp_sp) - expected * layers / 8) < 1
+        
+        # 选择性重计算去掉注意力分数，只剩34sbh；完全重计算只保存每层输入2sbh加一层工作区
+        selective = activation.calculate(model, request, ActivationRecomputation.SELECTIVE)
+        assert abs(selective - 34 * s * b * h * layers) < 1
+        full = activation.calculate(model, request, ActivationRecomputation.FULL)
+        assert abs(full - (2 * s * b * h * layers + expected)) < 1
+        
+        # 重计算开销：选择性只重算注意力分数，远小于完全重计算
+        result = calculator.calculate(request.model_copy(update={
+            "activation_recomputation": ActivationRecomputation.SELECTIVE
+        }))
+        modes = result.activation_analysis["modes"]
+        assert modes["none"]["memory_gb"] > modes["selective"]["memory_gb"] > modes["full"]["memory_gb"]
+        assert 1 < modes["selective"]["relative_compute"] < modes["full"]["relative_compute"]
+        assert (result.flops_analysis["recompute_flops_per_token"] ==
+                result.flops_analysis["forward_breakdown"]["attention_scores"])
+        
+        print(f"✅ 激活值计算成功:")
+        for name, mode in modes.items():
+            print(f"   - {name}: {mode['memory_gb']:.2f} GB, 计算量 x{mode['relative_compute']:.3f}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 激活值测试失败: {e}")
+        return False
+
+
+def test_context_parallel():
+    """测试上下文并行（Ring Attention / Ulysses）"""
+    print("\n🔍 测试上下文并行...")
+    
+    try:
+        from app.models.training import TrainingRequest, TrainingMethod
+        from app.models.inference import InferenceRequest, InferenceBackend
+        from app.models.common import ContextParallelMethod
+        from app.services.calculator.training_calc import TrainingCalculator
+        from app.services.calculator.inference_calc import InferenceCalculator
+        
+        calculator = TrainingCalculator()
+        request = TrainingRequest(
+            model_id="llama-7b",
+            training_method=TrainingMethod.FULL_FINETUNING,
+            batch_size=1,
+            sequence_length=131072,
+            gradient_checkpointing=True,
+            deepspeed_stage="stage3"
+        )
+        ring = request.model_copy(update={"context_parallel": 8})
+        model = calculator._get_model_info(request)
+        
+        # 每个rank只保存s/cp个token的激活值，注意力分数为本地查询对完整序列，整体恰好除以cp
+        activation = calculator.activation_calculator
+        assert abs(activation.calculate(model, ring) - activation.calculate(model, request) / 8) < 1
+        
+        baseline = calculator.calculate(request)
+        result = calculator.calculate(ring)
+        comm = result.communication_analysis
+        assert result.optimal_gpu_count == 8 and comm["num_gpus"] == 8
+        assert result.memory_breakdown["activations"] < baseline.memory_breakdown["activations"] / 4
+        assert comm["context_parallel_comm_s"] > 0
+        assert comm["context_parallel_exposed_s"] <= comm["context_parallel_comm_s"]
+        
+        # Ulysses的all-to-all不可掩盖，且要求头数能被 tp * cp 整除
+        ulysses = calculator.calculate(ring.model_copy(update={
+            "context_parallel_method": ContextParallelMethod.ULYSSES
+        }))
+        ulysses_comm = ulysses.communication_analysis
+        assert ulysses_comm["context_parallel_exposed_s"] == ulysses_comm["context_parallel_comm_s"]
+        try:
+            calculator.calculate(ring.model_copy(update={
+                "context_parallel": 64, "context_parallel_method": ContextParallelMethod.ULYSSES
+            }))
+            assert False, "头数不能被 tp * cp 整除时应报错"
+        except ValueError:
+            pass
+        
+        # 推理：Ring按序列、Ulysses按KV头切分，单卡KV block都缩小为1/cp
+        inference = InferenceCalculator()
+        base_request = InferenceRequest(
+            model_id="llama-7b",
+            backend=InferenceBackend.VLLM,
+            max_batch_size=1,
+            max_sequence_length=131072,
+            max_new_tokens=1024,
+            gpu_type="A100-80GB"
+        )
+        base = inference.calculate(base_request)
+        cp_result = inference.calculate(base_request.model_copy(update={"context_parallel": 4}))
+        ulysses_result = inference.calculate(base_request.model_copy(update={
+            "context_parallel": 4, "context_parallel_method": ContextParallelMethod.ULYSSES
+        }))
+        assert abs(cp_result.kv_cache_blocks["block_bytes"] * 4 - base.kv_cache_blocks["block_bytes"]) < 1
+        assert ulysses_result.kv_cache_blocks["block_bytes"] == cp_result.kv_cache_blocks["block_bytes"]
+        assert cp_result.optimal_gpu_count == 4
+        assert cp_result.decode_analysis["context_parallel_combine_ms"] > 0
+        
+        print(f"✅ 上下文并行计算成功:")
+        print(f"   - 128k训练激活值: {baseline.memory_breakdown['activations']:.2f} GB -> "
+              f"{result.memory_breakdown['activations']:.2f} GB (cp=8)")
+        print(f"   - Ring通信: {comm['context_parallel_comm_s'] * 1000:.1f} ms, "
+              f"未掩盖 {comm['context_parallel_exposed_s'] * 1000:.1f} ms")
+        print(f"   - Ulysses通信: {ulysses_comm['context_parallel_comm_s'] * 1000:.1f} ms")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 上下文并行测试失败: {e}")
+        return False
+
+
+def test_attention_kernels():
+    """测试各注意力内核的显存模型"""
+    print("\n🔍 测试注意力内核显存...")
+    
+    try:
+        from app.models.training import TrainingRequest, TrainingMethod, AccelerationMethod
+        from app.models.inference import InferenceRequest, InferenceBackend
+        from app.models.common import AttentionKernel
+        from app.services.calculator.training_calc import TrainingCalculator
+        from app.services.calculator.inference_calc import InferenceCalculator
+        
+        calculator = TrainingCalculator()
+        activation = calculator.activation_calculator
+        request = TrainingRequest(
+            model_id="llama2-70b",
+            training_method=TrainingMethod.FULL_FINETUNING,
+            batch_size=1,
+            sequence_length=8192,
+            tensor_parallel=8
+        )
+        model = calculator._get_model_info(request)
+        layers = {
+            method: activation.calculate_layer_breakdown(
+                model, request.model_copy(update={"acceleration_method": method})
+            )
+            for method in AccelerationMethod
+        }
+        
+        # eager保存 a/t * s² * 2字节的softmax输出；FA2/SDPA不保存分数，只有 a/t * s * 4字节的log-sum-exp
+        heads = model.num_heads / 8
+        assert layers[AccelerationMethod.NONE]["attention_scores"] == 2 * heads * 8192 * 8192
+        assert layers[AccelerationMethod.NONE]["softmax_stats"] == 0
+        for method in (AccelerationMethod.SDPA, AccelerationMethod.FLASH_ATTENTION_2):
+            assert layers[method]["attention_scores"] == 0
+            assert layers[method]["softmax_stats"] == 4 * heads * 8192
+        # GQA：SDPA需repeat_kv复制K/V，FA2原生分组计算
+        assert (layers[AccelerationMethod.SDPA]["attention_projections"] >
+                layers[AccelerationMethod.FLASH_ATTENTION_2]["attention_projections"])
+        # Unsloth的融合SwiGLU只保存gate和up
+        assert layers[AccelerationMethod.UNSLOTH]["mlp"] < layers[AccelerationMethod.FLASH_ATTENTION_2]["mlp"]
+        
+        # 推理：eager激活值随序列长度平方增长，FA2线性增长
+        inference = InferenceCalculator()
+        def inference_activation(kernel, length):
+            return inference.calculate(InferenceRequest(
+                model_id="llama-7b", backend=InferenceBackend.TRANSFORMERS,
+                max_sequence_length=length, attention_kernel=kernel
+            )).activation_memory_gb
+        eager_ratio = inference_activation(AttentionKernel.EAGER, 16384) / inference_activation(AttentionKernel.EAGER, 4096)
+        flash_ratio = (inference_activation(AttentionKernel.FLASH_ATTENTION_2, 16384) /
+                       inference_activation(AttentionKernel.FLASH_ATTENTION_2, 4096))
+        assert eager_ratio > 10 and abs(flash_ratio - 4) < 0.01
+        assert InferenceRequest(model_id="llama-7b", backend=InferenceBackend.VLLM,
+                                max_sequence_length=2048).attention_kernel == AttentionKernel.FLASH_ATTENTION_2
+        
+        print(f"✅ 注意力内核显存计算成功:")
+        for method, layer in layers.items():
+            print(f"   - {method.value}: 每层 {sum(layer.values()) / 1024 ** 3:.2f} GB")
+        print(f"   - 推理激活值 4k -> 16k: eager x{eager_ratio:.1f}, FA2 x{flash_ratio:.1f}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 注意力内核测试失败: {e}")
+        return False
+
+
+def test_moe_expert_parallel():
+    """测试混合专家模型与专家并行"""
+    print("\n🔍 测试MoE与专家并行...")
+    
+    try:
+        from app.models.training import TrainingRequest, TrainingMethod
+        from app.models.inference import InferenceRequest, InferenceBackend
+        from app.services.calculator.training_calc import TrainingCalculator
+        from app.services.calculator.inference_calc import InferenceCalculator
+        
+        calculator = TrainingCalculator()
+        request = TrainingRequest(
+            model_id="mixtral-8x7b",
+            training_method=TrainingMethod.FULL_FINETUNING,
+            batch_size=1,
+            sequence_length=4096,
+            gradient_checkpointing=True,
+            data_parallel=8
+        )
+        model = calculator._get_model_info(request)
+        
+        # Mixtral总参数约46.7B，每token激活2个专家约12.9B
+        active = calculator.get_active_parameters(model)
+        assert 12.0e9 < active < 13.5e9
+        
+        baseline = calculator.calculate(request)
+        result = calculator.calculate(request.model_copy(update={"expert_parallel": 8}))
+        assert result.memory_per_gpu < baseline.memory_per_gpu / 2
+        assert result.communication_analysis["expert_parallel_comm_s"] > 0
+        assert baseline.communication_analysis["expert_parallel_comm_s"] == 0
+        assert result.moe_analysis["experts_per_gpu"] == 1
+        
+        # 专家并行度必须能均分专家
+        try:
+            calculator.calculate(request.model_copy(update={"expert_parallel": 16, "data_parallel": 16}))
+            assert False, "专家数不能被专家并行度整除时应报错"
+        except ValueError:
+            pass
+        
+        # 小批次解码只读取被路由到的专家
+        inference = InferenceCalculator()
+        decode = inference.calculate(InferenceRequest(
+            model_id="qwen1.5-moe-a2.7b",
+            backend=InferenceBackend.VLLM,
+            max_batch_size=1,
+            max_sequence_length=2048,
+            max_new_tokens=256
+        ))
+        moe = decode.moe_analysis
+        assert decode.decode_analysis["weight_bytes_per_step_gb"] < decode.model_memory_gb / 2
+        assert moe["active_ratio"] < 0.3
+        
+        print(f"✅ MoE计算成功:")
+        print(f"   - Mixtral激活参数: {active / 1e9:.1f}B / {model.parameters / 1e9:.1f}B")
+        print(f"   - 单卡显存: {baseline.memory_per_gpu:.1f} GB -> {result.memory_per_gpu:.1f} GB (ep=8)")
+        print(f"   - 专家并行all-to-all: {result.communication_analysis['expert_parallel_comm_s'] * 1000:.1f} ms")
+        
+        return True
+    except Exception as e:
+        print(f"❌ MoE测试失败: {e}")
+        return False
+
+
+def test_architecture_parameters():
+    """测试按模型结构统计的参数量"""
+    print("\n🔍 测试模型结构参数量...")
+    
+    try:
+        from app.services.model_registry import ModelRegistry
+        from app.services.calculator.base_calc import BaseCalculator
+        from app.services.calculator.flops_calc import FlopsCalculator
+        from app.services.calculator.architecture_calc import count_parameters
+        
+        registry = ModelRegistry()
+        calculator = BaseCalculator()
+        
+        # 与HuggingFace模型的实际参数量逐个参数一致
+        expected = {
+            "llama2-7b": 6738415616,       # 门控MLP，未共享LM head
+            "qwen2-7b": 7615616512,        # GQA + QKV偏置
+            "mixtral-8x7b": 46702792704,   # 8个路由专家 + 路由门控
+            "chatglm-6b": 6173286400       # LayerNorm + 线性层偏置 + 共享LM head
+        }
+        for model_id, parameters in expected.items():
+            model = registry.get_model_info(model_id)
+            assert calculator.get_total_parameters(model) == parameters, model_id
+            assert model.parameters == parameters
+        
+        # 共享LM head少一份词嵌入
+        llama = registry.get_model_info("llama2-7b")
+        tied = llama.model_copy(update={"tie_word_embeddings": True})
+        breakdown = calculator.get_parameter_breakdown(llama)
+        assert calculator.get_total_parameters(llama) - calculator.get_total_parameters(tied) == breakdown["embedding"]
+        
+        # 结构相同的模型复用缓存结果
+        hits = count_parameters.cache_info().hits
+        calculator.get_total_parameters(registry.get_model_info("llama-7b"))
+        assert count_parameters.cache_info().hits > hits
+        
+        # FLOPs按组成部分参数量计算
+        forward = FlopsCalculator().calculate_forward_flops(llama, 4096)
+        assert forward["mlp"] == 2 * breakdown["mlp"]
+        assert forward["attention_projections"] == 2 * breakdown["attention"]
+        
+        print(f"✅ 模型结构参数量计算成功:")
+        for model_id in expected:
+            print(f"   - {model_id}: {registry.get_model_info(model_id).parameters / 1e9:.2f}B")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 模型结构参数量测试失败: {e}")
+        return False
+
+
+def test_logits_memory():
+    """测试logits与交叉熵损失显存"""
+    print("\n🔍 测试logits与交叉熵显存...")
+    
+    try:
+        from app.models.training import TrainingRequest, TrainingMethod, CrossEntropyMethod, AccelerationMethod
+        from app.services.calculator.training_calc import TrainingCalculator
+        
+        calculator = TrainingCalculator()
+        request = TrainingRequest(
+            model_id="qwen2-7b",
+            training_method=TrainingMethod.FULL_FINETUNING,
+            precision="bf16",
+            batch_size=1,
+            sequence_length=8192
+        )
+        model = calculator._get_model_info(request)
+        result = calculator.calculate(request)
+        
+        # standard：BF16 logits + FP32副本 + FP32 log_softmax + FP32梯度 = 14字节 * T * V
+        tokens_vocab = 8192 * model.vocab_size
+        breakdown = calculator.logits_calculator.calculate_breakdown(model, request)
+        assert sum(breakdown.values()) == 14 * tokens_vocab
+        assert result.memory_breakdown["logits"] > 15
+        assert result.stage_memory_breakdown[-1]["logits"] == result.memory_breakdown["logits"]
+        
+        # 分块与融合交叉熵依次减少显存
+        modes = result.logits_analysis["modes"]
+        assert modes["fused_linear"] < modes["chunked"] < modes["standard"] / 4
+        fused = calculator.calculate(request.model_copy(update={"cross_entropy": CrossEntropyMethod.FUSED_LINEAR}))
+        assert fused.memory_per_gpu < result.memory_per_gpu - 10
+        
+        # 张量并行按词表切分logits
+        tp = request.model_copy(update={"tensor_parallel": 4})
+        assert abs(calculator.logits_calculator.calculate(model, tp) * 4 -
+                   calculator.logits_calculator.calculate(model, request)) < 1
+        
+        # Unsloth默认使用分块交叉熵
+        unsloth = TrainingRequest(model_id="qwen2-7b", training_method=TrainingMethod.LORA,
+                                  batch_size=1, sequence_length=2048,
+                                  acceleration_method=AccelerationMethod.UNSLOTH)
+        assert unsloth.cross_entropy == CrossEntropyMethod.CHUNKED
+        
+        print(f"✅ logits与交叉熵显存计算成功:")
+        for method, memory in modes.items():
+            print(f"   - {method}: {memory:.2f} GB")
+        
+        return True
+    except Exception as e:
+        print(f"❌ logits与交叉熵显存测试失败: {e}")
+        return False
+
+
+def test_hf_config_import():
+    """测试HuggingFace config.json离线导入"""
+    print("\n🔍 测试HuggingFace配置导入...")
+    
+    try:
+        import json
+        import tempfile
+        from pathlib import Path
+        from app.config import BACKEND_DIR
+        from app.services.hf_config_importer import HFConfigImporter
+        
+        # 默认缓存目录按后端根目录解析，与工作目录无关
+        assert HFConfigImporter().cache_dir.is_relative_to(BACKEND_DIR)
+        
+        configs = {
+            "meta-llama/Llama-2-7b-hf": ({
+                "model_type": "llama", "hidden_size": 4096, "intermediate_size": 11008,
+                "num_attention_heads": 32, "num_hidden_layers": 32, "num_key_value_heads": 32,
+                "max_position_embeddings": 4096, "vocab_size": 32000, "torch_dtype": "float16",
+                "_name_or_path": "Llama-2-7b-hf"
+            }, 6738415616),
+            "Qwen/Qwen2-7B": ({
+                "model_type": "qwen2", "hidden_size": 3584, "intermediate_size": 18944,
+                "num_attention_heads": 28, "num_hidden_layers": 28, "num_key_value_heads": 4,
+                "max_position_embeddings": 131072, "vocab_size": 152064, "torch_dtype": "bfloat16"
+            }, 7615616512),
+            "THUDM/chatglm2-6b": ({
+                "model_type": "chatglm", "hidden_size": 4096, "ffn_hidden_size": 13696,
+                "num_attention_heads": 32, "num_layers": 28, "kv_channels": 128,
+                "multi_query_attention": True, "multi_query_group_num": 2, "add_qkv_bias": True,
+                "padded_vocab_size": 65024, "seq_length": 32768
+            }, 6243584000),
+            "google/bert-base": ({"model_type": "bert", "hidden_size": 768}, None),
+            "broken/array": ([1, 2], None)
+        }
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "models"
+            for model_id, (config, _) in configs.items():
+                (root / model_id).mkdir(parents=True)
+                (root / model_id / "config.json").write_text(json.dumps(config))
+            
+            importer = HFConfigImporter(Path(tmp) / "cache", max_workers=2)
+            importer.PROCESS_POOL_MIN_FILES = 1
+            result = importer.import_path(root)
+            models = {model.id: model for model in result["models"]}
+            assert result["parsed"] == 5 and result["cache_hits"] == 0
+            for model_id, (_, parameters) in configs.items():
+                if parameters:
+                    assert models[model_id].parameters == parameters, model_id
+            assert models["Qwen/Qwen2-7B"].num_key_value_heads == 4
+            assert models["THUDM/chatglm2-6b"].architecture == "chatglm2"
+            # 名称取_name_or_path，缺失时为模型ID（命中缓存时相同）
+            assert models["meta-llama/Llama-2-7b-hf"].name == "Llama-2-7b-hf"
+            assert models["Qwen/Qwen2-7B"].name == "Qwen/Qwen2-7B"
+            # 无法解析的文件（不支持的model_type、顶层不是对象）逐个报告，不影响其他文件
+            errors = sorted(error["error"] for error in result["errors"])
+            assert len(errors) == 2 and "list" in errors[0] and "bert" in errors[1], errors
+            
+            # 重复导入全部命中缓存，修改的文件重新解析
+            cached = importer.import_path(root)
+            assert cached["cache_hits"] == 5
+            assert {m.id: m.name for m in cached["models"]} == {m.id: m.name for m in result["models"]}
+            config = dict(configs["Qwen/Qwen2-7B"][0], num_hidden_layers=14)
+            (root / "Qwen/Qwen2-7B/config.json").write_text(json.dumps(config))
+            result = importer.import_path(root)
+            assert result["parsed"] == 1 and result["cache_hits"] == 4
+        
+        print(f"✅ HuggingFace配置导入成功:")
+        for model_id, (_, parameters) in configs.items():
+            if parameters:
+                print(f"   - {model_id}: {parameters / 1e9:.2f}B")
+        
+        return True
+    except Exception as e:
+        print(f"❌ HuggingFace配置导入测试失败: {e}")
+        return False
+
+
+def test_model_catalog():
+    """测试持久化模型目录"""
+    print("\n🔍 测试模型目录...")
+    
+    try:
+        import json
+        import os
+        import tempfile
+        from pathlib import Path
+        from app.models.common import ModelSize
+        from app.services.calculator.inference_calc import InferenceCalculator
+        from app.services.model_catalog import ModelCatalog, SEED_FILE
+        from app.services.model_registry import ModelRegistry
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "catalog.sqlite3"
+            registry = ModelRegistry(str(path))
+            builtin_count = len(registry.get_all_models())
+            assert builtin_count >= 17
+            
+            # 注册的模型写入数据库，重新打开后仍然存在；参数量按结构计算
+            custom = registry.get_model_info("llama2-7b").model_copy(update={
+                "id": "my-llama", "name": "My LLaMA", "family": "custom", "parameters": None
+            })
+            registry.register_custom_model(custom)
+            reopened = ModelCatalog(path)
+            assert reopened.get("my-llama").parameters == 6738415616
+            assert reopened.count() == builtin_count + 1
+            try:
+                registry.register_custom_model(custom)
+                assert False, "重复注册应报错"
+            except ValueError:
+                pass
+            
+            # 系列、规模、架构、参数量范围按索引查询
+            assert [m.id for m in registry.get_models_by_family("custom")] == ["my-llama"]
+            assert all(m.size_category == ModelSize.XLARGE for m in registry.get_models_by_size(ModelSize.XLARGE))
+            assert {m.id for m in registry.get_models_by_architecture("mixtral")} == {"mixtral-8x7b"}
+            mid_size = registry.get_models_by_parameters(6e9, 8e9)
+            assert mid_size and all(6e9 <= m.parameters <= 8e9 for m in mid_size)
+            plan = reopened._connection.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM models WHERE family = ?", ("custom",)
+            ).fetchall()
+            assert "idx_models_family" in plan[0][3]
+            
+            registry.update_model("my-llama", custom.model_copy(update={"context_length": 8192}))
+            assert ModelCatalog(path).get("my-llama").context_length == 8192
+            # 改名为已存在的ID时不覆盖其他模型
+            try:
+                registry.update_model("my-llama", custom.model_copy(update={"id": "llama2-7b"}))
+                raise AssertionError("改名为已存在的模型ID应当失败")
+            except ValueError:
+                pass
+            assert registry.get_model_info("llama2-7b").family != "custom"
+            
+            # 覆盖内置模型后内置定义文件变化：重新导入不覆盖用户的定义，其余内置模型更新
+            registry.update_model("llama2-7b", registry.get_model_info("llama2-7b").model_copy(
+                update={"name": "My Llama 2"}))
+            seed = json.loads(SEED_FILE.read_text(encoding="utf-8"))
+            for entry in seed:
+                entry["name"] = entry["name"] + " (v2)"
+            seed_file = Path(tmp) / "models.json"
+            seed_file.write_text(json.dumps(seed), encoding="utf-8")
+            reseeded = ModelCatalog(path, seed_file=seed_file)
+            assert reseeded.get("llama2-7b").name == "My Llama 2"
+            other = next(entry["id"] for entry in seed if entry["id"] != "llama2-7b")
+            assert reseeded.get(other).name.endswith(" (v2)")
+            registry.remove_model("my-llama")
+            assert not ModelCatalog(path).contains("my-llama")
+            
+            # 默认使用内存目录：在任意工作目录创建计算器都不产生数据库文件
+            cwd = os.getcwd()
+            try:
+                os.chdir(tmp)
+                InferenceCalculator()
+                assert not (Path(tmp) / ".cache").exists()
+            finally:
+                os.chdir(cwd)
+        
+        print(f"✅ 模型目录测试成功:")
+        print(f"   - 内置模型: {builtin_count}")
+        print(f"   - 7B-8B参数模型: {len(mid_size)}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 模型目录测试失败: {e}")
+        return False
+
+
+def test_model_search_api():
+    """测试模型搜索API"""
+    print("\n🔍 测试模型搜索API...")
+    
+    try:
+        import tempfile
+        from pathlib import Path
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.api.deps import get_model_registry
+        from app.services.model_registry import ModelRegistry
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            registry = ModelRegistry(str(Path(tmp) / "catalog.sqlite3"))
+            base = registry.get_model_info("llama2-7b")
+            registry._catalog.upsert_many([
+                base.model_copy(update={
+                    "id": f"org{i % 10}/synthetic-{i}", "name": f"Synthetic {i}",
+                    "family": f"family{i % 20}", "context_length": 4096 * (1 + i // 20 % 4)
+                })
+                for i in range(10000)
+            ])
+            app.dependency_overrides[get_model_registry] = lambda: registry
+            client = TestClient(app)
+            
+            # 前缀搜索：完全匹配排在最前，翻页不重复不遗漏
+            response = client.get("/api/v1/models", params={"q": "llama2", "limit": 2})
+            assert response.status_code == 200
+            first_page = response.json()
+            assert first_page["total"] == 3 and first_page["next_cursor"]
+            second_page = client.get("/api/v1/models", params={
+                "q": "llama2", "limit": 2, "cursor": first_page["next_cursor"]
+            }).json()
+            ids = [item["id"] for item in first_page["items"] + second_page["items"]]
+            assert sorted(ids) == ["llama2-13b", "llama2-70b", "llama2-7b"]
+            assert second_page["next_cursor"] is None
+            exact = client.get("/api/v1/models", params={"q": "Mixtral 8x7B"}).json()
+            assert exact["items"][0]["id"] == "mixtral-8x7b" and exact["items"][0]["score"] == 3.0
+            
+            # 拼写错误时模糊匹配
+            fuzzy = client.get("/api/v1/models", params={"q": "mixtrl"}).json()
+            assert fuzzy["items"][0]["id"] == "mixtral-8x7b" and fuzzy["items"][0]["score"] < 1
+            
+            # 过滤条件与分页遍历
+            params = {"family": "family3", "min_context_length": 8192, "max_context_length": 12288, "limit": 100}
+            seen, cursor = [], None
+            while True:
+                page = client.get("/api/v1/models", params=dict(params, cursor=cursor) if cursor else params).json()
+                seen.extend(page["items"])
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+            assert len(seen) == page["total"] == len({item["id"] for item in seen}) == 250
+            assert all(8192 <= item["context_length"] <= 12288 for item in seen)
+            
+            # 字段裁剪：非摘要字段从目录读取完整模型
+            projected = client.get("/api/v1/models", params={"q": "qwen2-7b", "fields": "id,num_key_value_heads"}).json()
+            assert projected["items"][0] == {"id": "qwen2-7b", "num_key_value_heads": 4}
+            assert client.get("/api/v1/models", params={"fields": "unknown"}).status_code == 400
+            assert client.get("/api/v1/models", params={"cursor": "!!"}).status_code == 400
+            
+            # ETag：目录未变化时返回304，写入后失效
+            etag = response.headers["etag"]
+            cached = client.get("/api/v1/models", params={"q": "llama2", "limit": 2},
+                                headers={"If-None-Match": etag})
+            assert cached.status_code == 304
+            registry.remove_model("org0/synthetic-0")
+            refreshed = client.get("/api/v1/models", params={"q": "llama2", "limit": 2},
+                                   headers={"If-None-Match": etag})
+            assert refreshed.status_code == 200 and refreshed.headers["etag"] != etag
+            
+            assert client.get("/api/v1/models/org1/synthetic-1").json()["name"] == "Synthetic 1"
+            assert client.get("/api/v1/models/missing").status_code == 404
+            app.dependency_overrides.clear()
+        
+        print(f"✅ 模型搜索API测试成功:")
+        print(f"   - 目录模型数: {len(registry.get_all_models())}")
+        print(f"   - 模糊匹配: mixtrl -> {fuzzy['items'][0]['id']} ({fuzzy['items'][0]['score']})")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 模型搜索API测试失败: {e}")
+        return False
+
+
+def test_conditional_caching():
+    """测试只读端点的ETag条件缓存"""
+    print("\n🔍 测试条件缓存...")
+    
+    try:
+        import tempfile
+        from pathlib import Path
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.api.deps import get_model_registry
+        from app.api.caching import etag_matches
+        from app.api.v1.endpoints.training import TRAINING_CONFIGS
+        from app.services.model_registry import ModelRegistry
+        
+        # 不压缩时返回原始的强ETag（压缩后的ETag见test_response_compression）
+        client = TestClient(app, headers={"Accept-Encoding": "identity"})
+        
+        # 静态配置：强ETag、可缓存，重复请求返回不带响应体的304
+        for url in ("/api/v1/training/configs", "/api/v1/inference/backends", "/api/v1/hardware/gpus"):
+            response = client.get(url)
+            etag = response.headers["etag"]
+            assert response.status_code == 200 and etag.startswith('"')
+            assert "max-age" in response.headers["cache-control"]
+            cached = client.get(url, headers={"If-None-Match": f'"other", W/{etag}'})
+            assert cached.status_code == 304 and cached.content == b""
+            assert cached.headers["etag"] == etag
+        assert client.get("/api/v1/training/configs").json() == TRAINING_CONFIGS
+        # 每个请求枚举的全部取值都在配置选项中
+        from app.models.common import ContextParallelMethod
+        from app.models.training import AccelerationMethod, CrossEntropyMethod
+        for key, enum in (("acceleration_methods", AccelerationMethod), ("cross_entropy_methods", CrossEntropyMethod),
+                          ("context_parallel_methods", ContextParallelMethod)):
+            assert [option["id"] for option in TRAINING_CONFIGS[key]] == [item.value for item in enum], key
+        assert any(gpu["name"] == "A100-80GB" for gpu in client.get("/api/v1/hardware/gpus").json())
+        
+        assert etag_matches("*", '"a"') and not etag_matches('"b"', '"a"') and not etag_matches(None, '"a"')
+        
+        # 模型目录：ETag随目录修订号变化，客户端每次重新验证
+        with tempfile.TemporaryDirectory() as tmp:
+            registry = ModelRegistry(str(Path(tmp) / "catalog.sqlite3"))
+            app.dependency_overrides[get_model_registry] = lambda: registry
+            url = "/api/v1/models/llama2-7b"
+            response = client.get(url)
+            etag = response.headers["etag"]
+            assert response.headers["cache-control"] == "no-cache"
+            assert response.json()["hidden_size"] == 4096
+            assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+            
+            custom = registry.get_model_info("llama2-7b").model_copy(update={"id": "cache-test"})
+            registry.register_custom_model(custom)
+            changed = client.get(url, headers={"If-None-Match": etag})
+            assert changed.status_code == 200 and changed.headers["etag"] != etag
+            assert client.get("/api/v1/models/missing").status_code == 404
+            app.dependency_overrides.clear()
+        
+        print(f"✅ 条件缓存测试成功:")
+        print(f"   - 训练配置ETag: {client.get('/api/v1/training/configs').headers['etag']}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 条件缓存测试失败: {e}")
+        return False
+
+
+def test_response_compression():
+    """测试响应压缩协商、阈值和NDJSON流式压缩"""
+    print("\n🔍 测试响应压缩...")
+    
+    try:
+        import gzip
+        import zlib
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.api.compression import negotiate_encoding, StreamCompressor
+        
+        # 协商：q值优先，q值相同按服务端偏好，q=0不接受
+        assert negotiate_encoding("gzip, br, zstd", ["zstd", "br", "gzip"]) == "zstd"
+        assert negotiate_encoding("gzip;q=1.0, zstd;q=0.5", ["zstd", "gzip"]) == "gzip"
+        assert negotiate_encoding("*;q=0.1, gzip;q=0", ["zstd", "gzip"]) == "zstd"
+        assert negotiate_encoding("identity", ["gzip"]) is None
+        assert negotiate_encoding("", ["gzip"]) is None
+        
+        client = TestClient(app)
+        
+        # 超过阈值的响应压缩，ETag变为弱ETag，条件请求仍返回304
+        response = client.get("/api/v1/training/configs", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.headers["etag"].startswith("W/")
+        plain = client.get("/api/v1/training/configs", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers and response.json() == plain.json()
+        assert int(response.headers["content-length"]) < len(plain.content) / 2
+        cached = client.get("/api/v1/training/configs", headers={
+            "Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]
+        })
+        assert cached.status_code == 304
+        
+        # 小于阈值的响应不压缩
+        health = client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in health.headers
+        
+        # NDJSON流式压缩：整体可解压，与不压缩的内容一致
+        body = {"model_id": "llama2-7b", "training_method": "full_finetuning", "batch_size": 1,
+                "sequence_length": 2048, "gradient_accumulation_steps": 16, "pipeline_parallel": 4}
+        with client.stream("POST", "/api/v1/training/pipeline-timeline", json=body,
+                           headers={"Accept-Encoding": "gzip"}) as streamed:
+            assert streamed.headers["content-encoding"] == "gzip"
+            assert "content-length" not in streamed.headers
+            raw = b"".join(streamed.iter_raw())
+        identity = client.post("/api/v1/training/pipeline-timeline", json=body,
+                               headers={"Accept-Encoding": "identity"})
+        assert gzip.decompress(raw) == identity.content
+        
+        # 每块flush后已收到的字节即可解出完整的行
+        compressor = StreamCompressor("gzip", 6)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        for line in identity.content.splitlines(keepends=True)[:20]:
+            assert decompressor.decompress(compressor.compress(line)) == line
+        
+        print(f"✅ 响应压缩测试成功:")
+        print(f"   - 训练配置: {len(plain.content)} -> {response.headers['content-length']} 字节")
+        print(f"   - 流水线时间线: {len(identity.content)} -> {len(raw)} 字节")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 响应压缩测试失败: {e}")
+        return False
+
+
+def test_result_store():
+    """测试持久化计算结果存储"""
+    print("\n🔍 测试计算结果存储...")
+    
+    try:
+        import os
+        import tempfile
+        from pathlib import Path
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.api.deps import get_result_store
+        from app.models.training import TrainingRequest, TrainingMethod
+        from app.services.model_registry import ModelRegistry
+        from app.services.result_store import ResultStore, make_key, make_request_key
+        from app.services.result_store import get_result_store as open_result_store
+        from app.config import settings
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "results.sqlite3"
+            
+            # 键：规范化JSON，字段顺序不影响；引用的模型定义变化时键变化
+            assert make_key("training", {"a": 1, "b": 2}) == make_key("training", {"b": 2, "a": 1})
+            assert make_key("training", {"a": 1}) != make_key("inference", {"a": 1})
+            registry = ModelRegistry(str(Path(tmp) / "catalog.sqlite3"))
+            request = TrainingRequest(model_id="llama2-7b", training_method=TrainingMethod.LORA,
+                                      batch_size=1, sequence_length=2048)
+            key = make_request_key("training", request, registry)
+            model = registry.get_model_info("llama2-7b")
+            registry.update_model("llama2-7b", model.model_copy(update={"context_length": 8192}))
+            assert make_request_key("training", request, registry) != key
+            
+            # 按大小上限淘汰最久未访问的结果；其他连接（进程）可读到已写入的结果
+            store = ResultStore(path, max_bytes=50_000)
+            values = [os.urandom(4096) for _ in range(40)]
+            for i, value in enumerate(values):
+                store.put(f"key-{i}", "test", value)
+            stats = store.stats()
+            assert stats["total_bytes"] <= 50_000 and stats["evictions"] > 0
+            assert store.get("key-0") is None and store.get("key-39") == values[39]
+            assert ResultStore(path, max_bytes=50_000).get("key-38") == values[38]
+            store.clear()
+            assert store.stats()["entries"] == 0 and store.stats()["total_bytes"] == 0
+            hits_before = store.stats()["process"]["hits"]
+            
+            # 两个/estimate端点读穿：第二次请求命中，内容一致
+            app.dependency_overrides[get_result_store] = lambda: store
+            client = TestClient(app)
+            training = {"model_id": "llama2-7b", "training_method": "lora", "batch_size": 1, "sequence_length": 2048}
+            inference = {"model_id": "llama-7b", "backend": "vllm", "precision": "fp16", "quantization": "none",
+                         "max_batch_size": 8, "max_sequence_length": 2048}
+            for url, body in (("/api/v1/training/estimate", training), ("/api/v1/inference/estimate", inference)):
+                first = client.post(url, json=body)
+                second = client.post(url, json=body)
+                assert first.status_code == second.status_code == 200
+                assert first.headers["x-result-cache"] == "miss" and second.headers["x-result-cache"] == "hit"
+                assert first.json() == second.json()
+            
+            # 出错的请求不保存
+            bad = client.post("/api/v1/training/estimate", json=dict(training, model_id="missing"))
+            assert bad.status_code == 400
+            stats = client.get("/api/v1/results/stats").json()
+            assert stats["namespaces"] == {"training": 1, "inference": 1}
+            assert stats["process"]["hits"] == hits_before + 2
+            
+            # 存储不可用时退化为直接计算，不返回400
+            broken = ResultStore(Path(tmp) / "broken.sqlite3", max_bytes=50_000)
+            broken._connection.close()
+            app.dependency_overrides[get_result_store] = lambda: broken
+            response = client.post("/api/v1/training/estimate", json=training)
+            assert response.status_code == 200 and response.headers["x-result-cache"] == "miss"
+            assert broken._errors == 2
+            app.dependency_overrides.clear()
+            
+            # 存储无法打开（父路径是文件、路径上不是SQLite文件）：请求直接计算，统计中标明不可用
+            blocker = Path(tmp) / "not-a-dir"
+            blocker.write_text("x")
+            garbage = Path(tmp) / "garbage.sqlite3"
+            garbage.write_bytes(b"not a sqlite database" * 100)
+            old_path = settings.RESULT_STORE_PATH
+            try:
+                for bad_path in (blocker / "results.sqlite3", garbage):
+                    settings.RESULT_STORE_PATH = str(bad_path)
+                    response = client.post("/api/v1/inference/estimate", json=inference)
+                    assert response.status_code == 200, response.text
+                    assert response.headers.get("x-result-cache", "miss") == "miss"
+                    unavailable = client.get("/api/v1/results/stats").json()
+                    assert unavailable["enabled"] and not unavailable["available"]
+                    assert unavailable["open_errors"] >= 1 and unavailable["last_open_error"]
+            finally:
+                settings.RESULT_STORE_PATH = old_path
+            
+            # 共享实例按 (路径, 大小上限) 区分
+            assert open_result_store(path, 50_000) is open_result_store(str(path), 50_000)
+            assert open_result_store(path, 60_000).max_bytes == 60_000
+        
+        print(f"✅ 计算结果存储测试成功:")
+        print(f"   - 条目: {stats['entries']}, 占用: {stats['total_bytes']} 字节")
+        print(f"   - 计算器版本: {stats['calculator_version']}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 计算结果存储测试失败: {e}")
+        return False
+
+
+def test_job_api():
+    """测试异步任务API（进程池执行、轮询、SSE、取消、进程池恢复与租约接管）"""
+    print("\n🔍 测试异步任务API...")
+    
+    import os
+    old_path = os.environ.get("RESULT_STORE_PATH")
+    try:
+        import json
+        import signal
+        import tempfile
+        import time
+        from pathlib import Path
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.api.deps import get_job_manager
+        from app.models.jobs import JobKind, JobSubmitRequest
+        from app.services.job_manager import JobManager, JobStore
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            # 工作进程（spawn）重新读取配置，结果存储写到临时目录
+            os.environ["RESULT_STORE_PATH"] = str(Path(tmp) / "results.sqlite3")
+            path = Path(tmp) / "jobs.sqlite3"
+            manager = JobManager(path, max_workers=1, max_pending=4)
+            app.dependency_overrides[get_job_manager] = lambda: manager
+            client = TestClient(app, headers={"Accept-Encoding": "identity"})
+            
+            def wait(job_id, timeout=120):
+                deadline = time.time() + timeout
+                while time.time() < deadline:
+                    job = client.get(f"/api/v1/jobs/{job_id}").json()
+                    if job["status"] in ("succeeded", "failed", "cancelled"):
+                        return job
+                    time.sleep(0.2)
+                raise AssertionError(f"任务未在{timeout}秒内结束: {job_id}")
+            
+            # 提交后立即返回，逐项结果可分页读取；非法组合记为该项失败，不影响其他项
+            body = {
+                "kind": "training_sweep",
+                "base": {"model_id": "llama2-7b", "training_method": "lora", "batch_size": 1, "sequence_length": 2048},
+                "grid": {"batch_size": [1, 2], "sequence_length": [1024, 2048, -1]}
+            }
+            response = client.post("/api/v1/jobs", json=body)
+            assert response.status_code == 202, response.text
+            job = response.json()
+            assert job["status"] == "queued" and job["total"] == 6
+            job = wait(job["id"])
+            assert job["status"] == "succeeded" and job["completed"] == 6 and job["failed"] == 2, job
+            assert job["summary"]["succeeded"] == 4 and job["summary"]["lowest_memory"]["index"] == 0
+            page = client.get(f"/api/v1/jobs/{job['id']}/results", params={"offset": 1, "limit": 2}).json()
+            assert [item["index"] for item in page["items"]] == [1, 2] and page["next_offset"] == 3
+            assert page["items"][0]["params"] == {"batch_size": 1, "sequence_length": 2048}
+            assert "result" in page["items"][0] and "error" in page["items"][1]
+            
+            # SSE：断线重连时按Last-Event-ID从下一项继续，最后推送end
+            with client.stream("GET", f"/api/v1/jobs/{job['id']}/events", headers={"Last-Event-ID": "3"}) as stream:
+                assert stream.headers["content-type"].startswith("text/event-stream")
+                events = [block for block in stream.read().decode().split("\n\n") if block]
+            result_ids = [block.split("\n")[0] for block in events if "event: result" in block]
+            assert result_ids == ["id: 4", "id: 5"], events
+            assert "event: progress" in events[-2] and "event: end" in events[-1]
+            assert json.loads(events[-1].split("data: ")[1])["status"] == "succeeded"
+            
+            # 同步SQLite访问不在事件循环中执行：端点为普通函数（在线程池中运行）
+            import asyncio
+            from app.api.v1.endpoints import jobs as jobs_endpoints
+            for handler in (jobs_endpoints.submit_job, jobs_endpoints.list_jobs, jobs_endpoints.get_job,
+                            jobs_endpoints.get_job_results, jobs_endpoints.stream_job_events,
+                            jobs_endpoints.cancel_job):
+                assert not asyncio.iscoroutinefunction(handler), handler.__name__
+            
+            # 校验：网格过大、第一个组合不合法、任务不存在
+            too_large = dict(body, grid={"batch_size": list(range(1, 101)), "sequence_length": list(range(1, 201))})
+            assert client.post("/api/v1/jobs", json=too_large).status_code == 400
+            assert client.post("/api/v1/jobs", json=dict(body, base={"model_id": "llama2-7b"})).status_code == 400
+            assert client.get("/api/v1/jobs/missing").status_code == 404
+            
+            # 取消：排队或运行中的任务停止，已完成的结果保留
+            large = dict(body, grid={"batch_size": list(range(1, 101)), "sequence_length": list(range(1024, 9216, 128))})
+            job = client.post("/api/v1/jobs", json=large).json()
+            while client.get(f"/api/v1/jobs/{job['id']}").json()["completed"] == 0:
+                time.sleep(0.1)
+            assert client.post(f"/api/v1/jobs/{job['id']}/cancel").json()["cancel_requested"]
+            job = wait(job["id"])
+            assert job["status"] == "cancelled" and job["completed"] < job["total"], job
+            
+            # 工作进程被杀死：重建进程池，任务从断点继续且不重复计数，之后的提交正常执行
+            medium = dict(body, grid={"batch_size": list(range(1, 101)), "sequence_length": list(range(1024, 3584, 128))})
+            job = client.post("/api/v1/jobs", json=medium).json()
+            while client.get(f"/api/v1/jobs/{job['id']}").json()["completed"] == 0:
+                time.sleep(0.1)
+            for pid in list(manager._executor._processes):
+                os.kill(pid, signal.SIGKILL)
+            job = wait(job["id"])
+            assert job["status"] == "succeeded" and job["completed"] == job["total"] == 2000, job
+            assert job["failed"] == 0
+            response = client.post("/api/v1/jobs", json=body)
+            assert response.status_code == 202 and wait(response.json()["id"])["status"] == "succeeded"
+            assert len(client.get("/api/v1/jobs").json()) == 4
+            manager.shutdown()
+            
+            # 租约接管：租约过期的任务由新的管理器重新提交，已完成的组合不再计算；
+            # 其他主机持有有效租约的任务不被接管
+            store = JobStore(path)
+            sweep = JobSubmitRequest(kind=JobKind.TRAINING_SWEEP, base=body["base"], grid={"batch_size": [1, 2]})
+            orphan = store.create(sweep, owner="other-host:1:dead", lease_seconds=-1)
+            assert store.mark_running(orphan.id, "other-host:1:dead", -1)
+            assert store.append_results(orphan.id, "other-host:1:dead", -1,
+                                        [{"index": 0, "params": {"batch_size": 1}, "error": "stale"}])
+            alive = store.create(sweep, owner="other-host:2:alive", lease_seconds=60)
+            recovered = JobManager(path, max_workers=1, max_pending=8)
+            app.dependency_overrides[get_job_manager] = lambda: recovered
+            job = wait(orphan.id)
+            assert job["status"] == "succeeded" and job["completed"] == 2, job
+            assert "error" in recovered.get_results(orphan.id)[0] and "result" in recovered.get_results(orphan.id)[1]
+            assert recovered.get(alive.id).status == "queued"
+            # 租约已转移，原持有者的工作进程不能再写入
+            assert not store.append_results(orphan.id, "other-host:1:dead", 30, [])
+            recovered.shutdown()
+            app.dependency_overrides.clear()
+        
+        print(f"✅ 异步任务API测试成功:")
+        print(f"   - 网格预估、分页结果、SSE续传、取消、进程池恢复、租约接管均正常")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 异步任务API测试失败: {e}")
+        return False
+    finally:
+        if old_path is None:
+            os.environ.pop("RESULT_STORE_PATH", None)
+        else:
+            os.environ["RESULT_STORE_PATH"] = old_path
+
+
 def main():
     """主测试函数"""
     print("🚀 开始后端基础功能测试\n")
@@ -127,7 +1722,32 @@ def main():
         test_imports,
         test_model_registry,
         test_training_calculator,
-        test_inference_calculator
+        test_inference_calculator,
+        test_paged_kv_cache,
+        test_gqa_kv_cache,
+        test_kv_cache_quantization,
+        test_prefix_cache,
+        test_length_distribution,
+        test_3d_parallel_training,
+        test_pipeline_schedule,
+        test_communication_model,
+        test_flops_throughput,
+        test_zero_offload,
+        test_precision_policy,
+        test_adapter_methods,
+        test_activation_recomputation,
+        test_context_parallel,
+        test_attention_kernels,
+        test_moe_expert_parallel,
+        test_architecture_parameters,
+        test_logits_memory,
+        test_hf_config_import,
+        test_model_catalog,
+        test_model_search_api,
+        test_conditional_caching,
+        test_response_compression,
+        test_result_store,
+        test_job_api
     ]
     
     passed = 0
@@ -278,7 +278,7 @@ export default function InferencePage() {
                       value={formData.maxSequenceLength}
                       onChange={(e) => setFormData({...formData, maxSequenceLength: parseInt(e.target.value) || 2048})}
                       min="128"
-                      max="32768"
+                      max="1048576"
                       placeholder="2048"
                     />
                   </div>
@@ -294,7 +294,7 @@ export default function InferencePage() {
                       value={formData.maxNewTokens}
                       onChange={(e) => setFormData({...formData, maxNewTokens: parseInt(e.target.value) || 1024})}
                       min="1"
-                      max="8192"
+                      max="32768"
                       placeholder="1024"
                     />
                   </div>
@@ -18,6 +18,9 @@ import { trainingApi } from '@/lib/api'
 import { TrainingRequest, TrainingResponse, TrainingConfig, AccelerationMethod } from '@/types/api'
 import { cn } from '@/lib/utils'
 
+// 需要LoRA参数配置的训练方法
+const ADAPTER_METHODS = ['lora', 'qlora', 'dora', 'adalora']
+
 export default function TrainingPage() {
   const [isCalculating, setIsCalculating] = useState(false)
   const [result, setResult] = useState<TrainingResponse | null>(null)
@@ -50,6 +53,7 @@ export default function TrainingPage() {
       // 获取参数数量
       const parametersBillion = parseFloat(formData.get('parameters_billion') as string)
       
+      const isAdapterMethod = ADAPTER_METHODS.includes(formData.get('training_method') as string)
       const request: TrainingRequest = {
         parameters_billion: parametersBillion,
         training_method: formData.get('training_method') as any,
@@ -66,7 +70,7 @@ export default function TrainingPage() {
         gradient_checkpointing: formData.has('gradient_checkpointing'),
         deepspeed_stage: formData.get('deepspeed_stage') as any || undefined,
         acceleration_method: formData.get('acceleration_method') as AccelerationMethod || AccelerationMethod.NONE,
-        lora_config: formData.get('training_method') === 'lora' ? {
+        lora_config: isAdapterMethod ? {
           rank: parseInt(formData.get('lora_rank') as string) || 16,
           alpha: parseInt(formData.get('lora_alpha') as string) || 32,
           dropout: parseFloat(formData.get('lora_dropout') as string) || 0.1,
@@ -138,15 +142,19 @@ export default function TrainingPage() {
                     >
                       <option value="full_finetuning">全参数微调</option>
                       <option value="lora">LoRA微调</option>
+                      <option value="qlora">QLoRA微调</option>
+                      <option value="dora">DoRA微调</option>
+                      <option value="adalora">AdaLoRA微调</option>
                     </FormSelect>
                     <p className="text-xs text-muted-foreground mt-1">
                       全参数微调：训练所有参数，效果最好但资源需求高<br/>
-                      LoRA微调：只训练少量参数，资源需求低，效果接近全参数微调
+                      LoRA微调：只训练少量参数，资源需求低，效果接近全参数微调<br/>
+                      QLoRA微调：基座权重4-bit量化，显存最省，速度略慢
                     </p>
                   </FormField>
 
                   {/* LoRA配置 */}
-                  {trainingMethod === 'lora' && (
+                  {ADAPTER_METHODS.includes(trainingMethod) && (
                     <div className="space-y-4 border-l-4 border-blue-200 bg-blue-50 p-4 rounded-md">
                       <h4 className="font-medium text-blue-900">LoRA参数配置</h4>
                       
@@ -204,13 +212,14 @@ export default function TrainingPage() {
                   <FormField name="acceleration_method">
                     <FormLabel className="flex items-center">
                       加速方法
-                      <HelpIcon content="选择训练加速技术。无加速：使用标准训练方式；Flash Attention 2：减少30%-60%激活值显存，支持更长序列；Unsloth：减少75%激活值显存，显存效率提升4倍，但仅支持单卡训练。" />
+                      <HelpIcon content="选择注意力实现与训练加速技术。无加速：eager注意力，保存O(N²)的注意力分数矩阵；SDPA：PyTorch显存高效内核，只保存O(N)的softmax统计；Flash Attention 2：同样不保存分数矩阵，且GQA无需复制K/V；Unsloth：在Flash Attention 2基础上融合SwiGLU并把检查点卸载到内存，但仅支持单卡训练。" />
                     </FormLabel>
                     <FormSelect 
                       name="acceleration_method" 
                       defaultValue="none"
                     >
-                      <option value="none">无加速</option>
+                      <option value="none">无加速（eager）</option>
+                      <option value="sdpa">SDPA</option>
                       <option value="flash_attention_2">Flash Attention 2</option>
                       <option 
                         value="unsloth" 
@@ -220,8 +229,8 @@ export default function TrainingPage() {
                       </option>
                     </FormSelect>
                     <p className="text-xs text-muted-foreground mt-1">
-                      Flash Attention 2: 减少30%-60%激活值显存，支持更长序列<br/>
-                      Unsloth: 减少75%激活值显存，显存效率提升4倍，仅支持单卡训练
+                      SDPA / Flash Attention 2: 去掉O(N²)的注意力分数，激活值随序列长度线性增长<br/>
+                      Unsloth: 融合SwiGLU并卸载检查点，仅支持单卡训练
                     </p>
                   </FormField>
 
@@ -252,7 +261,7 @@ export default function TrainingPage() {
                         type="number" 
                         defaultValue="2048"
                         min="128"
-                        max="8192"
+                        max="1048576"
                       />
                     </FormField>
                   </div>
@@ -118,6 +118,7 @@ export function MemoryBreakdown({ breakdown, total }: MemoryBreakdownProps) {
                 model_weights: '模型权重',
                 activations: '激活值',
                 optimizer_states: '优化器状态',
+                master_weights: 'FP32主权重',
                 gradients: '梯度',
                 kv_cache: 'KV Cache',
                 framework_overhead: '框架开销',
@@ -142,12 +143,13 @@ export function MemoryBreakdown({ breakdown, total }: MemoryBreakdownProps) {
 例如：7B模型 FP16 = 7,000,000,000 × 2字节 = 14GB
                 `,
                 activations: isTrainingMode ? `
-训练激活值显存计算公式：
-• 基础激活值 = batch_size × seq_len × hidden_size × num_layers × bytes_per_element
-• 注意力激活值 = batch_size × num_heads × seq_len² × num_layers × bytes_per_element
+训练激活值显存计算公式（逐层统计，参考Megatron）：
+• 每层 ≈ s×b×h×(34 + 5×a×s/h) 字节（FP16、dropout开启、MLP中间层4h）
+• 层归一化、QKV/MLP输入、dropout掩码只在开启序列并行时按张量并行度切分
 
-训练优化技术影响：
-- 梯度检查点：减少70%激活值显存
+重计算方式：
+- 选择性重计算：只重算注意力分数，去掉O(s²)项
+- 完全重计算（梯度检查点）：只保存每层输入2sbh
 - Flash Attention 2：减少30%-60%注意力内存
 - Unsloth：减少75%激活值显存
 
@@ -175,12 +177,27 @@ export function MemoryBreakdown({ breakdown, total }: MemoryBreakdownProps) {
 - AdamW/Adam: 2倍 (保存momentum和variance)
 - SGD: 1倍 (只保存momentum)
 
+状态精度：
+- 混合精度默认FP32状态：AdamW 8字节/参数
+- 8-bit优化器：分块量化INT8，约2字节/参数
+- 分页优化器：显存不足时换出到主机内存
+
 LoRA训练时：
 - 全参数：所有模型参数
 - LoRA：只有LoRA新增参数
 
 DeepSpeed ZeRO分片：
 - Stage 1/2/3: 在多GPU间分片，减少单卡占用
+                `,
+                master_weights: `
+FP32主权重显存计算公式：
+• 可训练参数量 × 4字节
+
+FP16/BF16混合精度训练中，优化器在FP32主权重上更新后再转换回半精度权重。
+加上半精度权重2字节、梯度2字节、AdamW状态8字节，合计约16字节/参数。
+
+DeepSpeed ZeRO分片：
+- Stage 1/2/3: 主权重与优化器状态一同分片
                 `,
                 gradients: `
 梯度显存计算公式：
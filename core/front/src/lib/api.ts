@@ -5,8 +5,17 @@ import type {
   InferenceRequest,
   InferenceResponse,
   ModelInfo,
+  ModelSearchParams,
+  ModelListResponse,
+  ResultStoreStats,
+  JobInfo,
+  JobResults,
+  JobResultItem,
+  JobSubmitRequest,
   TrainingConfig,
+  PipelineTimelineEvent,
   InferenceConfig,
+  LengthDistributionUpload,
   GPUInfo,
   ApiResponse,
   ApiError
@@ -66,6 +75,35 @@ export const trainingApi = {
     )
     return response.data
   },
+
+  // 流式获取流水线调度显存时间线（NDJSON），每解析一行回调一次
+  streamPipelineTimeline: async (
+    params: TrainingRequest,
+    onEvent: (event: PipelineTimelineEvent) => void
+  ): Promise<void> => {
+    const response = await fetch('/api/v1/training/pipeline-timeline', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(params),
+    })
+    if (!response.ok || !response.body) {
+      const error = await response.json().catch(() => ({}))
+      throw new Error(error.detail || `请求失败: ${response.status}`)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    for (;;) {
+      const { done, value } = await reader.read()
+      buffer += decoder.decode(value, { stream: !done })
+      const lines = buffer.split('\n')
+      buffer = lines.pop() ?? ''
+      lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)))
+      if (done) break
+    }
+    if (buffer.trim()) onEvent(JSON.parse(buffer))
+  },
 }
 
 // 推理相关 API
@@ -79,6 +117,18 @@ export const inferenceApi = {
     return response.data
   },
 
+  // 上传长度样本文件，解析为长度分布
+  parseLengthDistribution: async (file: File): Promise<LengthDistributionUpload> => {
+    const formData = new FormData()
+    formData.append('file', file)
+    const response = await apiClient.post<LengthDistributionUpload>(
+      '/inference/length-distribution',
+      formData,
+      { headers: { 'Content-Type': 'multipart/form-data' } }
+    )
+    return response.data
+  },
+
   // 获取推理后端列表
   getBackends: async (): Promise<InferenceConfig> => {
     const response = await apiClient.get<InferenceConfig>(
@@ -88,6 +138,83 @@ export const inferenceApi = {
   },
 }
 
+// 模型目录相关 API
+export const modelsApi = {
+  // 搜索/过滤模型（游标分页，传入上一页的 next_cursor 获取下一页）
+  search: async (params: ModelSearchParams = {}): Promise<ModelListResponse> => {
+    const response = await apiClient.get<ModelListResponse>('/models', { params })
+    return response.data
+  },
+
+  // 获取模型详细信息
+  get: async (modelId: string): Promise<ModelInfo> => {
+    const response = await apiClient.get<ModelInfo>(`/models/${modelId}`)
+    return response.data
+  },
+}
+
+// 计算结果存储相关 API
+export const resultsApi = {
+  // 获取结果存储统计（条目数、占用、命中率）
+  getStats: async (): Promise<ResultStoreStats> => {
+    const response = await apiClient.get<ResultStoreStats>('/results/stats')
+    return response.data
+  },
+}
+
+// 异步任务相关 API（耗时的参数网格预估，不受请求超时限制）
+export const jobsApi = {
+  // 提交任务，立即返回任务ID
+  submit: async (request: JobSubmitRequest): Promise<JobInfo> => {
+    const response = await apiClient.post<JobInfo>('/jobs', request)
+    return response.data
+  },
+
+  // 获取任务状态和进度
+  get: async (jobId: string): Promise<JobInfo> => {
+    const response = await apiClient.get<JobInfo>(`/jobs/${jobId}`)
+    return response.data
+  },
+
+  // 获取最近提交的任务
+  list: async (limit = 50): Promise<JobInfo[]> => {
+    const response = await apiClient.get<JobInfo[]>('/jobs', { params: { limit } })
+    return response.data
+  },
+
+  // 分页获取结果（运行中时为已完成的部分）
+  getResults: async (jobId: string, offset = 0, limit = 100): Promise<JobResults> => {
+    const response = await apiClient.get<JobResults>(`/jobs/${jobId}/results`, { params: { offset, limit } })
+    return response.data
+  },
+
+  // 取消任务
+  cancel: async (jobId: string): Promise<JobInfo> => {
+    const response = await apiClient.post<JobInfo>(`/jobs/${jobId}/cancel`)
+    return response.data
+  },
+
+  // 订阅进度和结果（SSE，断线后浏览器按Last-Event-ID自动续传），返回取消订阅函数
+  subscribe: (
+    jobId: string,
+    handlers: {
+      onProgress?: (job: JobInfo) => void
+      onResult?: (item: JobResultItem) => void
+      onEnd?: (job: JobInfo) => void
+    },
+    offset = 0
+  ): (() => void) => {
+    const source = new EventSource(`/api/v1/jobs/${jobId}/events?offset=${offset}`)
+    source.addEventListener('progress', (event) => handlers.onProgress?.(JSON.parse((event as MessageEvent).data)))
+    source.addEventListener('result', (event) => handlers.onResult?.(JSON.parse((event as MessageEvent).data)))
+    source.addEventListener('end', (event) => {
+      source.close()
+      handlers.onEnd?.(JSON.parse((event as MessageEvent).data))
+    })
+    return () => source.close()
+  },
+}
+
 // GPU 硬件相关 API (如果需要的话)
 export const hardwareApi = {
   // 获取所有 GPU 信息
@@ -4,23 +4,132 @@ export interface ModelInfo {
   id: string
   name: string
   family: string
-  parameters: number
+  parameters?: number
   hidden_size: number
   num_layers: number
   num_heads: number
+  num_key_value_heads?: number
+  head_dim?: number
+  intermediate_size?: number
+  num_experts?: number
+  num_experts_per_tok?: number
+  num_shared_experts?: number
+  moe_intermediate_size?: number
   vocab_size: number
+  tie_word_embeddings?: boolean
+  attention_bias?: boolean | null
   context_length: number
   architecture: string
   precision: PrecisionType
   size_category: ModelSize
 }
 
+// 模型列表摘要（/models 默认返回字段），score为搜索相关度
+export interface ModelSummary {
+  id: string
+  name: string
+  family: string
+  parameters: number
+  size_category: ModelSize
+  context_length: number
+  architecture: string
+  score: number
+}
+
+export interface ModelSearchParams {
+  q?: string
+  family?: string
+  size_category?: ModelSize
+  architecture?: string
+  min_parameters?: number
+  max_parameters?: number
+  min_context_length?: number
+  max_context_length?: number
+  limit?: number
+  cursor?: string
+  fields?: string
+}
+
+export interface ModelListResponse<T = ModelSummary> {
+  items: T[]
+  next_cursor: string | null
+  total: number
+}
+
+// 持久化计算结果存储统计（/results/stats）
+export interface ResultStoreStats {
+  enabled: boolean
+  available?: boolean
+  open_errors?: number
+  last_open_error?: string | null
+  entries?: number
+  namespaces?: Record<string, number>
+  total_bytes?: number
+  max_bytes?: number
+  evictions?: number
+  calculator_version?: string
+  process?: {
+    hits: number
+    misses: number
+    errors: number
+    hit_rate: number
+  }
+}
+
+// 异步任务（/jobs）
+export type JobKind = 'training_sweep' | 'inference_sweep'
+
+export type JobStatus = 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled'
+
+export interface JobSubmitRequest {
+  kind: JobKind
+  base: Partial<TrainingRequest> | Partial<InferenceRequest>
+  grid?: Record<string, unknown[]>
+}
+
+export interface JobInfo {
+  id: string
+  kind: JobKind
+  status: JobStatus
+  total: number
+  completed: number
+  failed: number
+  progress: number
+  cancel_requested: boolean
+  created_at: number
+  started_at?: number | null
+  finished_at?: number | null
+  error?: string | null
+  summary?: {
+    succeeded: number
+    failed: number
+    lowest_memory?: { index: number; params: Record<string, unknown>; total_memory_gb: number } | null
+  } | null
+}
+
+export interface JobResultItem<T = TrainingResponse | InferenceResponse> {
+  index: number
+  params: Record<string, unknown>
+  result?: T
+  error?: string
+}
+
+export interface JobResults<T = TrainingResponse | InferenceResponse> {
+  job: JobInfo
+  items: JobResultItem<T>[]
+  next_offset: number
+}
+
 export interface GPUInfo {
   name: string
   memory_gb: number
   memory_bandwidth_gb_s: number
   compute_capability: string
   fp16_tflops?: number
+  nvlink_bandwidth_gb_s?: number | null
+  pcie_bandwidth_gb_s?: number
+  interconnect_bandwidth_gb_s?: number
+  gpus_per_node?: number
 }
 
 export interface ResourceEstimate {
@@ -42,6 +151,11 @@ export enum PrecisionType {
   BF16 = 'bf16'
 }
 
+export enum ContextParallelMethod {
+  RING = 'ring',
+  ULYSSES = 'ulysses'
+}
+
 export enum ModelSize {
   SMALL = 'small',
   MEDIUM = 'medium',
@@ -51,13 +165,26 @@ export enum ModelSize {
 
 export enum TrainingMethod {
   FULL_FINETUNING = 'full_finetuning',
-  LORA = 'lora'
+  LORA = 'lora',
+  QLORA = 'qlora',
+  DORA = 'dora',
+  ADALORA = 'adalora'
 }
 
 export enum OptimizerType {
   ADAMW = 'adamw',
   ADAM = 'adam',
-  SGD = 'sgd'
+  SGD = 'sgd',
+  ADAMW_8BIT = 'adamw_8bit',
+  PAGED_ADAMW = 'paged_adamw',
+  PAGED_ADAMW_8BIT = 'paged_adamw_8bit'
+}
+
+export enum OptimizerStateDtype {
+  FP32 = 'fp32',
+  FP16 = 'fp16',
+  BF16 = 'bf16',
+  INT8 = 'int8'
 }
 
 export enum DeepSpeedStage {
@@ -67,12 +194,42 @@ export enum DeepSpeedStage {
   STAGE3 = 'stage3'
 }
 
+export enum OffloadDevice {
+  NONE = 'none',
+  CPU = 'cpu',
+  NVME = 'nvme'
+}
+
+export enum PipelineSchedule {
+  ONE_F_ONE_B = '1f1b',
+  INTERLEAVED_1F1B = 'interleaved_1f1b'
+}
+
+export enum ActivationRecomputation {
+  NONE = 'none',
+  SELECTIVE = 'selective',
+  FULL = 'full'
+}
+
 export enum AccelerationMethod {
   NONE = 'none',
+  SDPA = 'sdpa',
   FLASH_ATTENTION_2 = 'flash_attention_2',
   UNSLOTH = 'unsloth'
 }
 
+export enum CrossEntropyMethod {
+  STANDARD = 'standard',
+  CHUNKED = 'chunked',
+  FUSED_LINEAR = 'fused_linear'
+}
+
+export enum AttentionKernel {
+  EAGER = 'eager',
+  SDPA = 'sdpa',
+  FLASH_ATTENTION_2 = 'flash_attention_2'
+}
+
 export enum InferenceBackend {
   VLLM = 'vllm',
   PYTORCH = 'pytorch',
@@ -90,12 +247,41 @@ export enum QuantizationMethod {
   AWQ = 'awq'
 }
 
+export enum KVCacheDtype {
+  AUTO = 'auto',
+  FP16 = 'fp16',
+  BF16 = 'bf16',
+  FP8 = 'fp8',
+  FP8_E4M3 = 'fp8_e4m3',
+  FP8_E5M2 = 'fp8_e5m2',
+  INT8 = 'int8',
+  INT4 = 'int4'
+}
+
+export enum KVCacheQuantization {
+  PER_TENSOR = 'per_tensor',
+  PER_HEAD = 'per_head',
+  PER_TOKEN = 'per_token',
+  PER_BLOCK = 'per_block',
+  PER_GROUP = 'per_group'
+}
+
 // 训练相关接口
 export interface LoRAConfig {
   rank: number
   alpha: number
   dropout: number
   target_modules?: string
+  init_rank?: number
+  double_quant?: boolean
+  quant_block_size?: number
+}
+
+export interface PrecisionPolicy {
+  param_dtype?: PrecisionType
+  grad_dtype?: PrecisionType
+  master_weights?: boolean
+  optimizer_state_dtype?: OptimizerStateDtype
 }
 
 export interface TrainingRequest {
@@ -104,6 +290,7 @@ export interface TrainingRequest {
   custom_model?: ModelInfo
   training_method: TrainingMethod
   precision: PrecisionType
+  precision_policy?: PrecisionPolicy
   batch_size: number
   sequence_length: number
   gradient_accumulation_steps: number
@@ -113,10 +300,28 @@ export interface TrainingRequest {
   data_parallel: number
   tensor_parallel: number
   pipeline_parallel: number
+  context_parallel?: number
+  context_parallel_method?: ContextParallelMethod
+  expert_parallel?: number
   deepspeed_stage?: DeepSpeedStage
+  offload_optimizer?: OffloadDevice
+  offload_param?: OffloadDevice
+  nvme_bandwidth_gb_s?: number
+  pipeline_schedule?: PipelineSchedule
+  virtual_pipeline_stages?: number
+  gpu_type?: string
+  model_flops_utilization?: number
+  dataset_tokens?: number
+  dataset_samples?: number
   lora_config?: LoRAConfig
   gradient_checkpointing: boolean
+  activation_recomputation?: ActivationRecomputation
+  sequence_parallel?: boolean
+  hidden_dropout?: number
+  attention_dropout?: number
   acceleration_method: AccelerationMethod
+  cross_entropy?: CrossEntropyMethod
+  cross_entropy_chunk_size?: number
 }
 
 export interface TrainingResponse extends ResourceEstimate {
@@ -124,27 +329,63 @@ export interface TrainingResponse extends ResourceEstimate {
   effective_batch_size: number
   memory_per_gpu: number
   memory_breakdown: Record<string, number>
+  stage_memory_breakdown: Array<Record<string, number>>
+  pipeline_schedule?: PipelineScheduleSummary
+  communication_analysis?: CommunicationAnalysis
+  flops_analysis?: FlopsAnalysis
+  offload_analysis?: OffloadAnalysis
+  activation_analysis?: ActivationAnalysis
+  logits_analysis?: LogitsAnalysis
+  adapter_analysis?: AdapterAnalysis
+  moe_analysis?: MoEAnalysis | null
   estimated_tokens_per_second?: number
   estimated_time_per_epoch?: string
   recommendations: Record<string, any>
 }
 
 // 推理相关接口
+export interface LengthDistribution {
+  histogram?: Array<{ length: number; weight: number }>
+  percentiles?: Record<string, number>
+  samples?: number[]
+}
+
+export interface LengthDistributionUpload {
+  prompt_length_distribution?: LengthDistribution
+  output_length_distribution?: LengthDistribution
+  sample_count: { prompt: number; output: number }
+}
+
 export interface InferenceRequest {
   model_id?: string
   custom_model?: ModelInfo
   backend: InferenceBackend
   precision: PrecisionType
   quantization: QuantizationMethod
+  attention_kernel?: AttentionKernel
   max_batch_size: number
   max_sequence_length: number
   max_new_tokens: number
+  prompt_length_distribution?: LengthDistribution
+  output_length_distribution?: LengthDistribution
+  shared_prefix_length?: number
+  prefix_cache_hit_rate?: number
+  num_distinct_prefixes?: number
   tensor_parallel: number
   pipeline_parallel: number
-  kv_cache_dtype?: string
-  kv_cache_quantization?: string
+  context_parallel?: number
+  context_parallel_method?: ContextParallelMethod
+  expert_parallel?: number
+  block_size?: number
+  gpu_memory_utilization?: number
+  swap_space_gb?: number
+  max_num_seqs?: number
+  kv_cache_dtype?: KVCacheDtype
+  kv_cache_quantization?: KVCacheQuantization
+  kv_cache_group_size?: number
   target_throughput?: number
   target_latency_ms?: number
+  gpu_type?: string
   max_gpu_count?: number
   gpu_memory_limit_gb?: number
 }
@@ -154,15 +395,192 @@ export interface InferenceResponse extends ResourceEstimate {
   quantization: QuantizationMethod
   kv_cache_memory_gb: number
   max_concurrent_requests: number
+  kv_cache_blocks: Record<string, any>
   estimated_throughput: number
   estimated_latency_p50_ms: number
   estimated_latency_p99_ms: number
+  length_distribution_analysis: Record<string, any>
+  prefix_cache_analysis: Record<string, any>
+  decode_analysis: Record<string, any>
+  moe_analysis?: MoEAnalysis | null
   memory_breakdown: Record<string, number>
   recommendations: Record<string, any>
   scalability_analysis: Record<string, any>
 }
 
 // 配置选项
+// 流水线调度模拟汇总
+export interface PipelineScheduleSummary {
+  schedule: PipelineSchedule
+  num_stages: number
+  num_microbatches: number
+  virtual_stages: number
+  makespan: number
+  bubble_fraction: number
+  peak_memory_per_stage_gb: number[]
+  peak_in_flight_microbatches: number[]
+}
+
+// 卸载耗时分解（秒）
+export interface OffloadStepCost {
+  optimizer_pcie_s: number
+  optimizer_nvme_s: number
+  cpu_optimizer_s: number
+  param_fetch_s: number
+  exposed_s: number
+}
+
+// CPU/NVMe卸载分析
+export interface OffloadAnalysis extends OffloadStepCost {
+  offload_optimizer: OffloadDevice
+  offload_param: OffloadDevice
+  gpus_per_node: number
+  host_memory_per_gpu_gb: number
+  nvme_per_gpu_gb: number
+  host_memory_per_node_gb: number
+  nvme_per_node_gb: number
+}
+
+// 激活值分析：每层分解与各重计算方式对比
+export interface ActivationAnalysis {
+  recomputation: ActivationRecomputation
+  sequence_parallel: boolean
+  per_layer_gb: Record<string, number>
+  recompute_flops_per_token: number
+  modes: Record<ActivationRecomputation, {
+    memory_gb: number
+    recompute_flops_per_token: number
+    relative_compute: number
+  }>
+}
+
+// logits与交叉熵损失缓冲区分析
+export interface LogitsAnalysis {
+  cross_entropy: CrossEntropyMethod
+  vocab_size: number
+  tokens_per_microbatch: number
+  chunk_size: number | null
+  breakdown_gb: Record<'logits' | 'loss' | 'logits_gradient' | 'embedding_gradient', number>
+  total_gb: number
+  modes: Record<CrossEntropyMethod, number>
+}
+
+// LoRA系列适配器分析
+export interface AdapterAnalysis {
+  training_method: TrainingMethod
+  target_modules: string[]
+  rank: number
+  adapter_parameters: {
+    lora: number
+    singular_values: number
+    magnitude: number
+    total: number
+  }
+  trainable_ratio: number
+  base_weights_gb: number
+  quantization?: {
+    quant_type: 'nf4'
+    block_size: number
+    double_quant: boolean
+    bytes_per_param: number
+    quantized_parameters: number
+  }
+  rank_budget?: {
+    init_rank: number
+    target_rank: number
+    total_budget: number
+    final_parameters: number
+    importance_states_gb: number
+  }
+}
+
+// 每token计算量分解与MFU
+export interface FlopsAnalysis {
+  forward_breakdown: {
+    attention_projections: number
+    attention_scores: number
+    mlp: number
+    router: number
+    logits: number
+  }
+  forward_flops_per_token: number
+  backward_flops_per_token: number
+  recompute_flops_per_token: number
+  model_flops_per_token: number
+  hardware_flops_per_token: number
+  achieved_mfu: number
+  dataset_tokens?: number
+  flops_per_epoch?: number
+  time_per_epoch?: Record<'seconds' | 'minutes' | 'hours' | 'days', number>
+}
+
+// 混合专家参数与专家并行放置
+export interface MoEAnalysis {
+  num_experts: number
+  num_experts_per_tok: number
+  num_shared_experts: number
+  expert_intermediate_size: number
+  total_parameters: number
+  active_parameters: number
+  expert_parameters: number
+  active_ratio: number
+  expert_parallel: number
+  experts_per_gpu: number
+  expert_layers_per_gpu: number
+  dense_params_per_gpu: number
+  expert_params_per_gpu: number
+  weights_per_gpu_gb: number
+  all_to_all_s: number | null
+}
+
+// 通信开销与扩展效率分析
+export interface CommunicationAnalysis {
+  gpu: string
+  num_gpus: number
+  data_parallel: number
+  links: Record<'tensor_parallel' | 'context_parallel' | 'expert_parallel' | 'data_parallel' | 'pipeline_parallel', 'nvlink' | 'pcie' | 'network'>
+  tensor_parallel_algorithm: 'ring' | 'tree' | null
+  data_parallel_algorithm: 'ring' | 'tree' | null
+  compute_time_s: number
+  dequantize_time_s: number
+  tensor_parallel_comm_s: number
+  pipeline_parallel_comm_s: number
+  context_parallel_comm_s: number
+  context_parallel_exposed_s: number
+  expert_parallel?: number
+  expert_parallel_comm_s?: number
+  data_parallel_comm_s: number
+  data_parallel_exposed_s: number
+  offload: OffloadStepCost
+  step_time_s: number
+  tokens_per_step: number
+  tokens_per_second: number
+  scaling_efficiency: number
+  scaling_curve: Array<{
+    num_gpus: number
+    data_parallel: number
+    step_time_s: number
+    tokens_per_second: number
+    data_parallel_exposed_s: number
+    offload_exposed_s: number
+    scaling_efficiency: number
+  }>
+}
+
+// 流水线时间线事件（NDJSON每行一条）
+export type PipelineTimelineEvent =
+  | {
+      type: 'op'
+      stage: number
+      op: 'F' | 'B'
+      microbatch: number
+      chunk: number
+      start: number
+      end: number
+      memory_gb: number
+    }
+  | ({ type: 'summary' } & PipelineScheduleSummary)
+
 export interface TrainingConfig {
   training_methods: Array<{
     id: string
@@ -179,11 +597,46 @@ export interface TrainingConfig {
     name: string
     description: string
   }>
+  optimizer_state_dtypes?: Array<{
+    id: string
+    name: string
+    description: string
+  }>
   deepspeed_stages: Array<{
     id: string
     name: string
     description: string
   }>
+  offload_devices?: Array<{
+    id: string
+    name: string
+    description: string
+  }>
+  pipeline_schedules?: Array<{
+    id: string
+    name: string
+    description: string
+  }>
+  activation_recomputations?: Array<{
+    id: string
+    name: string
+    description: string
+  }>
+  acceleration_methods?: Array<{
+    id: string
+    name: string
+    description: string
+  }>
+  cross_entropy_methods?: Array<{
+    id: string
+    name: string
+    description: string
+  }>
+  context_parallel_methods?: Array<{
+    id: string
+    name: string
+    description: string
+  }>
 }
 
 export interface InferenceConfig {
@@ -198,6 +651,11 @@ export interface InferenceConfig {
     name: string
     description: string
   }>
+  kv_cache_dtypes?: Array<{
+    id: string
+    name: string
+    description: string
+  }>
 }
 
 // API响应格式